@@ -3,8 +3,12 @@
 
 核心战斗逻辑实现
 """
+import logging
+import time
 import uuid
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
 
 from .ai_opponent import OpponentAI
 from .dice import DiceRoller, d20
@@ -22,6 +26,7 @@ from .models.combatant import Combatant, CombatantType, StatusEffect
 from .models.combat_result import CombatPenalty, CombatResult, CombatRewards
 from .models.combat_session import CombatEndReason, CombatSession, CombatState
 from .rules import ITEM_EFFECTS, calculate_hit_chance, get_defeat_penalty, get_flee_difficulty
+from .session_snapshot import CombatSnapshotStore
 from .spatial import DistanceBand, SimpleDistanceProvider
 from .spells import SPELL_TEMPLATES
 
@@ -39,6 +44,11 @@ ACTION_COSTS = {
     ActionType.OFFHAND_ATTACK: "bonus",
 }
 
+logger = logging.getLogger(__name__)
+
+# 驱逐扫描的最小间隔（秒），避免每次查找都遍历全部会话
+_SWEEP_INTERVAL_SECONDS = 10.0
+
 RANGE_BANDS = [DistanceBand.ENGAGED, DistanceBand.CLOSE, DistanceBand.NEAR, DistanceBand.FAR, DistanceBand.DISTANT]
 
 
@@ -51,11 +61,26 @@ class CombatEngine:
     - 执行行动
     - 管理回合流程
     - 判定胜负
+    - 会话生命周期：结束的会话按 TTL 驱逐；配置了快照存储时，
+      进行中的会话在回合边界落盘，内存中缺失时按 combat_id 惰性恢复
     """
 
-    def __init__(self):
-        """初始化引擎"""
+    def __init__(self, snapshot_store: Optional[CombatSnapshotStore] = None):
+        """
+        初始化引擎
+
+        Args:
+            snapshot_store: 会话快照存储（可选）；为 None 时会话只保存在内存中
+        """
         self.sessions: dict[str, CombatSession] = {}
+        self.snapshot_store = snapshot_store
+        self._expires_at: Dict[str, float] = {}  # 已结束会话 -> 驱逐时间（monotonic）
+        self._last_access: Dict[str, float] = {}
+        self._next_sweep = 0.0
+        if snapshot_store:
+            pruned = snapshot_store.prune(settings.combat_snapshot_max_age_seconds)
+            if pruned:
+                logger.info("清理过期战斗快照 %d 个", pruned)
 
     # ============================================
     # 公共接口
@@ -157,7 +182,10 @@ class CombatEngine:
             self._run_enemy_turns_until_player(session)
 
         # 9. 保存会话
+        self._evict_expired(time.monotonic())
         self.sessions[combat_id] = session
+        self._last_access[combat_id] = time.monotonic()
+        self._after_update(session, None)
 
         return session
 
@@ -184,7 +212,7 @@ class CombatEngine:
         self, combat_id: str, actor_id: str
     ) -> List[ActionOption]:
         """获取指定角色当前可用行动选项"""
-        session = self.sessions.get(combat_id)
+        session = self._get_session(combat_id)
         if not session:
             return []
 
@@ -429,7 +457,7 @@ class CombatEngine:
         self, combat_id: str, actor_id: str, action_id: str
     ) -> ActionResult:
         """指定角色执行行动（用于多LLM协作）"""
-        session = self.sessions.get(combat_id)
+        session = self._get_session(combat_id)
         if not session:
             raise ValueError(f"Combat session not found: {combat_id}")
 
@@ -458,10 +486,18 @@ class CombatEngine:
         5. 如果未结束，推进回合
         6. 如果下一个是敌人，自动执行敌人回合
         """
-        session = self.sessions.get(combat_id)
+        session = self._get_session(combat_id)
         if not session:
             raise ValueError(f"Combat session not found: {combat_id}")
 
+        turn_marker = self._turn_marker(session)
+        try:
+            return self._apply_action(session, action_id)
+        finally:
+            self._after_update(session, turn_marker)
+
+    def _apply_action(self, session: CombatSession, action_id: str) -> ActionResult:
+        """在已解析的会话上执行行动（execute_action 的主体）"""
         current_actor = session.get_current_actor()
         if not current_actor:
             raise ValueError("No current actor")
@@ -604,7 +640,7 @@ class CombatEngine:
 
     def get_combat_state(self, combat_id: str) -> Optional[CombatSession]:
         """获取战斗状态"""
-        return self.sessions.get(combat_id)
+        return self._get_session(combat_id)
 
     def get_combat_result(self, combat_id: str) -> CombatResult:
         """
@@ -622,7 +658,7 @@ class CombatEngine:
         3. 计算奖励/惩罚
         4. 返回结果
         """
-        session = self.sessions.get(combat_id)
+        session = self._get_session(combat_id)
         if not session:
             raise ValueError(f"Combat session not found: {combat_id}")
 
@@ -669,6 +705,96 @@ class CombatEngine:
             total_rounds=session.current_round,
         )
 
+    def release_session(self, combat_id: str, delay: float = 0.0) -> None:
+        """
+        释放战斗会话
+
+        Args:
+            combat_id: 战斗ID
+            delay: 宽限秒数；0 表示立即从内存与快照存储中移除
+        """
+        if delay <= 0:
+            self._drop_session(combat_id)
+            return
+        deadline = time.monotonic() + delay
+        self._expires_at[combat_id] = min(self._expires_at.get(combat_id, deadline), deadline)
+
+    # ============================================
+    # 私有方法 - 会话生命周期
+    # ============================================
+
+    def _get_session(self, combat_id: str) -> Optional[CombatSession]:
+        """查找会话：先驱逐过期会话，内存中没有时从快照恢复"""
+        now = time.monotonic()
+        self._evict_expired(now)
+        session = self.sessions.get(combat_id)
+        if session is None and self.snapshot_store:
+            session = self.snapshot_store.load(combat_id)
+            if session is not None:
+                self.sessions[combat_id] = session
+                if session.state == CombatState.ENDED:
+                    self._expires_at[combat_id] = now + settings.combat_ended_ttl_seconds
+                logger.info("从快照恢复战斗会话 %s", combat_id)
+        if session is not None:
+            self._last_access[combat_id] = now
+        return session
+
+    def _turn_marker(self, session: CombatSession) -> tuple:
+        return (session.state, session.current_round, session.current_turn_index)
+
+    def _after_update(self, session: CombatSession, turn_marker: Optional[tuple]):
+        """行动后：战斗结束则开始计时驱逐；跨过回合边界则写快照"""
+        if turn_marker == self._turn_marker(session):
+            return
+        if session.state == CombatState.ENDED and session.combat_id not in self._expires_at:
+            self._expires_at[session.combat_id] = time.monotonic() + settings.combat_ended_ttl_seconds
+        self._save_snapshot(session)
+
+    def _save_snapshot(self, session: CombatSession) -> bool:
+        """写入会话快照；未配置存储或写入失败时返回 False"""
+        if not self.snapshot_store:
+            return False
+        try:
+            self.snapshot_store.save(session)
+        except (OSError, TypeError, ValueError) as exc:
+            logger.warning("写入战斗快照失败 %s: %s", session.combat_id, exc)
+            return False
+        return True
+
+    def _drop_session(self, combat_id: str):
+        self.sessions.pop(combat_id, None)
+        self._expires_at.pop(combat_id, None)
+        self._last_access.pop(combat_id, None)
+        if self.snapshot_store:
+            self.snapshot_store.delete(combat_id)
+
+    def _evict_expired(self, now: float):
+        """
+        驱逐过期会话
+
+        - 已结束且超过期限的会话：从内存与快照存储中移除
+        - 长时间无访问的进行中会话：有快照存储时落盘后移出内存，下次查找再恢复
+        """
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + _SWEEP_INTERVAL_SECONDS
+
+        for combat_id, deadline in list(self._expires_at.items()):
+            if deadline <= now:
+                self._drop_session(combat_id)
+
+        if not self.snapshot_store:
+            return
+        idle_before = now - settings.combat_idle_ttl_seconds
+        for combat_id, last_access in list(self._last_access.items()):
+            if last_access > idle_before or combat_id in self._expires_at:
+                continue
+            session = self.sessions.get(combat_id)
+            if session is not None and not self._save_snapshot(session):
+                continue  # 落盘失败：保留在内存中，下次扫描再试
+            self.sessions.pop(combat_id, None)
+            self._last_access.pop(combat_id, None)
+
     # ============================================
     # 私有方法 - 行动执行
     # ============================================
@@ -4,6 +4,7 @@
 暴露标准 MCP 工具接口
 """
 import argparse
+import asyncio
 import json
 import os
 from typing import Any, Dict, List, Optional
@@ -11,6 +12,8 @@ from typing import Any, Dict, List, Optional
 from mcp.server.fastmcp import FastMCP
 
 from .combat_engine import CombatEngine
+from .encounter_simulator import DEFAULT_MAX_ROUNDS, DEFAULT_TRIALS
+from .encounter_simulator import simulate_encounter as run_encounter_simulation
 from .enemy_registry import (
     list_templates,
     load_world_templates,
@@ -20,6 +23,8 @@ from .enemy_registry import (
 from .data_repository import CombatDataRepository
 from .template_mapper import skill_to_spell_template, slugify
 from .models.combat_session import CombatState
+from .session_snapshot import CombatSnapshotStore
+from app.config import settings
 from app.models.event import Event, EventContent, EventType, GMEventIngestRequest
 from app.models.game import CombatContext
 from app.services.game_session_store import GameSessionStore
@@ -41,6 +46,7 @@ combat_mcp = FastMCP(
 - 战斗奖励/惩罚
 
 使用流程：
+0. simulate_encounter - （可选）开战前批量模拟，估算胜率与损耗
 1. start_combat - 初始化战斗
 2. get_available_actions - 获取玩家可用行动
 3. execute_action - 执行玩家选择的行动
@@ -49,8 +55,10 @@ combat_mcp = FastMCP(
 """,
 )
 
-# 全局战斗引擎实例
-combat_engine = CombatEngine()
+# 全局战斗引擎实例（进行中的战斗落盘，重启后按 combat_id 恢复）
+combat_engine = CombatEngine(
+    snapshot_store=CombatSnapshotStore() if settings.combat_snapshot_enabled else None,
+)
 session_store = GameSessionStore()
 event_service = AdminEventService()
 
@@ -347,6 +355,7 @@ async def resolve_combat_session(
 
     response = await event_service.ingest_event(world_id, dispatch_request)
     await session_store.clear_combat(world_id, session_id)
+    combat_engine.release_session(combat_id)
 
     return json.dumps(
         {
@@ -684,6 +693,8 @@ async def get_combat_result(combat_id: str) -> str:
     """
     try:
         result = combat_engine.get_combat_result(combat_id)
+        # 结果已被取走：只保留一段宽限期供 resolve_combat_session 使用
+        combat_engine.release_session(combat_id, delay=settings.combat_result_grace_seconds)
         return json.dumps(result.to_dict(), ensure_ascii=False, indent=2, default=str)
     except ValueError as exc:
         return json.dumps({"error": str(exc)})
@@ -752,6 +763,47 @@ async def list_enemy_templates(
     )
 
 
+@combat_mcp.tool()
+async def simulate_encounter(
+    enemies: List[Dict[str, Any]],
+    player_state: Dict[str, Any],
+    allies: Optional[List[Dict[str, Any]]] = None,
+    world_id: Optional[str] = None,
+    template_version: Optional[str] = None,
+    trials: int = DEFAULT_TRIALS,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    seed: Optional[int] = None,
+) -> str:
+    """
+    蒙特卡洛模拟遭遇战（不创建战斗会话）
+
+    参数与 start_combat 相同，批量模拟 trials 场战斗，返回胜率、期望回合数、
+    期望 HP 损失等，用于开战前调整敌人数量与等级。
+    """
+    normalized_enemies = _normalize_enemy_specs(
+        enemies,
+        world_id=world_id,
+        template_version=template_version,
+    )
+    if world_id:
+        load_world_templates(world_id, template_version=template_version)
+    try:
+        result = await asyncio.to_thread(
+            run_encounter_simulation,
+            normalized_enemies,
+            player_state,
+            allies,
+            world_id=world_id,
+            template_version=template_version,
+            trials=trials,
+            max_rounds=max_rounds,
+            seed=seed,
+        )
+    except (KeyError, ValueError) as exc:
+        return json.dumps({"error": str(exc)}, ensure_ascii=False)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+
 # ============================================
 # 服务器启动
 # ============================================
@@ -28,7 +28,25 @@ class DiceRoller:
             >>> roll("2d6+3")
             (11, [4, 4])  # 4+4+3=11
         """
-        # 解析骰子记号
+        num_dice, die_size, modifier = DiceRoller.parse(dice_notation)
+
+        # 投掷
+        rolls = [random.randint(1, die_size) for _ in range(num_dice)]
+        total = sum(rolls) + modifier
+
+        return total, rolls
+
+    @staticmethod
+    def parse(dice_notation: str) -> Tuple[int, int, int]:
+        """
+        解析骰子记号
+
+        Args:
+            dice_notation: 骰子记号（如 "3d8+2"）
+
+        Returns:
+            Tuple[int, int, int]: (骰子数, 骰子面数, 修正值)
+        """
         pattern = r"(\d+)d(\d+)([+-]\d+)?"
         match = re.match(pattern, dice_notation.lower().replace(" ", ""))
 
@@ -38,12 +56,7 @@ class DiceRoller:
         num_dice = int(match.group(1))
         die_size = int(match.group(2))
         modifier = int(match.group(3)) if match.group(3) else 0
-
-        # 投掷
-        rolls = [random.randint(1, die_size) for _ in range(num_dice)]
-        total = sum(rolls) + modifier
-
-        return total, rolls
+        return num_dice, die_size, modifier
 
     @staticmethod
     def roll_single(die_size: int) -> int:
@@ -0,0 +1,362 @@
+"""
+遭遇战蒙特卡洛模拟
+
+在 NumPy 数组上批量模拟成千上万场战斗，供 GM 在 start_combat 之前估算遭遇难度。
+
+战斗单位由 CombatEngine 的同一套构造逻辑生成（敌人模板、等级成长、覆盖值），
+规则与引擎一致：
+- 先攻 d20 + 加值，降序稳定排序，死亡单位跳过
+- 命中 d20 + 攻击加值 >= AC，骰出 20 时伤害骰翻倍
+- 抗性 / 易伤 / 免疫
+- 敌人按 AI 性格决策：低血量逃跑（成功则战斗以 FLED 结束）、防御型低血量防御、
+  按偏好选择目标（最弱 / 最受伤 / 随机）
+
+玩家与队友采用固定策略：首个回合靠近敌人，之后集火当前 HP 最低的敌人，
+持有副手武器时追加副手攻击。敌人在队员靠近前无法攻击到该队员（与引擎的
+初始距离一致）。法术、物品与状态效果不在模拟范围内。回合数按实际经过的
+轮次统计。
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .combat_engine import CombatEngine
+from .dice import DiceRoller
+from .models.combatant import Combatant
+from .rules import AI_PERSONALITIES, FLEE_DC, calculate_hit_chance
+
+# 结果编码
+_ONGOING, _VICTORY, _DEFEAT, _FLED, _TIMEOUT = 0, 1, 2, 3, 4
+
+# 伤害修正编码（攻击者伤害类型 × 目标抗性）
+_NORMAL, _IMMUNE, _VULNERABLE, _RESISTANT = 0, 1, 2, 3
+
+# 敌人目标偏好
+_TARGET_RANDOM, _TARGET_WEAKEST, _TARGET_WOUNDED = 0, 1, 2
+
+DEFAULT_TRIALS = 2000
+MAX_TRIALS = 20000
+DEFAULT_MAX_ROUNDS = 50
+
+
+@dataclass
+class _Roster:
+    """参战单位的列式属性（下标 0 为玩家，其后队友、敌人）。"""
+
+    combatants: List[Combatant]
+    is_party: np.ndarray
+    hp: np.ndarray
+    max_hp: np.ndarray
+    ac: np.ndarray
+    attack_bonus: np.ndarray
+    initiative_bonus: np.ndarray
+    dice_num: np.ndarray
+    dice_size: np.ndarray
+    dice_mod: np.ndarray
+    damage_bonus: np.ndarray
+    has_offhand: np.ndarray
+    offhand_num: np.ndarray
+    offhand_size: np.ndarray
+    offhand_mod: np.ndarray
+    damage_kind: np.ndarray  # [attacker, target]
+    flee_threshold: np.ndarray
+    prefer_defend: np.ndarray
+    target_mode: np.ndarray
+
+
+def _build_roster(combatants: List[Combatant]) -> _Roster:
+    count = len(combatants)
+    main_dice = [DiceRoller.parse(c.damage_dice) for c in combatants]
+    offhand_dice = [
+        DiceRoller.parse(c.offhand_damage_dice) if c.offhand_damage_dice else (0, 1, 0)
+        for c in combatants
+    ]
+
+    damage_kind = np.full((count, count), _NORMAL, dtype=np.int8)
+    for i, attacker in enumerate(combatants):
+        for j, target in enumerate(combatants):
+            if attacker.damage_type in target.immunities:
+                damage_kind[i, j] = _IMMUNE
+            elif attacker.damage_type in target.vulnerabilities:
+                damage_kind[i, j] = _VULNERABLE
+            elif attacker.damage_type in target.resistances:
+                damage_kind[i, j] = _RESISTANT
+
+    personalities = [
+        AI_PERSONALITIES.get(c.ai_personality or "aggressive", AI_PERSONALITIES["aggressive"])
+        for c in combatants
+    ]
+    target_mode = [
+        _TARGET_WEAKEST if p.get("prefer_weaker_targets", False)
+        else _TARGET_WOUNDED if p.get("prefer_wounded_targets", False)
+        else _TARGET_RANDOM
+        for p in personalities
+    ]
+
+    def column(values, dtype=np.int64) -> np.ndarray:
+        return np.asarray(list(values), dtype=dtype)
+
+    is_party = column((not c.is_enemy() for c in combatants), dtype=bool)
+    return _Roster(
+        combatants=combatants,
+        is_party=is_party,
+        hp=column(c.hp for c in combatants),
+        max_hp=column(c.max_hp for c in combatants),
+        ac=column(c.ac for c in combatants),
+        attack_bonus=column(c.attack_bonus for c in combatants),
+        initiative_bonus=column(c.initiative_bonus for c in combatants),
+        dice_num=column(d[0] for d in main_dice),
+        dice_size=column(max(1, d[1]) for d in main_dice),
+        dice_mod=column(d[2] for d in main_dice),
+        damage_bonus=column(c.damage_bonus for c in combatants),
+        has_offhand=column((bool(c.offhand_damage_dice) for c in combatants), dtype=bool),
+        offhand_num=column(d[0] for d in offhand_dice),
+        offhand_size=column(max(1, d[1]) for d in offhand_dice),
+        offhand_mod=column(d[2] + c.offhand_damage_bonus for d, c in zip(offhand_dice, combatants)),
+        damage_kind=damage_kind,
+        # 队员不参与 AI 决策
+        flee_threshold=np.where(
+            is_party, 0.0, column((p.get("flee_threshold", 0.0) for p in personalities), dtype=float),
+        ),
+        prefer_defend=~is_party & column((p.get("prefer_defend", False) for p in personalities), dtype=bool),
+        target_mode=column(target_mode),
+    )
+
+
+class _Batch:
+    """N 场并行战斗的状态；每步只处理仍在进行的战斗（行下标子集）。"""
+
+    def __init__(self, roster: _Roster, trials: int, rng: np.random.Generator) -> None:
+        self.roster = roster
+        self.rng = rng
+        count = len(roster.combatants)
+        self.hp = np.tile(roster.hp, (trials, 1))
+        self.alive = self.hp > 0
+        # 队员是否已靠近敌人（敌人只能攻击已靠近的队员）
+        self.engaged = np.zeros((trials, count), dtype=bool)
+        self.result = np.full(trials, _ONGOING, dtype=np.int8)
+        self.rounds = np.zeros(trials, dtype=np.int64)
+        self._max_dice = int(max(roster.dice_num.max(), roster.offhand_num.max(), 1))
+        self._no_hp = np.iinfo(self.hp.dtype).max
+
+    def d20(self, n: int) -> np.ndarray:
+        return self.rng.integers(1, 21, size=n)
+
+    def _roll_dice(self, num: np.ndarray, size: np.ndarray) -> np.ndarray:
+        faces = self.rng.integers(1, size[:, None] + 1, size=(len(num), self._max_dice))
+        return np.where(np.arange(self._max_dice) < num[:, None], faces, 0).sum(axis=1)
+
+    def _weakest(self, rows: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        return np.where(candidates, self.hp[rows], self._no_hp).argmin(axis=1)
+
+    def attack(self, rows: np.ndarray, attacker: np.ndarray, target: np.ndarray, offhand: bool = False) -> None:
+        """对 rows 中的战斗各执行一次近战攻击。"""
+        roster = self.roster
+        roll = self.d20(len(rows))
+        is_hit = roll + roster.attack_bonus[attacker] >= roster.ac[target]
+        if not is_hit.any():
+            return
+        rows, attacker, target, roll = rows[is_hit], attacker[is_hit], target[is_hit], roll[is_hit]
+        if offhand:
+            damage = self._roll_dice(roster.offhand_num[attacker], roster.offhand_size[attacker])
+            damage = damage + roster.offhand_mod[attacker]
+        else:
+            num, size, mod = roster.dice_num[attacker], roster.dice_size[attacker], roster.dice_mod[attacker]
+            damage = self._roll_dice(num, size) + mod
+            critical = roll == 20
+            if critical.any():
+                damage[critical] += self._roll_dice(num[critical], size[critical]) + mod[critical]
+            damage = damage + roster.damage_bonus[attacker]
+
+        kind = roster.damage_kind[attacker, target]
+        damage = np.where(kind == _IMMUNE, 0, damage)
+        damage = np.where(kind == _VULNERABLE, damage * 2, damage)
+        damage = np.where(kind == _RESISTANT, np.maximum(1, damage // 2), damage)
+        damage = np.clip(damage, 0, None)
+
+        self.hp[rows, target] -= np.minimum(damage, self.hp[rows, target])
+        self.alive[rows, target] = self.hp[rows, target] > 0
+
+    def party_turn(self, rows: np.ndarray, actor: np.ndarray) -> None:
+        enemy_cols = ~self.roster.is_party
+        self.engaged[rows, actor] = True
+        self.attack(rows, actor, self._weakest(rows, self.alive[rows] & enemy_cols))
+        offhand = self.roster.has_offhand[actor]
+        if offhand.any():
+            rows, actor = rows[offhand], actor[offhand]
+            enemies = self.alive[rows] & enemy_cols
+            remaining = enemies.any(axis=1)
+            self.attack(rows[remaining], actor[remaining], self._weakest(rows[remaining], enemies[remaining]), offhand=True)
+
+    def enemy_turn(self, rows: np.ndarray, actor: np.ndarray, rnd: int) -> None:
+        roster = self.roster
+        ratio = self.hp[rows, actor] / roster.max_hp[actor]
+        threshold = roster.flee_threshold[actor]
+
+        # 1. 逃跑：HP 低于阈值时 50% 尝试，d20 >= DC 则战斗结束
+        flee = (threshold > 0) & (ratio < threshold) & (self.rng.random(len(rows)) < 0.5)
+        fled = flee & (self.d20(len(rows)) >= FLEE_DC)
+        self.finish(rows[fled], _FLED, rnd)
+
+        # 2. 防御：防御型 HP 低于 50% 时 30% 防御（与引擎一致，防御姿态在本回合结束时过期）
+        defend = roster.prefer_defend[actor] & (ratio < 0.5) & (self.rng.random(len(rows)) < 0.3)
+
+        # 3. 攻击：按性格选择目标
+        attacking = ~flee & ~defend
+        rows, actor = rows[attacking], actor[attacking]
+        if not len(rows):
+            return
+        party = self.alive[rows] & roster.is_party
+        mode = roster.target_mode[actor]
+        target = np.empty(len(rows), dtype=np.int64)
+
+        weakest = mode == _TARGET_WEAKEST
+        target[weakest] = self._weakest(rows[weakest], party[weakest])
+        wounded = (self.hp[rows] < roster.max_hp) & party
+        by_wound = (mode == _TARGET_WOUNDED) & wounded.any(axis=1)
+        if by_wound.any():
+            ratios = self.hp[rows[by_wound]] / roster.max_hp
+            target[by_wound] = np.where(wounded[by_wound], ratios, np.inf).argmin(axis=1)
+        at_random = ~weakest & ~by_wound
+        if at_random.any():
+            keys = self.rng.random((int(at_random.sum()), party.shape[1]))
+            target[at_random] = np.where(party[at_random], keys, -1.0).argmax(axis=1)
+
+        # 目标尚未靠近时攻击落空
+        in_range = self.engaged[rows, target]
+        self.attack(rows[in_range], actor[in_range], target[in_range])
+
+    def finish(self, rows: np.ndarray, outcome: int, rnd: int) -> None:
+        rows = rows[self.result[rows] == _ONGOING]
+        self.result[rows] = outcome
+        self.rounds[rows] = rnd
+
+    def check_end(self, rows: np.ndarray, rnd: int) -> None:
+        alive = self.alive[rows]
+        self.finish(rows[~alive[:, 0]], _DEFEAT, rnd)
+        self.finish(rows[~(alive & ~self.roster.is_party).any(axis=1)], _VICTORY, rnd)
+
+
+def _run(roster: _Roster, trials: int, max_rounds: int, rng: np.random.Generator) -> _Batch:
+    batch = _Batch(roster, trials, rng)
+    # 先攻：d20 + 加值，降序稳定排序（同值保持参战顺序）
+    initiative = rng.integers(1, 21, size=batch.hp.shape) + roster.initiative_bonus
+    order = np.argsort(-initiative, axis=1, kind="stable")
+
+    live = np.arange(trials)
+    for rnd in range(1, max_rounds + 1):
+        for slot in range(order.shape[1]):
+            actor = order[live, slot]
+            acting = batch.alive[live, actor]
+            rows, actor = live[acting], actor[acting]
+            party_actor = roster.is_party[actor]
+            if party_actor.any():
+                batch.party_turn(rows[party_actor], actor[party_actor])
+            if not party_actor.all():
+                batch.enemy_turn(rows[~party_actor], actor[~party_actor], rnd)
+            batch.check_end(rows, rnd)
+            live = live[batch.result[live] == _ONGOING]
+            if not len(live):
+                return batch
+    batch.finish(live, _TIMEOUT, max_rounds)
+    return batch
+
+
+def simulate_encounter(
+    enemies: List[dict],
+    player_state: dict,
+    allies: Optional[List[dict]] = None,
+    *,
+    world_id: Optional[str] = None,
+    template_version: Optional[str] = None,
+    trials: int = DEFAULT_TRIALS,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    批量模拟遭遇战
+
+    Args:
+        enemies: 敌人列表（与 CombatEngine.start_combat 相同）
+        player_state: 玩家战斗状态
+        allies: 队友列表（可选）
+        world_id: 世界ID（用于世界敌人模板）
+        template_version: 模板版本
+        trials: 模拟场数
+        max_rounds: 单场最大回合数，超出记为超时
+        seed: 随机种子（可选，便于复现）
+
+    Returns:
+        Dict: 胜率、期望回合数、期望 HP 损失等统计
+    """
+    started = time.perf_counter()
+    trials = max(1, min(int(trials), MAX_TRIALS))
+    max_rounds = max(1, int(max_rounds))
+
+    engine = CombatEngine()
+    combatants = [engine._create_player_combatant(player_state)]
+    for index, ally_state in enumerate(allies or []):
+        combatants.append(engine._create_ally_combatant(ally_state, index=index + 1))
+    for index, enemy_data in enumerate(enemies):
+        combatants.append(
+            engine._create_enemy_combatant(
+                enemy_data,
+                index=index + 1,
+                world_id=world_id,
+                template_version=template_version,
+            )
+        )
+    if not any(c.is_enemy() for c in combatants):
+        raise ValueError("At least one enemy is required")
+
+    roster = _build_roster(combatants)
+    batch = _run(roster, trials, max_rounds, np.random.default_rng(seed))
+
+    def rate(outcome: int) -> float:
+        return round(float((batch.result == outcome).mean()), 4)
+
+    hp_loss = roster.hp - batch.hp
+    victories = batch.result == _VICTORY
+    party = [
+        {
+            "id": c.id,
+            "name": c.name,
+            "hp": int(c.hp),
+            "max_hp": int(c.max_hp),
+            "expected_hp_loss": round(float(hp_loss[:, i].mean()), 2),
+            "death_rate": round(float((~batch.alive[:, i]).mean()), 4),
+            "hit_chance": {
+                e.id: calculate_hit_chance(c.attack_bonus, e.ac) for e in combatants if e.is_enemy()
+            },
+        }
+        for i, c in enumerate(combatants) if not c.is_enemy()
+    ]
+    enemy_rows = [
+        {
+            "id": c.id,
+            "name": c.name,
+            "max_hp": int(c.max_hp),
+            "ac": int(c.ac),
+            "ai_personality": c.ai_personality,
+            "kill_rate": round(float((~batch.alive[:, i]).mean()), 4),
+            "hit_chance_vs_player": calculate_hit_chance(c.attack_bonus, combatants[0].ac),
+        }
+        for i, c in enumerate(combatants) if c.is_enemy()
+    ]
+
+    return {
+        "trials": trials,
+        "win_rate": rate(_VICTORY),
+        "defeat_rate": rate(_DEFEAT),
+        "fled_rate": rate(_FLED),
+        "timeout_rate": rate(_TIMEOUT),
+        "expected_rounds": round(float(batch.rounds.mean()), 2),
+        "expected_rounds_to_win": round(float(batch.rounds[victories].mean()), 2) if victories.any() else None,
+        "expected_hp_loss": party[0]["expected_hp_loss"],
+        "expected_party_hp_loss": round(float(hp_loss[:, roster.is_party].sum(axis=1).mean()), 2),
+        "party": party,
+        "enemies": enemy_rows,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
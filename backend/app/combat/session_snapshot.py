@@ -0,0 +1,200 @@
+"""战斗会话快照 — 进行中的战斗在回合边界落盘，MCP 重启后按 combat_id 惰性恢复。
+
+编码与原子读写与世界快照共用 ``app.utils.snapshot_codec``。event_sink 等
+运行时回调不持久化，恢复后由调用方重新挂载。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import asdict, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.snapshot_codec import SNAPSHOT_SUFFIX, read_payload, safe_file_name, write_atomic
+
+from .models.combat_session import (
+    CombatEndReason,
+    CombatLogEntry,
+    CombatLogEvent,
+    CombatSession,
+    CombatState,
+    TurnRequest,
+)
+from .models.combatant import Combatant, CombatantType, StatusEffect, StatusEffectInstance
+from .spatial import DistanceBand, SimpleDistanceProvider
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+_COMBATANT_FIELDS = {f.name for f in fields(Combatant)}
+
+
+def _parse_time(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+# ============================================
+# 会话 <-> 字典
+# ============================================
+
+
+def dump_session(session: CombatSession) -> Dict[str, Any]:
+    """把战斗会话转换为可编码的字典。"""
+    spatial = session.spatial
+    distances: List[List[str]] = []
+    if isinstance(spatial, SimpleDistanceProvider):
+        distances = [[a, b, band.value] for (a, b), band in spatial.distance_map.items()]
+    return {
+        "combat_id": session.combat_id,
+        "state": session.state.value,
+        "combatants": [asdict(combatant) for combatant in session.combatants],
+        "turn_order": list(session.turn_order),
+        "current_turn_index": session.current_turn_index,
+        "current_round": session.current_round,
+        "environment": session.environment,
+        "distances": distances,
+        "combat_log": [
+            [entry.round, entry.actor_id, entry.message, entry.timestamp.isoformat()]
+            for entry in session.combat_log
+        ],
+        "event_log": [event.to_dict() for event in session.event_log],
+        "event_seq": session.event_seq,
+        "turn_requests": [request.to_dict() for request in session.turn_requests],
+        "turn_request_seq": session.turn_request_seq,
+        "turn_actor_id": session.turn_actor_id,
+        "end_reason": session.end_reason.value if session.end_reason else None,
+    }
+
+
+def _load_combatant(data: Dict[str, Any]) -> Combatant:
+    values = {key: value for key, value in data.items() if key in _COMBATANT_FIELDS}
+    values["combatant_type"] = CombatantType(values["combatant_type"])
+    values["status_effects"] = [
+        StatusEffectInstance(
+            effect=StatusEffect(item["effect"]),
+            duration=int(item["duration"]),
+            source=item.get("source", ""),
+        )
+        for item in values.get("status_effects") or []
+    ]
+    # JSON 会把 int 键转成字符串
+    values["spell_slots"] = {int(k): int(v) for k, v in (values.get("spell_slots") or {}).items()}
+    return Combatant(**values)
+
+
+def load_session(data: Dict[str, Any]) -> CombatSession:
+    """从 dump_session 的结果重建战斗会话。"""
+    spatial = SimpleDistanceProvider()
+    for a, b, band in data.get("distances") or []:
+        spatial.set_distance(a, b, DistanceBand(band))
+    end_reason = data.get("end_reason")
+    return CombatSession(
+        combat_id=data["combat_id"],
+        state=CombatState(data["state"]),
+        combatants=[_load_combatant(item) for item in data.get("combatants") or []],
+        turn_order=list(data.get("turn_order") or []),
+        current_turn_index=int(data.get("current_turn_index", 0)),
+        current_round=int(data.get("current_round", 1)),
+        environment=data.get("environment"),
+        spatial=spatial,
+        combat_log=[
+            CombatLogEntry(round=r, actor_id=actor, message=message, timestamp=_parse_time(ts))
+            for r, actor, message, ts in data.get("combat_log") or []
+        ],
+        event_log=[
+            CombatLogEvent(
+                seq=event["seq"],
+                round=event["round"],
+                actor_id=event["actor"],
+                event_type=event["event_type"],
+                message=event["message"],
+                timestamp=_parse_time(event.get("timestamp")),
+                action_id=event.get("action_id"),
+                payload=event.get("payload"),
+            )
+            for event in data.get("event_log") or []
+        ],
+        event_seq=int(data.get("event_seq", 0)),
+        turn_requests=[
+            TurnRequest(
+                seq=request["seq"],
+                round=request["round"],
+                actor_id=request["actor"],
+                status=request.get("status", "pending"),
+                created_at=_parse_time(request.get("created_at")),
+            )
+            for request in data.get("turn_requests") or []
+        ],
+        turn_request_seq=int(data.get("turn_request_seq", 0)),
+        turn_actor_id=data.get("turn_actor_id"),
+        end_reason=CombatEndReason(end_reason) if end_reason else None,
+    )
+
+
+# ============================================
+# 本地存储
+# ============================================
+
+
+class CombatSnapshotStore:
+    """按 combat_id 存取战斗会话快照的本地目录。"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or settings.combat_snapshot_dir)
+
+    def path_for(self, combat_id: str) -> Path:
+        name = safe_file_name(combat_id)
+        return self.directory / f"{name}.combat.{SNAPSHOT_SUFFIX}"
+
+    def save(self, session: CombatSession) -> Path:
+        """原子写入会话快照。"""
+        payload = {"format": SNAPSHOT_FORMAT, "session": dump_session(session)}
+        return write_atomic(self.path_for(session.combat_id), payload)
+
+    def load(self, combat_id: str) -> Optional[CombatSession]:
+        """读取会话快照；不存在、损坏或格式不符时返回 None。"""
+        path = self.path_for(combat_id)
+        payload = read_payload(path, "战斗快照")
+        if payload is None:
+            return None
+        if not isinstance(payload, dict) or payload.get("format") != SNAPSHOT_FORMAT:
+            logger.info("忽略不兼容的战斗快照 %s", path)
+            return None
+        try:
+            session = load_session(payload["session"])
+        except Exception as exc:
+            logger.warning("战斗快照损坏 %s: %s", path, exc)
+            return None
+        if session.combat_id != combat_id:
+            return None
+        return session
+
+    def delete(self, combat_id: str) -> None:
+        try:
+            self.path_for(combat_id).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning("删除战斗快照失败 %s: %s", combat_id, exc)
+
+    def prune(self, max_age_seconds: float) -> int:
+        """删除超过 max_age_seconds 未更新的快照（被遗弃的战斗），返回删除数量。"""
+        if not self.directory.is_dir():
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for path in self.directory.glob(f"*.combat.{SNAPSHOT_SUFFIX}"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
@@ -85,6 +85,10 @@ class Settings(BaseModel):
         "true",
         "yes",
     )
+    # 每个 MCP 服务的会话数（stdio 每个会话一个子进程；HTTP 固定单会话复用）与单会话并发上限
+    mcp_tools_pool_size: int = int(os.getenv("MCP_TOOLS_POOL_SIZE", "1"))
+    mcp_combat_pool_size: int = int(os.getenv("MCP_COMBAT_POOL_SIZE", "1"))
+    mcp_session_max_in_flight: int = int(os.getenv("MCP_SESSION_MAX_IN_FLIGHT", "8"))
     
     # 热记忆配置
     active_window_size: int = 20
@@ -107,16 +111,67 @@ class Settings(BaseModel):
     cloudflare_embedding_model: str = "@cf/baai/bge-base-en-v1.5"
 
     # NPC 实例池配置
-    instance_pool_max_instances: int = int(os.getenv("INSTANCE_POOL_MAX_INSTANCES", "20"))
+    instance_pool_max_instances: int = int(os.getenv("INSTANCE_POOL_MAX_INSTANCES", "200"))
     instance_pool_context_window_size: int = int(os.getenv("INSTANCE_POOL_CONTEXT_WINDOW_SIZE", "1000000"))
     instance_pool_graphize_threshold: float = float(os.getenv("INSTANCE_POOL_GRAPHIZE_THRESHOLD", "0.8"))
     instance_pool_keep_recent_tokens: int = int(os.getenv("INSTANCE_POOL_KEEP_RECENT_TOKENS", "50000"))
     instance_pool_evict_after_minutes: int = int(os.getenv("INSTANCE_POOL_EVICT_AFTER_MINUTES", "30"))
+    instance_pool_eviction_concurrency: int = int(os.getenv("INSTANCE_POOL_EVICTION_CONCURRENCY", "2"))
+    instance_pool_eviction_queue_max: int = int(os.getenv("INSTANCE_POOL_EVICTION_QUEUE_MAX", "32"))
+    # 实例池驻留预算（全部实例合计；0 表示不限制），淘汰按分段 LRU
+    instance_pool_token_budget: int = int(os.getenv("INSTANCE_POOL_TOKEN_BUDGET", "4000000"))
+    instance_pool_byte_budget_mb: int = int(os.getenv("INSTANCE_POOL_BYTE_BUDGET_MB", "512"))
+    instance_pool_protected_ratio: float = float(os.getenv("INSTANCE_POOL_PROTECTED_RATIO", "0.8"))
+
+    # 作用域图谱缓存（GraphStore.load_graph_v2 前置，进程内）
+    scope_graph_cache_enabled: bool = os.getenv("SCOPE_GRAPH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    scope_graph_cache_max_mb: int = int(os.getenv("SCOPE_GRAPH_CACHE_MAX_MB", "256"))
+    scope_graph_cache_ttl_seconds: float = float(os.getenv("SCOPE_GRAPH_CACHE_TTL_SECONDS", "600"))
+
+    # 图谱存储后端：firestore（默认）或 sqlite（单机部署 / 压测 / 基准）
+    graph_store_backend: Literal["firestore", "sqlite"] = os.getenv("GRAPH_STORE_BACKEND", "firestore")
+    graph_store_sqlite_path: str = os.getenv("GRAPH_STORE_SQLITE_PATH", "./graph_store.sqlite3")
+
+    # Firestore 阻塞调用线程池（事件循环外执行，按操作统计延迟）
+    firestore_io_offload_enabled: bool = os.getenv("FIRESTORE_IO_OFFLOAD_ENABLED", "true").lower() in ("1", "true", "yes")
+    firestore_io_max_workers: int = int(os.getenv("FIRESTORE_IO_MAX_WORKERS", "16"))
+    # load_local_subgraph 每跳并发的边查询数上限
+    graph_subgraph_query_fanout: int = int(os.getenv("GRAPH_SUBGRAPH_QUERY_FANOUT", "8"))
+    # 批量写入：并发在途的 batch commit 数与单批重试次数
+    graph_bulk_commit_concurrency: int = int(os.getenv("GRAPH_BULK_COMMIT_CONCURRENCY", "4"))
+    graph_bulk_commit_max_retries: int = int(os.getenv("GRAPH_BULK_COMMIT_MAX_RETRIES", "3"))
+
+    # 召回合并图（会话级，增量维护）
+    recall_merged_view_max: int = int(os.getenv("RECALL_MERGED_VIEW_MAX", "64"))
+    # 召回结果缓存条目上限（0 关闭）
+    recall_activation_cache_max: int = int(os.getenv("RECALL_ACTIVATION_CACHE_MAX", "256"))
+
+    # WorldInstance 本地快照：冷启动先从快照恢复，后台按世界数据版本戳刷新
+    world_snapshot_enabled: bool = os.getenv("WORLD_SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+    world_snapshot_dir: str = os.getenv("WORLD_SNAPSHOT_DIR", "./.world_snapshots")
+
+    # 战斗 MCP 会话：结束后按 TTL 驱逐（取过结果后缩短为宽限期），进行中的战斗在回合边界落盘
+    combat_ended_ttl_seconds: float = float(os.getenv("COMBAT_ENDED_TTL_SECONDS", "1800"))
+    combat_result_grace_seconds: float = float(os.getenv("COMBAT_RESULT_GRACE_SECONDS", "300"))
+    combat_idle_ttl_seconds: float = float(os.getenv("COMBAT_IDLE_TTL_SECONDS", "1800"))
+    combat_snapshot_enabled: bool = os.getenv("COMBAT_SNAPSHOT_ENABLED", "true").lower() in ("1", "true", "yes")
+    combat_snapshot_dir: str = os.getenv("COMBAT_SNAPSHOT_DIR", "./.combat_snapshots")
+    combat_snapshot_max_age_seconds: float = float(os.getenv("COMBAT_SNAPSHOT_MAX_AGE_SECONDS", "86400"))
+
+    # SessionRuntime 常驻缓存（GameRuntime 内，写回延迟持久化）
+    session_runtime_cache_enabled: bool = os.getenv("SESSION_RUNTIME_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    session_runtime_cache_max: int = int(os.getenv("SESSION_RUNTIME_CACHE_MAX", "256"))
+    session_runtime_idle_ttl_seconds: float = float(os.getenv("SESSION_RUNTIME_IDLE_TTL_SECONDS", "900"))
+    session_runtime_flush_interval_seconds: float = float(os.getenv("SESSION_RUNTIME_FLUSH_INTERVAL_SECONDS", "5"))
 
     # SessionHistory 自动图谱化窗口（玩家主会话）
     session_history_max_tokens: int = int(os.getenv("SESSION_HISTORY_MAX_TOKENS", "1000000"))
     session_history_graphize_threshold: float = float(os.getenv("SESSION_HISTORY_GRAPHIZE_THRESHOLD", "0.8"))
     session_history_keep_recent_tokens: int = int(os.getenv("SESSION_HISTORY_KEEP_RECENT_TOKENS", "150000"))
+    # 会话消息落盘：按序号追加，空闲或攒满后批量写入；恢复按序号分页读取
+    session_history_flush_delay_seconds: float = float(os.getenv("SESSION_HISTORY_FLUSH_DELAY_SECONDS", "2"))
+    session_history_flush_max_messages: int = int(os.getenv("SESSION_HISTORY_FLUSH_MAX_MESSAGES", "40"))
+    session_history_restore_page_size: int = int(os.getenv("SESSION_HISTORY_RESTORE_PAGE_SIZE", "500"))
 
     # 剧情编排严格模式
     narrative_v2_strict_mode: bool = os.getenv("NARRATIVE_V2_STRICT_MODE", "true").lower() in ("1", "true", "yes")
@@ -4,7 +4,7 @@ FastAPI dependencies.
 from functools import lru_cache
 
 from app.services.admin.admin_coordinator import AdminCoordinator
-from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import GraphStoreBackend, create_graph_store
 
 
 @lru_cache()
@@ -13,5 +13,5 @@ def get_coordinator() -> AdminCoordinator:
 
 
 @lru_cache()
-def get_graph_store() -> GraphStore:
-    return GraphStore()
+def get_graph_store() -> GraphStoreBackend:
+    return create_graph_store()
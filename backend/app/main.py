@@ -6,7 +6,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings, validate_config
 from app.routers import game_v2_router
+from app.runtime.game_runtime import GameRuntime
+from app.services.admin.admin_coordinator import AdminCoordinator
+from app.services.firestore_io import get_firestore_io
 from app.services.mcp_client_pool import MCPClientPool
+from app.services.scope_graph_cache import get_scope_graph_cache
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -65,7 +69,15 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时的清理"""
+    runtime = GameRuntime.peek_instance()
+    if runtime is not None:
+        await runtime.shutdown()
+    coordinator = AdminCoordinator.peek_instance()
+    if coordinator is not None:
+        await coordinator.instance_manager.shutdown()
+        await coordinator.session_history_manager.flush_all()
     await MCPClientPool.shutdown()
+    get_firestore_io().shutdown()
 
 
 @app.get("/")
@@ -122,3 +134,25 @@ async def mcp_diagnostics():
                 "error": f"{type(exc).__name__}: {exc}",
             },
         )
+
+
+@app.get(f"{settings.api_prefix}/admin/graph/cache")
+async def graph_cache_stats():
+    """Scope graph cache hit/miss counters and memory usage."""
+    cache = get_scope_graph_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
+
+
+@app.get(f"{settings.api_prefix}/admin/storage/firestore")
+async def firestore_io_stats():
+    """Per-operation Firestore latency (exec p50/p95, queue wait) and pool usage."""
+    return get_firestore_io().get_stats()
+
+
+@app.get(f"{settings.api_prefix}/admin/runtime/sessions")
+async def session_runtime_stats():
+    """Resident SessionRuntime cache counters (hits, write-behind flushes, evictions)."""
+    runtime = await GameRuntime.get_instance()
+    return runtime.get_session_stats()
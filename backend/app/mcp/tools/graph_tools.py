@@ -10,11 +10,11 @@ from app.models.activation import SpreadingActivationConfig
 from app.models.flash import RecallRequest, RecallResponse
 from app.models.graph import MemoryEdge, MemoryNode
 from app.models.graph_scope import GraphScope
-from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import create_graph_store
 from app.services.memory_graph import MemoryGraph
 from app.services.spreading_activation import extract_subgraph, spread_activation
 
-_graph_store = GraphStore()
+_graph_store = create_graph_store()
 
 
 def _build_scope(
@@ -1,12 +1,12 @@
 """Party tools for MCP server."""
 import json
 
-from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import create_graph_store
 from app.services.party_service import PartyService
 from app.services.party_store import PartyStore
 
 _party_service = PartyService(
-    graph_store=GraphStore(),
+    graph_store=create_graph_store(),
     party_store=PartyStore(),
 )
 
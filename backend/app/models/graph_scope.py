@@ -75,3 +75,21 @@ class GraphScope:
     @staticmethod
     def camp() -> "GraphScope":
         return GraphScope(scope_type="camp")
+
+    def document_path(self, world_id: str) -> str:
+        """Base document path of this scope (nodes/edges live underneath)."""
+        base = f"worlds/{world_id}"
+        if self.scope_type == "world":
+            return f"{base}/graphs/world"
+        if self.scope_type == "chapter":
+            return f"{base}/chapters/{self.chapter_id}/graph/data"
+        if self.scope_type == "area":
+            return f"{base}/chapters/{self.chapter_id}/areas/{self.area_id}/graph/data"
+        if self.scope_type == "location":
+            return (
+                f"{base}/chapters/{self.chapter_id}/areas/{self.area_id}"
+                f"/locations/{self.location_id}/graph/data"
+            )
+        if self.scope_type == "character":
+            return f"{base}/characters/{self.character_id}"
+        return f"{base}/camp/graph"
@@ -40,6 +40,7 @@ from app.models.game import (
     TriggerCombatRequest,
     TriggerCombatResponse,
 )
+from app.runtime.game_runtime import GameRuntime
 from app.services.admin.admin_coordinator import AdminCoordinator
 from app.services.mcp_client_pool import MCPServiceUnavailableError
 
@@ -71,6 +72,18 @@ def _map_exception_to_http(exc: Exception) -> HTTPException:
     return HTTPException(status_code=500, detail=str(exc))
 
 
+async def _evict_session_runtime(world_id: str, session_id: str) -> None:
+    """端点绕过 V4 管线直接修改会话状态前，先落盘并驱逐常驻 SessionRuntime。"""
+    runtime = await GameRuntime.get_instance()
+    await runtime.evict_session(world_id, session_id)
+
+
+async def _flush_session_runtime(world_id: str, session_id: str) -> None:
+    """直接读取 Firestore 会话状态的端点，读前写回常驻 SessionRuntime 的脏状态。"""
+    runtime = await GameRuntime.get_instance()
+    await runtime.flush_session(world_id, session_id)
+
+
 @router.get("/worlds")
 async def list_worlds(coordinator=Depends(get_coordinator)):
     """列出所有可用世界"""
@@ -162,6 +175,8 @@ async def start_session(
     创建并启动游戏会话（统一入口）
     """
     try:
+        if payload.session_id:
+            await _evict_session_runtime(world_id, payload.session_id)
         participants = payload.participants or [payload.user_id]
         if payload.user_id not in participants:
             participants.append(payload.user_id)
@@ -234,7 +249,10 @@ async def list_sessions(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}")
+@router.get(
+    "/{world_id}/sessions/{session_id}",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_session(
     world_id: str,
     session_id: str,
@@ -253,7 +271,10 @@ class ResumeSessionRequest(BaseModel):
     generate_narration: bool = True
 
 
-@router.post("/{world_id}/sessions/{session_id}/resume")
+@router.post(
+    "/{world_id}/sessions/{session_id}/resume",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def resume_session(
     world_id: str,
     session_id: str,
@@ -307,7 +328,10 @@ class CharacterCreateRequest(BaseModel):
     backstory: str = ""
 
 
-@router.post("/{world_id}/sessions/{session_id}/character")
+@router.post(
+    "/{world_id}/sessions/{session_id}/character",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def create_character(
     world_id: str,
     session_id: str,
@@ -360,7 +384,10 @@ async def create_character(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/character")
+@router.get(
+    "/{world_id}/sessions/{session_id}/character",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_character(
     world_id: str,
     session_id: str,
@@ -373,7 +400,10 @@ async def get_character(
     return {"character": character.model_dump(mode="json")}
 
 
-@router.get("/{world_id}/sessions/{session_id}/context")
+@router.get(
+    "/{world_id}/sessions/{session_id}/context",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_context(
     world_id: str,
     session_id: str,
@@ -394,7 +424,10 @@ async def get_context(
     )
 
 
-@router.post("/{world_id}/sessions/{session_id}/scene")
+@router.post(
+    "/{world_id}/sessions/{session_id}/scene",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def enter_scene(
     world_id: str,
     session_id: str,
@@ -499,7 +532,10 @@ async def process_input_v2_stream(
     )
 
 
-@router.get("/{world_id}/sessions/{session_id}/location")
+@router.get(
+    "/{world_id}/sessions/{session_id}/location",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_location(
     world_id: str,
     session_id: str,
@@ -517,7 +553,10 @@ async def get_location(
         raise _map_exception_to_http(exc) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/navigate")
+@router.post(
+    "/{world_id}/sessions/{session_id}/navigate",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def navigate(
     world_id: str,
     session_id: str,
@@ -551,7 +590,10 @@ async def navigate(
         raise _map_exception_to_http(exc) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/time")
+@router.get(
+    "/{world_id}/sessions/{session_id}/time",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_time(
     world_id: str,
     session_id: str,
@@ -575,7 +617,10 @@ class AdvanceTimeRequest(BaseModel):
     minutes: int = 30
 
 
-@router.post("/{world_id}/sessions/{session_id}/time/advance")
+@router.post(
+    "/{world_id}/sessions/{session_id}/time/advance",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def advance_time(
     world_id: str,
     session_id: str,
@@ -601,7 +646,10 @@ async def advance_time(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/sub-location/enter")
+@router.post(
+    "/{world_id}/sessions/{session_id}/sub-location/enter",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def enter_sub_location(
     world_id: str,
     session_id: str,
@@ -633,7 +681,10 @@ async def enter_sub_location(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/sub-location/leave")
+@router.post(
+    "/{world_id}/sessions/{session_id}/sub-location/leave",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def leave_sub_location(
     world_id: str,
     session_id: str,
@@ -654,7 +705,10 @@ async def leave_sub_location(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/sub-locations")
+@router.get(
+    "/{world_id}/sessions/{session_id}/sub-locations",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_sub_locations(
     world_id: str,
     session_id: str,
@@ -677,7 +731,10 @@ async def get_sub_locations(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/dialogue/start")
+@router.post(
+    "/{world_id}/sessions/{session_id}/dialogue/start",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def start_dialogue(
     world_id: str,
     session_id: str,
@@ -711,7 +768,10 @@ async def start_dialogue(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/dialogue/end")
+@router.post(
+    "/{world_id}/sessions/{session_id}/dialogue/end",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def end_dialogue(
     world_id: str,
     session_id: str,
@@ -729,7 +789,10 @@ async def end_dialogue(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/combat/trigger")
+@router.post(
+    "/{world_id}/sessions/{session_id}/combat/trigger",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def trigger_combat(
     world_id: str,
     session_id: str,
@@ -763,7 +826,10 @@ async def trigger_combat(
         raise _map_exception_to_http(exc) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/combat/action")
+@router.post(
+    "/{world_id}/sessions/{session_id}/combat/action",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def execute_combat_action(
     world_id: str,
     session_id: str,
@@ -795,7 +861,10 @@ async def execute_combat_action(
         raise _map_exception_to_http(exc) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/combat/start")
+@router.post(
+    "/{world_id}/sessions/{session_id}/combat/start",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def start_combat(
     world_id: str,
     session_id: str,
@@ -811,7 +880,10 @@ async def start_combat(
         raise _map_exception_to_http(exc) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/combat/resolve")
+@router.post(
+    "/{world_id}/sessions/{session_id}/combat/resolve",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def resolve_combat(
     world_id: str,
     session_id: str,
@@ -827,7 +899,10 @@ async def resolve_combat(
         raise _map_exception_to_http(exc) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/advance-day")
+@router.post(
+    "/{world_id}/sessions/{session_id}/advance-day",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def advance_day(
     world_id: str,
     session_id: str,
@@ -853,7 +928,10 @@ async def advance_day(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/party")
+@router.post(
+    "/{world_id}/sessions/{session_id}/party",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def create_party(
     world_id: str,
     session_id: str,
@@ -871,7 +949,10 @@ async def create_party(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/party")
+@router.get(
+    "/{world_id}/sessions/{session_id}/party",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_party_info(
     world_id: str,
     session_id: str,
@@ -884,7 +965,10 @@ async def get_party_info(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/party/add")
+@router.post(
+    "/{world_id}/sessions/{session_id}/party/add",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def add_teammate(
     world_id: str,
     session_id: str,
@@ -906,7 +990,10 @@ async def add_teammate(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.delete("/{world_id}/sessions/{session_id}/party/{character_id}")
+@router.delete(
+    "/{world_id}/sessions/{session_id}/party/{character_id}",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def remove_teammate(
     world_id: str,
     session_id: str,
@@ -920,7 +1007,10 @@ async def remove_teammate(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/party/load")
+@router.post(
+    "/{world_id}/sessions/{session_id}/party/load",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def load_predefined_teammates(
     world_id: str,
     session_id: str,
@@ -944,7 +1034,10 @@ class TriggerEventRequest(BaseModel):
     event_id: str
 
 
-@router.get("/{world_id}/sessions/{session_id}/narrative/progress")
+@router.get(
+    "/{world_id}/sessions/{session_id}/narrative/progress",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_narrative_progress(
     world_id: str,
     session_id: str,
@@ -969,7 +1062,10 @@ async def get_narrative_progress(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/narrative/flow-board")
+@router.get(
+    "/{world_id}/sessions/{session_id}/narrative/flow-board",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_narrative_flow_board(
     world_id: str,
     session_id: str,
@@ -988,7 +1084,10 @@ async def get_narrative_flow_board(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/narrative/current-plan")
+@router.get(
+    "/{world_id}/sessions/{session_id}/narrative/current-plan",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_narrative_current_plan(
     world_id: str,
     session_id: str,
@@ -1005,7 +1104,10 @@ async def get_narrative_current_plan(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.get("/{world_id}/sessions/{session_id}/narrative/available-maps")
+@router.get(
+    "/{world_id}/sessions/{session_id}/narrative/available-maps",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_available_maps(
     world_id: str,
     session_id: str,
@@ -1025,7 +1127,10 @@ async def get_available_maps(
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@router.post("/{world_id}/sessions/{session_id}/narrative/trigger-event")
+@router.post(
+    "/{world_id}/sessions/{session_id}/narrative/trigger-event",
+    dependencies=[Depends(_evict_session_runtime)],
+)
 async def trigger_narrative_event(
     world_id: str,
     session_id: str,
@@ -1056,7 +1161,10 @@ class PasserbyDialogueRequest(BaseModel):
     message: str
 
 
-@router.get("/{world_id}/sessions/{session_id}/passersby")
+@router.get(
+    "/{world_id}/sessions/{session_id}/passersby",
+    dependencies=[Depends(_flush_session_runtime)],
+)
 async def get_passersby(
     world_id: str,
     session_id: str,
@@ -5,7 +5,7 @@ from __future__ import annotations
 import logging
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.cloud import firestore
 
@@ -13,9 +13,7 @@ from app.config import settings
 from app.models.narrative import (
     Chapter,
     ChapterTransition,
-    Condition,
     ConditionGroup,
-    ConditionType,
     StoryEvent,
 )
 from app.runtime.models.area_state import (
@@ -25,6 +23,13 @@ from app.runtime.models.area_state import (
     EventUpdate,
     VisitSummary,
 )
+from app.runtime.event_conditions import (
+    CompiledCondition,
+    SessionFacts,
+    compile_condition_group,
+    parse_condition_group,
+)
+from app.runtime.models.layered_context import StaticList
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +52,12 @@ class AreaRuntime:
         self._world_id: Optional[str] = None
         self._session_id: Optional[str] = None
         self._db: Optional[firestore.Client] = None
+        self._connections_context: Optional[StaticList] = None
+        # 事件条件编译缓存: (event_id, kind) -> (原始条件对象, 编译结果)
+        self._compiled_conditions: Dict[Tuple[str, str], Tuple[Any, Optional[CompiledCondition]]] = {}
+        # 上次求值: event_id -> (事件状态, 编译结果, 依赖事实指纹)
+        self._last_evaluated: Dict[str, Tuple[str, CompiledCondition, Dict[str, Any]]] = {}
+        self.condition_stats: Dict[str, int] = {"checks": 0, "evaluated": 0, "skipped": 0}
 
     def _get_db(self) -> firestore.Client:
         """获取或创建 Firestore 客户端。"""
@@ -120,6 +131,8 @@ class AreaRuntime:
             except Exception as e:
                 logger.warning("跳过无效访问摘要 %s: %s", doc.id, e)
 
+        self._reset_condition_cache()
+
         # 更新访问计数
         self.state.visit_count += 1
         self.state.updated_at = datetime.utcnow()
@@ -160,6 +173,7 @@ class AreaRuntime:
                 is_repeatable=se.is_repeatable,
             )
             self.events.append(area_event)
+        self._compile_event_conditions()
 
     async def unload(self, session: Any) -> Optional[VisitSummary]:
         """生成访问摘要 + 持久化 + 释放资源。
@@ -207,25 +221,31 @@ class AreaRuntime:
                 visit_summary.model_dump()
             )
 
-        # 2. 持久化区域状态
+        # 2-3. 持久化区域状态与事件状态
+        await self.persist()
+
+        # 4. 清理临时数据
+        self.current_visit_log = []
+        self.npc_contexts = {}
+
+        logger.info("AreaRuntime '%s' 已卸载并持久化", self.area_id)
+        return visit_summary
+
+    async def persist(self) -> None:
+        """持久化区域状态与事件状态（不生成访问摘要，不清理访问日志）。"""
+        if not self._world_id:
+            return
+        area_ref = self._area_ref(self._world_id)
+
         self.state.updated_at = datetime.utcnow()
         area_ref.collection("state").document("current").set(
             self.state.model_dump(), merge=True
         )
-
-        # 3. 持久化事件状态
         for event in self.events:
             area_ref.collection("events").document(event.id).set(
                 event.model_dump(), merge=True
             )
 
-        # 4. 清理临时数据
-        self.current_visit_log = []
-        self.npc_contexts = {}
-
-        logger.info("AreaRuntime '%s' 已卸载并持久化", self.area_id)
-        return visit_summary
-
     # =========================================================================
     # 事件状态机 — check_events
     # =========================================================================
@@ -237,6 +257,9 @@ class AreaRuntime:
         - locked → available: trigger_conditions 满足
         - active → completed: completion_conditions 满足
 
+        条件在首次使用时编译；事件状态与其依赖的会话事实都未变化时跳过求值
+        （结果必然与上次相同）。
+
         Args:
             session: SessionRuntime 实例，提供条件评估所需的上下文。
 
@@ -244,6 +267,8 @@ class AreaRuntime:
             本次检查产生的所有状态变更列表。
         """
         updates: List[EventUpdate] = []
+        facts = SessionFacts(session)
+        self.condition_stats["checks"] += 1
 
         for event in self.events:
             if event.status == "completed":
@@ -252,18 +277,13 @@ class AreaRuntime:
             if event.status == "locked":
                 if not event.trigger_conditions:
                     continue
-                cond_group = self._parse_condition_group(
-                    event.trigger_conditions
-                )
-                if cond_group is None or not cond_group.conditions:
-                    continue
-                result = self._evaluate_conditions(cond_group, session)
-                if result["satisfied"] and not result["pending_flash"]:
+                result = self._evaluate_event(event, "trigger", event.trigger_conditions, session, facts)
+                if result is not None and result[0] and not result[1]:
                     event.status = "available"
                     update = EventUpdate(
                         event=event,
                         transition="locked→available",
-                        details=result.get("details", {}),
+                        details=result[2],
                     )
                     updates.append(update)
                     logger.info(
@@ -273,21 +293,18 @@ class AreaRuntime:
             if event.status == "active":
                 if not event.completion_conditions:
                     continue
-                cond_group = self._parse_condition_group(
-                    event.completion_conditions
-                )
-                if cond_group is None or not cond_group.conditions:
-                    continue
-                result = self._evaluate_conditions(cond_group, session)
-                if result["satisfied"] and not result["pending_flash"]:
+                result = self._evaluate_event(event, "completion", event.completion_conditions, session, facts)
+                if result is not None and result[0] and not result[1]:
                     event.status = "completed"
                     self._apply_on_complete(
                         event.on_complete, session, completed_event=event,
                     )
+                    # 副作用可能改变会话事实，之后的事件重新取指纹
+                    facts = SessionFacts(session)
                     update = EventUpdate(
                         event=event,
                         transition="active→completed",
-                        details=result.get("details", {}),
+                        details=result[2],
                     )
                     updates.append(update)
                     logger.info(
@@ -296,6 +313,55 @@ class AreaRuntime:
 
         return updates
 
+    def _compiled_for(self, event: AreaEvent, kind: str, raw: Any) -> Optional[CompiledCondition]:
+        """取事件条件的编译结果（条件对象被替换时重新编译）。"""
+        key = (event.id, kind)
+        cached = self._compiled_conditions.get(key)
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        compiled = compile_condition_group(raw, self.area_id)
+        self._compiled_conditions[key] = (raw, compiled)
+        return compiled
+
+    def _evaluate_event(
+        self,
+        event: AreaEvent,
+        kind: str,
+        raw: Any,
+        session: Any,
+        facts: SessionFacts,
+    ) -> Optional[Tuple[bool, List[Any], Dict[str, bool]]]:
+        """求值事件条件；未编译出条件或依赖未变化（跳过）时返回 None。"""
+        compiled = self._compiled_for(event, kind, raw)
+        if compiled is None or compiled.empty:
+            return None
+        last = self._last_evaluated.get(event.id)
+        if (
+            last is not None
+            and last[0] == event.status
+            and last[1] is compiled
+            and facts.matches(last[2])
+        ):
+            self.condition_stats["skipped"] += 1
+            return None
+        self.condition_stats["evaluated"] += 1
+        result = compiled.evaluate(session)
+        self._last_evaluated[event.id] = (event.status, compiled, facts.snapshot(compiled.deps))
+        return result
+
+    def _compile_event_conditions(self) -> None:
+        """预编译所有事件条件（区域加载时调用）。"""
+        for event in self.events:
+            if event.trigger_conditions:
+                self._compiled_for(event, "trigger", event.trigger_conditions)
+            if event.completion_conditions:
+                self._compiled_for(event, "completion", event.completion_conditions)
+
+    def _reset_condition_cache(self) -> None:
+        self._compiled_conditions = {}
+        self._last_evaluated = {}
+        self._compile_event_conditions()
+
     # =========================================================================
     # 章节转换检查
     # =========================================================================
@@ -405,7 +471,11 @@ class AreaRuntime:
         area_npcs = []
         if world is not None and hasattr(world, "get_characters_in_area"):
             try:
-                area_npcs = world.get_characters_in_area(self.area_id)
+                area_npcs = (
+                    world.get_area_npcs_context(self.area_id)
+                    if hasattr(world, "get_area_npcs_context")
+                    else world.get_characters_in_area(self.area_id)
+                )
             except NotImplementedError:
                 # WorldInstance 尚未实现时使用 resident_npcs
                 for npc_id in defn.resident_npcs:
@@ -440,16 +510,22 @@ class AreaRuntime:
             "npcs": area_npcs,
             "events": event_summaries,
             "visit_count": self.state.visit_count,
-            "connections": [
+            "connections": self._get_connections_context(),
+        }
+
+    def _get_connections_context(self) -> StaticList:
+        """区域连接（定义不变，缓存为共享片段）。"""
+        if self._connections_context is None:
+            self._connections_context = StaticList(
                 {
                     "target": c.target_area_id,
                     "type": c.connection_type,
                     "travel_time": c.travel_time,
                     "description": c.description,
                 }
-                for c in defn.connections
-            ],
-        }
+                for c in self.definition.connections
+            )
+        return self._connections_context
 
     def get_location_context(self, sub_id: str) -> Dict[str, Any]:
         """生成 Layer 3 子地点上下文。
@@ -483,239 +559,19 @@ class AreaRuntime:
         raw: Any,
     ) -> Optional[ConditionGroup]:
         """将 dict 或 ConditionGroup 统一为 ConditionGroup。"""
-        if isinstance(raw, ConditionGroup):
-            return raw
-        if isinstance(raw, dict):
-            if not raw:
-                return None
-            try:
-                return ConditionGroup(**raw)
-            except Exception:
-                return None
-        return None
+        return parse_condition_group(raw)
 
     def _evaluate_conditions(
         self,
         group: ConditionGroup,
         session: Any,
     ) -> Dict[str, Any]:
-        """递归评估条件组，返回 {satisfied, pending_flash, details}。
-
-        内联复用 ConditionEngine 的 8 种条件逻辑。
-        """
-        if not group.conditions:
+        """评估条件组，返回 {satisfied, pending_flash, details}（编译后求值，不缓存）。"""
+        compiled = compile_condition_group(group, self.area_id)
+        if compiled is None:
             return {"satisfied": True, "pending_flash": [], "details": {}}
-
-        if group.operator == "not":
-            inner = self._eval_single(group.conditions[0], session)
-            return {
-                "satisfied": not inner["satisfied"]
-                    if not inner["pending_flash"] else True,
-                "pending_flash": inner["pending_flash"],
-                "details": inner["details"],
-            }
-
-        results = [
-            self._eval_single(cond, session) for cond in group.conditions
-        ]
-
-        all_pending: List[Any] = []
-        all_details: Dict[str, bool] = {}
-        structural: List[bool] = []
-
-        for r in results:
-            all_pending.extend(r["pending_flash"])
-            all_details.update(r["details"])
-            structural.append(r["satisfied"])
-
-        if group.operator == "and":
-            satisfied = all(structural)
-        else:  # "or"
-            satisfied = any(structural)
-
-        return {
-            "satisfied": satisfied,
-            "pending_flash": all_pending,
-            "details": all_details,
-        }
-
-    def _eval_single(
-        self,
-        cond: Any,
-        session: Any,
-    ) -> Dict[str, Any]:
-        """评估单个条件或嵌套条件组。"""
-        if isinstance(cond, ConditionGroup):
-            return self._evaluate_conditions(cond, session)
-
-        if not isinstance(cond, Condition):
-            if isinstance(cond, dict):
-                try:
-                    cond = Condition(**cond)
-                except Exception:
-                    return {"satisfied": True, "pending_flash": [], "details": {}}
-            else:
-                return {"satisfied": True, "pending_flash": [], "details": {}}
-
-        handler = self._CONDITION_HANDLERS.get(cond.type)
-        if handler is None:
-            logger.warning("未知条件类型: %s", cond.type)
-            return {"satisfied": True, "pending_flash": [], "details": {}}
-        return handler(self, cond, session)
-
-    # ----- 条件处理器 -----
-
-    def _eval_location(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        params = cond.params
-        area_match = True
-        sub_match = True
-        if "area_id" in params:
-            area_match = self.area_id == params["area_id"]
-        if "sub_location" in params:
-            current_sub = None
-            if session and hasattr(session, "player") and session.player:
-                current_sub = getattr(session.player, "sub_location", None)
-            sub_match = current_sub == params["sub_location"]
-        satisfied = area_match and sub_match
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {"location": satisfied},
-        }
-
-    def _eval_npc_interacted(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        npc_id = cond.params.get("npc_id", "")
-        min_interactions = cond.params.get("min_interactions", 1)
-        actual = 0
-        if session and hasattr(session, "narrative") and session.narrative:
-            interactions = getattr(session.narrative, "npc_interactions", {})
-            actual = interactions.get(npc_id, 0)
-        satisfied = actual >= min_interactions
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {f"npc_interacted:{npc_id}": satisfied},
-        }
-
-    def _eval_time_passed(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        min_day = cond.params.get("min_day", 0)
-        min_hour = cond.params.get("min_hour", 0)
-        game_day = 0
-        game_hour = 0
-        if session and hasattr(session, "time") and session.time:
-            game_day = getattr(session.time, "day", 0) or 0
-            game_hour = getattr(session.time, "hour", 0) or 0
-        satisfied = (game_day > min_day) or (
-            game_day == min_day and game_hour >= min_hour
-        )
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {"time_passed": satisfied},
-        }
-
-    def _eval_rounds_elapsed(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        min_rounds = cond.params.get("min_rounds", 0)
-        max_rounds = cond.params.get("max_rounds", float("inf"))
-        rounds = 0
-        if session and hasattr(session, "narrative") and session.narrative:
-            rounds = getattr(session.narrative, "rounds_in_chapter", 0)
-        satisfied = min_rounds <= rounds <= max_rounds
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {"rounds_elapsed": satisfied},
-        }
-
-    def _eval_party_contains(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        character_id = cond.params.get("character_id", "")
-        party_ids: List[str] = []
-        if session and hasattr(session, "party") and session.party:
-            party_ids = getattr(session.party, "member_ids", []) or []
-        satisfied = character_id in party_ids
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {f"party_contains:{character_id}": satisfied},
-        }
-
-    def _eval_event_triggered(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        event_id = cond.params.get("event_id", "")
-        triggered: List[str] = []
-        if session and hasattr(session, "narrative") and session.narrative:
-            triggered = getattr(
-                session.narrative, "events_triggered", []
-            ) or []
-        satisfied = event_id in triggered
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {f"event_triggered:{event_id}": satisfied},
-        }
-
-    def _eval_objective_completed(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        objective_id = cond.params.get("objective_id", "")
-        completed: List[str] = []
-        if session and hasattr(session, "narrative") and session.narrative:
-            completed = getattr(
-                session.narrative, "objectives_completed", []
-            ) or []
-        satisfied = objective_id in completed
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {f"objective_completed:{objective_id}": satisfied},
-        }
-
-    def _eval_game_state(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        required_state = cond.params.get("state", "")
-        current_state = ""
-        if session and hasattr(session, "player") and session.player:
-            current_state = getattr(session.player, "game_state", "") or ""
-        satisfied = current_state == required_state
-        return {
-            "satisfied": satisfied,
-            "pending_flash": [],
-            "details": {f"game_state:{required_state}": satisfied},
-        }
-
-    def _eval_flash_evaluate(
-        self, cond: Condition, session: Any
-    ) -> Dict[str, Any]:
-        """语义条件标记为 pending，不在此处理。"""
-        return {
-            "satisfied": True,
-            "pending_flash": [cond],
-            "details": {"flash_evaluate": True},
-        }
-
-    _CONDITION_HANDLERS = {
-        ConditionType.LOCATION: _eval_location,
-        ConditionType.NPC_INTERACTED: _eval_npc_interacted,
-        ConditionType.TIME_PASSED: _eval_time_passed,
-        ConditionType.ROUNDS_ELAPSED: _eval_rounds_elapsed,
-        ConditionType.PARTY_CONTAINS: _eval_party_contains,
-        ConditionType.EVENT_TRIGGERED: _eval_event_triggered,
-        ConditionType.OBJECTIVE_COMPLETED: _eval_objective_completed,
-        ConditionType.GAME_STATE: _eval_game_state,
-        ConditionType.FLASH_EVALUATE: _eval_flash_evaluate,
-    }
+        satisfied, pending, details = compiled.evaluate(session)
+        return {"satisfied": satisfied, "pending_flash": pending, "details": details}
 
     # =========================================================================
     # 事件完成副作用
@@ -150,9 +150,10 @@ class ContextAssembler:
         """
         area = getattr(session, "current_area", None)
 
-        return LayeredContext(
+        # model_construct：保留 WorldInstance / AreaRuntime 缓存的共享片段（不做校验复制）
+        return LayeredContext.model_construct(
             world=(
-                world.world_constants.to_context()
+                world.get_world_context()
                 if world and getattr(world, "world_constants", None)
                 else {}
             ),
@@ -0,0 +1,309 @@
+"""事件条件编译 — AreaRuntime 条件求值的编译形式。
+
+``ConditionGroup`` / dict 形式的条件只在首次使用时编译为闭包树，之后每回合
+不再构造 pydantic 对象、也不再按类型查表分派。每个编译结果声明它读取的会话
+事实（``FACT_*``）；AreaRuntime 每次检查时为用到的事实取一次指纹，依赖的事实
+与事件状态都未变化的事件直接跳过。
+
+求值结果与 AreaRuntime 原有逐条解释的语义一致：
+``(satisfied, pending_flash, details)``。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from app.models.narrative import Condition, ConditionGroup, ConditionType
+
+logger = logging.getLogger(__name__)
+
+Result = Tuple[bool, List[Any], Dict[str, bool]]
+Evaluator = Callable[[Any], Result]
+
+# 条件可依赖的会话事实
+FACT_SUB_LOCATION = "sub_location"
+FACT_NPC_INTERACTIONS = "npc_interactions"
+FACT_TIME = "time"
+FACT_ROUNDS = "rounds"
+FACT_PARTY = "party"
+FACT_EVENTS = "events_triggered"
+FACT_OBJECTIVES = "objectives"
+FACT_GAME_STATE = "game_state"
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """编译后的条件组。"""
+
+    evaluate: Evaluator
+    deps: FrozenSet[str]
+    empty: bool  # 条件组为空（调用方视为"无条件"）
+
+
+# ---- 事实读取（与原条件处理器读取会话的方式一致） ----
+
+
+def _player(session: Any) -> Any:
+    if session and hasattr(session, "player") and session.player:
+        return session.player
+    return None
+
+
+def _narrative(session: Any) -> Any:
+    if session and hasattr(session, "narrative") and session.narrative:
+        return session.narrative
+    return None
+
+
+def _sub_location(session: Any) -> Any:
+    player = _player(session)
+    return getattr(player, "sub_location", None) if player is not None else None
+
+
+def _npc_interactions(session: Any) -> Dict[str, int]:
+    narrative = _narrative(session)
+    return getattr(narrative, "npc_interactions", {}) if narrative is not None else {}
+
+
+def _game_time(session: Any) -> Tuple[int, int]:
+    if session and hasattr(session, "time") and session.time:
+        return (getattr(session.time, "day", 0) or 0, getattr(session.time, "hour", 0) or 0)
+    return (0, 0)
+
+
+def _rounds(session: Any) -> int:
+    narrative = _narrative(session)
+    return getattr(narrative, "rounds_in_chapter", 0) if narrative is not None else 0
+
+
+def _party_ids(session: Any) -> List[str]:
+    if session and hasattr(session, "party") and session.party:
+        return getattr(session.party, "member_ids", []) or []
+    return []
+
+
+def _events_triggered(session: Any) -> List[str]:
+    narrative = _narrative(session)
+    return (getattr(narrative, "events_triggered", []) or []) if narrative is not None else []
+
+
+def _objectives_completed(session: Any) -> List[str]:
+    narrative = _narrative(session)
+    return (getattr(narrative, "objectives_completed", []) or []) if narrative is not None else []
+
+
+def _game_state(session: Any) -> str:
+    player = _player(session)
+    return (getattr(player, "game_state", "") or "") if player is not None else ""
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted(value.items(), key=lambda item: str(item[0])))
+    if isinstance(value, (list, set)):
+        return tuple(value)
+    return value
+
+
+_FACT_READERS: Dict[str, Callable[[Any], Any]] = {
+    FACT_SUB_LOCATION: _sub_location,
+    FACT_NPC_INTERACTIONS: _npc_interactions,
+    FACT_TIME: _game_time,
+    FACT_ROUNDS: _rounds,
+    FACT_PARTY: _party_ids,
+    FACT_EVENTS: _events_triggered,
+    FACT_OBJECTIVES: _objectives_completed,
+    FACT_GAME_STATE: _game_state,
+}
+
+
+class SessionFacts:
+    """一次检查内的事实指纹（按需读取并缓存）。"""
+
+    __slots__ = ("_session", "_values")
+
+    def __init__(self, session: Any) -> None:
+        self._session = session
+        self._values: Dict[str, Any] = {}
+
+    def fingerprint(self, fact: str) -> Any:
+        try:
+            return self._values[fact]
+        except KeyError:
+            value = self._values[fact] = _freeze(_FACT_READERS[fact](self._session))
+            return value
+
+    def snapshot(self, deps: FrozenSet[str]) -> Dict[str, Any]:
+        return {fact: self.fingerprint(fact) for fact in deps}
+
+    def matches(self, snapshot: Dict[str, Any]) -> bool:
+        return all(self.fingerprint(fact) == value for fact, value in snapshot.items())
+
+
+# ---- 编译 ----
+
+
+def _constant(satisfied: bool, details: Dict[str, bool], pending: Optional[List[Any]] = None) -> Evaluator:
+    def _evaluate(session: Any) -> Result:
+        return satisfied, list(pending or ()), dict(details)
+    return _evaluate
+
+
+_PASS: Evaluator = _constant(True, {})
+
+
+def _compile_location(params: Dict[str, Any], area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    area_match = area_id == params["area_id"] if "area_id" in params else True
+    if "sub_location" not in params:
+        return _constant(area_match, {"location": area_match}), frozenset()
+    target = params["sub_location"]
+
+    def _evaluate(session: Any) -> Result:
+        satisfied = area_match and _sub_location(session) == target
+        return satisfied, [], {"location": satisfied}
+    return _evaluate, frozenset({FACT_SUB_LOCATION})
+
+
+def _compile_npc_interacted(params: Dict[str, Any], area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    npc_id = params.get("npc_id", "")
+    min_interactions = params.get("min_interactions", 1)
+    key = f"npc_interacted:{npc_id}"
+
+    def _evaluate(session: Any) -> Result:
+        satisfied = _npc_interactions(session).get(npc_id, 0) >= min_interactions
+        return satisfied, [], {key: satisfied}
+    return _evaluate, frozenset({FACT_NPC_INTERACTIONS})
+
+
+def _compile_time_passed(params: Dict[str, Any], area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    min_day = params.get("min_day", 0)
+    min_hour = params.get("min_hour", 0)
+
+    def _evaluate(session: Any) -> Result:
+        day, hour = _game_time(session)
+        satisfied = (day > min_day) or (day == min_day and hour >= min_hour)
+        return satisfied, [], {"time_passed": satisfied}
+    return _evaluate, frozenset({FACT_TIME})
+
+
+def _compile_rounds_elapsed(params: Dict[str, Any], area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    min_rounds = params.get("min_rounds", 0)
+    max_rounds = params.get("max_rounds", float("inf"))
+
+    def _evaluate(session: Any) -> Result:
+        satisfied = min_rounds <= _rounds(session) <= max_rounds
+        return satisfied, [], {"rounds_elapsed": satisfied}
+    return _evaluate, frozenset({FACT_ROUNDS})
+
+
+def _compile_membership(
+    param: str, prefix: str, reader: Callable[[Any], List[str]], fact: str,
+) -> Callable[[Dict[str, Any], str], Tuple[Evaluator, FrozenSet[str]]]:
+    def _compile(params: Dict[str, Any], area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+        target = params.get(param, "")
+        key = f"{prefix}:{target}"
+
+        def _evaluate(session: Any) -> Result:
+            satisfied = target in reader(session)
+            return satisfied, [], {key: satisfied}
+        return _evaluate, frozenset({fact})
+    return _compile
+
+
+def _compile_game_state(params: Dict[str, Any], area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    required = params.get("state", "")
+    key = f"game_state:{required}"
+
+    def _evaluate(session: Any) -> Result:
+        satisfied = _game_state(session) == required
+        return satisfied, [], {key: satisfied}
+    return _evaluate, frozenset({FACT_GAME_STATE})
+
+
+_LEAF_COMPILERS: Dict[ConditionType, Callable[[Dict[str, Any], str], Tuple[Evaluator, FrozenSet[str]]]] = {
+    ConditionType.LOCATION: _compile_location,
+    ConditionType.NPC_INTERACTED: _compile_npc_interacted,
+    ConditionType.TIME_PASSED: _compile_time_passed,
+    ConditionType.ROUNDS_ELAPSED: _compile_rounds_elapsed,
+    ConditionType.PARTY_CONTAINS: _compile_membership("character_id", "party_contains", _party_ids, FACT_PARTY),
+    ConditionType.EVENT_TRIGGERED: _compile_membership("event_id", "event_triggered", _events_triggered, FACT_EVENTS),
+    ConditionType.OBJECTIVE_COMPLETED: _compile_membership(
+        "objective_id", "objective_completed", _objectives_completed, FACT_OBJECTIVES,
+    ),
+    ConditionType.GAME_STATE: _compile_game_state,
+}
+
+
+def _compile_node(cond: Any, area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    if isinstance(cond, ConditionGroup):
+        return _compile_group(cond, area_id)
+    if not isinstance(cond, Condition):
+        if not isinstance(cond, dict):
+            return _PASS, frozenset()
+        try:
+            cond = Condition(**cond)
+        except Exception:
+            return _PASS, frozenset()
+    if cond.type == ConditionType.FLASH_EVALUATE:
+        # 语义条件标记为 pending，不在此处理
+        return _constant(True, {"flash_evaluate": True}, [cond]), frozenset()
+    compiler = _LEAF_COMPILERS.get(cond.type)
+    if compiler is None:
+        logger.warning("未知条件类型: %s", cond.type)
+        return _PASS, frozenset()
+    return compiler(cond.params, area_id)
+
+
+def _compile_group(group: ConditionGroup, area_id: str) -> Tuple[Evaluator, FrozenSet[str]]:
+    if not group.conditions:
+        return _PASS, frozenset()
+
+    if group.operator == "not":
+        inner, deps = _compile_node(group.conditions[0], area_id)
+
+        def _negate(session: Any) -> Result:
+            satisfied, pending, details = inner(session)
+            return (not satisfied if not pending else True), pending, details
+        return _negate, deps
+
+    children = [_compile_node(cond, area_id) for cond in group.conditions]
+    evaluators = [fn for fn, _ in children]
+    deps = frozenset().union(*(child_deps for _, child_deps in children))
+    combine = all if group.operator == "and" else any
+
+    def _evaluate(session: Any) -> Result:
+        pending: List[Any] = []
+        details: Dict[str, bool] = {}
+        structural: List[bool] = []
+        for fn in evaluators:
+            satisfied, child_pending, child_details = fn(session)
+            pending.extend(child_pending)
+            details.update(child_details)
+            structural.append(satisfied)
+        return combine(structural), pending, details
+    return _evaluate, deps
+
+
+def parse_condition_group(raw: Any) -> Optional[ConditionGroup]:
+    """将 dict 或 ConditionGroup 统一为 ConditionGroup。"""
+    if isinstance(raw, ConditionGroup):
+        return raw
+    if isinstance(raw, dict):
+        if not raw:
+            return None
+        try:
+            return ConditionGroup(**raw)
+        except Exception:
+            return None
+    return None
+
+
+def compile_condition_group(raw: Any, area_id: str) -> Optional[CompiledCondition]:
+    """编译条件组（dict 或 ConditionGroup）；无法解析时返回 None。"""
+    group = parse_condition_group(raw)
+    if group is None:
+        return None
+    evaluate, deps = _compile_group(group, area_id)
+    return CompiledCondition(evaluate=evaluate, deps=deps, empty=not group.conditions)
@@ -1,18 +1,42 @@
-"""GameRuntime — 全局单例，管理 WorldInstance 生命周期。"""
+"""GameRuntime — 全局单例，管理 WorldInstance 与常驻 SessionRuntime 生命周期。"""
 
 from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.runtime.session_runtime import SessionRuntime
 
 logger = logging.getLogger(__name__)
 
+SessionKey = Tuple[str, str]
+
+
+class _SessionEntry:
+    """常驻会话条目。"""
+
+    __slots__ = ("session", "last_used")
+
+    def __init__(self, session: "SessionRuntime") -> None:
+        self.session = session
+        self.last_used = time.monotonic()
+
 
 class GameRuntime:
     """V4 游戏运行时全局单例。
 
     持有所有已加载的 WorldInstance，提供统一的世界访问入口。
+
+    同时常驻热会话的 SessionRuntime：回合间不再 restore()/persist()，
+    脏状态由后台任务按 flush 间隔批量写回，空闲超时 / 超出容量 / 关闭时
+    先落盘再驱逐。同一会话的回合由会话锁串行化。
     """
 
     _instance: Optional["GameRuntime"] = None
@@ -22,6 +46,22 @@ class GameRuntime:
         from app.runtime.world_instance import WorldInstance
         self._worlds: Dict[str, WorldInstance] = {}
 
+        self._sessions: "OrderedDict[SessionKey, _SessionEntry]" = OrderedDict()
+        self._session_locks: Dict[SessionKey, asyncio.Lock] = {}
+        # 正在持有或等待会话锁的协程数（为 0 时才可回收锁）
+        self._session_lock_users: Dict[SessionKey, int] = {}
+        self._session_evict_listeners: List[Callable[[str, str], Any]] = []
+        self._session_worker: Optional[asyncio.Task] = None
+        self._session_stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "idle_evictions": 0,
+            "capacity_evictions": 0,
+            "invalidations": 0,
+        }
+
     @classmethod
     async def get_instance(cls) -> "GameRuntime":
         """获取或创建全局单例（双重检查锁）。"""
@@ -32,6 +72,11 @@ class GameRuntime:
                     logger.info("GameRuntime 单例已创建")
         return cls._instance
 
+    @classmethod
+    def peek_instance(cls) -> Optional["GameRuntime"]:
+        """返回已创建的单例，未创建时返回 None（不触发创建）。"""
+        return cls._instance
+
     @classmethod
     def reset_instance(cls) -> None:
         """重置单例（仅测试用）。"""
@@ -55,10 +100,220 @@ class GameRuntime:
     async def unload_world(self, world_id: str) -> None:
         """卸载 WorldInstance。"""
         if world_id in self._worlds:
-            del self._worlds[world_id]
+            world = self._worlds.pop(world_id)
+            await world.close()
             logger.info(f"WorldInstance '{world_id}' 已卸载")
 
     @property
     def loaded_worlds(self) -> list[str]:
         """已加载的世界 ID 列表。"""
         return list(self._worlds.keys())
+
+    # =========================================================================
+    # SessionRuntime 常驻缓存
+    # =========================================================================
+
+    @asynccontextmanager
+    async def session(
+        self,
+        world_id: str,
+        session_id: str,
+        factory: Callable[[], "SessionRuntime"],
+    ) -> AsyncIterator["SessionRuntime"]:
+        """租用会话运行时，退出前独占该会话。
+
+        缓存未命中时用 ``factory()`` 构造并 restore()；退出时不立即 persist，
+        脏状态交给后台写回。回合异常或会话被标记 stale 时先落盘再驱逐，
+        下一回合重新 restore。
+        """
+        if not settings.session_runtime_cache_enabled:
+            session = factory()
+            await session.restore()
+            yield session
+            await session.persist()
+            return
+
+        key = (world_id, session_id)
+        async with self._session_locked(key):
+            entry = self._sessions.get(key)
+            if entry is None:
+                session = factory()
+                await session.restore()
+                entry = _SessionEntry(session)
+                self._sessions[key] = entry
+                self._session_stats["misses"] += 1
+            else:
+                self._sessions.move_to_end(key)
+                self._session_stats["hits"] += 1
+            self._ensure_session_worker()
+
+            discard = True
+            try:
+                yield entry.session
+                discard = entry.session.is_stale
+            finally:
+                entry.last_used = time.monotonic()
+                if discard:
+                    await self._drop_session(key, entry)
+                    self._session_stats["invalidations"] += 1
+
+        await self._enforce_session_capacity()
+
+    async def evict_session(self, world_id: str, session_id: str) -> bool:
+        """落盘并驱逐常驻会话（外部直接修改会话状态前调用）。"""
+        key = (world_id, session_id)
+        if key not in self._sessions:
+            return False
+        async with self._session_locked(key):
+            entry = self._sessions.get(key)
+            if entry is None:
+                return False
+            await self._drop_session(key, entry)
+            self._session_stats["invalidations"] += 1
+            return True
+
+    async def flush_session(self, world_id: str, session_id: str) -> bool:
+        """写回单个常驻会话的脏状态但不驱逐（直接读 Firestore 的端点在读取前调用）。"""
+        key = (world_id, session_id)
+        entry = self._sessions.get(key)
+        if entry is None or not entry.session.is_dirty:
+            return False
+        return await self._flush_one(key, evict=False)
+
+    async def flush_sessions(self) -> int:
+        """写回所有空闲会话的脏状态，并驱逐超过空闲 TTL 的会话。返回落盘次数。"""
+        now = time.monotonic()
+        ttl = settings.session_runtime_idle_ttl_seconds
+        tasks = []
+        for key, entry in list(self._sessions.items()):
+            if self._session_lock_users.get(key):
+                continue  # 回合进行中，下次再写回
+            if now - entry.last_used >= ttl:
+                tasks.append(self._flush_one(key, evict=True))
+            elif entry.session.is_dirty:
+                tasks.append(self._flush_one(key, evict=False))
+        if not tasks:
+            return 0
+        results = await asyncio.gather(*tasks)
+        return sum(1 for flushed in results if flushed)
+
+    def add_session_evict_listener(self, listener: Callable[[str, str], Any]) -> None:
+        """注册会话驱逐回调 ``listener(world_id, session_id)``（如释放召回合并图）。"""
+        if listener not in self._session_evict_listeners:
+            self._session_evict_listeners.append(listener)
+
+    async def shutdown(self) -> None:
+        """停止后台写回并落盘全部常驻会话。"""
+        worker = self._session_worker
+        self._session_worker = None
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        for key in list(self._sessions.keys()):
+            async with self._session_locked(key):
+                entry = self._sessions.get(key)
+                if entry is not None:
+                    await self._drop_session(key, entry)
+        for world in list(self._worlds.values()):
+            await world.close()
+        logger.info("GameRuntime 会话缓存已关闭")
+
+    def get_session_stats(self) -> Dict[str, Any]:
+        """常驻会话缓存统计。"""
+        return {
+            "enabled": settings.session_runtime_cache_enabled,
+            "sessions": len(self._sessions),
+            "dirty": sum(1 for e in self._sessions.values() if e.session.is_dirty),
+            "max_sessions": settings.session_runtime_cache_max,
+            "idle_ttl_seconds": settings.session_runtime_idle_ttl_seconds,
+            "flush_interval_seconds": settings.session_runtime_flush_interval_seconds,
+            **self._session_stats,
+        }
+
+    # ---- internals ----
+
+    @asynccontextmanager
+    async def _session_locked(self, key: SessionKey) -> AsyncIterator[None]:
+        lock = self._session_locks.get(key)
+        if lock is None:
+            lock = self._session_locks[key] = asyncio.Lock()
+        self._session_lock_users[key] = self._session_lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            users = self._session_lock_users[key] - 1
+            if users:
+                self._session_lock_users[key] = users
+            else:
+                self._session_lock_users.pop(key, None)
+                if key not in self._sessions:
+                    self._session_locks.pop(key, None)
+
+    async def _flush_one(self, key: SessionKey, evict: bool) -> bool:
+        async with self._session_locked(key):
+            entry = self._sessions.get(key)
+            if entry is None:
+                return False
+            idle = time.monotonic() - entry.last_used
+            if evict and idle >= settings.session_runtime_idle_ttl_seconds:
+                await self._drop_session(key, entry)
+                self._session_stats["idle_evictions"] += 1
+                return True
+            try:
+                await entry.session.persist()
+            except Exception as exc:
+                self._session_stats["flush_errors"] += 1
+                logger.warning("[GameRuntime] 会话写回失败: %s/%s err=%s", key[0], key[1], exc)
+                return False
+            self._session_stats["flushes"] += 1
+            return True
+
+    async def _drop_session(self, key: SessionKey, entry: _SessionEntry) -> None:
+        """落盘并移出缓存（调用方须持有会话锁）。"""
+        if self._sessions.get(key) is entry:
+            del self._sessions[key]
+        try:
+            await entry.session.close()
+            self._session_stats["flushes"] += 1
+        except Exception as exc:
+            self._session_stats["flush_errors"] += 1
+            logger.warning("[GameRuntime] 会话驱逐落盘失败: %s/%s err=%s", key[0], key[1], exc)
+        for listener in self._session_evict_listeners:
+            try:
+                listener(key[0], key[1])
+            except Exception as exc:
+                logger.warning("[GameRuntime] 会话驱逐回调失败: %s", exc)
+
+    async def _enforce_session_capacity(self) -> None:
+        limit = max(0, settings.session_runtime_cache_max)
+        overflow = len(self._sessions) - limit
+        if overflow <= 0:
+            return
+        for key in list(self._sessions.keys()):
+            if overflow <= 0:
+                break
+            if self._session_lock_users.get(key):
+                continue
+            async with self._session_locked(key):
+                entry = self._sessions.get(key)
+                if entry is None:
+                    continue
+                await self._drop_session(key, entry)
+                self._session_stats["capacity_evictions"] += 1
+                overflow -= 1
+
+    def _ensure_session_worker(self) -> None:
+        if self._session_worker is None or self._session_worker.done():
+            self._session_worker = asyncio.create_task(self._session_worker_loop())
+
+    async def _session_worker_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.session_runtime_flush_interval_seconds)
+            try:
+                await self.flush_sessions()
+            except Exception as exc:
+                logger.warning("[GameRuntime] 会话写回任务异常: %s", exc)
@@ -6,15 +6,63 @@ Layer 2: 区域（NPC、怪物、子地点、事件状态）
 Layer 3: 子地点详情
 Layer 4: 玩家/队伍/时间/好感度
 Memory: 动态图谱召回结果
+
+世界常量、区域 NPC 列表等跨回合不变的片段以 StaticDict / StaticList 形式
+由 WorldInstance / AreaRuntime 按版本缓存，序列化结果随片段缓存；
+dumps_context 拼接上下文 JSON 时直接复用，每回合只序列化动态部分。
 """
 
 from __future__ import annotations
 
+import json
+from functools import cached_property
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
 
+class StaticDict(dict):
+    """跨回合共享的只读上下文片段（缓存其 JSON 序列化结果，勿原地修改）。"""
+
+    @cached_property
+    def json(self) -> str:
+        return json.dumps(self, ensure_ascii=False, default=str)
+
+
+class StaticList(list):
+    """跨回合共享的只读列表片段（缓存其 JSON 序列化结果，勿原地修改）。"""
+
+    @cached_property
+    def json(self) -> str:
+        return json.dumps(self, ensure_ascii=False, default=str)
+
+
+def dumps_context(value: Any) -> str:
+    """序列化上下文，输出与 ``json.dumps(value, ensure_ascii=False, default=str)`` 一致。
+
+    StaticDict / StaticList 片段直接使用缓存的序列化结果。
+    """
+    if isinstance(value, (StaticDict, StaticList)):
+        return value.json
+    if isinstance(value, dict) and any(isinstance(v, (dict, list)) for v in value.values()):
+        return "{" + ", ".join(
+            f"{_dumps_key(key)}: {dumps_context(item)}" for key, item in value.items()
+        ) + "}"
+    if isinstance(value, list) and any(isinstance(v, (dict, list)) for v in value):
+        return "[" + ", ".join(dumps_context(item) for item in value) + "]"
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def join_context_parts(parts: Dict[str, str]) -> str:
+    """把各键已序列化的 JSON 片段拼成一个 JSON 对象（与 dumps_context 格式一致）。"""
+    return "{" + ", ".join(f"{_dumps_key(key)}: {part}" for key, part in parts.items()) + "}"
+
+
+def _dumps_key(key: Any) -> str:
+    # json.dumps 把非字符串键（数字 / 布尔 / None）转成其 JSON 字面量
+    return json.dumps(key if isinstance(key, str) else json.dumps(key), ensure_ascii=False)
+
+
 class LayeredContext(BaseModel):
     """分层上下文 — 6 层数据包，供 Agentic LLM 使用。"""
 
@@ -69,12 +117,11 @@ class LayeredContext(BaseModel):
 
     def get_layer_summary(self) -> Dict[str, int]:
         """返回各层数据量摘要（用于调试/监控）。"""
-        import json
         return {
-            "world_chars": len(json.dumps(self.world, ensure_ascii=False)),
-            "chapter_chars": len(json.dumps(self.chapter, ensure_ascii=False)),
-            "area_chars": len(json.dumps(self.area, ensure_ascii=False)),
-            "location_chars": len(json.dumps(self.location, ensure_ascii=False)) if self.location else 0,
-            "dynamic_chars": len(json.dumps(self.dynamic, ensure_ascii=False)),
-            "memory_chars": len(json.dumps(self.memory, ensure_ascii=False)) if self.memory else 0,
+            "world_chars": len(dumps_context(self.world)),
+            "chapter_chars": len(dumps_context(self.chapter)),
+            "area_chars": len(dumps_context(self.area)),
+            "location_chars": len(dumps_context(self.location)) if self.location else 0,
+            "dynamic_chars": len(dumps_context(self.dynamic)),
+            "memory_chars": len(dumps_context(self.memory)) if self.memory else 0,
         }
@@ -80,6 +80,8 @@ class SessionRuntime:
         self._dirty_player: bool = False
 
         self._restored: bool = False
+        # 本回合有工具绕过 SessionRuntime 直接写库（组件可能已过期）
+        self._stale: bool = False
 
     # =========================================================================
     # 属性便捷访问
@@ -110,6 +112,21 @@ class SessionRuntime:
         """是否已完成 restore()。"""
         return self._restored
 
+    @property
+    def is_dirty(self) -> bool:
+        """是否有尚未 persist 的变更。"""
+        return (
+            self._dirty_game_state
+            or self._dirty_party
+            or self._dirty_narrative
+            or self._dirty_player
+        )
+
+    @property
+    def is_stale(self) -> bool:
+        """内存状态是否可能落后于 Firestore（需重新 restore）。"""
+        return self._stale
+
     # =========================================================================
     # restore — 从 Firestore 恢复会话状态
     # =========================================================================
@@ -144,7 +161,7 @@ class SessionRuntime:
         await self._restore_narrative()
 
         # 5. SessionHistory
-        self._restore_history()
+        await self._restore_history()
 
         # 6. 时间快照（从 GameState 提取）
         if self.game_state:
@@ -235,10 +252,10 @@ class SessionRuntime:
                 except Exception:
                     self.narrative = None
 
-    def _restore_history(self) -> None:
+    async def _restore_history(self) -> None:
         """加载 SessionHistory。"""
         if self._session_history_manager:
-            self.history = self._session_history_manager.get_or_create(
+            self.history = await self._session_history_manager.get_or_create_async(
                 self.world_id, self.session_id
             )
         else:
@@ -521,10 +538,27 @@ class SessionRuntime:
                 "[SessionRuntime] persist 完成: %s", ", ".join(persisted)
             )
 
+    async def close(self) -> None:
+        """会话离开常驻缓存时调用：持久化脏状态 + 当前区域状态。"""
+        await self.persist()
+        if self.current_area:
+            try:
+                await self.current_area.persist()
+            except Exception as exc:
+                logger.warning(
+                    "[SessionRuntime] 区域状态持久化失败: area=%s err=%s",
+                    self.current_area.area_id,
+                    exc,
+                )
+
     # =========================================================================
     # 状态变更辅助方法
     # =========================================================================
 
+    def mark_stale(self) -> None:
+        """外部服务直接改写了会话状态（玩家/队伍等），缓存的组件需丢弃重载。"""
+        self._stale = True
+
     def mark_game_state_dirty(self) -> None:
         """外部修改 game_state 后调用此方法标记脏。"""
         self._dirty_game_state = True
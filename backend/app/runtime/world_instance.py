@@ -5,24 +5,77 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.cloud import firestore
 
 from app.config import settings
+from app.runtime.models.layered_context import StaticDict, StaticList
 from app.runtime.models.world_constants import WorldConstants
 from app.runtime.models.area_state import AreaDefinition, SubLocationDef, AreaConnection
+from app.runtime.world_snapshot import read_snapshot, write_snapshot
+from app.services.firestore_io import run_firestore, stream_docs
 
 logger = logging.getLogger(__name__)
 
+# 危险等级 → challenge_rating 映射
+_DANGER_RATINGS: Dict[int, set] = {
+    1: {"白瓷", "porcelain", "low", "1"},
+    2: {"黑曜石", "obsidian", "钢铁", "steel", "medium", "2"},
+    3: {"青铜", "bronze", "白银", "silver", "high", "3"},
+    4: {"黄金", "gold", "白金", "platinum", "extreme", "4"},
+}
+_RATING_TIER: Dict[str, int] = {
+    rating: level for level, ratings in _DANGER_RATINGS.items() for rating in ratings
+}
+_MAX_DANGER = max(_DANGER_RATINGS)
+
+
+def _character_maps(char_data: Dict[str, Any]) -> Tuple[str, str]:
+    """角色的 (profile.metadata.default_map, state.current_map)。"""
+    profile = char_data.get("profile", {})
+    metadata = profile.get("metadata", {}) if isinstance(profile, dict) else {}
+    default_map = metadata.get("default_map", "") if isinstance(metadata, dict) else ""
+    state = char_data.get("state", {})
+    current_map = state.get("current_map", "") if isinstance(state, dict) else ""
+    return default_map, current_map
+
+
+def _skill_class_keys(skill_data: Dict[str, Any]) -> set:
+    """技能可匹配的职业标识（source / class / classes，小写）。"""
+    keys = {
+        str(skill_data.get("source", "")).strip().lower(),
+        str(skill_data.get("class", "")).strip().lower(),
+    }
+    keys.update(c.lower() for c in skill_data.get("classes", []) if isinstance(c, str))
+    return keys
+
 
 class WorldInstance:
     """世界静态数据的一次性加载容器。
 
-    所有数据在 initialize() 时并行从 Firestore 批量加载，
-    之后为只读访问。
+    所有数据在 initialize() 时并行从 Firestore 批量加载（阻塞读在
+    Firestore I/O 线程池中执行，各注册表真正并发），之后为只读访问。
+
+    注册表每次（重新）加载后 ``version`` 递增；由注册表派生的上下文片段
+    （世界常量、区域 NPC 列表）按版本缓存并预序列化，供各会话共享。
+
+    查询方法走加载时建立的二级索引（区域→角色、子地点→常驻角色、
+    危险等级→怪物、职业→技能），结果顺序与注册表顺序一致。直接替换注册表
+    后需调用 ``rebuild_indexes()``；角色位置变化通过
+    ``update_character_state()`` 增量更新索引。
+
+    启用本地快照时，成功加载后将注册表写入快照文件；进程重启后先从快照
+    恢复（毫秒级），再在后台比对 Firestore 中的世界数据版本戳，不一致时
+    全量重读并替换注册表（重读不完整则保留快照）。角色 state 为运行时可变
+    数据，不受版本戳约束，后台总是重读角色集合。
     """
 
+    _REGISTRIES = (
+        "character_registry", "chapter_registry", "mainline_registry",
+        "monster_registry", "item_registry", "skill_registry",
+    )
+
     def __init__(self, world_id: str) -> None:
         self.world_id = world_id
         self.world_constants: Optional[WorldConstants] = None
@@ -33,16 +86,64 @@ class WorldInstance:
         self.skill_registry: Dict[str, Dict[str, Any]] = {}
         self.chapter_registry: Dict[str, Any] = {}
         self.mainline_registry: Dict[str, Any] = {}
+        self.version: int = 0
+        # 世界数据版本戳（meta/info.data_version，缺省为该文档更新时间）
+        self.data_version: Optional[str] = None
+        # 注册表来源："firestore" | "snapshot"
+        self.source: Optional[str] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._context_cache: Dict[str, Any] = {}
         self._initialized: bool = False
+        # 二级索引（rebuild_indexes 建立，首次查询时惰性建立）
+        self._indexed: bool = False
+        self._char_rank: Dict[str, int] = {}
+        self._char_maps: Dict[str, Tuple[str, str]] = {}
+        self._area_characters: Dict[str, List[Dict[str, Any]]] = {}
+        self._sublocation_residents: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._monsters_by_danger: List[List[Dict[str, Any]]] = []
+        self._skills_by_class: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
 
     async def initialize(self) -> None:
-        """并行 Firestore 批量加载所有注册表。"""
+        """加载所有注册表（优先本地快照，否则并行 Firestore 批量加载）。"""
         if self._initialized:
             logger.debug("WorldInstance '%s' 已初始化，跳过", self.world_id)
             return
 
         t0 = time.monotonic()
-        db = firestore.Client(database=settings.firestore_database)
+        if settings.world_snapshot_enabled and await self._restore_snapshot():
+            self._mark_loaded("snapshot")
+            self._refresh_task = asyncio.create_task(self._refresh_from_firestore())
+        else:
+            complete = await self._load_from_firestore()
+            self._mark_loaded("firestore")
+            if complete and settings.world_snapshot_enabled:
+                self._snapshot_task = asyncio.create_task(self._save_snapshot())
+        elapsed = time.monotonic() - t0
+        logger.info(
+            "WorldInstance '%s' 初始化完成 (%s, %.3fs): "
+            "%d characters, %d areas, %d chapters, %d mainlines, "
+            "%d monsters, %d items, %d skills",
+            self.world_id, self.source, elapsed,
+            len(self.character_registry),
+            len(self.area_registry),
+            len(self.chapter_registry),
+            len(self.mainline_registry),
+            len(self.monster_registry),
+            len(self.item_registry),
+            len(self.skill_registry),
+        )
+
+    def _mark_loaded(self, source: str) -> None:
+        self.source = source
+        self.version += 1
+        self._context_cache = {}
+        self.rebuild_indexes()
+        self._initialized = True
+
+    async def _load_from_firestore(self) -> bool:
+        """并行加载所有注册表；全部成功时返回 True。"""
+        db = await run_firestore("world.client", firestore.Client, database=settings.firestore_database)
         world_ref = db.collection("worlds").document(self.world_id)
 
         # 并行加载所有注册表
@@ -63,28 +164,123 @@ class WorldInstance:
             "world_constants", "characters", "areas",
             "chapters", "mainlines", "monsters", "skills", "items",
         ]
+        complete = True
         for label, result in zip(labels, results):
             if isinstance(result, Exception):
+                complete = False
                 logger.warning(
                     "WorldInstance '%s' 加载 %s 失败: %s",
                     self.world_id, label, result,
                 )
+        return complete
 
-        self._initialized = True
-        elapsed = time.monotonic() - t0
-        logger.info(
-            "WorldInstance '%s' 初始化完成 (%.2fs): "
-            "%d characters, %d areas, %d chapters, %d mainlines, "
-            "%d monsters, %d items, %d skills",
-            self.world_id, elapsed,
-            len(self.character_registry),
-            len(self.area_registry),
-            len(self.chapter_registry),
-            len(self.mainline_registry),
-            len(self.monster_registry),
-            len(self.item_registry),
-            len(self.skill_registry),
+    # ---- 本地快照 ----
+
+    def _snapshot_registries(self) -> Dict[str, Any]:
+        registries: Dict[str, Any] = {name: getattr(self, name) for name in self._REGISTRIES}
+        registries["world_constants"] = (
+            self.world_constants.model_dump() if self.world_constants else None
         )
+        registries["area_registry"] = {
+            area_id: area_def.model_dump() for area_id, area_def in self.area_registry.items()
+        }
+        return registries
+
+    async def _save_snapshot(self) -> None:
+        """将当前注册表写入本地快照（序列化与写文件在线程中执行）。"""
+        registries = self._snapshot_registries()
+        try:
+            path = await asyncio.to_thread(write_snapshot, self.world_id, self.data_version, registries)
+            logger.info("WorldInstance '%s' 快照已写入 %s", self.world_id, path)
+        except Exception as exc:
+            logger.warning("WorldInstance '%s' 写入快照失败: %s", self.world_id, exc)
+
+    async def _restore_snapshot(self) -> bool:
+        """从本地快照恢复注册表；无可用快照时返回 False。"""
+        payload = await asyncio.to_thread(read_snapshot, self.world_id)
+        if payload is None:
+            return False
+        registries = payload["registries"]
+        try:
+            constants = registries.get("world_constants")
+            world_constants = WorldConstants(**constants) if constants else None
+            area_registry = {
+                area_id: AreaDefinition(**area_data)
+                for area_id, area_data in (registries.get("area_registry") or {}).items()
+            }
+        except Exception as exc:
+            logger.warning("WorldInstance '%s' 快照解析失败: %s", self.world_id, exc)
+            return False
+        self.world_constants = world_constants
+        self.area_registry = area_registry
+        for name in self._REGISTRIES:
+            setattr(self, name, registries.get(name) or {})
+        self.data_version = payload.get("data_version")
+        return True
+
+    async def _refresh_from_firestore(self) -> None:
+        """后台校验快照：版本戳不一致时全量重读；一致时仍重读角色集合。
+
+        角色 state（current_map 等）由运行时直接写入 characters 文档，
+        不会改变世界数据版本戳，因此快照中的角色数据总是重新读取。
+        重读不完整时保留快照数据。
+        """
+        try:
+            db = await run_firestore("world.client", firestore.Client, database=settings.firestore_database)
+            world_ref = db.collection("worlds").document(self.world_id)
+            meta_doc = await run_firestore("world.meta", world_ref.collection("meta").document("info").get)
+            stamp = self._version_stamp(meta_doc) if meta_doc.exists else None
+            fresh = WorldInstance(self.world_id)
+            if stamp is not None and stamp == self.data_version:
+                await fresh._load_characters(world_ref)
+                self.character_registry = fresh.character_registry
+                self.version += 1
+                self._context_cache = {}
+                self.rebuild_indexes()
+                logger.info(
+                    "WorldInstance '%s' 快照版本一致 (%s)，已刷新 %d 个角色",
+                    self.world_id, stamp, len(self.character_registry),
+                )
+                return
+
+            if not await fresh._load_from_firestore():
+                logger.warning(
+                    "WorldInstance '%s' 快照已过期但 Firestore 重读不完整，继续使用快照数据",
+                    self.world_id,
+                )
+                return
+            self.world_constants = fresh.world_constants
+            self.area_registry = fresh.area_registry
+            for name in self._REGISTRIES:
+                setattr(self, name, getattr(fresh, name))
+            self.data_version = fresh.data_version
+            self._mark_loaded("firestore")
+            logger.info(
+                "WorldInstance '%s' 快照已过期，已从 Firestore 刷新 (version=%d)",
+                self.world_id, self.version,
+            )
+            await self._save_snapshot()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("WorldInstance '%s' 后台刷新失败: %s", self.world_id, exc)
+
+    async def close(self) -> None:
+        """取消未完成的后台刷新，等待进行中的快照写入。"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        for task in (self._refresh_task, self._snapshot_task):
+            if task is not None:
+                await asyncio.gather(task, return_exceptions=True)
+
+    @staticmethod
+    def _version_stamp(doc: Any) -> Optional[str]:
+        """meta/info 文档的数据版本戳（data_version 字段，缺省为文档更新时间）。"""
+        data = doc.to_dict() or {}
+        if data.get("data_version"):
+            return str(data["data_version"])
+        update_time = getattr(doc, "update_time", None)
+        return update_time.isoformat() if update_time is not None else None
 
     # ---- Firestore 加载方法 ----
 
@@ -92,13 +288,14 @@ class WorldInstance:
         self, world_ref: firestore.DocumentReference
     ) -> None:
         """加载 worlds/{wid}/meta/info 单文档。"""
-        doc = world_ref.collection("meta").document("info").get()
+        doc = await run_firestore("world.meta", world_ref.collection("meta").document("info").get)
         if not doc.exists:
             logger.warning(
                 "WorldInstance '%s': meta/info 文档不存在", self.world_id
             )
             return
         data = doc.to_dict() or {}
+        self.data_version = self._version_stamp(doc)
         data.setdefault("world_id", self.world_id)
         self.world_constants = WorldConstants(**data)
 
@@ -107,7 +304,7 @@ class WorldInstance:
     ) -> None:
         """加载 worlds/{wid}/characters/ 集合遍历。"""
         chars_ref = world_ref.collection("characters")
-        for doc in chars_ref.stream():
+        for doc in await run_firestore("world.characters", stream_docs, chars_ref):
             data = doc.to_dict()
             if not data:
                 continue
@@ -119,10 +316,15 @@ class WorldInstance:
     ) -> None:
         """加载 worlds/{wid}/maps/ 集合（含 info/data 子文档）。"""
         maps_ref = world_ref.collection("maps")
-        for map_doc in maps_ref.stream():
-            info_doc = (
-                map_doc.reference.collection("info").document("data").get()
+        map_docs = await run_firestore("world.maps", stream_docs, maps_ref)
+        info_docs = await asyncio.gather(*(
+            run_firestore(
+                "world.map_info",
+                map_doc.reference.collection("info").document("data").get,
             )
+            for map_doc in map_docs
+        ))
+        for map_doc, info_doc in zip(map_docs, info_docs):
             if not info_doc.exists:
                 continue
             info = info_doc.to_dict() or {}
@@ -136,7 +338,7 @@ class WorldInstance:
     ) -> None:
         """加载 worlds/{wid}/chapters/ 集合遍历。"""
         chapters_ref = world_ref.collection("chapters")
-        for doc in chapters_ref.stream():
+        for doc in await run_firestore("world.chapters", stream_docs, chapters_ref):
             data = doc.to_dict()
             if not data:
                 continue
@@ -148,7 +350,7 @@ class WorldInstance:
     ) -> None:
         """加载 worlds/{wid}/mainlines/ 集合遍历。"""
         mainlines_ref = world_ref.collection("mainlines")
-        for doc in mainlines_ref.stream():
+        for doc in await run_firestore("world.mainlines", stream_docs, mainlines_ref):
             data = doc.to_dict()
             if not data:
                 continue
@@ -159,10 +361,9 @@ class WorldInstance:
         self, world_ref: firestore.DocumentReference, entity_type: str
     ) -> None:
         """加载 worlds/{wid}/combat_entities/{type} 文档中的 entries 数组。"""
-        doc = (
-            world_ref.collection("combat_entities")
-            .document(entity_type)
-            .get()
+        doc = await run_firestore(
+            "world.combat_entities",
+            world_ref.collection("combat_entities").document(entity_type).get,
         )
         if not doc.exists:
             return
@@ -256,6 +457,108 @@ class WorldInstance:
             },
         )
 
+    # ---- 上下文片段（按 version 缓存） ----
+
+    def get_world_context(self) -> StaticDict:
+        """Layer 0 世界常量上下文（共享只读，序列化结果随片段缓存）。"""
+        cached = self._context_cache.get("world")
+        if cached is None:
+            cached = self._context_cache["world"] = StaticDict(
+                self.world_constants.to_context() if self.world_constants else {}
+            )
+        return cached
+
+    def get_area_npcs_context(self, area_id: str) -> StaticList:
+        """区域内角色列表（get_characters_in_area 的共享只读缓存）。"""
+        key = f"area_npcs:{area_id}"
+        cached = self._context_cache.get(key)
+        if cached is None:
+            cached = self._context_cache[key] = StaticList(self.get_characters_in_area(area_id))
+        return cached
+
+    # ---- 二级索引 ----
+
+    def rebuild_indexes(self) -> None:
+        """由当前注册表重建全部二级索引。"""
+        self._char_rank = {char_id: rank for rank, char_id in enumerate(self.character_registry)}
+        self._char_maps = {}
+        area_members: Dict[str, List[str]] = {}
+        for char_id, char_data in self.character_registry.items():
+            maps = self._char_maps[char_id] = _character_maps(char_data)
+            for area_id in set(maps):
+                area_members.setdefault(area_id, []).append(char_id)
+        self._area_characters = {
+            area_id: [self.character_registry[c] for c in members]
+            for area_id, members in area_members.items()
+        }
+
+        self._sublocation_residents = {}
+        for area_id, area_def in self.area_registry.items():
+            for sub_loc in area_def.sub_locations:
+                residents = {c for c in sub_loc.resident_npcs if c in self._char_rank}
+                if residents:
+                    self._sublocation_residents[(area_id, sub_loc.id)] = [
+                        self.character_registry[c] for c in sorted(residents, key=self._char_rank.__getitem__)
+                    ]
+
+        # 累积列表：第 n 项为危险等级 n 可出现的怪物
+        tiers = [
+            _RATING_TIER.get(str(monster.get("challenge_rating", "")).strip().lower())
+            for monster in self.monster_registry.values()
+        ]
+        self._monsters_by_danger = [
+            [m for m, tier in zip(self.monster_registry.values(), tiers) if tier is not None and tier <= level]
+            for level in range(_MAX_DANGER + 1)
+        ]
+
+        self._skills_by_class = {}
+        for rank, skill_data in enumerate(self.skill_registry.values()):
+            for key in _skill_class_keys(skill_data):
+                self._skills_by_class.setdefault(key, []).append((rank, skill_data))
+
+        self._indexed = True
+
+    def _ensure_indexes(self) -> None:
+        if not self._indexed:
+            self.rebuild_indexes()
+
+    def update_character_state(self, character_id: str, updates: Dict[str, Any]) -> None:
+        """合并角色 state 字段；current_map 变化时增量更新区域索引。
+
+        角色所在（及离开）区域的 area_npcs 上下文片段都会失效。
+        """
+        char_data = self.character_registry.get(character_id)
+        if char_data is None:
+            return
+        self._ensure_indexes()
+        state = char_data.get("state")
+        if not isinstance(state, dict):
+            state = char_data["state"] = {}
+        state.update(updates)
+
+        old_maps = self._char_maps.get(character_id, ("", ""))
+        new_maps = _character_maps(char_data)
+        for area_id in set(old_maps) | set(new_maps):
+            self._context_cache.pop(f"area_npcs:{area_id}", None)
+        if new_maps == old_maps:
+            return
+        self._char_maps[character_id] = new_maps
+        old_areas, new_areas = set(old_maps), set(new_maps)
+        for area_id in old_areas - new_areas:
+            members = [c for c in self._area_characters.get(area_id, []) if c is not char_data]
+            if members:
+                self._area_characters[area_id] = members
+            else:
+                self._area_characters.pop(area_id, None)
+        rank = self._char_rank[character_id]
+        for area_id in new_areas - old_areas:
+            members = self._area_characters.setdefault(area_id, [])
+            # 按注册表顺序插入
+            pos = len(members)
+            while pos > 0 and self._char_rank.get(members[pos - 1].get("id", ""), -1) > rank:
+                pos -= 1
+            members.insert(pos, char_data)
+
     # ---- 查询方法 ----
 
     def get_characters_in_area(self, area_id: str) -> List[Dict[str, Any]]:
@@ -264,38 +567,15 @@ class WorldInstance:
         角色数据中 profile.metadata.default_map 或 state.current_map
         匹配 area_id 时视为在该区域内。
         """
-        result = []
-        for char_id, char_data in self.character_registry.items():
-            # 检查 profile.metadata.default_map
-            profile = char_data.get("profile", {})
-            metadata = profile.get("metadata", {}) if isinstance(profile, dict) else {}
-            default_map = metadata.get("default_map", "") if isinstance(metadata, dict) else ""
-            # 检查 state.current_map
-            state = char_data.get("state", {})
-            current_map = state.get("current_map", "") if isinstance(state, dict) else ""
-
-            if default_map == area_id or current_map == area_id:
-                result.append(char_data)
-        return result
+        self._ensure_indexes()
+        return list(self._area_characters.get(area_id, ()))
 
     def get_characters_at_sublocation(
         self, area_id: str, sub_id: str
     ) -> List[Dict[str, Any]]:
         """按子地点定义的 resident_npcs 过滤角色。"""
-        area_def = self.area_registry.get(area_id)
-        if not area_def:
-            return []
-
-        sub_loc = area_def.get_sub_location(sub_id)
-        if not sub_loc or not sub_loc.resident_npcs:
-            return []
-
-        resident_set = set(sub_loc.resident_npcs)
-        return [
-            char_data
-            for char_id, char_data in self.character_registry.items()
-            if char_id in resident_set
-        ]
+        self._ensure_indexes()
+        return list(self._sublocation_residents.get((area_id, sub_id), ()))
 
     def get_monsters_for_danger(self, danger_level: int) -> List[Dict[str, Any]]:
         """按 challenge_rating 过滤怪物。
@@ -303,46 +583,22 @@ class WorldInstance:
         challenge_rating 可能是字符串（如 "白瓷"、"黄金"）或数值，
         采用简单映射进行匹配。
         """
-        # 危险等级 → challenge_rating 映射
-        danger_to_ratings = {
-            1: {"白瓷", "porcelain", "low", "1"},
-            2: {"黑曜石", "obsidian", "钢铁", "steel", "medium", "2"},
-            3: {"青铜", "bronze", "白银", "silver", "high", "3"},
-            4: {"黄金", "gold", "白金", "platinum", "extreme", "4"},
-        }
-        allowed_ratings = set()
-        for level in range(1, danger_level + 1):
-            allowed_ratings.update(danger_to_ratings.get(level, set()))
-
-        result = []
-        for monster_data in self.monster_registry.values():
-            cr = str(monster_data.get("challenge_rating", "")).strip().lower()
-            if cr in allowed_ratings:
-                result.append(monster_data)
-        return result
+        self._ensure_indexes()
+        if danger_level < 1:
+            return []
+        return list(self._monsters_by_danger[min(danger_level, _MAX_DANGER)])
 
     def get_skills_for_classes(self, classes: List[str]) -> List[Dict[str, Any]]:
-        """按 source 过滤技能。"""
+        """按 source 过滤技能（也匹配 class/classes 字段，兼容不同数据格式）。"""
         if not classes:
             return list(self.skill_registry.values())
 
-        classes_lower = {c.lower() for c in classes}
-        result = []
-        for skill_data in self.skill_registry.values():
-            source = str(skill_data.get("source", "")).strip().lower()
-            # source 字段可能是 "warrior"、"priest" 等职业标识
-            if source in classes_lower:
-                result.append(skill_data)
-            # 也检查 class/classes 字段（兼容不同数据格式）
-            elif str(skill_data.get("class", "")).strip().lower() in classes_lower:
-                result.append(skill_data)
-            elif any(
-                c.lower() in classes_lower
-                for c in skill_data.get("classes", [])
-                if isinstance(c, str)
-            ):
-                result.append(skill_data)
-        return result
+        self._ensure_indexes()
+        matched: Dict[int, Dict[str, Any]] = {}
+        for cls in {c.lower() for c in classes}:
+            for rank, skill_data in self._skills_by_class.get(cls, ()):
+                matched[rank] = skill_data
+        return [matched[rank] for rank in sorted(matched)]
 
     def get_area_definition(self, area_id: str) -> Optional[AreaDefinition]:
         """获取区域定义。"""
@@ -0,0 +1,63 @@
+"""WorldInstance 本地快照 — 冷启动时先从本地文件恢复注册表。
+
+快照为注册表的紧凑编码（编码与原子读写见 ``app.utils.snapshot_codec``）。
+头部记录格式版本、world_id 与世界数据版本戳（``data_version``）：格式或
+world_id 不符的快照直接忽略；版本戳由 WorldInstance 在后台刷新时与
+Firestore 比对，一致则无需全量重读。
+
+Firestore 特有类型（时间戳等）写入时转为 ISO 字符串 / 字符串。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.utils.snapshot_codec import SNAPSHOT_SUFFIX, read_payload, safe_file_name, write_atomic
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_path(world_id: str, directory: Optional[str] = None) -> Path:
+    """快照文件路径（编码方式体现在扩展名中）。"""
+    name = safe_file_name(world_id)
+    return Path(directory or settings.world_snapshot_dir) / f"{name}.world.{SNAPSHOT_SUFFIX}"
+
+
+def write_snapshot(
+    world_id: str,
+    data_version: Optional[str],
+    registries: Dict[str, Any],
+    directory: Optional[str] = None,
+) -> Path:
+    """原子写入快照（阻塞，调用方放到线程中执行）。"""
+    payload = {
+        "format": SNAPSHOT_FORMAT,
+        "world_id": world_id,
+        "data_version": data_version,
+        "saved_at": time.time(),
+        "registries": registries,
+    }
+    return write_atomic(snapshot_path(world_id, directory), payload)
+
+
+def read_snapshot(world_id: str, directory: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """读取快照；文件不存在、损坏或与当前格式 / world_id 不符时返回 None。"""
+    path = snapshot_path(world_id, directory)
+    payload = read_payload(path, "世界快照")
+    if payload is None:
+        return None
+    if (
+        not isinstance(payload, dict)
+        or payload.get("format") != SNAPSHOT_FORMAT
+        or payload.get("world_id") != world_id
+        or not isinstance(payload.get("registries"), dict)
+    ):
+        logger.info("忽略不兼容的世界快照 %s", path)
+        return None
+    return payload
@@ -0,0 +1,102 @@
+"""
+Recall result memoization.
+
+同一区域内连续的对话/探索回合往往以相同或重叠的种子、相同的
+SpreadingActivationConfig 召回，每次都从零执行 spread_activation +
+extract_subgraph。这里按以下键缓存最终结果：
+- 合并图版本向量（MergedScopeGraph.version_vector，任一作用域写入即变化）
+- 归一化种子集合（激活与种子顺序、重复无关）
+- 配置键（SpreadingActivationConfig 全部字段）
+
+版本向量在任何写入后都会变化，因此不会返回过期结果；旧条目由 LRU 淘汰。
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from app.models.activation import SpreadingActivationConfig
+from app.models.graph import GraphData
+
+CacheKey = Tuple[Hashable, ...]
+CachedRecall = Tuple[Dict[str, float], Optional[GraphData]]
+
+
+def config_key(config: SpreadingActivationConfig) -> Tuple[Tuple[str, Any], ...]:
+    """Hashable key covering every activation parameter."""
+    return tuple(sorted(config.model_dump().items()))
+
+
+def make_key(
+    version_vector: Hashable,
+    seeds: Iterable[str],
+    config: SpreadingActivationConfig,
+) -> CacheKey:
+    return (version_vector, frozenset(seeds), config_key(config))
+
+
+class ActivationCache:
+    """Bounded LRU of (activated scores, subgraph) recall results."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[CacheKey, CachedRecall]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: CacheKey) -> Optional[CachedRecall]:
+        """Return a copy of the cached result; nodes/edges are shared and read-only."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        activated, subgraph = entry
+        return dict(activated), _copy_graph_data(subgraph)
+
+    def put(self, key: CacheKey, activated: Dict[str, float], subgraph: Optional[GraphData]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (dict(activated), _copy_graph_data(subgraph))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_view(self, view_id: int) -> None:
+        """Drop entries computed on a merged view that is being released."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0][0] == view_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def _copy_graph_data(graph_data: Optional[GraphData]) -> Optional[GraphData]:
+    if graph_data is None:
+        return None
+    return GraphData.model_construct(nodes=list(graph_data.nodes), edges=list(graph_data.edges))
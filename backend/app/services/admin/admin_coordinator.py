@@ -42,7 +42,8 @@ from app.models.admin_protocol import (
 from app.services.game_session_store import GameSessionStore
 from app.services.flash_service import FlashService
 from app.services.admin.event_service import AdminEventService
-from app.services.graph_store import GraphStore
+from app.services.firestore_io import run_firestore, stream_docs
+from app.services.graph_store_backend import GraphStoreBackend, create_graph_store
 from app.services.narrative_service import NarrativeService
 from app.services.passerby_service import PasserbyService
 from app.services.admin.world_runtime import AdminWorldRuntime
@@ -66,6 +67,11 @@ class AdminCoordinator:
             cls._instance = cls()
         return cls._instance
 
+    @classmethod
+    def peek_instance(cls) -> Optional["AdminCoordinator"]:
+        """返回已创建的单例，未创建时返回 None（不触发创建）。"""
+        return cls._instance
+
     @classmethod
     def reset_instance(cls) -> None:
         cls._instance = None
@@ -75,7 +81,7 @@ class AdminCoordinator:
         session_store: Optional[GameSessionStore] = None,
         state_manager: Optional[StateManager] = None,
         event_service: Optional[AdminEventService] = None,
-        graph_store: Optional[GraphStore] = None,
+        graph_store: Optional[GraphStoreBackend] = None,
         flash_service: Optional[FlashService] = None,
         narrative_service: Optional[NarrativeService] = None,
         passerby_service: Optional[PasserbyService] = None,
@@ -87,7 +93,7 @@ class AdminCoordinator:
         self._session_store = session_store or GameSessionStore()
         self._state_manager = state_manager or StateManager()
         self.event_service = event_service or AdminEventService()
-        self.graph_store = graph_store or GraphStore()
+        self.graph_store = graph_store or create_graph_store()
         self.flash_service = flash_service or FlashService(self.graph_store)
         self.narrative_service = narrative_service or NarrativeService(self._session_store)
         self.passerby_service = passerby_service or PasserbyService()
@@ -106,6 +112,11 @@ class AdminCoordinator:
             graphize_threshold=settings.instance_pool_graphize_threshold,
             keep_recent_tokens=settings.instance_pool_keep_recent_tokens,
             graph_store=self.graph_store,
+            eviction_concurrency=settings.instance_pool_eviction_concurrency,
+            eviction_queue_max=settings.instance_pool_eviction_queue_max,
+            token_budget=settings.instance_pool_token_budget or None,
+            byte_budget=settings.instance_pool_byte_budget_mb * 1024 * 1024 or None,
+            protected_ratio=settings.instance_pool_protected_ratio,
         )
 
         self.flash_cpu = flash_cpu or FlashCPUService(
@@ -143,6 +154,8 @@ class AdminCoordinator:
             max_tokens=settings.session_history_max_tokens,
             graphize_threshold=settings.session_history_graphize_threshold,
             keep_recent_tokens=settings.session_history_keep_recent_tokens,
+            # 恢复会话只加载 agentic 上下文所需的最近历史（字符上限 >= token 数），更早的按需分页
+            restore_tokens=settings.admin_agentic_history_max_chars,
         )
         self.memory_graphizer = MemoryGraphizer(graph_store=self.graph_store)
 
@@ -196,9 +209,13 @@ class AdminCoordinator:
         """
         worlds_ref = self.graph_store.db.collection("worlds")
         worlds = []
-        for doc_ref in worlds_ref.list_documents():
+        doc_refs = await run_firestore("list_worlds", lambda: list(worlds_ref.list_documents()))
+        meta_docs = await asyncio.gather(*(
+            run_firestore("list_worlds.meta", doc_ref.collection("meta").document("info").get)
+            for doc_ref in doc_refs
+        ))
+        for doc_ref, meta_doc in zip(doc_refs, meta_docs):
             world_id = doc_ref.id
-            meta_doc = doc_ref.collection("meta").document("info").get()
             meta = meta_doc.to_dict() if meta_doc.exists else {}
             if not meta:
                 continue
@@ -220,6 +237,9 @@ class AdminCoordinator:
         """获取会话聊天历史（优先内存实时数据，回退 Firestore）。"""
         in_memory = self.session_history_manager.get(world_id, session_id)
         if in_memory:
+            missing = limit - in_memory.stats["message_count"]
+            if missing > 0 and in_memory.has_older:
+                await in_memory.load_older(max_messages=missing)
             live_messages = in_memory.get_recent_messages_for_api(limit)
             if live_messages:
                 return live_messages
@@ -410,17 +430,48 @@ class AdminCoordinator:
         is_private: bool = False,
         private_target: Optional[str] = None,
     ):
-        """V4 SSE 流：复用 V4 主流程并按事件输出。"""
+        """V4 SSE 流：模型叙述增量、工具进度与队友响应实时输出。"""
         self._ensure_fixed_world(world_id)
         try:
             yield {"type": "phase", "phase": "generating"}
-            response = await self.process_player_input_v3(
+            response: Optional[CoordinatorResponse] = None
+            gm_started = False
+            pipeline = getattr(self, "_pipeline_orchestrator", None)
+            source = pipeline.process_stream if pipeline is not None else self._replay_v4_response
+            async for event in source(
                 world_id=world_id,
                 session_id=session_id,
                 player_input=player_input,
                 is_private=is_private,
                 private_target=private_target,
-            )
+            ):
+                event_type = event.get("type")
+                if event_type in ("answer", "thought"):
+                    if not gm_started:
+                        gm_started = True
+                        yield {"type": "gm_start"}
+                    yield {"type": "gm_chunk", "text": event["text"], "chunk_type": event_type}
+                elif event_type == "tool_start":
+                    yield {"type": "phase", "phase": "tool_running", "tool": event["name"]}
+                elif event_type == "tool_end":
+                    yield {
+                        "type": "phase",
+                        "phase": "tool_done",
+                        "tool": event["name"],
+                        "success": event.get("success", True),
+                        "duration_ms": event.get("duration_ms", 0),
+                    }
+                elif event_type == "narration_complete":
+                    if not gm_started:
+                        gm_started = True
+                        yield {"type": "gm_start"}
+                    yield {"type": "gm_end", "full_text": event["narration"]}
+                elif event_type == "response":
+                    response = event["response"]
+                else:
+                    # teammate_start / teammate_chunk / teammate_end / teammate_skip
+                    yield event
+
             agentic_trace = {}
             if isinstance(response.metadata, dict):
                 raw_trace = response.metadata.get("agentic_trace")
@@ -428,15 +479,6 @@ class AdminCoordinator:
                     agentic_trace = raw_trace
             if agentic_trace:
                 yield {"type": "agentic_trace", "agentic_trace": agentic_trace}
-            yield {"type": "gm_start"}
-            full_text = response.narration or ""
-            chunk_size = 120
-            for idx in range(0, len(full_text), chunk_size):
-                yield {"type": "gm_chunk", "text": full_text[idx:idx + chunk_size], "chunk_type": "answer"}
-            yield {"type": "gm_end", "full_text": full_text}
-
-            for teammate in response.teammate_responses:
-                yield {"type": "teammate_response", **teammate}
 
             yield {
                 "type": "complete",
@@ -456,6 +498,31 @@ class AdminCoordinator:
             logger.exception("[v4-stream] 处理失败: %s", exc)
             yield {"type": "error", "error": str(exc)}
 
+    async def _replay_v4_response(
+        self,
+        world_id: str,
+        session_id: str,
+        player_input: str,
+        is_private: bool = False,
+        private_target: Optional[str] = None,
+    ):
+        """无流式管线时的回退：等待完整结果后按管线事件格式分片输出。"""
+        response = await self.process_player_input_v3(
+            world_id=world_id,
+            session_id=session_id,
+            player_input=player_input,
+            is_private=is_private,
+            private_target=private_target,
+        )
+        full_text = response.narration or ""
+        chunk_size = 120
+        for idx in range(0, len(full_text), chunk_size):
+            yield {"type": "answer", "text": full_text[idx:idx + chunk_size]}
+        yield {"type": "narration_complete", "narration": full_text}
+        for teammate in response.teammate_responses:
+            yield {"type": "teammate_response", **teammate}
+        yield {"type": "response", "response": response}
+
     async def process_player_input_v2(
         self,
         world_id: str,
@@ -540,7 +607,7 @@ class AdminCoordinator:
         party = await self.party_service.get_party(world_id, session_id)
 
         # 3. 加载对话历史（自动从 Firestore 恢复）
-        history = self.session_history_manager.get_or_create(world_id, session_id)
+        history = await self.session_history_manager.get_or_create_async(world_id, session_id)
 
         # 4. 预热队友实例（恢复 state metadata）
         prewarmed_members = []
@@ -816,11 +883,13 @@ class AdminCoordinator:
             try:
                 world_ref = self.graph_store.db.collection("worlds").document(world_id)
                 # 优先读取初始化器写入的 worlds/{world_id}/meta/info
-                meta_doc = world_ref.collection("meta").document("info").get()
+                meta_doc = await run_firestore(
+                    "world_background.meta", world_ref.collection("meta").document("info").get
+                )
                 data = meta_doc.to_dict() if meta_doc.exists else {}
                 # 兼容旧数据结构（世界根文档）
                 if not data:
-                    root_doc = world_ref.get()
+                    root_doc = await run_firestore("world_background.root", world_ref.get)
                     if root_doc.exists:
                         data = root_doc.to_dict() or {}
 
@@ -875,7 +944,7 @@ class AdminCoordinator:
         entries = []
         try:
             chars_ref = self.graph_store.db.collection("worlds").document(world_id).collection("characters")
-            docs = chars_ref.stream()
+            docs = await run_firestore("roster.characters", stream_docs, chars_ref)
             for doc in docs:
                 data = doc.to_dict() or {}
                 profile = data.get("profile") if isinstance(data.get("profile"), dict) else {}
@@ -923,7 +992,7 @@ class AdminCoordinator:
         char_ids: set = set()
         try:
             chars_ref = self.graph_store.db.collection("worlds").document(world_id).collection("characters")
-            for doc in chars_ref.stream():
+            for doc in await run_firestore("roster.character_ids", stream_docs, chars_ref):
                 char_ids.add(doc.id)
         except Exception as exc:
             logger.debug("[character_id_set] Firestore 读取失败: %s", exc)
@@ -939,7 +1008,7 @@ class AdminCoordinator:
         mapping: Dict[str, str] = {}
         try:
             chapters_ref = self.graph_store.db.collection("worlds").document(world_id).collection("chapters")
-            for doc in chapters_ref.stream():
+            for doc in await run_firestore("area_chapter_map.chapters", stream_docs, chapters_ref):
                 ch_data = doc.to_dict() or {}
                 ch_id = ch_data.get("id") or doc.id
                 areas = ch_data.get("available_areas") or ch_data.get("available_maps") or []
@@ -1247,7 +1316,7 @@ class AdminCoordinator:
     ) -> str:
         """状态变更后的统一叙述（供 navigate/time/dialogue 等端点使用）"""
         context = await self._build_context(world_id, session_id)
-        history = self.session_history_manager.get_or_create(world_id, session_id)
+        history = await self.session_history_manager.get_or_create_async(world_id, session_id)
         conversation_history = history.get_recent_history(max_tokens=settings.session_history_max_tokens)
         if conversation_history:
             context["conversation_history"] = conversation_history
@@ -1393,7 +1462,7 @@ class AdminCoordinator:
         description = scene.description or ""
         if generate_description and not description:
             context = await self._build_context(world_id, session_id)
-            history = self.session_history_manager.get_or_create(world_id, session_id)
+            history = await self.session_history_manager.get_or_create_async(world_id, session_id)
             conversation_history = history.get_recent_history(max_tokens=settings.session_history_max_tokens)
             if conversation_history:
                 context["conversation_history"] = conversation_history
@@ -315,6 +315,7 @@ class AgenticToolRegistry:
                         intent_type=str(intent_type or "roleplay"),
                         chapter_id=chapter_id,
                         area_id=area_id,
+                        session_id=self.session_id,
                     ),
                     timeout=settings.admin_agentic_tool_timeout_seconds,
                 )
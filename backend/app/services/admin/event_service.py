@@ -24,7 +24,7 @@ from app.models.character_profile import CharacterProfile
 from app.services.event_bus import EventBus
 from app.services.flash_service import FlashService
 from app.services.graph_schema import GraphSchemaOptions, validate_edge, validate_node
-from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import GraphStoreBackend, create_graph_store
 
 logger = logging.getLogger(__name__)
 
@@ -34,11 +34,11 @@ class AdminEventService:
 
     def __init__(
         self,
-        graph_store: Optional[GraphStore] = None,
+        graph_store: Optional[GraphStoreBackend] = None,
         flash_service: Optional[FlashService] = None,
         event_bus: Optional[EventBus] = None,
     ) -> None:
-        self.graph_store = graph_store or GraphStore()
+        self.graph_store = graph_store or create_graph_store()
         self.flash_service = flash_service or FlashService(self.graph_store)
         self.event_bus = event_bus or EventBus()
         self._llm_service: Optional["EventLLMService"] = None
@@ -22,6 +22,7 @@ from app.models.admin_protocol import (
     ParsedIntent,
 )
 from app.models.state_delta import StateDelta
+from app.runtime.models.layered_context import dumps_context, join_context_parts
 from app.services.admin.state_manager import StateManager
 from app.services.flash_service import FlashService
 from app.services.admin.event_service import AdminEventService
@@ -608,6 +609,93 @@ class FlashCPUService:
             graph_store: GraphStore for memory/disposition tools.
             recall_orchestrator: Optional RecallOrchestrator.
         """
+        registry, request = self._prepare_agentic_v4(
+            session=session,
+            player_input=player_input,
+            context=context,
+            graph_store=graph_store,
+            recall_orchestrator=recall_orchestrator,
+        )
+        llm_resp = await self.llm_service.agentic_generate(**request)
+        return self._finish_agentic_v4(registry, llm_resp)
+
+    async def agentic_process_v4_stream(
+        self,
+        *,
+        session: Any,
+        player_input: str,
+        context: Dict[str, Any],
+        graph_store: Any,
+        recall_orchestrator: Any = None,
+    ):
+        """Streaming V4 agentic process (same tools/prompt as agentic_process_v4).
+
+        The model stream runs in a producer task so tool progress is delivered
+        while a tool is still executing, not only at the next model chunk.
+
+        Yields:
+            dict: ``thought`` / ``answer`` text deltas, ``tool_start`` / ``tool_end``
+            progress, then one ``{"type": "agentic_result", "result": AgenticResult}``.
+        """
+        stream_fn = getattr(self.llm_service, "agentic_generate_stream", None)
+        if not callable(stream_fn):
+            result = await self.agentic_process_v4(
+                session=session,
+                player_input=player_input,
+                context=context,
+                graph_store=graph_store,
+                recall_orchestrator=recall_orchestrator,
+            )
+            yield {"type": "agentic_result", "result": result}
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        registry, request = self._prepare_agentic_v4(
+            session=session,
+            player_input=player_input,
+            context=context,
+            graph_store=graph_store,
+            recall_orchestrator=recall_orchestrator,
+            event_sink=queue.put_nowait,
+        )
+        done = object()
+
+        async def _produce() -> None:
+            try:
+                async for chunk in stream_fn(**request):
+                    queue.put_nowait(chunk)
+            finally:
+                queue.put_nowait(done)
+
+        producer = asyncio.create_task(_produce())
+        llm_resp = None
+        try:
+            while True:
+                event = await queue.get()
+                if event is done:
+                    break
+                if event.get("type") == "done":
+                    llm_resp = event["response"]
+                    continue
+                yield event
+            await producer  # 透传模型/SDK 异常
+        finally:
+            if not producer.done():
+                producer.cancel()
+
+        yield {"type": "agentic_result", "result": self._finish_agentic_v4(registry, llm_resp)}
+
+    def _prepare_agentic_v4(
+        self,
+        *,
+        session: Any,
+        player_input: str,
+        context: Dict[str, Any],
+        graph_store: Any,
+        recall_orchestrator: Any = None,
+        event_sink: Any = None,
+    ) -> tuple:
+        """Build the V4 tool registry and agentic_generate kwargs."""
         from app.services.admin.v4_agentic_tools import V4AgenticToolRegistry
 
         system_prompt = self._load_agentic_prompt()
@@ -619,48 +707,50 @@ class FlashCPUService:
             graph_store=graph_store,
             recall_orchestrator=recall_orchestrator,
             image_service=self.image_service,
+            event_sink=event_sink,
         )
 
-        context_json = json.dumps(context, ensure_ascii=False, default=str)
+        # 世界常量跨回合不变：作为稳定前缀单独发送（命中隐式前缀缓存），其余为本回合上下文
+        world_context = context.get("world_context")
+        static_prefix = (
+            f"以下是世界常量(JSON)：\n{dumps_context(world_context)}" if world_context else None
+        )
+        context_parts = {
+            key: dumps_context(value) for key, value in context.items() if key != "world_context"
+        }
+        context_json = join_context_parts(context_parts)
         user_prompt = (
             "以下是分层上下文(JSON)：\n"
             f"{context_json}\n\n"
             f"玩家输入：{player_input}\n\n"
             "请先调用必要工具，再输出最终 GM 叙述。"
         )
-
-        # --- 诊断：各组件大小 (写入文件供排查) ---
-        _diag = {
-            "context_json_chars": len(context_json),
-            "system_prompt_chars": len(system_prompt),
-            "user_prompt_chars": len(user_prompt),
-            "conversation_history_chars": len(str(context.get("conversation_history", ""))),
-            "area_npcs_chars": len(json.dumps(context.get("area_context", {}).get("npcs", []), ensure_ascii=False, default=str)),
-            "area_context_chars": len(json.dumps(context.get("area_context", {}), ensure_ascii=False, default=str)),
-            "world_context_chars": len(json.dumps(context.get("world_context", {}), ensure_ascii=False, default=str)),
-            "chapter_context_chars": len(json.dumps(context.get("chapter_context", {}), ensure_ascii=False, default=str)),
-            "dynamic_state_chars": len(json.dumps(context.get("dynamic_state", {}), ensure_ascii=False, default=str)),
-        }
-        import pathlib as _pl
-        _pl.Path("/tmp/agentic_v4_diag.json").write_text(
-            json.dumps(_diag, indent=2, ensure_ascii=False), encoding="utf-8"
-        )
-        logger.warning("[agentic_v4] CONTEXT SIZE DIAG written to /tmp/agentic_v4_diag.json: total_user_prompt=%d chars", len(user_prompt))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[agentic_v4] context sizes: prefix=%d user_prompt=%d system=%d parts=%s",
+                len(static_prefix or ""), len(user_prompt), len(system_prompt),
+                {key: len(part) for key, part in context_parts.items()},
+            )
 
         tools = registry.get_tools()
         logger.info(
             "[agentic_v4] starting: model=%s tools=%d input=%.60s...",
             model_name, len(tools), player_input,
         )
-        llm_resp = await self.llm_service.agentic_generate(
-            user_prompt=user_prompt,
-            system_instruction=system_prompt,
-            tools=tools,
-            model_override=model_name,
-            thinking_level=settings.admin_flash_thinking_level,
-            max_remote_calls=settings.admin_agentic_max_remote_calls,
-        )
-        narration = (llm_resp.text or "").strip()
+        request = {
+            "user_prompt": user_prompt,
+            "system_instruction": system_prompt,
+            "tools": tools,
+            "model_override": model_name,
+            "thinking_level": settings.admin_flash_thinking_level,
+            "max_remote_calls": settings.admin_agentic_max_remote_calls,
+            "static_prefix": static_prefix,
+        }
+        return registry, request
+
+    def _finish_agentic_v4(self, registry: Any, llm_resp: Any) -> AgenticResult:
+        """Convert the final LLM response + recorded tool calls into AgenticResult."""
+        narration = (getattr(llm_resp, "text", "") or "").strip()
         logger.info(
             "[agentic_v4] done: tool_calls=%d narration_len=%d",
             len(registry.tool_calls), len(narration),
@@ -670,13 +760,15 @@ class FlashCPUService:
             narration = "（你短暂沉默，观察着周围的动静。）"
 
         finish_reason: Optional[str] = None
+        thinking = getattr(llm_resp, "thinking", None)
         usage = {
             "tool_calls": len(registry.tool_calls),
-            "thoughts_token_count": llm_resp.thinking.thoughts_token_count,
-            "output_token_count": llm_resp.thinking.output_token_count,
-            "total_token_count": llm_resp.thinking.total_token_count,
+            "thoughts_token_count": getattr(thinking, "thoughts_token_count", 0),
+            "output_token_count": getattr(thinking, "output_token_count", 0),
+            "total_token_count": getattr(thinking, "total_token_count", 0),
+            "cached_token_count": getattr(thinking, "cached_token_count", 0),
         }
-        raw = llm_resp.raw_response
+        raw = getattr(llm_resp, "raw_response", None)
         try:
             candidates = getattr(raw, "candidates", None) or []
             if candidates:
@@ -686,7 +778,7 @@ class FlashCPUService:
 
         return AgenticResult(
             narration=narration,
-            thinking_summary=(llm_resp.thinking.thoughts_summary or "").strip(),
+            thinking_summary=(getattr(thinking, "thoughts_summary", "") or "").strip(),
             tool_calls=registry.tool_calls,
             image_data=registry.image_data,
             usage=usage,
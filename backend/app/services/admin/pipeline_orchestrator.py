@@ -12,7 +12,7 @@ V4 关键变化:
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.config import settings
 from app.models.admin_protocol import AgenticResult, CoordinatorResponse
@@ -22,6 +22,18 @@ from app.runtime.session_runtime import SessionRuntime
 
 logger = logging.getLogger(__name__)
 
+# 绕过 SessionRuntime 直接写 Firestore 的工具（玩家/队伍/战斗状态）。
+# 本回合调用过这些工具时，常驻会话在回合结束后落盘并驱逐，下回合重新 restore。
+SESSION_EXTERNAL_WRITE_TOOLS = frozenset({
+    "npc_dialogue",
+    "update_time",
+    "start_combat",
+    "choose_combat_action",
+    "add_teammate",
+    "remove_teammate",
+    "disband_party",
+})
+
 
 class PipelineOrchestrator:
     """V4 管线编排器 — 比 V3 更简洁的三阶段流程。
@@ -64,25 +76,86 @@ class PipelineOrchestrator:
         private_target: Optional[str] = None,
     ) -> CoordinatorResponse:
         """V4 管线主入口。"""
+        response: Optional[CoordinatorResponse] = None
+        async for event in self._run(
+            world_id, session_id, player_input, is_private, private_target, stream=False,
+        ):
+            if event["type"] == "response":
+                response = event["response"]
+        return response
+
+    async def process_stream(
+        self,
+        world_id: str,
+        session_id: str,
+        player_input: str,
+        is_private: bool = False,
+        private_target: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """V4 管线流式入口。
+
+        Yields:
+            dict: ``thought`` / ``answer`` 叙述增量、``tool_start`` / ``tool_end``
+            工具进度、``narration_complete``、队友 ``teammate_*`` 事件，
+            最后一个 ``{"type": "response", "response": CoordinatorResponse}``。
+        """
+        async for event in self._run(
+            world_id, session_id, player_input, is_private, private_target, stream=True,
+        ):
+            yield event
+
+    async def _run(
+        self,
+        world_id: str,
+        session_id: str,
+        player_input: str,
+        is_private: bool,
+        private_target: Optional[str],
+        stream: bool,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        rt = await GameRuntime.get_instance()
+        world = await rt.get_world(world_id)
+        if self.recall_orchestrator is not None:
+            rt.add_session_evict_listener(self.recall_orchestrator.drop_session_views)
+
+        def _new_session() -> SessionRuntime:
+            return SessionRuntime(
+                world_id=world_id,
+                session_id=session_id,
+                world=world,
+                state_manager=self.state_manager,
+                party_service=self.party_service,
+                narrative_service=self.narrative_service,
+                session_history_manager=self.session_history_manager,
+                character_store=self.character_store,
+                world_runtime=self.world_runtime,
+            )
+
+        # 常驻会话：命中时跳过 restore，持久化由 GameRuntime 写回
+        async with rt.session(world_id, session_id, _new_session) as session:
+            async for event in self._process_turn(
+                session,
+                player_input=player_input,
+                is_private=is_private,
+                private_target=private_target,
+                stream=stream,
+            ):
+                yield event
+
+    async def _process_turn(
+        self,
+        session: SessionRuntime,
+        player_input: str,
+        is_private: bool,
+        private_target: Optional[str],
+        stream: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """单回合 A/B/C 三阶段（调用方持有会话锁），最后产出 ``response`` 事件。"""
 
         # =====================================================================
         # A 阶段: 上下文组装
         # =====================================================================
-        rt = await GameRuntime.get_instance()
-        world = await rt.get_world(world_id)
-
-        session = SessionRuntime(
-            world_id=world_id,
-            session_id=session_id,
-            world=world,
-            state_manager=self.state_manager,
-            party_service=self.party_service,
-            narrative_service=self.narrative_service,
-            session_history_manager=self.session_history_manager,
-            character_store=self.character_store,
-            world_runtime=self.world_runtime,
-        )
-        await session.restore()
+        world = session.world
 
         if not session.player:
             raise ValueError("请先创建角色后再开始冒险。")
@@ -133,20 +206,33 @@ class PipelineOrchestrator:
             context_dict["is_private"] = True
             context_dict["private_target"] = private_target
 
-        agentic_result: AgenticResult = await self.flash_cpu.agentic_process_v4(
+        agentic_kwargs = dict(
             session=session,
             player_input=player_input,
             context=context_dict,
             graph_store=self.graph_store,
             recall_orchestrator=self.recall_orchestrator,
         )
+        agentic_result: Optional[AgenticResult] = None
+        if stream:
+            async for event in self.flash_cpu.agentic_process_v4_stream(**agentic_kwargs):
+                if event["type"] == "agentic_result":
+                    agentic_result = event["result"]
+                else:
+                    yield event
+        else:
+            agentic_result = await self.flash_cpu.agentic_process_v4(**agentic_kwargs)
         gm_narration = agentic_result.narration
+        if stream:
+            yield {"type": "narration_complete", "narration": gm_narration}
 
         logger.info(
             "[v4] agentic 完成: tools=%d narration_len=%d",
             len(agentic_result.tool_calls),
             len(gm_narration),
         )
+        if any(call.name in SESSION_EXTERNAL_WRITE_TOOLS for call in agentic_result.tool_calls):
+            session.mark_stale()
 
         # =====================================================================
         # C 阶段: 后处理
@@ -189,20 +275,36 @@ class PipelineOrchestrator:
         party = session.party
         teammate_responses: List[Dict[str, Any]] = []
         if party and party.get_active_members():
-            teammate_result = await self.teammate_response_service.process_round(
-                party=party,
-                player_input=player_input,
-                gm_response=gm_narration,
-                context=context_dict,
-            )
-            for r in teammate_result.responses:
-                if r.response:
-                    teammate_responses.append({
-                        "character_id": r.character_id,
-                        "name": r.name,
-                        "response": r.response,
-                        "reaction": r.reaction,
-                    })
+            if stream:
+                async for event in self.teammate_response_service.process_round_stream(
+                    party=party,
+                    player_input=player_input,
+                    gm_response=gm_narration,
+                    context=context_dict,
+                ):
+                    yield event
+                    if event.get("type") == "teammate_end" and event.get("response"):
+                        teammate_responses.append({
+                            "character_id": event["character_id"],
+                            "name": event["name"],
+                            "response": event["response"],
+                            "reaction": event.get("reaction", ""),
+                        })
+            else:
+                teammate_result = await self.teammate_response_service.process_round(
+                    party=party,
+                    player_input=player_input,
+                    gm_response=gm_narration,
+                    context=context_dict,
+                )
+                for r in teammate_result.responses:
+                    if r.response:
+                        teammate_responses.append({
+                            "character_id": r.character_id,
+                            "name": r.name,
+                            "response": r.response,
+                            "reaction": r.reaction,
+                        })
 
         # 历史记录
         if session.history:
@@ -222,8 +324,7 @@ class PipelineOrchestrator:
                     response=t["response"],
                 )
 
-        # 统一持久化
-        await session.persist()
+        # 统一持久化：由 GameRuntime 会话缓存写回（驱逐/关闭时强制落盘）
 
         # 合并所有事件 ID
         all_event_ids: List[str] = []
@@ -233,7 +334,7 @@ class PipelineOrchestrator:
                 all_event_ids.append(u.event.id)
                 seen.add(u.event.id)
 
-        return CoordinatorResponse(
+        response = CoordinatorResponse(
             narration=gm_narration,
             speaker="GM",
             teammate_responses=teammate_responses,
@@ -251,3 +352,4 @@ class PipelineOrchestrator:
             story_events=all_event_ids,
             image_data=agentic_result.image_data,
         )
+        yield {"type": "response", "response": response}
@@ -5,12 +5,16 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections import OrderedDict
 from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from app.config import settings
 from app.models.activation import SpreadingActivationConfig
 from app.models.flash import RecallResponse
+from app.models.graph import GraphData, MemoryEdge
 from app.models.graph_scope import GraphScope
-from app.services.memory_graph import MemoryGraph
+from app.services.activation_cache import ActivationCache, make_key
+from app.services.merged_scope_graph import MergedScopeGraph
 from app.services.spreading_activation import extract_subgraph, spread_activation
 
 logger = logging.getLogger(__name__)
@@ -45,6 +49,66 @@ class RecallOrchestrator:
         self.graph_store = graph_store
         self._get_character_id_set = get_character_id_set
         self._get_area_chapter_map = get_area_chapter_map
+        # 会话级合并图（增量维护，LRU）
+        self._merged_views: "OrderedDict[Tuple[str, str, str, str], MergedScopeGraph]" = OrderedDict()
+        self.max_merged_views = settings.recall_merged_view_max
+        # 召回结果缓存（按合并图版本向量 + 种子集合 + 配置）
+        self.activation_cache = ActivationCache(settings.recall_activation_cache_max)
+
+    def _get_merged_view(
+        self,
+        mode: str,
+        world_id: str,
+        character_id: str,
+        session_id: Optional[str],
+    ) -> MergedScopeGraph:
+        key = (mode, world_id, session_id or "", character_id)
+        view = self._merged_views.get(key)
+        if view is None:
+            view = MergedScopeGraph()
+            self._merged_views[key] = view
+            while len(self._merged_views) > self.max_merged_views:
+                _, evicted = self._merged_views.popitem(last=False)
+                self.activation_cache.invalidate_view(evicted.view_id)
+        else:
+            self._merged_views.move_to_end(key)
+        return view
+
+    def drop_session_views(self, world_id: str, session_id: str) -> None:
+        """Release merged views held for a session."""
+        for key in [k for k in self._merged_views if k[1] == world_id and k[2] == session_id]:
+            view = self._merged_views.pop(key, None)
+            if view is not None:
+                self.activation_cache.invalidate_view(view.view_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "merged_views": len(self._merged_views),
+            "activation_cache": self.activation_cache.get_stats(),
+        }
+
+    def _activate(
+        self,
+        view: MergedScopeGraph,
+        seeds: List[str],
+        config: SpreadingActivationConfig,
+    ) -> Tuple[Dict[str, float], GraphData]:
+        """spread_activation + extract_subgraph, memoized on the view's version vector."""
+        key = make_key(view.version_vector(), seeds, config)
+        cached = self.activation_cache.get(key)
+        if cached is not None:
+            return cached
+
+        merged = view.graph
+        activated = spread_activation(merged, seeds, config)
+        subgraph = extract_subgraph(merged, activated).to_graph_data()
+        subgraph.nodes = [
+            node
+            for node in subgraph.nodes
+            if not (node.properties or {}).get("placeholder", False)
+        ]
+        self.activation_cache.put(key, activated, subgraph)
+        return activated, subgraph
 
     async def recall(
         self,
@@ -55,6 +119,7 @@ class RecallOrchestrator:
         intent_type: Optional[str] = None,
         chapter_id: Optional[str] = None,
         area_id: Optional[str] = None,
+        session_id: Optional[str] = None,
     ) -> RecallResponse:
         """Recall memory by merging multi-scope graphs and running activation."""
         recall_cfg = self.RECALL_CONFIGS.get(intent_type or "", {})
@@ -154,14 +219,18 @@ class RecallOrchestrator:
         if len(loaded_chars) > 1:
             logger.info("[recall] loaded %d extra character scopes: %s", len(loaded_chars) - 1, loaded_chars - {character_id})
 
-        merged = MemoryGraph.from_multi_scope(scoped_data)
-        await self._inject_disposition_edges(world_id, character_id, merged)
+        disposition_edges = await self._load_disposition_edges(world_id, character_id)
+        view = self._get_merged_view("recall", world_id, character_id, session_id)
+        view.sync(scoped_data)
+        view.set_overlay_edges(disposition_edges)
+        merged = view.graph
 
         logger.info(
-            "[recall] merged scopes=%d nodes=%d edges=%d",
+            "[recall] merged scopes=%d nodes=%d edges=%d version=%d",
             len(scoped_data),
             len(merged.graph.nodes),
             len(merged.graph.edges),
+            view.version,
         )
 
         expanded_seeds: List[str] = []
@@ -188,14 +257,7 @@ class RecallOrchestrator:
                 used_subgraph=False,
             )
 
-        activated = spread_activation(merged, valid_seeds, config)
-        subgraph_graph = extract_subgraph(merged, activated)
-        subgraph = subgraph_graph.to_graph_data()
-        subgraph.nodes = [
-            node
-            for node in subgraph.nodes
-            if not (node.properties or {}).get("placeholder", False)
-        ]
+        activated, subgraph = self._activate(view, valid_seeds, config)
 
         return RecallResponse(
             seed_nodes=seed_nodes,
@@ -213,6 +275,7 @@ class RecallOrchestrator:
         intent_type: Optional[str] = None,
         chapter_id: Optional[str] = None,
         area_id: Optional[str] = None,
+        session_id: Optional[str] = None,
     ) -> RecallResponse:
         """V4 简化记忆召回 — 仅 area + character 两个作用域。
 
@@ -248,14 +311,18 @@ class RecallOrchestrator:
                 continue
             scoped_data.append((scope, result))
 
-        merged = MemoryGraph.from_multi_scope(scoped_data)
-        await self._inject_disposition_edges(world_id, character_id, merged)
+        disposition_edges = await self._load_disposition_edges(world_id, character_id)
+        view = self._get_merged_view("recall_v4", world_id, character_id, session_id)
+        view.sync(scoped_data)
+        view.set_overlay_edges(disposition_edges)
+        merged = view.graph
 
         logger.info(
-            "[recall_v4] merged scopes=%d nodes=%d edges=%d",
+            "[recall_v4] merged scopes=%d nodes=%d edges=%d version=%d",
             len(scoped_data),
             len(merged.graph.nodes),
             len(merged.graph.edges),
+            view.version,
         )
 
         # 扩展种子节点（复用 recall 逻辑）
@@ -283,14 +350,7 @@ class RecallOrchestrator:
                 used_subgraph=False,
             )
 
-        activated = spread_activation(merged, valid_seeds, config)
-        subgraph_graph = extract_subgraph(merged, activated)
-        subgraph = subgraph_graph.to_graph_data()
-        subgraph.nodes = [
-            node
-            for node in subgraph.nodes
-            if not (node.properties or {}).get("placeholder", False)
-        ]
+        activated, subgraph = self._activate(view, valid_seeds, config)
 
         return RecallResponse(
             seed_nodes=seed_nodes,
@@ -299,38 +359,37 @@ class RecallOrchestrator:
             used_subgraph=True,
         )
 
-    async def _inject_disposition_edges(
+    async def _load_disposition_edges(
         self,
         world_id: str,
         character_id: str,
-        graph: MemoryGraph,
-    ) -> None:
-        """Inject approves edges based on Firestore dispositions."""
-        from app.models.graph import MemoryEdge
+    ) -> List[MemoryEdge]:
+        """Build approves edges from Firestore dispositions.
 
+        Edges are applied as a low-priority overlay on the merged view: they are
+        only realized when both endpoints exist and no scope edge shares the id.
+        """
         dispositions = await self.graph_store.get_all_dispositions(world_id, character_id)
         char_node_id = f"character_{character_id}" if not character_id.startswith("character_") else character_id
 
+        edges: List[MemoryEdge] = []
         for target_id, disp_data in dispositions.items():
             target_node_id = f"character_{target_id}" if not target_id.startswith("character_") else target_id
-            if not graph.has_node(char_node_id) or not graph.has_node(target_node_id):
-                continue
             approval = disp_data.get("approval", 0)
             weight = (approval + 100) / 200.0
             weight = max(0.0, min(1.0, weight))
-            edge_id = f"disposition_{character_id}_{target_id}_approves"
-            if not graph.has_edge(edge_id):
-                graph.add_edge(
-                    MemoryEdge(
-                        id=edge_id,
-                        source=char_node_id,
-                        target=target_node_id,
-                        relation="approves",
-                        weight=weight,
-                        properties={
-                            "created_by": "disposition",
-                            "approval": approval,
-                            "trust": disp_data.get("trust", 0),
-                        },
-                    )
+            edges.append(
+                MemoryEdge(
+                    id=f"disposition_{character_id}_{target_id}_approves",
+                    source=char_node_id,
+                    target=target_node_id,
+                    relation="approves",
+                    weight=weight,
+                    properties={
+                        "created_by": "disposition",
+                        "approval": approval,
+                        "trust": disp_data.get("trust", 0),
+                    },
                 )
+            )
+        return edges
@@ -15,7 +15,7 @@ import logging
 import time
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from app.config import settings
 from app.models.admin_protocol import AgenticToolCall
@@ -37,6 +37,7 @@ class V4AgenticToolRegistry:
         graph_store: Any,       # GraphStore (for memory/disposition)
         recall_orchestrator: Optional[Any] = None,
         image_service: Optional[ImageGenerationService] = None,
+        event_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
     ) -> None:
         self.session = session
         self.flash_cpu = flash_cpu
@@ -49,6 +50,8 @@ class V4AgenticToolRegistry:
 
         self._lock = asyncio.Lock()
         self._image_generated_this_turn = False
+        # 流式管线的工具进度回调（tool_start / tool_end）
+        self._event_sink = event_sink
 
     # Convenience accessors
     @property
@@ -81,6 +84,7 @@ class V4AgenticToolRegistry:
         @functools.wraps(tool_fn)
         async def wrapper(**kwargs):
             started = time.perf_counter()
+            registry._emit({"type": "tool_start", "name": tool_fn.__name__, "args": kwargs})
             try:
                 return await tool_fn(**kwargs)
             except TypeError as exc:
@@ -192,6 +196,21 @@ class V4AgenticToolRegistry:
         )
         async with self._lock:
             self.tool_calls.append(call)
+        self._emit({
+            "type": "tool_end",
+            "name": name,
+            "success": success,
+            "duration_ms": duration_ms,
+            "error": error,
+        })
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        if self._event_sink is None:
+            return
+        try:
+            self._event_sink(event)
+        except Exception as exc:
+            logger.debug("[agentic] event sink failed: %s", exc)
 
     async def _timed(self, name: str, args: Dict[str, Any], coro) -> Dict[str, Any]:
         """Execute coroutine with timing, recording, and error handling."""
@@ -357,6 +376,7 @@ class V4AgenticToolRegistry:
                         intent_type="roleplay",
                         chapter_id=chapter_id,
                         area_id=area_id,
+                        session_id=self.session_id,
                     ),
                     timeout=settings.admin_agentic_tool_timeout_seconds,
                 )
@@ -2,19 +2,18 @@
 Context Window Service.
 
 200K 上下文窗口管理器，负责：
-- Token 计数（使用 tiktoken）
+- Token 计数（使用共享 tiktoken 编码器，见 token_counter）
 - 消息管理
 - 满载检测与图谱化触发
+
+消息按追加顺序存放，另维护 id -> 下标索引、token 前缀和（"最近 N token"
+用二分查找定位）以及已图谱化消息的区段列表；移除已图谱化的前缀只移动
+起始下标，不重建列表。
 """
 import uuid
+from bisect import bisect_left
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-try:
-    import tiktoken
-    _TIKTOKEN_AVAILABLE = True
-except ImportError:
-    _TIKTOKEN_AVAILABLE = False
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from app.models.context_window import (
     AddMessageResult,
@@ -25,34 +24,12 @@ from app.models.context_window import (
     WindowMessage,
 )
 from app.models.npc_instance import GraphizeTrigger
+from app.services.token_counter import count_tokens, count_tokens_batch
 
+# 已移除前缀超过此长度且占一半以上时压缩存储
+_COMPACT_MIN = 1024
 
-def count_tokens(text: str) -> int:
-    """
-    计算文本的 token 数
-
-    Args:
-        text: 输入文本
-
-    Returns:
-        token 数量
-    """
-    if not text:
-        return 0
-
-    if _TIKTOKEN_AVAILABLE:
-        try:
-            encoding = tiktoken.get_encoding("cl100k_base")
-            return len(encoding.encode(text))
-        except Exception:
-            pass
-
-    # 降级：按字符估算
-    # 中文约 2 字符 = 1 token，英文约 4 字符 = 1 token
-    # 使用保守估计
-    chinese_count = sum(1 for c in text if '\u4e00' <= c <= '\u9fff')
-    other_count = len(text) - chinese_count
-    return chinese_count // 2 + other_count // 4 + 1
+Segment = Tuple[int, int]
 
 
 class ContextWindow:
@@ -93,6 +70,10 @@ class ContextWindow:
 
         # 状态
         self._messages: List[WindowMessage] = []
+        self._head: int = 0  # 第一条未移除消息的下标
+        self._index: Dict[str, int] = {}
+        self._prefix: List[int] = [0]  # _prefix[i] = 前 i 条消息的 token 和
+        self._graphized: List[Segment] = []  # 已图谱化未移除的 [start, end) 区段
         self._current_tokens: int = 0
         self._system_prompt_tokens: int = 0
         self._system_prompt: str = ""
@@ -132,12 +113,12 @@ class ContextWindow:
     @property
     def message_count(self) -> int:
         """消息数量"""
-        return len(self._messages)
+        return len(self._messages) - self._head
 
     @property
     def messages(self) -> List[WindowMessage]:
         """获取消息列表的副本"""
-        return self._messages.copy()
+        return self._messages[self._head:]
 
     # ==================== 系统提示词 ====================
 
@@ -199,7 +180,7 @@ class ContextWindow:
         )
 
         # 添加到列表
-        self._messages.append(message)
+        self._append(message)
         self._current_tokens += token_count
         self._total_messages_processed += 1
         self._updated_at = datetime.now()
@@ -220,20 +201,82 @@ class ContextWindow:
             messages_to_graphize_count=messages_to_graphize_count,
         )
 
+    def add_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """
+        批量添加消息（恢复历史等场景），token 一次性批量计数
+
+        Args:
+            messages: 消息字典列表，包含 role / content，可选 id / metadata
+
+        Returns:
+            添加的消息数
+        """
+        built = self._build_messages(messages)
+        for message in built:
+            self._append(message)
+            self._current_tokens += message.token_count
+        self._total_messages_processed += len(built)
+        if built:
+            self._updated_at = datetime.now()
+        return len(built)
+
+    def prepend_messages(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """
+        在最早的消息之前插入更早的历史（按需分页加载旧历史）
+
+        Args:
+            messages: 消息字典列表（按时间正序），格式同 add_messages
+
+        Returns:
+            插入的消息数
+        """
+        built = self._build_messages(messages)
+        if not built:
+            return 0
+        self._reset_storage(built + self._messages[self._head:])
+        self._current_tokens += sum(message.token_count for message in built)
+        self._total_messages_processed += len(built)
+        self._updated_at = datetime.now()
+        return len(built)
+
+    def _build_messages(self, messages: Iterable[Dict[str, Any]]) -> List[WindowMessage]:
+        items = [item for item in messages if item.get("content")]
+        if not items:
+            return []
+        token_counts = count_tokens_batch([item["content"] for item in items])
+        now = datetime.now()
+        return [
+            WindowMessage(
+                id=item.get("id") or f"msg_{uuid.uuid4().hex[:12]}",
+                role=item.get("role", "system"),
+                content=item["content"],
+                timestamp=now,
+                token_count=token_count,
+                metadata=item.get("metadata") or {},
+            )
+            for item, token_count in zip(items, token_counts)
+        ]
+
     def get_message(self, message_id: str) -> Optional[WindowMessage]:
         """根据 ID 获取消息"""
-        for msg in self._messages:
-            if msg.id == message_id:
-                return msg
-        return None
+        index = self._index.get(message_id)
+        if index is None or index < self._head:
+            return None
+        return self._messages[index]
 
     def get_recent_messages(self, count: int) -> List[WindowMessage]:
         """获取最近 N 条消息"""
-        return self._messages[-count:] if count > 0 else []
+        if count <= 0:
+            return []
+        return self._messages[max(self._head, len(self._messages) - count):]
+
+    def get_recent_by_tokens(self, max_tokens: int) -> List[WindowMessage]:
+        """获取总 token 不超过 max_tokens 的最近连续消息（按时间正序）"""
+        return self._messages[self._tail_start(max_tokens):]
 
     def get_all_messages(self) -> List[WindowMessage]:
         """获取所有消息"""
-        return self._messages.copy()
+        return self._messages[self._head:]
 
     # ==================== 图谱化触发 ====================
 
@@ -267,28 +310,17 @@ class ContextWindow:
 
         策略：保留最近 keep_recent_tokens 的消息，其余图谱化
         """
-        if not self._messages:
-            return []
-
-        # 从最新消息往前累计，找到要保留的消息
-        keep_messages = []
-        accumulated_tokens = 0
-
-        for msg in reversed(self._messages):
-            if accumulated_tokens + msg.token_count > self.keep_recent_tokens:
+        # 最近 keep_recent_tokens 的连续消息保留，其余（跳过已图谱化区段）图谱化
+        keep_start = self._tail_start(self.keep_recent_tokens)
+        to_graphize: List[WindowMessage] = []
+        cursor = self._head
+        for start, end in self._graphized:
+            if start >= keep_start:
                 break
-            keep_messages.insert(0, msg)
-            accumulated_tokens += msg.token_count
-
-        # 要保留的消息 ID 集合
-        keep_ids = {msg.id for msg in keep_messages}
-
-        # 其余消息需要图谱化（排除已图谱化的）
-        to_graphize = [
-            msg for msg in self._messages
-            if msg.id not in keep_ids and not msg.is_graphized
-        ]
-
+            to_graphize.extend(self._messages[cursor:start])
+            cursor = max(cursor, end)
+        if cursor < keep_start:
+            to_graphize.extend(self._messages[cursor:keep_start])
         return to_graphize
 
     def get_graphize_request(
@@ -328,13 +360,20 @@ class ContextWindow:
             message_ids: 已图谱化的消息 ID 列表
         """
         graphized_at = datetime.now()
-        message_id_set = set(message_ids)
-
-        for msg in self._messages:
-            if msg.id in message_id_set:
-                msg.is_graphized = True
-                msg.graphized_at = graphized_at
-
+        positions = []
+        for message_id in set(message_ids):
+            index = self._index.get(message_id)
+            if index is None or index < self._head:
+                continue
+            msg = self._messages[index]
+            if msg.is_graphized:
+                continue
+            msg.is_graphized = True
+            msg.graphized_at = graphized_at
+            positions.append(index)
+
+        if positions:
+            self._graphized = _merge_segments(self._graphized, _segments(sorted(positions)))
         self._updated_at = datetime.now()
 
     def remove_graphized_messages(self) -> RemoveGraphizedResult:
@@ -344,10 +383,8 @@ class ContextWindow:
         Returns:
             RemoveGraphizedResult 包含移除结果
         """
-        # 找出要移除的消息
-        to_remove = [msg for msg in self._messages if msg.is_graphized]
-
-        if not to_remove:
+        segments = self._graphized
+        if not segments:
             return RemoveGraphizedResult(
                 removed_count=0,
                 tokens_freed=0,
@@ -356,16 +393,31 @@ class ContextWindow:
             )
 
         # 计算释放的 token 数
-        tokens_freed = sum(msg.token_count for msg in to_remove)
+        removed_count = sum(end - start for start, end in segments)
+        tokens_freed = sum(self._prefix[end] - self._prefix[start] for start, end in segments)
+
+        # 移除消息：开头的区段只移动起始下标，中间的区段才需要重建
+        self._graphized = []
+        if segments[0][0] == self._head:
+            self._head = segments[0][1]
+            segments = segments[1:]
+        if segments:
+            kept: List[WindowMessage] = []
+            cursor = self._head
+            for start, end in segments:
+                kept.extend(self._messages[cursor:start])
+                cursor = end
+            kept.extend(self._messages[cursor:])
+            self._reset_storage(kept)
+        elif self._head >= _COMPACT_MIN and self._head * 2 >= len(self._messages):
+            self._reset_storage(self._messages[self._head:])
 
-        # 移除消息
-        self._messages = [msg for msg in self._messages if not msg.is_graphized]
         self._current_tokens -= tokens_freed
-        self._total_messages_graphized += len(to_remove)
+        self._total_messages_graphized += removed_count
         self._updated_at = datetime.now()
 
         return RemoveGraphizedResult(
-            removed_count=len(to_remove),
+            removed_count=removed_count,
             tokens_freed=tokens_freed,
             current_tokens=self.current_tokens,
             usage_ratio=self.usage_ratio,
@@ -390,7 +442,7 @@ class ContextWindow:
             })
 
         # 添加对话消息
-        for msg in self._messages:
+        for msg in self._messages[self._head:]:
             messages.append({
                 "role": msg.role,
                 "content": msg.content,
@@ -431,7 +483,7 @@ class ContextWindow:
             })
 
         # 添加对话消息
-        for msg in self._messages:
+        for msg in self._messages[self._head:]:
             messages.append({
                 "role": msg.role,
                 "content": msg.content,
@@ -451,7 +503,7 @@ class ContextWindow:
             keep_recent_tokens=self.keep_recent_tokens,
             current_tokens=self._current_tokens,
             system_prompt_tokens=self._system_prompt_tokens,
-            messages=self._messages.copy(),
+            messages=self._messages[self._head:],
             total_messages_processed=self._total_messages_processed,
             total_messages_graphized=self._total_messages_graphized,
             created_at=self._created_at,
@@ -468,8 +520,8 @@ class ContextWindow:
             keep_recent_tokens=self.keep_recent_tokens,
             current_tokens=self._current_tokens,
             system_prompt_tokens=self._system_prompt_tokens,
-            message_count=len(self._messages),
-            message_ids=[msg.id for msg in self._messages],
+            message_count=self.message_count,
+            message_ids=[msg.id for msg in self._messages[self._head:]],
             total_messages_processed=self._total_messages_processed,
             total_messages_graphized=self._total_messages_graphized,
         )
@@ -484,7 +536,7 @@ class ContextWindow:
             graphize_threshold=state.graphize_threshold,
             keep_recent_tokens=state.keep_recent_tokens,
         )
-        window._messages = state.messages.copy()
+        window._reset_storage(state.messages)
         window._current_tokens = state.current_tokens
         window._system_prompt_tokens = state.system_prompt_tokens
         window._total_messages_processed = state.total_messages_processed
@@ -493,6 +545,30 @@ class ContextWindow:
         window._updated_at = state.updated_at
         return window
 
+    # ==================== 存储（内部） ====================
+
+    def _append(self, message: WindowMessage) -> None:
+        self._index[message.id] = len(self._messages)
+        self._messages.append(message)
+        self._prefix.append(self._prefix[-1] + message.token_count)
+
+    def _reset_storage(self, messages: List[WindowMessage]) -> None:
+        """按给定消息重建索引、token 前缀和与已图谱化区段"""
+        self._messages = []
+        self._head = 0
+        self._index = {}
+        self._prefix = [0]
+        for message in messages:
+            self._append(message)
+        self._graphized = _segments(
+            [i for i, msg in enumerate(self._messages) if msg.is_graphized]
+        )
+
+    def _tail_start(self, max_tokens: int) -> int:
+        """token 总和不超过 max_tokens 的最近连续消息的起始下标"""
+        end = len(self._messages)
+        return bisect_left(self._prefix, self._prefix[end] - max_tokens, self._head, end + 1)
+
     # ==================== 统计信息 ====================
 
     def get_stats(self) -> Dict[str, Any]:
@@ -517,3 +593,25 @@ class ContextWindow:
             f"tokens={self.current_tokens}/{self.max_tokens}, "
             f"messages={self.message_count})"
         )
+
+
+def _segments(positions: List[int]) -> List[Segment]:
+    """有序下标 -> 连续 [start, end) 区段"""
+    segments: List[Segment] = []
+    for index in positions:
+        if segments and segments[-1][1] == index:
+            segments[-1] = (segments[-1][0], index + 1)
+        else:
+            segments.append((index, index + 1))
+    return segments
+
+
+def _merge_segments(left: List[Segment], right: List[Segment]) -> List[Segment]:
+    """合并两组有序区段，相邻或重叠的区段合并为一段"""
+    merged: List[Segment] = []
+    for start, end in sorted(left + right):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
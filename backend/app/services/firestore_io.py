@@ -0,0 +1,164 @@
+"""
+Firestore I/O offload layer.
+
+google-cloud-firestore 的同步 Client 在 ``async def`` 中直接调用会阻塞事件循环，
+``asyncio.gather`` 也就无法真正重叠多个读。这里把阻塞调用放进一个有界线程池：
+- ``run(op, fn, *args)`` 在线程池中执行 ``fn``，事件循环只等待结果
+- 线程数有上限，慢读不会无限占用线程，也不会饿死其他请求
+- 按操作名统计次数、错误、排队等待与执行耗时（p50/p95/max）
+
+沿用同步 Client（而非 AsyncClient），所有调用方与测试中的 fake client 保持不变。
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+_TIMING_WINDOW = 256
+
+
+@dataclass
+class _OpStats:
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    # (queue_wait_ms, exec_ms)
+    recent: Deque[Tuple[float, float]] = field(default_factory=lambda: deque(maxlen=_TIMING_WINDOW))
+
+
+def _percentile(values: list, ratio: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[int(round((len(ordered) - 1) * ratio))], 2)
+
+
+class FirestoreIO:
+    """Bounded thread-pool executor for blocking Firestore calls, with per-op latency stats."""
+
+    def __init__(self, max_workers: int = 16, enabled: bool = True) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.enabled = enabled
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats: Dict[str, _OpStats] = {}
+        self._in_flight = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="firestore-io",
+                    )
+        return self._executor
+
+    async def run(self, op: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking Firestore callable off the event loop and record its latency under ``op``."""
+        submitted = time.perf_counter()
+        if not self.enabled:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self._record(op, 0.0, (time.perf_counter() - submitted) * 1000, failed=True)
+                raise
+            self._record(op, 0.0, (time.perf_counter() - submitted) * 1000, failed=False)
+            return result
+
+        timing: Dict[str, float] = {}
+
+        def _call() -> T:
+            timing["started"] = time.perf_counter()
+            return fn(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        failed = True
+        try:
+            result = await loop.run_in_executor(self._get_executor(), _call)
+            failed = False
+            return result
+        finally:
+            self._in_flight -= 1
+            finished = time.perf_counter()
+            started = timing.get("started", finished)
+            self._record(op, (started - submitted) * 1000, (finished - started) * 1000, failed=failed)
+
+    def _record(self, op: str, queue_wait_ms: float, exec_ms: float, *, failed: bool) -> None:
+        stats = self._stats.get(op)
+        if stats is None:
+            stats = self._stats[op] = _OpStats()
+        stats.calls += 1
+        if failed:
+            stats.errors += 1
+        stats.total_ms += exec_ms
+        stats.max_ms = max(stats.max_ms, exec_ms)
+        stats.recent.append((queue_wait_ms, exec_ms))
+
+    def get_stats(self) -> Dict[str, Any]:
+        ops: Dict[str, Any] = {}
+        for op, stats in sorted(self._stats.items()):
+            waits = [wait for wait, _ in stats.recent]
+            execs = [elapsed for _, elapsed in stats.recent]
+            ops[op] = {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "avg_ms": round(stats.total_ms / stats.calls, 2) if stats.calls else 0.0,
+                "max_ms": round(stats.max_ms, 2),
+                "p50_ms": _percentile(execs, 0.50),
+                "p95_ms": _percentile(execs, 0.95),
+                "queue_wait_p95_ms": _percentile(waits, 0.95),
+            }
+        return {
+            "enabled": self.enabled,
+            "max_workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "ops": ops,
+        }
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
+
+    def shutdown(self) -> None:
+        executor = self._executor
+        self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def stream_docs(query: Any) -> list:
+    """Materialize ``query.stream()``; blocking, meant to be passed to ``run``."""
+    return list(query.stream())
+
+
+_shared_io: Optional[FirestoreIO] = None
+_shared_io_lock = threading.Lock()
+
+
+def get_firestore_io() -> FirestoreIO:
+    """Process-wide Firestore I/O layer shared by GraphStore and runtime loaders."""
+    global _shared_io
+    if _shared_io is None:
+        with _shared_io_lock:
+            if _shared_io is None:
+                _shared_io = FirestoreIO(
+                    max_workers=settings.firestore_io_max_workers,
+                    enabled=settings.firestore_io_offload_enabled,
+                )
+    return _shared_io
+
+
+async def run_firestore(op: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Shorthand for ``get_firestore_io().run(...)``."""
+    return await get_firestore_io().run(op, fn, *args, **kwargs)
@@ -22,8 +22,9 @@ from app.models.flash import (
 from app.models.graph import MemoryEdge, MemoryNode
 from app.models.graph_scope import GraphScope
 from app.models.character_profile import CharacterProfile
+from app.runtime.game_runtime import GameRuntime
 from app.services.graph_schema import GraphSchemaOptions, validate_edge, validate_node
-from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import GraphStoreBackend, create_graph_store
 from app.services.memory_graph import MemoryGraph
 from app.services.reference_resolver import ReferenceResolver
 from app.services.spreading_activation import (
@@ -38,10 +39,10 @@ class FlashService:
 
     def __init__(
         self,
-        graph_store: Optional[GraphStore] = None,
+        graph_store: Optional[GraphStoreBackend] = None,
         reference_resolver: Optional[ReferenceResolver] = None,
     ) -> None:
-        self.graph_store = graph_store or GraphStore()
+        self.graph_store = graph_store or create_graph_store()
         self.reference_resolver = reference_resolver or ReferenceResolver(self.graph_store)
         self._llm_service: Optional["FlashLLMService"] = None
 
@@ -114,6 +115,11 @@ class FlashService:
                 request.state_updates,
             )
             state_updated = True
+            # 已加载的 WorldInstance 同步更新（current_map 变化时增量维护区域索引）
+            runtime = GameRuntime.peek_instance()
+            world = runtime.get_world_cached(world_id) if runtime is not None else None
+            if world is not None:
+                world.update_character_state(character_id, request.state_updates)
 
         note = None
         if node_count == 0 and edge_count == 0:
@@ -13,22 +13,67 @@ v2 新增（GraphScope 统一寻址）：
 - dispositions: 好感度 (worlds/{wid}/characters/{cid}/dispositions/{tid})
 - choices: 选择后果 (worlds/{wid}/choices/{choice_id})
 """
+import asyncio
+import random
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
 
+from google.api_core import exceptions as gcp_exceptions
 from google.cloud import firestore
 
 from app.config import settings
 from app.models.graph import GraphData, MemoryEdge, MemoryNode
 from app.models.graph_scope import GraphScope
+from app.services.firestore_io import get_firestore_io, stream_docs
+from app.services.graph_store_backend import GraphStoreBackend, ProgressCallback
 from app.services.memory_graph import MemoryGraph
+from app.services.scope_graph_cache import ScopeGraphCache, get_scope_graph_cache
 
+T = TypeVar("T")
+WriteOp = Tuple[firestore.DocumentReference, dict, bool]
 
-class GraphStore:
-    """Graph storage service."""
+# Firestore 单批上限 500 条写入，留出余量
+_BATCH_SIZE = 450
+_COMMIT_RETRY_BASE_DELAY = 0.5
+_RETRYABLE_COMMIT_ERRORS = (
+    gcp_exceptions.Aborted,
+    gcp_exceptions.DeadlineExceeded,
+    gcp_exceptions.InternalServerError,
+    gcp_exceptions.ResourceExhausted,
+    gcp_exceptions.ServiceUnavailable,
+)
 
-    def __init__(self, firestore_client: Optional[firestore.Client] = None) -> None:
+
+class GraphStore(GraphStoreBackend):
+    """Graph storage service (Firestore backend)."""
+
+    # 作用域图谱缓存；None 表示不缓存（默认使用进程级共享缓存）
+    scope_cache: Optional[ScopeGraphCache] = None
+
+    def __init__(
+        self,
+        firestore_client: Optional[firestore.Client] = None,
+        scope_cache: Optional[ScopeGraphCache] = None,
+    ) -> None:
         self.db = firestore_client or firestore.Client(database=settings.firestore_database)
+        self.scope_cache = scope_cache if scope_cache is not None else get_scope_graph_cache()
+
+    async def _run(self, op: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking Firestore call off the event loop (see ``firestore_io``)."""
+        return await get_firestore_io().run(f"graph.{op}", fn, *args, **kwargs)
+
+    async def _read_graph(
+        self,
+        nodes_ref: firestore.CollectionReference,
+        edges_ref: firestore.CollectionReference,
+        op: str,
+    ) -> GraphData:
+        """Stream nodes and edges concurrently."""
+        nodes, edges = await asyncio.gather(
+            self._run(f"{op}.nodes", _read_models, nodes_ref, MemoryNode),
+            self._run(f"{op}.edges", _read_models, edges_ref, MemoryEdge),
+        )
+        return GraphData(nodes=nodes, edges=edges)
 
     def _get_base_ref(
         self,
@@ -124,25 +169,24 @@ class GraphStore:
         world_id: str,
         scope: GraphScope,
     ) -> GraphData:
-        """Load a full graph using GraphScope addressing."""
+        """Load a full graph using GraphScope addressing.
+
+        Served from the scope cache when available; returned nodes/edges may be
+        shared with the cache and must not be mutated in place.
+        """
+        cache = self.scope_cache
+        cache_version: Optional[int] = None
+        if cache is not None:
+            cached = cache.get(world_id, scope)
+            if cached is not None:
+                return cached
+            cache_version = cache.version(world_id, scope)
+
         nodes_ref, edges_ref = self._get_graph_refs_v2(world_id, scope)
-        nodes = []
-        for doc in nodes_ref.stream():
-            data = doc.to_dict()
-            if not data:
-                continue
-            if "id" not in data:
-                data["id"] = doc.id
-            nodes.append(MemoryNode(**data))
-        edges = []
-        for doc in edges_ref.stream():
-            data = doc.to_dict()
-            if not data:
-                continue
-            if "id" not in data:
-                data["id"] = doc.id
-            edges.append(MemoryEdge(**data))
-        return GraphData(nodes=nodes, edges=edges)
+        graph_data = await self._read_graph(nodes_ref, edges_ref, "load_v2")
+        if cache is not None:
+            cache.put(world_id, scope, graph_data, expected_version=cache_version)
+        return graph_data
 
     async def save_graph_v2(
         self,
@@ -150,6 +194,7 @@ class GraphStore:
         scope: GraphScope,
         graph: Union[GraphData, MemoryGraph],
         merge: bool = True,
+        progress: Optional[ProgressCallback] = None,
     ) -> None:
         """Save a full graph using GraphScope addressing."""
         graph_data = graph.to_graph_data() if isinstance(graph, MemoryGraph) else graph
@@ -159,7 +204,10 @@ class GraphStore:
             operations.append((nodes_ref.document(node.id), node.model_dump(), merge))
         for edge in graph_data.edges:
             operations.append((edges_ref.document(edge.id), edge.model_dump(), merge))
-        self._commit_in_batches(operations)
+        try:
+            await self._commit_in_batches("save_v2", operations, progress)
+        finally:
+            self._invalidate_scope(world_id, scope)
 
     async def upsert_node_v2(
         self,
@@ -170,15 +218,11 @@ class GraphStore:
     ) -> None:
         """Upsert a single node using GraphScope addressing."""
         nodes_ref, _ = self._get_graph_refs_v2(world_id, scope)
-        effective_merge = merge
-        new_props = node.properties or {}
-        if merge and not new_props.get("placeholder", False):
-            doc = nodes_ref.document(node.id).get()
-            if doc.exists:
-                existing_props = (doc.to_dict() or {}).get("properties") or {}
-                if existing_props.get("placeholder", False):
-                    effective_merge = False
-        nodes_ref.document(node.id).set(node.model_dump(), merge=effective_merge)
+        effective_merge = await self._run(
+            "upsert_node_v2", _upsert_node_sync, nodes_ref.document(node.id), node, merge
+        )
+        if self.scope_cache is not None:
+            self.scope_cache.patch_node(world_id, scope, node, merge=effective_merge)
 
     async def upsert_edge_v2(
         self,
@@ -189,7 +233,25 @@ class GraphStore:
     ) -> None:
         """Upsert a single edge using GraphScope addressing."""
         _, edges_ref = self._get_graph_refs_v2(world_id, scope)
-        edges_ref.document(edge.id).set(edge.model_dump(), merge=merge)
+        await self._run("upsert_edge_v2", edges_ref.document(edge.id).set, edge.model_dump(), merge=merge)
+        if self.scope_cache is not None:
+            self.scope_cache.patch_edge(world_id, scope, edge, merge=merge)
+
+    def _invalidate_scope(self, world_id: str, scope: Optional[GraphScope]) -> None:
+        if self.scope_cache is not None and scope is not None:
+            self.scope_cache.invalidate(world_id, scope)
+
+    def _legacy_scope(
+        self,
+        graph_type: str,
+        character_id: Optional[str] = None,
+    ) -> Optional[GraphScope]:
+        """Map a legacy (graph_type, character_id) address onto the v2 scope sharing its path."""
+        if graph_type == "character":
+            return GraphScope.character(character_id) if character_id else None
+        if graph_type == "world":
+            return GraphScope.world()
+        return None
 
     # ---- Disposition (好感度) interfaces ----
 
@@ -220,7 +282,7 @@ class GraphStore:
         Returns dict with keys: approval, trust, fear, romance,
         last_updated, history. Returns None if no disposition exists.
         """
-        doc = self._get_disposition_ref(world_id, character_id, target_id).get()
+        doc = await self._run("get_disposition", self._get_disposition_ref(world_id, character_id, target_id).get)
         if not doc.exists:
             return None
         return doc.to_dict()
@@ -245,47 +307,13 @@ class GraphStore:
             Updated disposition dict.
         """
         ref = self._get_disposition_ref(world_id, character_id, target_id)
-        doc = ref.get()
+        doc = await self._run("get_disposition", ref.get)
 
-        if doc.exists:
-            data = doc.to_dict() or {}
-        else:
-            data = {
-                "approval": 0,
-                "trust": 0,
-                "fear": 0,
-                "romance": 0,
-                "history": [],
-            }
-
-        # Apply deltas with clamping
-        clamp_ranges = {
-            "approval": (-100, 100),
-            "trust": (-100, 100),
-            "fear": (0, 100),
-            "romance": (0, 100),
-        }
-        history_entry = {"reason": reason, "day": game_day}
-        for field, delta in deltas.items():
-            if field not in clamp_ranges:
-                continue
-            lo, hi = clamp_ranges[field]
-            current = data.get(field, 0)
-            data[field] = max(lo, min(hi, current + delta))
-            history_entry[f"delta_{field}"] = delta
-
-        data["last_updated"] = datetime.now()
-
-        # Append history (keep last 50 entries)
-        history = data.get("history", [])
-        if not isinstance(history, list):
-            history = []
-        history.append(history_entry)
-        if len(history) > 50:
-            history = history[-50:]
-        data["history"] = history
-
-        ref.set(data)
+        data = (doc.to_dict() or {}) if doc.exists else self._new_disposition()
+        # Apply deltas with clamping; history keeps the last 50 entries
+        self._apply_disposition_deltas(data, deltas, reason, game_day, datetime.now())
+
+        await self._run("set_disposition", ref.set, data)
         return data
 
     async def get_all_dispositions(
@@ -306,7 +334,7 @@ class GraphStore:
             .collection("dispositions")
         )
         result = {}
-        for doc in base_ref.stream():
+        for doc in await self._run("list_dispositions", stream_docs, base_ref):
             data = doc.to_dict()
             if data:
                 result[doc.id] = data
@@ -327,38 +355,6 @@ class GraphStore:
             .document(choice_id)
         )
 
-    def _build_choice_node(
-        self,
-        choice_id: str,
-        description: str,
-        chapter_id: Optional[str],
-        consequences: List[Dict[str, Any]],
-        metadata: Optional[Dict[str, Any]],
-        character_id: str,
-        resolved: bool,
-    ) -> MemoryNode:
-        """Build a choice node for character graph recall."""
-        props: Dict[str, Any] = {
-            "scope_type": "character",
-            "character_id": character_id,
-            "choice_id": choice_id,
-            "chapter_id": chapter_id,
-            "consequences": consequences,
-            "resolved": resolved,
-            "created_by": "player",
-            "source": "choices_collection",
-        }
-        if metadata:
-            props["metadata"] = metadata
-
-        return MemoryNode(
-            id=f"choice_{choice_id}",
-            type="choice",
-            name=description[:80] if description else choice_id,
-            importance=0.9,
-            properties=props,
-        )
-
     async def record_choice(
         self,
         world_id: str,
@@ -401,7 +397,7 @@ class GraphStore:
         if character_id:
             data["character_id"] = character_id
 
-        self._get_choice_ref(world_id, choice_id).set(data)
+        await self._run("set_choice", self._get_choice_ref(world_id, choice_id).set, data)
 
         if character_id and write_to_character_graph:
             choice_node = self._build_choice_node(
@@ -428,7 +424,7 @@ class GraphStore:
         choice_id: str,
     ) -> Optional[Dict[str, Any]]:
         """Get a choice record by ID."""
-        doc = self._get_choice_ref(world_id, choice_id).get()
+        doc = await self._run("get_choice", self._get_choice_ref(world_id, choice_id).get)
         if not doc.exists:
             return None
         return doc.to_dict()
@@ -456,7 +452,7 @@ class GraphStore:
             query = query.where("chapter_id", "==", chapter_id)
 
         results = []
-        for doc in query.stream():
+        for doc in await self._run("query_choices", stream_docs, query):
             data = doc.to_dict()
             if data:
                 data["choice_id"] = doc.id
@@ -480,7 +476,7 @@ class GraphStore:
             Updated choice document, or None if not found.
         """
         ref = self._get_choice_ref(world_id, choice_id)
-        doc = ref.get()
+        doc = await self._run("get_choice", ref.get)
         if not doc.exists:
             return None
 
@@ -499,7 +495,7 @@ class GraphStore:
         data["consequences"] = consequences
         data["resolved"] = all_resolved
 
-        ref.set(data)
+        await self._run("set_choice", ref.set, data)
 
         # Keep character choice node in sync when available.
         character_id = data.get("character_id")
@@ -543,23 +539,7 @@ class GraphStore:
     ) -> GraphData:
         """Load a full graph."""
         nodes_ref, edges_ref = self._get_graph_refs(world_id, graph_type, character_id)
-        nodes = []
-        for doc in nodes_ref.stream():
-            data = doc.to_dict()
-            if not data:
-                continue
-            if "id" not in data:
-                data["id"] = doc.id
-            nodes.append(MemoryNode(**data))
-        edges = []
-        for doc in edges_ref.stream():
-            data = doc.to_dict()
-            if not data:
-                continue
-            if "id" not in data:
-                data["id"] = doc.id
-            edges.append(MemoryEdge(**data))
-        return GraphData(nodes=nodes, edges=edges)
+        return await self._read_graph(nodes_ref, edges_ref, "load")
 
     async def save_graph(
         self,
@@ -569,6 +549,7 @@ class GraphStore:
         character_id: Optional[str] = None,
         merge: bool = True,
         build_indexes: bool = False,
+        progress: Optional[ProgressCallback] = None,
     ) -> None:
         """Save a full graph (merge by default, does not delete)."""
         graph_data = graph.to_graph_data() if isinstance(graph, MemoryGraph) else graph
@@ -582,7 +563,10 @@ class GraphStore:
             base_ref = self._get_base_ref(world_id, graph_type, character_id)
             for node in graph_data.nodes:
                 operations.extend(self._index_node_operations(base_ref, node))
-        self._commit_in_batches(operations)
+        try:
+            await self._commit_in_batches("save", operations, progress)
+        finally:
+            self._invalidate_scope(world_id, self._legacy_scope(graph_type, character_id))
 
     async def upsert_node(
         self,
@@ -601,7 +585,7 @@ class GraphStore:
         effective_merge = merge
         new_props = node.properties or {}
         if merge and not new_props.get("placeholder", False):
-            doc = nodes_ref.document(node.id).get()
+            doc = await self._run("get_node", nodes_ref.document(node.id).get)
             if doc.exists:
                 existing_props = (doc.to_dict() or {}).get("properties") or {}
                 if existing_props.get("placeholder", False):
@@ -611,7 +595,8 @@ class GraphStore:
         if index:
             base_ref = self._get_base_ref(world_id, graph_type, character_id)
             operations.extend(self._index_node_operations(base_ref, node))
-        self._commit_in_batches(operations)
+        await self._commit_in_batches("upsert_node", operations)
+        self._invalidate_scope(world_id, self._legacy_scope(graph_type, character_id))
 
     async def upsert_edge(
         self,
@@ -623,7 +608,8 @@ class GraphStore:
     ) -> None:
         """Upsert a single edge."""
         _, edges_ref = self._get_graph_refs(world_id, graph_type, character_id)
-        edges_ref.document(edge.id).set(edge.model_dump(), merge=merge)
+        await self._run("upsert_edge", edges_ref.document(edge.id).set, edge.model_dump(), merge=merge)
+        self._invalidate_scope(world_id, self._legacy_scope(graph_type, character_id))
 
     async def get_node(
         self,
@@ -634,7 +620,7 @@ class GraphStore:
     ) -> Optional[MemoryNode]:
         """Fetch a single node."""
         nodes_ref, _ = self._get_graph_refs(world_id, graph_type, character_id)
-        doc = nodes_ref.document(node_id).get()
+        doc = await self._run("get_node", nodes_ref.document(node_id).get)
         if not doc.exists:
             return None
         data = doc.to_dict() or {}
@@ -651,7 +637,7 @@ class GraphStore:
     ) -> Optional[MemoryEdge]:
         """Fetch a single edge."""
         _, edges_ref = self._get_graph_refs(world_id, graph_type, character_id)
-        doc = edges_ref.document(edge_id).get()
+        doc = await self._run("get_edge", edges_ref.document(edge_id).get)
         if not doc.exists:
             return None
         data = doc.to_dict() or {}
@@ -667,10 +653,8 @@ class GraphStore:
     ) -> None:
         """Clear a graph (destructive)."""
         nodes_ref, edges_ref = self._get_graph_refs(world_id, graph_type, character_id)
-        for doc in nodes_ref.stream():
-            doc.reference.delete()
-        for doc in edges_ref.stream():
-            doc.reference.delete()
+        await self._run("clear", _delete_all, nodes_ref, edges_ref)
+        self._invalidate_scope(world_id, self._legacy_scope(graph_type, character_id))
 
     async def update_character_state(
         self,
@@ -680,7 +664,7 @@ class GraphStore:
     ) -> None:
         """Update character state on character document."""
         base_ref = self._get_base_ref(world_id, "character", character_id)
-        base_ref.set({"state": updates}, merge=True)
+        await self._run("set_character_state", base_ref.set, {"state": updates}, merge=True)
 
     async def get_character_state(
         self,
@@ -689,7 +673,7 @@ class GraphStore:
     ) -> dict:
         """Get character state."""
         base_ref = self._get_base_ref(world_id, "character", character_id)
-        doc = base_ref.get()
+        doc = await self._run("get_character", base_ref.get)
         if not doc.exists:
             return {}
         data = doc.to_dict() or {}
@@ -702,7 +686,7 @@ class GraphStore:
     ) -> dict:
         """Get character profile."""
         base_ref = self._get_base_ref(world_id, "character", character_id)
-        doc = base_ref.get()
+        doc = await self._run("get_character", base_ref.get)
         if not doc.exists:
             return {}
         data = doc.to_dict() or {}
@@ -717,7 +701,7 @@ class GraphStore:
     ) -> None:
         """Set character profile."""
         base_ref = self._get_base_ref(world_id, "character", character_id)
-        base_ref.set({"profile": profile}, merge=merge)
+        await self._run("set_character_profile", base_ref.set, {"profile": profile}, merge=merge)
 
     async def get_nodes_by_ids(
         self,
@@ -728,19 +712,7 @@ class GraphStore:
     ) -> List[MemoryNode]:
         """Fetch multiple nodes by id."""
         nodes_ref, _ = self._get_graph_refs(world_id, graph_type, character_id)
-        doc_refs = [nodes_ref.document(node_id) for node_id in node_ids]
-        if not doc_refs:
-            return []
-        docs = self.db.get_all(doc_refs)
-        nodes: List[MemoryNode] = []
-        for doc in docs:
-            if not doc.exists:
-                continue
-            data = doc.to_dict() or {}
-            if "id" not in data:
-                data["id"] = doc.id
-            nodes.append(MemoryNode(**data))
-        return nodes
+        return await self._get_nodes(nodes_ref, node_ids, "get_nodes_by_ids")
 
     async def get_nodes_by_ids_v2(
         self,
@@ -750,10 +722,18 @@ class GraphStore:
     ) -> List[MemoryNode]:
         """Fetch multiple nodes by id using GraphScope addressing."""
         nodes_ref, _ = self._get_graph_refs_v2(world_id, scope)
+        return await self._get_nodes(nodes_ref, node_ids, "get_nodes_by_ids")
+
+    async def _get_nodes(
+        self,
+        nodes_ref: firestore.CollectionReference,
+        node_ids: Iterable[str],
+        op: str,
+    ) -> List[MemoryNode]:
         doc_refs = [nodes_ref.document(node_id) for node_id in node_ids]
         if not doc_refs:
             return []
-        docs = self.db.get_all(doc_refs)
+        docs = await self._run(op, _get_all_docs, self.db, doc_refs)
         nodes: List[MemoryNode] = []
         for doc in docs:
             if not doc.exists:
@@ -778,7 +758,7 @@ class GraphStore:
             .document(node_type)
             .collection("nodes")
         )
-        return [doc.to_dict() for doc in nodes_ref.stream() if doc.to_dict()]
+        return await self._run("query_index", _stream_dict_list, nodes_ref)
 
     async def query_index_by_name(
         self,
@@ -795,7 +775,7 @@ class GraphStore:
             .document(name_key)
             .collection("nodes")
         )
-        return [doc.to_dict() for doc in nodes_ref.stream() if doc.to_dict()]
+        return await self._run("query_index", _stream_dict_list, nodes_ref)
 
     async def query_index_by_day(
         self,
@@ -812,7 +792,7 @@ class GraphStore:
             .document(day_key)
             .collection("events")
         )
-        return [doc.to_dict() for doc in events_ref.stream() if doc.to_dict()]
+        return await self._run("query_index", _stream_dict_list, events_ref)
 
     async def load_local_subgraph(
         self,
@@ -824,52 +804,8 @@ class GraphStore:
         character_id: Optional[str] = None,
     ) -> GraphData:
         """Load a subgraph by traversing edges in Firestore."""
-        direction = direction.lower()
-        if direction not in {"out", "in", "both"}:
-            raise ValueError("direction must be one of: out, in, both")
         nodes_ref, edges_ref = self._get_graph_refs(world_id, graph_type, character_id)
-
-        visited = {node_id for node_id in seed_nodes if node_id}
-        frontier = set(visited)
-        edges_by_id = {}
-
-        for _ in range(depth):
-            if not frontier:
-                break
-            next_frontier = set()
-
-            if direction in {"out", "both"}:
-                for chunk in _chunked(list(frontier), 10):
-                    for doc in edges_ref.where("source", "in", chunk).stream():
-                        data = doc.to_dict() or {}
-                        if not data:
-                            continue
-                        if "id" not in data:
-                            data["id"] = doc.id
-                        edges_by_id[data["id"]] = MemoryEdge(**data)
-                        target = data.get("target")
-                        if target:
-                            next_frontier.add(target)
-
-            if direction in {"in", "both"}:
-                for chunk in _chunked(list(frontier), 10):
-                    for doc in edges_ref.where("target", "in", chunk).stream():
-                        data = doc.to_dict() or {}
-                        if not data:
-                            continue
-                        if "id" not in data:
-                            data["id"] = doc.id
-                        edges_by_id[data["id"]] = MemoryEdge(**data)
-                        source = data.get("source")
-                        if source:
-                            next_frontier.add(source)
-
-            next_frontier -= visited
-            visited |= next_frontier
-            frontier = next_frontier
-
-        nodes = await self.get_nodes_by_ids(world_id, graph_type, visited, character_id)
-        return GraphData(nodes=nodes, edges=list(edges_by_id.values()))
+        return await self._traverse_local_subgraph(nodes_ref, edges_ref, seed_nodes, depth, direction)
 
     async def load_local_subgraph_v2(
         self,
@@ -880,51 +816,79 @@ class GraphStore:
         direction: str = "both",
     ) -> GraphData:
         """Load a subgraph by traversing edges using GraphScope addressing."""
+        nodes_ref, edges_ref = self._get_graph_refs_v2(world_id, scope)
+        return await self._traverse_local_subgraph(nodes_ref, edges_ref, seed_nodes, depth, direction)
+
+    async def _traverse_local_subgraph(
+        self,
+        nodes_ref: firestore.CollectionReference,
+        edges_ref: firestore.CollectionReference,
+        seed_nodes: Iterable[str],
+        depth: int,
+        direction: str,
+    ) -> GraphData:
+        """BFS over edge queries.
+
+        每一跳的 ``in`` 分块查询（source/target 两个方向）并发发出，并发度受
+        ``graph_subgraph_query_fanout`` 限制；已取到的边跨跳复用，不重复解析；
+        新发现节点的 ``get_all`` 与下一跳的边查询并行，最后统一汇总。
+        """
         direction = direction.lower()
         if direction not in {"out", "in", "both"}:
             raise ValueError("direction must be one of: out, in, both")
-        nodes_ref, edges_ref = self._get_graph_refs_v2(world_id, scope)
+        fields = []
+        if direction in {"out", "both"}:
+            fields.append("source")
+        if direction in {"in", "both"}:
+            fields.append("target")
 
         visited = {node_id for node_id in seed_nodes if node_id}
         frontier = set(visited)
-        edges_by_id = {}
-
-        for _ in range(depth):
-            if not frontier:
-                break
-            next_frontier = set()
-
-            if direction in {"out", "both"}:
-                for chunk in _chunked(list(frontier), 10):
-                    for doc in edges_ref.where("source", "in", chunk).stream():
-                        data = doc.to_dict() or {}
-                        if not data:
-                            continue
-                        if "id" not in data:
-                            data["id"] = doc.id
-                        edges_by_id[data["id"]] = MemoryEdge(**data)
-                        target = data.get("target")
-                        if target:
-                            next_frontier.add(target)
-
-            if direction in {"in", "both"}:
-                for chunk in _chunked(list(frontier), 10):
-                    for doc in edges_ref.where("target", "in", chunk).stream():
-                        data = doc.to_dict() or {}
-                        if not data:
-                            continue
-                        if "id" not in data:
-                            data["id"] = doc.id
-                        edges_by_id[data["id"]] = MemoryEdge(**data)
-                        source = data.get("source")
-                        if source:
-                            next_frontier.add(source)
-
-            next_frontier -= visited
-            visited |= next_frontier
-            frontier = next_frontier
-
-        nodes = await self.get_nodes_by_ids_v2(world_id, scope, visited)
+        edges_by_id: Dict[str, MemoryEdge] = {}
+        semaphore = asyncio.Semaphore(max(1, settings.graph_subgraph_query_fanout))
+
+        async def _query(field: str, chunk: List[str]) -> Tuple[str, list]:
+            async with semaphore:
+                docs = await self._run("subgraph_edges", stream_docs, edges_ref.where(field, "in", chunk))
+            return field, docs
+
+        node_tasks = [asyncio.ensure_future(self._get_nodes(nodes_ref, sorted(visited), "subgraph_nodes"))]
+        try:
+            for _ in range(depth):
+                if not frontier:
+                    break
+                chunks = _chunked(sorted(frontier), 10)
+                results = await asyncio.gather(*(_query(field, chunk) for field in fields for chunk in chunks))
+
+                next_frontier = set()
+                for field, docs in results:
+                    for doc in docs:
+                        edge = edges_by_id.get(doc.id)
+                        if edge is None:
+                            data = doc.to_dict() or {}
+                            if not data:
+                                continue
+                            if "id" not in data:
+                                data["id"] = doc.id
+                            edge = edges_by_id[doc.id] = MemoryEdge(**data)
+                        neighbor = edge.target if field == "source" else edge.source
+                        if neighbor:
+                            next_frontier.add(neighbor)
+
+                next_frontier -= visited
+                visited |= next_frontier
+                frontier = next_frontier
+                if frontier:
+                    node_tasks.append(asyncio.ensure_future(
+                        self._get_nodes(nodes_ref, sorted(frontier), "subgraph_nodes")
+                    ))
+            batches = await asyncio.gather(*node_tasks)
+        except BaseException:
+            for task in node_tasks:
+                task.cancel()
+            raise
+
+        nodes = [node for batch in batches for node in batch]
         return GraphData(nodes=nodes, edges=list(edges_by_id.values()))
 
     async def rebuild_indexes(
@@ -933,6 +897,7 @@ class GraphStore:
         graph_type: str,
         character_id: Optional[str] = None,
         clear_first: bool = False,
+        progress: Optional[ProgressCallback] = None,
     ) -> int:
         """Rebuild indexes for an existing graph."""
         if clear_first:
@@ -941,7 +906,7 @@ class GraphStore:
         base_ref = self._get_base_ref(world_id, graph_type, character_id)
         operations = []
         count = 0
-        for doc in nodes_ref.stream():
+        for doc in await self._run("rebuild_indexes.nodes", stream_docs, nodes_ref):
             data = doc.to_dict() or {}
             if not data:
                 continue
@@ -950,11 +915,7 @@ class GraphStore:
             node = MemoryNode(**data)
             operations.extend(self._index_node_operations(base_ref, node))
             count += 1
-            if len(operations) >= 400:
-                self._commit_in_batches(operations)
-                operations = []
-        if operations:
-            self._commit_in_batches(operations)
+        await self._commit_in_batches("rebuild_indexes", operations, progress)
         return count
 
     async def clear_indexes(
@@ -965,12 +926,11 @@ class GraphStore:
     ) -> None:
         """Clear all index collections for a graph."""
         base_ref = self._get_base_ref(world_id, graph_type, character_id)
-        _clear_subcollection(base_ref.collection("type_index"), "nodes")
-        _clear_subcollection(base_ref.collection("name_index"), "nodes")
-        _clear_subcollection(base_ref.collection("timeline"), "events")
-
-    def _sanitize_index_key(self, value: str) -> str:
-        return value.replace("/", "_").strip()
+        await asyncio.gather(
+            self._run("clear_indexes", _clear_subcollection, base_ref.collection("type_index"), "nodes"),
+            self._run("clear_indexes", _clear_subcollection, base_ref.collection("name_index"), "nodes"),
+            self._run("clear_indexes", _clear_subcollection, base_ref.collection("timeline"), "events"),
+        )
 
     def _index_node_operations(
         self,
@@ -1016,22 +976,51 @@ class GraphStore:
                 operations.append((timeline_ref, timeline_payload, True))
         return operations
 
-    def _commit_in_batches(self, operations: Iterable[Tuple[firestore.DocumentReference, dict, bool]]) -> None:
-        """Commit in batches to avoid Firestore limits."""
-        batch = self.db.batch()
-        op_count = 0
-        for doc_ref, payload, merge in operations:
-            batch.set(doc_ref, payload, merge=merge)
-            op_count += 1
-            if op_count >= 450:
-                batch.commit()
-                batch = self.db.batch()
-                op_count = 0
-        if op_count:
-            batch.commit()
-
-
-def _chunked(items: List[str], size: int) -> List[List[str]]:
+    async def _commit_in_batches(
+        self,
+        op: str,
+        operations: Iterable[WriteOp],
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        """Commit in batches to avoid Firestore limits.
+
+        批次并发提交（在途上限 ``graph_bulk_commit_concurrency``），瞬时错误按指数
+        退避重试（写入均为 set，重放幂等）。``progress(done_ops, total_ops)`` 在每批
+        提交成功后回调。任一批次最终失败时取消其余批次并抛出。
+        """
+        batches = _chunked(list(operations), _BATCH_SIZE)
+        if not batches:
+            return
+        total = sum(len(batch) for batch in batches)
+        semaphore = asyncio.Semaphore(max(1, settings.graph_bulk_commit_concurrency))
+        max_retries = max(0, settings.graph_bulk_commit_max_retries)
+        done = 0
+
+        async def _commit(batch_ops: List[WriteOp]) -> None:
+            nonlocal done
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        await self._run(f"{op}.commit", _commit_batch, self.db, batch_ops)
+                        break
+                    except _RETRYABLE_COMMIT_ERRORS:
+                        if attempt >= max_retries:
+                            raise
+                        await asyncio.sleep(_COMMIT_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5))
+            done += len(batch_ops)
+            if progress is not None:
+                progress(done, total)
+
+        tasks = [asyncio.ensure_future(_commit(batch)) for batch in batches]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+
+def _chunked(items: List[T], size: int) -> List[List[T]]:
     if size <= 0:
         return []
     return [items[i : i + size] for i in range(0, len(items), size)]
@@ -1045,3 +1034,58 @@ def _clear_subcollection(
         child_ref = doc.reference.collection(child_collection_name)
         for child_doc in child_ref.stream():
             child_doc.reference.delete()
+
+
+# ---- Blocking helpers (run in the Firestore I/O pool) ----
+
+
+def _stream_dict_list(query: Any) -> List[dict]:
+    results = []
+    for doc in query.stream():
+        data = doc.to_dict()
+        if data:
+            results.append(data)
+    return results
+
+
+def _commit_batch(db: firestore.Client, operations: List[WriteOp]) -> None:
+    batch = db.batch()
+    for doc_ref, payload, merge in operations:
+        batch.set(doc_ref, payload, merge=merge)
+    batch.commit()
+
+
+def _get_all_docs(db: firestore.Client, doc_refs: list) -> list:
+    return list(db.get_all(doc_refs))
+
+
+def _read_models(collection_ref: firestore.CollectionReference, model: type) -> list:
+    items = []
+    for doc in collection_ref.stream():
+        data = doc.to_dict()
+        if not data:
+            continue
+        if "id" not in data:
+            data["id"] = doc.id
+        items.append(model(**data))
+    return items
+
+
+def _upsert_node_sync(doc_ref: firestore.DocumentReference, node: MemoryNode, merge: bool) -> bool:
+    """Write a node; a placeholder being backfilled with real data is replaced, not merged."""
+    effective_merge = merge
+    new_props = node.properties or {}
+    if merge and not new_props.get("placeholder", False):
+        doc = doc_ref.get()
+        if doc.exists:
+            existing_props = (doc.to_dict() or {}).get("properties") or {}
+            if existing_props.get("placeholder", False):
+                effective_merge = False
+    doc_ref.set(node.model_dump(), merge=effective_merge)
+    return effective_merge
+
+
+def _delete_all(*collection_refs: firestore.CollectionReference) -> None:
+    for collection_ref in collection_refs:
+        for doc in collection_ref.stream():
+            doc.reference.delete()
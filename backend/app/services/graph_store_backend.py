@@ -0,0 +1,231 @@
+"""
+Graph storage backend interface.
+
+GraphStore（Firestore）与 SQLiteGraphStore（本地嵌入式）共同实现的存储面：
+- *_v2 作用域图谱读写（GraphScope 寻址，路径语义一致）
+- 好感度 dispositions、选择后果 choices
+- query_index_by_* 二级索引查询
+
+通过 ``settings.graph_store_backend`` 选择实现，``create_graph_store()`` 构造。
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from app.config import settings
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.memory_graph import MemoryGraph
+
+DISPOSITION_CLAMP_RANGES = {
+    "approval": (-100, 100),
+    "trust": (-100, 100),
+    "fear": (0, 100),
+    "romance": (0, 100),
+}
+DISPOSITION_HISTORY_LIMIT = 50
+
+# 批量写入进度回调：progress(已完成写入数, 总写入数)
+ProgressCallback = Callable[[int, int], None]
+
+
+class GraphStoreBackend(ABC):
+    """Storage surface shared by all graph store backends."""
+
+    # ---- GraphScope (v2) ----
+
+    @abstractmethod
+    async def load_graph_v2(self, world_id: str, scope: GraphScope) -> GraphData: ...
+
+    @abstractmethod
+    async def save_graph_v2(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        graph: Union[GraphData, MemoryGraph],
+        merge: bool = True,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None: ...
+
+    @abstractmethod
+    async def upsert_node_v2(
+        self, world_id: str, scope: GraphScope, node: MemoryNode, merge: bool = True
+    ) -> None: ...
+
+    @abstractmethod
+    async def upsert_edge_v2(
+        self, world_id: str, scope: GraphScope, edge: MemoryEdge, merge: bool = True
+    ) -> None: ...
+
+    @abstractmethod
+    async def get_nodes_by_ids_v2(
+        self, world_id: str, scope: GraphScope, node_ids: Iterable[str]
+    ) -> List[MemoryNode]: ...
+
+    @abstractmethod
+    async def load_local_subgraph_v2(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        seed_nodes: Iterable[str],
+        depth: int = 1,
+        direction: str = "both",
+    ) -> GraphData: ...
+
+    # ---- Dispositions ----
+
+    @abstractmethod
+    async def get_disposition(
+        self, world_id: str, character_id: str, target_id: str
+    ) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    async def update_disposition(
+        self,
+        world_id: str,
+        character_id: str,
+        target_id: str,
+        deltas: Dict[str, int],
+        reason: str = "",
+        game_day: Optional[int] = None,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    async def get_all_dispositions(
+        self, world_id: str, character_id: str
+    ) -> Dict[str, Dict[str, Any]]: ...
+
+    # ---- Choices ----
+
+    @abstractmethod
+    async def record_choice(
+        self,
+        world_id: str,
+        choice_id: str,
+        description: str,
+        chapter_id: Optional[str] = None,
+        consequences: Optional[List[Dict[str, Any]]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        character_id: Optional[str] = None,
+        write_to_character_graph: bool = True,
+    ) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    async def get_choice(self, world_id: str, choice_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    async def get_unresolved_consequences(
+        self, world_id: str, chapter_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    async def resolve_consequence(
+        self,
+        world_id: str,
+        choice_id: str,
+        consequence_index: int,
+        resolution: str = "",
+    ) -> Optional[Dict[str, Any]]: ...
+
+    # ---- Secondary indexes ----
+
+    @abstractmethod
+    async def query_index_by_type(
+        self, world_id: str, graph_type: str, node_type: str, character_id: Optional[str] = None
+    ) -> List[dict]: ...
+
+    @abstractmethod
+    async def query_index_by_name(
+        self, world_id: str, graph_type: str, name: str, character_id: Optional[str] = None
+    ) -> List[dict]: ...
+
+    @abstractmethod
+    async def query_index_by_day(
+        self, world_id: str, graph_type: str, day: str, character_id: Optional[str] = None
+    ) -> List[dict]: ...
+
+    # ---- Shared helpers ----
+
+    @staticmethod
+    def _sanitize_index_key(value: str) -> str:
+        return value.replace("/", "_").strip()
+
+    @staticmethod
+    def _new_disposition() -> Dict[str, Any]:
+        return {"approval": 0, "trust": 0, "fear": 0, "romance": 0, "history": []}
+
+    @staticmethod
+    def _apply_disposition_deltas(
+        data: Dict[str, Any],
+        deltas: Dict[str, int],
+        reason: str,
+        game_day: Optional[int],
+        now: Any,
+    ) -> Dict[str, Any]:
+        """Clamp deltas into ``data`` and append a bounded history entry."""
+        history_entry = {"reason": reason, "day": game_day}
+        for field, delta in deltas.items():
+            if field not in DISPOSITION_CLAMP_RANGES:
+                continue
+            lo, hi = DISPOSITION_CLAMP_RANGES[field]
+            current = data.get(field, 0)
+            data[field] = max(lo, min(hi, current + delta))
+            history_entry[f"delta_{field}"] = delta
+
+        data["last_updated"] = now
+
+        history = data.get("history", [])
+        if not isinstance(history, list):
+            history = []
+        history.append(history_entry)
+        if len(history) > DISPOSITION_HISTORY_LIMIT:
+            history = history[-DISPOSITION_HISTORY_LIMIT:]
+        data["history"] = history
+        return data
+
+    def _build_choice_node(
+        self,
+        choice_id: str,
+        description: str,
+        chapter_id: Optional[str],
+        consequences: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]],
+        character_id: str,
+        resolved: bool,
+    ) -> MemoryNode:
+        """Build a choice node for character graph recall."""
+        props: Dict[str, Any] = {
+            "scope_type": "character",
+            "character_id": character_id,
+            "choice_id": choice_id,
+            "chapter_id": chapter_id,
+            "consequences": consequences,
+            "resolved": resolved,
+            "created_by": "player",
+            "source": "choices_collection",
+        }
+        if metadata:
+            props["metadata"] = metadata
+
+        return MemoryNode(
+            id=f"choice_{choice_id}",
+            type="choice",
+            name=description[:80] if description else choice_id,
+            importance=0.9,
+            properties=props,
+        )
+
+
+def create_graph_store(**kwargs: Any) -> GraphStoreBackend:
+    """Construct the configured graph store backend (``GRAPH_STORE_BACKEND``)."""
+    backend = (settings.graph_store_backend or "firestore").strip().lower()
+    if backend == "sqlite":
+        from app.services.sqlite_graph_store import SQLiteGraphStore
+
+        return SQLiteGraphStore(path=kwargs.pop("path", settings.graph_store_sqlite_path), **kwargs)
+    if backend == "firestore":
+        from app.services.graph_store import GraphStore
+
+        return GraphStore(**kwargs)
+    raise ValueError(f"Unknown graph store backend: {backend}")
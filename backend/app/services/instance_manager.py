@@ -3,15 +3,26 @@ NPC Instance Manager.
 
 实例池管理器，负责：
 - 懒加载 NPC 实例（首次交互时创建）
-- LRU 淘汰策略（内存不足时清理不活跃实例）
+- 分段 LRU 淘汰策略（按全局 token / 字节预算与实例数上限清理不活跃实例）
 - 持久化状态（实例销毁前保存到 Firestore）
+
+驻留体积按实例的 ``ContextWindow.current_tokens`` 与已加载记忆图谱大小估算，
+以运行合计记账：命中时只同步被访问实例（O(1)），图谱体积仅在创建/收回与
+图谱化后重新统计；只有新实例入池或实例体积增长时才检查预算。
+新实例进入试用段（probation），再次交互后晋升到保护段（protected）；淘汰优先
+从试用段的最久未使用者开始，保护段超出配额时把最旧的降级回试用段，
+从而让常驻队友不被一次性路过的 NPC 挤出。
+
+淘汰在后台执行：被淘汰实例先移出活跃池并排队，由有限并发的后台任务完成
+图谱化与持久化，触发淘汰的 ``get_or_create`` 不再等待其他 NPC 的 LLM 调用。
+排队中的实例被再次访问时直接收回；已开始淘汰的实例需等其落盘后再重建。
 """
 import asyncio
 import logging
 from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
 
 from app.models.npc_instance import (
     NPCConfig,
@@ -23,11 +34,16 @@ from app.services.context_window import ContextWindow
 
 if TYPE_CHECKING:
     from app.services.flash_service import FlashService
-    from app.services.graph_store import GraphStore
+    from app.services.graph_store_backend import GraphStoreBackend
     from app.services.memory_graph import MemoryGraph
 
 logger = logging.getLogger(__name__)
 
+# 驻留体积估算：上下文按 token 折算字节，记忆图谱按节点/边计
+_BYTES_PER_TOKEN = 4
+_GRAPH_NODE_BYTES = 1024
+_GRAPH_EDGE_BYTES = 256
+
 
 @dataclass
 class NPCInstance:
@@ -62,6 +78,9 @@ class NPCInstance:
     _get_flash_service: Optional[Callable] = None
     _get_memory_graph: Optional[Callable] = None
 
+    # 最近一次统计的记忆图谱估算字节
+    _graph_bytes: int = 0
+
     def __post_init__(self):
         """初始化后设置状态"""
         self.state.npc_id = self.npc_id
@@ -87,6 +106,7 @@ class NPCInstance:
             else:
                 from app.services.memory_graph import MemoryGraph
                 self._memory_graph = MemoryGraph()
+            self.refresh_graph_bytes()
         return self._memory_graph
 
     @property
@@ -103,6 +123,25 @@ class NPCInstance:
         """更新最后访问时间"""
         self.state.last_access = datetime.now()
 
+    @property
+    def resident_tokens(self) -> int:
+        """上下文窗口当前占用的 token 数"""
+        return self.context_window.current_tokens
+
+    def refresh_graph_bytes(self) -> int:
+        """重新统计已加载记忆图谱的体积（O(V+E)，仅在图谱变化后调用，不触发懒加载）"""
+        size = 0
+        if self._memory_graph is not None:
+            graph = self._memory_graph.graph
+            size += graph.number_of_nodes() * _GRAPH_NODE_BYTES
+            size += graph.number_of_edges() * _GRAPH_EDGE_BYTES
+        self._graph_bytes = size
+        return size
+
+    def estimated_bytes(self) -> int:
+        """估算驻留内存（上下文 + 最近一次统计的记忆图谱体积，O(1)）"""
+        return self.context_window.current_tokens * _BYTES_PER_TOKEN + self._graph_bytes
+
     def get_info(self) -> NPCInstanceInfo:
         """获取实例信息"""
         return NPCInstanceInfo(
@@ -116,7 +155,7 @@ class NPCInstance:
             graphize_count=self.state.graphize_count,
         )
 
-    async def persist(self, graph_store: "GraphStore") -> None:
+    async def persist(self, graph_store: "GraphStoreBackend") -> None:
         """
         持久化实例状态
 
@@ -161,27 +200,49 @@ class InstanceManager:
         context_window_size: int = 200_000,
         graphize_threshold: float = 0.8,
         keep_recent_tokens: int = 50_000,
-        graph_store: Optional["GraphStore"] = None,
+        graph_store: Optional["GraphStoreBackend"] = None,
+        eviction_concurrency: int = 2,
+        eviction_queue_max: int = 32,
+        token_budget: Optional[int] = None,
+        byte_budget: Optional[int] = None,
+        protected_ratio: float = 0.8,
     ):
         """
         初始化实例管理器
 
         Args:
-            max_instances: 最大同时活跃实例数
+            max_instances: 最大同时活跃实例数（硬上限）
             evict_after: 不活跃多久后可淘汰
             context_window_size: 上下文窗口大小（tokens）
             graphize_threshold: 图谱化阈值
             keep_recent_tokens: 图谱化后保留的 token 数
             graph_store: 图谱存储服务（可选）
+            eviction_concurrency: 后台淘汰（图谱化 + 持久化）最大并发数
+            eviction_queue_max: 待淘汰实例上限，超出时触发方等待最早的一个完成
+            token_budget: 全部实例上下文 token 总预算（None 不限制）
+            byte_budget: 全部实例估算驻留字节总预算（None 不限制）
+            protected_ratio: 保护段可占用的预算/实例数比例
         """
         self.max_instances = max_instances
         self.evict_after = evict_after
         self.context_window_size = context_window_size
         self.graphize_threshold = graphize_threshold
         self.keep_recent_tokens = keep_recent_tokens
+        self.token_budget = token_budget
+        self.byte_budget = byte_budget
+        self.protected_ratio = min(1.0, max(0.0, protected_ratio))
 
         # 实例存储（使用 OrderedDict 保持 LRU 顺序）
         self._instances: OrderedDict[str, NPCInstance] = OrderedDict()
+        # 分段 LRU：保护段的 key；其余实例属于试用段
+        self._protected: set = set()
+
+        # 驻留体积记账：key -> 最近一次同步的 (tokens, bytes)，以及全池 / 保护段合计
+        self._sizes: Dict[str, Tuple[int, int]] = {}
+        self._resident_tokens: int = 0
+        self._resident_bytes: int = 0
+        self._protected_tokens: int = 0
+        self._protected_bytes: int = 0
 
         # 依赖
         self._graph_store = graph_store
@@ -189,16 +250,30 @@ class InstanceManager:
         # 锁（防止并发创建同一实例）
         self._locks: Dict[str, asyncio.Lock] = {}
 
+        # 后台淘汰：key -> 待淘汰实例 / 后台任务
+        self.eviction_concurrency = max(1, eviction_concurrency)
+        self.eviction_queue_max = max(1, eviction_queue_max)
+        self._evicting: Dict[str, NPCInstance] = {}
+        self._eviction_tasks: Dict[str, asyncio.Task] = {}
+        self._eviction_started: set = set()
+        self._eviction_semaphore = asyncio.Semaphore(self.eviction_concurrency)
+
         # 统计
         self._total_created: int = 0
         self._total_evicted: int = 0
+        self._eviction_stats: Dict[str, int] = {
+            "queued": 0,
+            "reclaimed": 0,
+            "failed": 0,
+            "backpressure_waits": 0,
+        }
 
     @property
-    def graph_store(self) -> "GraphStore":
-        """懒加载 GraphStore"""
+    def graph_store(self) -> "GraphStoreBackend":
+        """懒加载图谱存储后端"""
         if self._graph_store is None:
-            from app.services.graph_store import GraphStore
-            self._graph_store = GraphStore()
+            from app.services.graph_store_backend import create_graph_store
+            self._graph_store = create_graph_store()
         return self._graph_store
 
     def _make_key(self, world_id: str, npc_id: str) -> str:
@@ -234,22 +309,38 @@ class InstanceManager:
         """
         key = self._make_key(world_id, npc_id)
 
-        # 如果已存在，直接返回（更新 LRU）
+        # 如果已存在，直接返回（更新 LRU，再次交互晋升保护段；仅在体积增长时检查预算）
         if key in self._instances:
-            self._touch(key)
-            return self._instances[key]
+            instance = self._instances[key]
+            grew = self._account(key)
+            self._touch(key, promote=True)
+            if grew:
+                self._rebalance_protected()
+                await self._enforce_budget(keep=key)
+            return instance
 
         # 使用锁防止并发创建
         lock = self._get_lock(key)
         async with lock:
             # 双重检查
             if key in self._instances:
-                self._touch(key)
+                self._touch(key, promote=True)
                 return self._instances[key]
 
-            # 检查是否需要淘汰
-            if len(self._instances) >= self.max_instances:
-                await self._evict_lru()
+            # 正在后台淘汰：未开始则收回，已开始则等待落盘后重建
+            reclaimed = await self._reclaim_or_wait_eviction(key)
+
+            # 检查是否需要淘汰（为新实例腾出一个位置）
+            while len(self._instances) >= self.max_instances:
+                if not await self._evict_lru():
+                    break
+
+            if reclaimed is not None:
+                self._instances[key] = reclaimed
+                self._touch(key)
+                self._sync_sizes(refresh_graph=key)
+                await self._enforce_budget(keep=key)
+                return reclaimed
 
             # 创建新实例
             instance = await self._create_instance(
@@ -257,6 +348,8 @@ class InstanceManager:
             )
             self._instances[key] = instance
             self._total_created += 1
+            self._sync_sizes(refresh_graph=key)
+            await self._enforce_budget(keep=key)
 
             return instance
 
@@ -391,60 +484,193 @@ class InstanceManager:
             instance.state.total_tokens_used = saved.get("total_tokens_used", 0)
             instance.state.graphize_count = saved.get("graphize_count", 0)
 
+    # ==================== 体积记账 ====================
+
+    def _shift(self, key: str, tokens: int, size: int) -> None:
+        self._resident_tokens += tokens
+        self._resident_bytes += size
+        if key in self._protected:
+            self._protected_tokens += tokens
+            self._protected_bytes += size
+
+    def _account(self, key: str, refresh_graph: bool = False) -> bool:
+        """把实例当前体积同步到运行合计，返回是否比上次记账增长"""
+        instance = self._instances[key]
+        if refresh_graph:
+            instance.refresh_graph_bytes()
+        tokens, size = instance.resident_tokens, instance.estimated_bytes()
+        old_tokens, old_size = self._sizes.get(key, (0, 0))
+        self._sizes[key] = (tokens, size)
+        self._shift(key, tokens - old_tokens, size - old_size)
+        return tokens > old_tokens or size > old_size
+
+    def _unaccount(self, key: str) -> None:
+        """实例离开活跃池时从合计中扣除（须在移出保护段之前调用）"""
+        tokens, size = self._sizes.pop(key, (0, 0))
+        self._shift(key, -tokens, -size)
+
+    def _sync_sizes(self, refresh_graph: Optional[str] = None) -> None:
+        """新实例入池时同步全部实例的上下文增长（每个 O(1)），``refresh_graph`` 的图谱重新统计"""
+        for key in self._instances:
+            self._account(key, refresh_graph=key == refresh_graph)
+
+    def _protect(self, key: str) -> None:
+        if key not in self._protected:
+            self._protected.add(key)
+            tokens, size = self._sizes.get(key, (0, 0))
+            self._protected_tokens += tokens
+            self._protected_bytes += size
+
+    def _unprotect(self, key: str) -> None:
+        if key in self._protected:
+            self._protected.discard(key)
+            tokens, size = self._sizes.get(key, (0, 0))
+            self._protected_tokens -= tokens
+            self._protected_bytes -= size
+
     # ==================== LRU 淘汰 ====================
 
-    def _touch(self, key: str) -> None:
-        """更新 LRU 顺序"""
+    def _touch(self, key: str, promote: bool = False) -> None:
+        """更新 LRU 顺序；``promote`` 时晋升到保护段"""
         if key in self._instances:
             # 移到末尾（最近使用）
             self._instances.move_to_end(key)
             self._instances[key].touch()
+            if promote and key not in self._protected:
+                self._protect(key)
+                self._rebalance_protected()
+
+    def _rebalance_protected(self) -> None:
+        """保护段超出配额时，把最旧的保护实例降级到试用段末尾（再给一次机会）"""
+        count_limit = max(1, int(self.max_instances * self.protected_ratio))
+        token_limit = self.token_budget * self.protected_ratio if self.token_budget else None
+        byte_limit = self.byte_budget * self.protected_ratio if self.byte_budget else None
+        while len(self._protected) > 1:
+            if (
+                len(self._protected) <= count_limit
+                and (token_limit is None or self._protected_tokens <= token_limit)
+                and (byte_limit is None or self._protected_bytes <= byte_limit)
+            ):
+                return
+            demoted = next((k for k in self._instances if k in self._protected), None)
+            if demoted is None:
+                return
+            self._unprotect(demoted)
+            self._instances.move_to_end(demoted)
+
+    def _over_budget(self) -> bool:
+        if len(self._instances) > self.max_instances:
+            return True
+        if self.token_budget is not None and self._resident_tokens > self.token_budget:
+            return True
+        if self.byte_budget is not None and self._resident_bytes > self.byte_budget:
+            return True
+        return False
 
-    async def _evict_lru(self) -> None:
-        """淘汰最久未使用的实例"""
-        if not self._instances:
-            return
-
-        # 找到最久未使用且超过淘汰时间的实例
-        now = datetime.now()
-        evict_key = None
-
-        for key, instance in self._instances.items():
-            if now - instance.last_access > self.evict_after:
-                evict_key = key
+    async def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        """超出实例数 / token / 字节预算时持续淘汰（``keep`` 为当前请求的实例，不淘汰）"""
+        while self._over_budget():
+            if not await self._evict_lru(exclude=keep):
                 break
 
-        # 如果没有超时的，淘汰最旧的
+    def _pick_victim(self, exclude: Optional[str] = None) -> Optional[str]:
+        """选择淘汰对象：试用段中超时未访问者 > 试用段最旧者 > 保护段最旧者"""
+        now = datetime.now()
+        probation = [k for k in self._instances if k != exclude and k not in self._protected]
+        for key in probation:
+            if now - self._instances[key].last_access > self.evict_after:
+                return key
+        if probation:
+            return probation[0]
+        for key in self._instances:
+            if key != exclude:
+                return key
+        return None
+
+    async def _evict_lru(self, exclude: Optional[str] = None) -> bool:
+        """淘汰最久未使用的实例，返回是否有实例被淘汰"""
+        evict_key = self._pick_victim(exclude)
         if evict_key is None:
-            evict_key = next(iter(self._instances))
-
-        await self._evict_instance(evict_key)
+            return False
+        await self._schedule_eviction(evict_key)
+        return True
+
+    async def _schedule_eviction(self, key: str) -> None:
+        """将实例移出活跃池并交给后台淘汰任务。"""
+        self._unaccount(key)
+        self._unprotect(key)
+        instance = self._instances.pop(key, None)
+        if instance is None:
+            return
+        self._evicting[key] = instance
+        # 队列已满：等待最早的淘汰完成（背压，仅在大量 NPC 同时被淘汰时发生）
+        while len(self._eviction_tasks) >= self.eviction_queue_max:
+            self._eviction_stats["backpressure_waits"] += 1
+            await asyncio.wait(
+                list(self._eviction_tasks.values()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        if self._evicting.get(key) is not instance:
+            return  # 等待期间已被收回
+        self._eviction_tasks[key] = asyncio.create_task(self._run_eviction(key, instance))
+        self._eviction_stats["queued"] += 1
+
+    async def _run_eviction(self, key: str, instance: NPCInstance) -> None:
+        task = asyncio.current_task()
+        try:
+            async with self._eviction_semaphore:
+                if self._eviction_tasks.get(key) is not task:
+                    return  # 排队期间已被收回
+                self._eviction_started.add(key)
+                await self._evict_instance(key, instance)
+        except Exception as e:
+            self._eviction_stats["failed"] += 1
+            logger.error("[InstanceManager] 后台淘汰失败 %s: %s", key, e, exc_info=True)
+        finally:
+            if self._eviction_tasks.get(key) is task:
+                del self._eviction_tasks[key]
+                self._eviction_started.discard(key)
+                if self._evicting.get(key) is instance:
+                    del self._evicting[key]
+
+    async def _reclaim_or_wait_eviction(self, key: str) -> Optional[NPCInstance]:
+        """返回仍在排队的待淘汰实例；若淘汰已开始则等待其完成并返回 None。"""
+        instance = self._evicting.get(key)
+        if instance is None:
+            return None
+        if key not in self._eviction_started:
+            del self._evicting[key]
+            self._eviction_tasks.pop(key, None)
+            self._eviction_stats["reclaimed"] += 1
+            return instance
+        task = self._eviction_tasks.get(key)
+        if task is not None:
+            await asyncio.shield(task)
+        return None
 
-    async def _evict_instance(self, key: str) -> None:
+    async def _evict_instance(self, key: str, instance: NPCInstance) -> None:
         """淘汰指定实例（含对话图谱化）"""
-        instance = self._instances.pop(key, None)
-        if instance:
-            # 图谱化剩余对话
-            if instance.context_window.message_count > 0:
-                try:
-                    graphized = await self._graphize_messages(
-                        instance=instance,
-                        current_scene=None,
-                        game_day=1,
-                        force_all=True,
+        # 图谱化剩余对话
+        if instance.context_window.message_count > 0:
+            try:
+                graphized = await self._graphize_messages(
+                    instance=instance,
+                    current_scene=None,
+                    game_day=1,
+                    force_all=True,
+                )
+                if graphized and graphized.get("success"):
+                    logger.info(
+                        "[InstanceManager] 淘汰图谱化 %s: nodes=%d edges=%d",
+                        key,
+                        graphized.get("nodes_added", 0),
+                        graphized.get("edges_added", 0),
                     )
-                    if graphized and graphized.get("success"):
-                        logger.info(
-                            "[InstanceManager] 淘汰图谱化 %s: nodes=%d edges=%d",
-                            key,
-                            graphized.get("nodes_added", 0),
-                            graphized.get("edges_added", 0),
-                        )
-                except Exception as e:
-                    logger.error("[InstanceManager] 淘汰图谱化失败 %s: %s", key, e, exc_info=True)
-            # 持久化状态
-            await instance.persist(self.graph_store)
-            self._total_evicted += 1
+            except Exception as e:
+                logger.error("[InstanceManager] 淘汰图谱化失败 %s: %s", key, e, exc_info=True)
+        # 持久化状态
+        await instance.persist(self.graph_store)
+        self._total_evicted += 1
 
     async def maybe_graphize_instance(
         self,
@@ -460,12 +686,15 @@ class InstanceManager:
             instance = self._instances.get(key)
             if not instance:
                 return None
-            return await self._graphize_messages(
+            result = await self._graphize_messages(
                 instance=instance,
                 current_scene=current_scene,
                 game_day=game_day,
                 force_all=False,
             )
+            if result and self._instances.get(key) is instance:
+                self._account(key, refresh_graph=True)
+            return result
 
     async def _graphize_messages(
         self,
@@ -572,6 +801,8 @@ class InstanceManager:
             是否成功移除
         """
         key = self._make_key(world_id, npc_id)
+        self._unaccount(key)
+        self._unprotect(key)
         instance = self._instances.pop(key, None)
 
         if instance:
@@ -628,20 +859,73 @@ class InstanceManager:
                 await instance.persist(self.graph_store)
 
         self._instances.clear()
+        self._protected.clear()
+        self._sizes.clear()
+        self._resident_tokens = self._resident_bytes = 0
+        self._protected_tokens = self._protected_bytes = 0
+        return count
+
+    async def drain_evictions(self) -> int:
+        """等待所有后台淘汰完成，返回等待的任务数。"""
+        count = 0
+        while self._eviction_tasks:
+            tasks = list(self._eviction_tasks.values())
+            count += len(tasks)
+            await asyncio.gather(*tasks, return_exceptions=True)
         return count
 
+    async def shutdown(self) -> None:
+        """关闭前排空后台淘汰，并持久化仍在池中的脏实例。"""
+        drained = await self.drain_evictions()
+        persisted = await self.persist_all()
+        logger.info("[InstanceManager] 已关闭: drained=%d persisted=%d", drained, persisted)
+
     # ==================== 统计信息 ====================
 
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
+        self._sync_sizes()
         return {
             "active_instances": len(self._instances),
             "max_instances": self.max_instances,
             "total_created": self._total_created,
             "total_evicted": self._total_evicted,
+            "budget": {
+                "token_budget": self.token_budget,
+                "byte_budget": self.byte_budget,
+                "resident_tokens": self._resident_tokens,
+                "resident_bytes": self._resident_bytes,
+                "protected": len(self._protected),
+                "probation": len(self._instances) - len(self._protected),
+            },
+            "worlds": self._world_residency(),
+            "evictions": {
+                "pending": len(self._evicting) - len(self._eviction_started),
+                "in_progress": len(self._eviction_started),
+                "max_concurrency": self.eviction_concurrency,
+                "queue_max": self.eviction_queue_max,
+                **self._eviction_stats,
+            },
             "instances": [inst.get_info().model_dump() for inst in self._instances.values()],
         }
 
+    def _world_residency(self) -> Dict[str, Dict[str, int]]:
+        """按世界汇总驻留情况"""
+        worlds: Dict[str, Dict[str, int]] = {}
+        for key, instance in self._instances.items():
+            row = worlds.setdefault(instance.world_id, {
+                "instances": 0,
+                "protected": 0,
+                "tokens": 0,
+                "bytes": 0,
+            })
+            row["instances"] += 1
+            tokens, size = self._sizes.get(key, (0, 0))
+            row["protected"] += 1 if key in self._protected else 0
+            row["tokens"] += tokens
+            row["bytes"] += size
+        return worlds
+
     def __len__(self) -> int:
         return len(self._instances)
 
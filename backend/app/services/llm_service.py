@@ -20,6 +20,7 @@ class ThinkingMetadata:
     thoughts_token_count: int = 0
     output_token_count: int = 0
     total_token_count: int = 0
+    cached_token_count: int = 0  # 命中上下文缓存（含隐式前缀缓存）的输入 token
 
 
 @dataclass
@@ -121,6 +122,7 @@ class LLMService:
                 thinking_meta.output_token_count = usage.candidates_token_count or 0
             if hasattr(usage, 'total_token_count'):
                 thinking_meta.total_token_count = usage.total_token_count or 0
+            thinking_meta.cached_token_count = getattr(usage, 'cached_content_token_count', 0) or 0
         
         return LLMResponse(
             text=answer_text.strip(),
@@ -224,9 +226,17 @@ class LLMService:
         thinking_level: Optional[str] = None,
         max_remote_calls: Optional[int] = None,
         cached_content: Optional[str] = None,
+        static_prefix: Optional[str] = None,
     ) -> LLMResponse:
         """Run a single agentic session with automatic function calling.
 
+        ``static_prefix`` is sent as the first part of the user turn, ahead of
+        ``user_prompt``. Keeping it byte-identical across turns (after the
+        system instruction and tools) lets Gemini's implicit prefix caching
+        reuse it; hits are reported as ``thinking.cached_token_count``.
+        (An explicit ``cached_content`` is rejected by the API when tools are
+        set, so agentic turns rely on the implicit prefix cache.)
+
         IMPORTANT: Uses mode="AUTO" (default) so the model can freely mix
         tool calls and text responses within the SDK's automatic loop.
         mode="ANY" is incompatible with automatic_function_calling because
@@ -252,16 +262,13 @@ class LLMService:
 
             response = await self.client.aio.models.generate_content(
                 model=model,
-                contents=user_prompt,
-                config=types.GenerateContentConfig(
+                contents=self._agentic_contents(user_prompt, static_prefix),
+                config=self._agentic_config(
                     system_instruction=system_instruction,
                     thinking_config=thinking_config,
                     tools=tools,
+                    max_remote_calls=max_remote_calls,
                     cached_content=cached_content,
-                    automatic_function_calling=types.AutomaticFunctionCallingConfig(
-                        disable=False,
-                        maximum_remote_calls=max_remote_calls or settings.admin_agentic_max_remote_calls,
-                    ),
                 ),
             )
 
@@ -283,11 +290,126 @@ class LLMService:
                                 name, str(resp_data["error"])[:300],
                             )
 
-            return self._extract_response(response, thinking_level)
+            result = self._extract_response(response, thinking_level)
+            if result.thinking.cached_token_count:
+                _logger.debug(
+                    "[agentic_generate] prefix cache hit: cached_tokens=%d",
+                    result.thinking.cached_token_count,
+                )
+            return result
         except Exception as e:
             _logger.error("agentic_generate failed (model=%s): %s", model, e, exc_info=True)
             raise
 
+    async def agentic_generate_stream(
+        self,
+        *,
+        user_prompt: str,
+        system_instruction: str,
+        tools: List[Any],
+        model_override: Optional[str] = None,
+        thinking_level: Optional[str] = None,
+        max_remote_calls: Optional[int] = None,
+        cached_content: Optional[str] = None,
+        static_prefix: Optional[str] = None,
+    ):
+        """Streaming variant of agentic_generate (same AUTO function-calling loop).
+
+        Tool calls still run inside the SDK's automatic loop; text parts are
+        surfaced as they arrive instead of after the final round. Like
+        agentic_generate, the aggregated text keeps only the final round:
+        preamble text from rounds that end in a tool call is streamed but dropped.
+
+        Yields:
+            dict: {"type": "thought"/"answer", "text": str} deltas, then one
+            {"type": "done", "response": LLMResponse} with the aggregated text/usage.
+        """
+        thinking_config = self._get_thinking_config(thinking_level)
+        model = model_override or settings.admin_agentic_model or self.main_model
+
+        answer_parts: List[str] = []
+        thought_parts: List[str] = []
+        last_chunk: Any = None
+        async for chunk in await self.client.aio.models.generate_content_stream(
+            model=model,
+            contents=self._agentic_contents(user_prompt, static_prefix),
+            config=self._agentic_config(
+                system_instruction=system_instruction,
+                thinking_config=thinking_config,
+                tools=tools,
+                max_remote_calls=max_remote_calls,
+                cached_content=cached_content,
+            ),
+        ):
+            last_chunk = chunk
+            candidates = getattr(chunk, "candidates", None) or []
+            content = getattr(candidates[0], "content", None) if candidates else None
+            parts = getattr(content, "parts", None) or []
+            for part in parts:
+                text = getattr(part, "text", None)
+                if not text:
+                    continue
+                if getattr(part, "thought", False):
+                    thought_parts.append(text)
+                    yield {"type": "thought", "text": text}
+                else:
+                    answer_parts.append(text)
+                    yield {"type": "answer", "text": text}
+            if any(getattr(part, "function_call", None) for part in parts):
+                # 该轮以工具调用结束，之前的文本只是前导语
+                answer_parts.clear()
+
+        thinking_meta = ThinkingMetadata(
+            thinking_enabled=settings.thinking_enabled,
+            thinking_level=thinking_level or settings.thinking_level,
+            thoughts_summary="".join(thought_parts).strip(),
+        )
+        usage = getattr(last_chunk, "usage_metadata", None)
+        if usage is not None:
+            thinking_meta.thoughts_token_count = getattr(usage, "thoughts_token_count", 0) or 0
+            thinking_meta.output_token_count = getattr(usage, "candidates_token_count", 0) or 0
+            thinking_meta.total_token_count = getattr(usage, "total_token_count", 0) or 0
+            thinking_meta.cached_token_count = getattr(usage, "cached_content_token_count", 0) or 0
+        yield {
+            "type": "done",
+            "response": LLMResponse(
+                text="".join(answer_parts).strip(),
+                thinking=thinking_meta,
+                raw_response=last_chunk,
+            ),
+        }
+
+    @staticmethod
+    def _agentic_contents(user_prompt: str, static_prefix: Optional[str]) -> Any:
+        """User turn for the agentic loop: stable prefix part first, then the per-turn prompt."""
+        if not static_prefix:
+            return user_prompt
+        return types.Content(
+            role="user",
+            parts=[types.Part(text=static_prefix), types.Part(text=user_prompt)],
+        )
+
+    def _agentic_config(
+        self,
+        *,
+        system_instruction: str,
+        thinking_config: Optional[types.ThinkingConfig],
+        tools: List[Any],
+        max_remote_calls: Optional[int],
+        cached_content: Optional[str],
+    ) -> types.GenerateContentConfig:
+        """GenerateContentConfig for the AUTO function-calling agentic loop."""
+        return types.GenerateContentConfig(
+            system_instruction=system_instruction,
+            thinking_config=thinking_config,
+            tools=tools,
+            cached_content=cached_content,
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(
+                disable=False,
+                maximum_remote_calls=max_remote_calls or settings.admin_agentic_max_remote_calls,
+            ),
+        )
+
     async def agentic_force_tool_calls(
         self,
         *,
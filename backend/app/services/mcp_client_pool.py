@@ -14,11 +14,12 @@ import shlex
 import sys
 import time
 import uuid
-from collections import deque
+import zlib
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 import httpx
 from mcp.client.session import ClientSession
@@ -55,15 +56,41 @@ class ServerConfig:
     endpoint: str
 
 
+@dataclass
+class _SessionSlot:
+    """One client session of a server (its own subprocess for stdio)."""
+
+    index: int
+    max_in_flight: int
+    session: Optional[ClientSession] = None
+    exit_stack: Optional[contextlib.AsyncExitStack] = None
+    healthy: bool = False
+    epoch: int = 0
+    in_flight: int = 0
+    waiting: int = 0
+    calls: int = 0
+    last_health_ok: float = 0.0
+    last_protocol_check: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.connect_lock = asyncio.Lock()
+        self.semaphore = asyncio.Semaphore(max(1, self.max_in_flight))
+
+    @property
+    def load(self) -> int:
+        return self.in_flight + self.waiting
+
+
 class MCPClientPool:
     """
     Singleton pool for MCP client sessions.
 
     Features:
-    - Maintains persistent MCP server subprocess
-    - Session health checking via ping
-    - Automatic reconnection on failure
-    - Per-server call serialization to avoid stdio interleaving
+    - Maintains N persistent sessions per server (lazily connected)
+    - Concurrent in-flight requests per session (JSON-RPC ids multiplex the stream)
+    - Least-busy dispatch; stateful calls stick to one session by entity id
+    - Per-session health checking via throttled ping and reconnect epochs
+    - Queue-wait vs. execution timing in diagnostics
     """
 
     _instance: Optional["MCPClientPool"] = None
@@ -74,14 +101,11 @@ class MCPClientPool:
     COMBAT = "combat"
 
     def __init__(self) -> None:
-        self._sessions: Dict[str, ClientSession] = {}
-        self._exit_stacks: Dict[str, contextlib.AsyncExitStack] = {}
-        self._healthy: Dict[str, bool] = {}
-        self._call_locks: Dict[str, asyncio.Lock] = {}
-        self._connect_locks: Dict[str, asyncio.Lock] = {}
+        self._slots: Dict[str, List[_SessionSlot]] = {}
         self._cooldowns: Dict[str, float] = {}
         self._session_epochs: Dict[str, int] = {}
-        self._last_protocol_check: Dict[str, float] = {}
+        self._sticky_routes: Dict[str, "OrderedDict[str, int]"] = {}
+        self._call_timings: Dict[str, deque[tuple[int, int]]] = {}
         self._recent_tool_calls: deque[Dict[str, Any]] = deque(maxlen=200)
         self._recent_errors: deque[Dict[str, Any]] = deque(maxlen=200)
         self._server_stats: Dict[str, Dict[str, int]] = {}
@@ -96,6 +120,20 @@ class MCPClientPool:
         }
         self._ping_timeout_seconds = 2.0
         self._protocol_health_check_interval_seconds = 5.0
+        # 最近一次成功调用/ping 后的这段时间内不再重复 ping，避免每次调用多一个往返。
+        self._health_check_interval_seconds = 1.0
+        self._max_in_flight = max(1, int(settings.mcp_session_max_in_flight))
+        self._pool_sizes: Dict[str, int] = {
+            self.GAME_TOOLS: max(1, int(settings.mcp_tools_pool_size)),
+            self.COMBAT: max(1, int(settings.mcp_combat_pool_size)),
+        }
+        # 服务端进程内有状态的调用（战斗实例、NPC 实例）按实体 id 固定到同一会话。
+        self._sticky_args: Dict[str, tuple[str, ...]] = {
+            self.GAME_TOOLS: ("npc_id",),
+            self.COMBAT: ("combat_id",),
+        }
+        self._sticky_route_limit = 4096
+        self._timing_window = 512
 
         self._server_root = Path(__file__).resolve().parents[2]
 
@@ -134,11 +172,6 @@ class MCPClientPool:
             await cls._instance._close_all()
             cls._instance = None
 
-    def _get_lock(self, lock_map: Dict[str, asyncio.Lock], server_type: str) -> asyncio.Lock:
-        if server_type not in lock_map:
-            lock_map[server_type] = asyncio.Lock()
-        return lock_map[server_type]
-
     def _in_cooldown(self, server_type: str) -> bool:
         until = self._cooldowns.get(server_type, 0.0)
         return time.monotonic() < until
@@ -467,21 +500,112 @@ class MCPClientPool:
             )
         return results
 
-    async def get_session(self, server_type: str) -> ClientSession:
-        """Get a healthy session for the specified server type."""
+    # =========================================================================
+    # Session slots & dispatch
+    # =========================================================================
+
+    def _slots_for(self, server_type: str) -> List[_SessionSlot]:
+        slots = self._slots.get(server_type)
+        if slots is None:
+            size = self._pool_sizes.get(server_type, 1)
+            config = self._configs.get(server_type)
+            if config and self._is_http_transport(config.transport):
+                # HTTP 传输在单个会话上复用并发请求，无需多连接。
+                size = 1
+            slots = [_SessionSlot(index=i, max_in_flight=self._max_in_flight) for i in range(size)]
+            self._slots[server_type] = slots
+        return slots
+
+    def _slot_of(self, server_type: str, session: ClientSession) -> Optional[_SessionSlot]:
+        for slot in self._slots.get(server_type, []):
+            if slot.session is session:
+                return slot
+        return None
+
+    def _sticky_key(self, server_type: str, arguments: Optional[Dict[str, Any]]) -> Optional[str]:
+        if not arguments:
+            return None
+        for name in self._sticky_args.get(server_type, ()):
+            value = arguments.get(name)
+            if value:
+                return f"{name}:{value}"
+        return None
+
+    def _select_slot(
+        self,
+        server_type: str,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> _SessionSlot:
+        """Sticky slot for stateful entities, otherwise the least-busy slot.
+
+        Ties go to healthy slots and then the lowest index, so extra sessions
+        are only spawned once the first ones are actually loaded.
+        """
+        slots = self._slots_for(server_type)
+        if len(slots) == 1:
+            return slots[0]
+        key = self._sticky_key(server_type, arguments)
+        if key is not None:
+            index = self._sticky_routes.get(server_type, {}).get(key)
+            if index is None:
+                index = zlib.crc32(key.encode("utf-8")) % len(slots)
+            return slots[index]
+        return min(slots, key=lambda slot: (slot.load, not slot.healthy, slot.index))
+
+    def _learn_sticky_route(self, server_type: str, result: Dict[str, Any], slot: _SessionSlot) -> None:
+        """Pin ids created by a call (e.g. a new combat_id) to the slot that owns them."""
+        if len(self._slots.get(server_type, ())) <= 1 or not isinstance(result, dict):
+            return
+        routes = self._sticky_routes.setdefault(server_type, OrderedDict())
+        for name in self._sticky_args.get(server_type, ()):
+            value = result.get(name)
+            if not value or not isinstance(value, (str, int)):
+                continue
+            key = f"{name}:{value}"
+            routes[key] = slot.index
+            routes.move_to_end(key)
+        while len(routes) > self._sticky_route_limit:
+            routes.popitem(last=False)
+
+    def _record_timing(self, server_type: str, queue_wait_ms: int, exec_ms: int) -> None:
+        timings = self._call_timings.get(server_type)
+        if timings is None:
+            timings = self._call_timings[server_type] = deque(maxlen=self._timing_window)
+        timings.append((queue_wait_ms, exec_ms))
+
+    @staticmethod
+    def _summarize_ms(values: List[int]) -> Dict[str, Any]:
+        if not values:
+            return {"p50": None, "p95": None, "max": None, "avg": None}
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        return {
+            "p50": ordered[int(round(last * 0.50))],
+            "p95": ordered[int(round(last * 0.95))],
+            "max": ordered[-1],
+            "avg": round(sum(ordered) / len(ordered), 1),
+        }
+
+    async def get_session(
+        self,
+        server_type: str,
+        slot: Optional[_SessionSlot] = None,
+    ) -> ClientSession:
+        """Get a healthy session for the specified server type (least-busy slot by default)."""
         if server_type not in self._configs:
             raise ValueError(f"Unknown server type: {server_type}")
+        if slot is None:
+            slot = self._select_slot(server_type)
 
-        session = self._sessions.get(server_type)
-        if session and await self._check_health(server_type, session):
+        session = slot.session
+        if session and await self._check_health(server_type, session, slot):
             return session
 
-        connect_lock = self._get_lock(self._connect_locks, server_type)
-        async with connect_lock:
-            session = self._sessions.get(server_type)
-            if session and await self._check_health(server_type, session):
+        async with slot.connect_lock:
+            session = slot.session
+            if session and await self._check_health(server_type, session, slot):
                 return session
-            return await self._connect(server_type)
+            return await self._connect(server_type, slot)
 
     async def call_tool(
         self,
@@ -490,7 +614,11 @@ class MCPClientPool:
         arguments: Dict[str, Any],
         max_retries: int = 2,
     ) -> Dict[str, Any]:
-        """Call a tool with automatic reconnection on failure."""
+        """Call a tool with automatic reconnection on failure.
+
+        Calls on the same session run concurrently up to ``max_in_flight``;
+        beyond that they queue on the slot semaphore (reported as queue wait).
+        """
         stats = self._ensure_server_stats(server_type)
         request_id = uuid.uuid4().hex[:12]
         config = self._configs.get(server_type)
@@ -516,16 +644,86 @@ class MCPClientPool:
             )
 
         last_error: Optional[Exception] = None
-        call_lock = self._get_lock(self._call_locks, server_type)
 
-        async with call_lock:
-            for attempt in range(max_retries + 1):
-                started = time.perf_counter()
-                timeout = self._resolve_tool_timeout(server_type, tool_name)
-                session_epoch = self._session_epochs.get(server_type, 0)
+        for attempt in range(max_retries + 1):
+            slot = self._select_slot(server_type, arguments)
+            timeout = self._resolve_tool_timeout(server_type, tool_name)
+            queued = time.perf_counter()
+            slot.waiting += 1
+            try:
+                await slot.semaphore.acquire()
+            finally:
+                slot.waiting -= 1
+            slot.in_flight += 1
+            slot.calls += 1
+            started = time.perf_counter()
+            queue_wait_ms = int((started - queued) * 1000)
+            session_epoch = slot.epoch
+            logger.info(
+                "[MCPPool] call start request_id=%s server=%s transport=%s endpoint=%s "
+                "tool=%s attempt=%s/%s timeout=%.1fs slot=%s session_epoch=%s queue_wait_ms=%s",
+                request_id,
+                server_type,
+                transport,
+                endpoint,
+                tool_name,
+                attempt + 1,
+                max_retries + 1,
+                timeout,
+                slot.index,
+                session_epoch,
+                queue_wait_ms,
+            )
+            try:
+                session = await self.get_session(server_type, slot)
+                session_epoch = slot.epoch
+                result = await asyncio.wait_for(
+                    session.call_tool(tool_name, arguments),
+                    timeout=timeout,
+                )
+                decoded = self._decode_tool_result(result)
+                elapsed_ms = int((time.perf_counter() - started) * 1000)
+                slot.last_health_ok = time.monotonic()
+                stats["calls_total"] += 1
+                stats["calls_success"] += 1
+                self._record_timing(server_type, queue_wait_ms, elapsed_ms)
+                self._learn_sticky_route(server_type, decoded, slot)
+                self._record_tool_call(
+                    {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "request_id": request_id,
+                        "server_type": server_type,
+                        "tool_name": tool_name,
+                        "attempt": attempt + 1,
+                        "success": True,
+                        "elapsed_ms": elapsed_ms,
+                        "queue_wait_ms": queue_wait_ms,
+                        "slot": slot.index,
+                        "session_epoch": session_epoch,
+                    }
+                )
                 logger.info(
-                    "[MCPPool] call start request_id=%s server=%s transport=%s endpoint=%s "
-                    "tool=%s attempt=%s/%s timeout=%.1fs session_epoch=%s",
+                    "[MCPPool] call success request_id=%s server=%s tool=%s elapsed_ms=%s "
+                    "queue_wait_ms=%s slot=%s attempt=%s/%s",
+                    request_id,
+                    server_type,
+                    tool_name,
+                    elapsed_ms,
+                    queue_wait_ms,
+                    slot.index,
+                    attempt + 1,
+                    max_retries + 1,
+                )
+                return decoded
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                last_error = exc
+                elapsed_ms = int((time.perf_counter() - started) * 1000)
+                error_type = type(exc).__name__
+                logger.warning(
+                    "[MCPPool] call failed request_id=%s server=%s transport=%s endpoint=%s "
+                    "tool=%s attempt=%s/%s slot=%s elapsed_ms=%s error=%s: %r",
                     request_id,
                     server_type,
                     transport,
@@ -533,103 +731,66 @@ class MCPClientPool:
                     tool_name,
                     attempt + 1,
                     max_retries + 1,
-                    timeout,
-                    session_epoch,
+                    slot.index,
+                    elapsed_ms,
+                    error_type,
+                    exc,
                 )
-                try:
-                    session = await self.get_session(server_type)
-                    result = await asyncio.wait_for(
-                        session.call_tool(tool_name, arguments),
-                        timeout=timeout,
-                    )
-                    decoded = self._decode_tool_result(result)
-                    elapsed_ms = int((time.perf_counter() - started) * 1000)
-                    stats["calls_total"] += 1
-                    stats["calls_success"] += 1
-                    self._record_tool_call(
-                        {
-                            "timestamp": datetime.now(timezone.utc).isoformat(),
-                            "request_id": request_id,
-                            "server_type": server_type,
-                            "tool_name": tool_name,
-                            "attempt": attempt + 1,
-                            "success": True,
-                            "elapsed_ms": elapsed_ms,
-                            "session_epoch": self._session_epochs.get(server_type, 0),
-                        }
-                    )
-                    logger.info(
-                        "[MCPPool] call success request_id=%s server=%s tool=%s elapsed_ms=%s attempt=%s/%s",
-                        request_id,
-                        server_type,
-                        tool_name,
-                        elapsed_ms,
-                        attempt + 1,
-                        max_retries + 1,
-                    )
-                    return decoded
-                except asyncio.CancelledError:
-                    raise
-                except Exception as exc:
-                    last_error = exc
-                    elapsed_ms = int((time.perf_counter() - started) * 1000)
-                    error_type = type(exc).__name__
+                slot.healthy = False
+                stats["calls_total"] += 1
+                stats["calls_failed"] += 1
+                self._record_timing(server_type, queue_wait_ms, elapsed_ms)
+                self._record_tool_call(
+                    {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "request_id": request_id,
+                        "server_type": server_type,
+                        "tool_name": tool_name,
+                        "attempt": attempt + 1,
+                        "success": False,
+                        "elapsed_ms": elapsed_ms,
+                        "queue_wait_ms": queue_wait_ms,
+                        "slot": slot.index,
+                        "error_type": error_type,
+                        "error": str(exc),
+                        "session_epoch": session_epoch,
+                    }
+                )
+                self._record_error(
+                    {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "request_id": request_id,
+                        "server_type": server_type,
+                        "tool_name": tool_name,
+                        "attempt": attempt + 1,
+                        "error_type": error_type,
+                        "detail": str(exc),
+                        "slot": slot.index,
+                        "session_epoch": session_epoch,
+                    }
+                )
+
+                # 只关闭出错时所用的那一代会话；并发调用可能已经完成了重连。
+                if (
+                    settings.mcp_http_recover_on_session_error
+                    and self._is_session_lifecycle_error(exc)
+                    and slot.epoch == session_epoch
+                ):
+                    stats["session_errors"] += 1
+                    stats["forced_reconnects"] += 1
                     logger.warning(
-                        "[MCPPool] call failed request_id=%s server=%s transport=%s endpoint=%s "
-                        "tool=%s attempt=%s/%s elapsed_ms=%s error=%s: %r",
+                        "[MCPPool] session lifecycle error; forcing reconnect request_id=%s server=%s slot=%s",
                         request_id,
                         server_type,
-                        transport,
-                        endpoint,
-                        tool_name,
-                        attempt + 1,
-                        max_retries + 1,
-                        elapsed_ms,
-                        error_type,
-                        exc,
-                    )
-                    self._healthy[server_type] = False
-                    stats["calls_total"] += 1
-                    stats["calls_failed"] += 1
-                    self._record_tool_call(
-                        {
-                            "timestamp": datetime.now(timezone.utc).isoformat(),
-                            "request_id": request_id,
-                            "server_type": server_type,
-                            "tool_name": tool_name,
-                            "attempt": attempt + 1,
-                            "success": False,
-                            "elapsed_ms": elapsed_ms,
-                            "error_type": error_type,
-                            "error": str(exc),
-                            "session_epoch": self._session_epochs.get(server_type, 0),
-                        }
+                        slot.index,
                     )
-                    self._record_error(
-                        {
-                            "timestamp": datetime.now(timezone.utc).isoformat(),
-                            "request_id": request_id,
-                            "server_type": server_type,
-                            "tool_name": tool_name,
-                            "attempt": attempt + 1,
-                            "error_type": error_type,
-                            "detail": str(exc),
-                            "session_epoch": self._session_epochs.get(server_type, 0),
-                        }
-                    )
-
-                    if settings.mcp_http_recover_on_session_error and self._is_session_lifecycle_error(exc):
-                        stats["session_errors"] += 1
-                        stats["forced_reconnects"] += 1
-                        logger.warning(
-                            "[MCPPool] session lifecycle error; forcing reconnect request_id=%s server=%s",
-                            request_id,
-                            server_type,
-                        )
-                        await self._close_session(server_type)
+                    await self._close_session(server_type, slot.index)
+            finally:
+                slot.in_flight -= 1
+                slot.semaphore.release()
 
-                    if attempt < max_retries:
-                        await asyncio.sleep(0.1 * (attempt + 1))
+            if attempt < max_retries:
+                await asyncio.sleep(0.1 * (attempt + 1))
 
         # 对话类工具超时可能是慢而非挂，超时不进入全局 cooldown，避免把整个工具服务封死。
         if not self._is_timeout_error(last_error):
@@ -649,9 +810,11 @@ class MCPClientPool:
             f"{type(last_error).__name__ if last_error else 'UnknownError'}: {last_error!r}"
         )
 
-    async def _connect(self, server_type: str) -> ClientSession:
-        """Create a new connection to the specified server."""
-        await self._close_session(server_type)
+    async def _connect(self, server_type: str, slot: Optional[_SessionSlot] = None) -> ClientSession:
+        """Create a new connection for one slot of the specified server."""
+        if slot is None:
+            slot = self._select_slot(server_type)
+        await self._close_session(server_type, slot.index)
 
         config = self._configs[server_type]
         transport = self._normalize_transport(config.transport)
@@ -700,24 +863,28 @@ class MCPClientPool:
                 session.send_ping(),
                 timeout=self._ping_timeout_seconds,
             )
+            now = time.monotonic()
             if self._is_http_transport(transport):
                 await asyncio.wait_for(
                     session.list_tools(),
                     timeout=max(self._ping_timeout_seconds, 3.0),
                 )
-                self._last_protocol_check[server_type] = time.monotonic()
+                slot.last_protocol_check = now
 
-            self._sessions[server_type] = session
-            self._exit_stacks[server_type] = exit_stack
-            self._healthy[server_type] = True
             self._session_epochs[server_type] = self._session_epochs.get(server_type, 0) + 1
+            slot.session = session
+            slot.exit_stack = exit_stack
+            slot.healthy = True
+            slot.epoch = self._session_epochs[server_type]
+            slot.last_health_ok = now
 
             logger.info(
-                "[MCPPool] Connected to %s (transport=%s endpoint=%s session_epoch=%s)",
+                "[MCPPool] Connected to %s (transport=%s endpoint=%s slot=%s session_epoch=%s)",
                 config.name,
                 transport,
                 config.endpoint,
-                self._session_epochs[server_type],
+                slot.index,
+                slot.epoch,
             )
             return session
         except asyncio.CancelledError:
@@ -732,8 +899,22 @@ class MCPClientPool:
                 detail=f"{type(exc).__name__}: {exc}",
             ) from exc
 
-    async def _check_health(self, server_type: str, session: ClientSession) -> bool:
-        """Check if a session is healthy."""
+    async def _check_health(
+        self,
+        server_type: str,
+        session: ClientSession,
+        slot: Optional[_SessionSlot] = None,
+    ) -> bool:
+        """Check if a session is healthy (ping is skipped right after a successful round trip)."""
+        if slot is None:
+            slot = self._slot_of(server_type, session)
+        now = time.monotonic()
+        if (
+            slot is not None
+            and slot.healthy
+            and (now - slot.last_health_ok) < self._health_check_interval_seconds
+        ):
+            return True
         try:
             await asyncio.wait_for(
                 session.send_ping(),
@@ -742,16 +923,21 @@ class MCPClientPool:
             config = self._configs.get(server_type)
             transport = self._normalize_transport(config.transport) if config else "stdio"
             if self._is_http_transport(transport):
-                now = time.monotonic()
-                last = self._last_protocol_check.get(server_type, 0.0)
+                last = slot.last_protocol_check if slot is not None else 0.0
                 if (now - last) >= self._protocol_health_check_interval_seconds:
                     await asyncio.wait_for(
                         session.list_tools(),
                         timeout=max(self._ping_timeout_seconds, 3.0),
                     )
-                    self._last_protocol_check[server_type] = now
+                    if slot is not None:
+                        slot.last_protocol_check = now
+            if slot is not None:
+                slot.healthy = True
+                slot.last_health_ok = now
             return True
         except Exception as exc:
+            if slot is not None:
+                slot.healthy = False
             self._record_error(
                 {
                     "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -760,27 +946,33 @@ class MCPClientPool:
                     "tool_name": "",
                     "error_type": type(exc).__name__,
                     "detail": str(exc),
-                    "session_epoch": self._session_epochs.get(server_type, 0),
+                    "slot": slot.index if slot is not None else None,
+                    "session_epoch": slot.epoch if slot is not None else self._session_epochs.get(server_type, 0),
                 }
             )
             return False
 
-    async def _close_session(self, server_type: str) -> None:
-        """Close a specific session."""
-        if server_type in self._exit_stacks:
+    async def _close_session(self, server_type: str, index: Optional[int] = None) -> None:
+        """Close one slot's session, or every session of the server when ``index`` is None."""
+        slots = self._slots.get(server_type, [])
+        targets = slots if index is None else [slot for slot in slots if slot.index == index]
+        for slot in targets:
+            exit_stack = slot.exit_stack
+            slot.session = None
+            slot.exit_stack = None
+            slot.healthy = False
+            slot.last_health_ok = 0.0
+            slot.last_protocol_check = 0.0
+            if exit_stack is None:
+                continue
             try:
-                await self._exit_stacks[server_type].aclose()
+                await exit_stack.aclose()
             except Exception as exc:
-                logger.warning("[MCPPool] Error closing %s: %s", server_type, exc)
-            finally:
-                self._sessions.pop(server_type, None)
-                self._exit_stacks.pop(server_type, None)
-                self._healthy[server_type] = False
-                self._last_protocol_check.pop(server_type, None)
+                logger.warning("[MCPPool] Error closing %s slot=%s: %s", server_type, slot.index, exc)
 
     async def _close_all(self) -> None:
         """Close all sessions."""
-        for server_type in list(self._sessions.keys()):
+        for server_type in list(self._slots.keys()):
             await self._close_session(server_type)
 
     async def get_diagnostics(
@@ -800,26 +992,51 @@ class MCPClientPool:
             else {}
         )
 
+        now = time.monotonic()
         servers: Dict[str, Any] = {}
         for server_type, config in self._configs.items():
             transport = self._normalize_transport(config.transport)
             cooldown_remaining = self._cooldown_remaining_seconds(server_type)
             stats = self._ensure_server_stats(server_type)
-            last_protocol_check = self._last_protocol_check.get(server_type)
+            slots = self._slots_for(server_type)
+            protocol_checks = [slot.last_protocol_check for slot in slots if slot.last_protocol_check]
             protocol_check_age = None
-            if last_protocol_check:
-                protocol_check_age = round(max(0.0, time.monotonic() - last_protocol_check), 3)
+            if protocol_checks:
+                protocol_check_age = round(max(0.0, now - max(protocol_checks)), 3)
+            timings = list(self._call_timings.get(server_type, ()))
 
             servers[server_type] = {
                 "name": config.name,
                 "transport": transport,
                 "endpoint": config.endpoint,
-                "connected": server_type in self._sessions,
-                "healthy": bool(self._healthy.get(server_type, False)),
+                "connected": any(slot.session is not None for slot in slots),
+                "healthy": any(slot.healthy for slot in slots),
                 "in_cooldown": cooldown_remaining > 0,
                 "cooldown_remaining_seconds": round(cooldown_remaining, 3),
                 "session_epoch": self._session_epochs.get(server_type, 0),
                 "last_protocol_check_age_seconds": protocol_check_age,
+                "pool_size": len(slots),
+                "max_in_flight_per_session": self._max_in_flight,
+                "in_flight": sum(slot.in_flight for slot in slots),
+                "queued": sum(slot.waiting for slot in slots),
+                "sessions": [
+                    {
+                        "slot": slot.index,
+                        "connected": slot.session is not None,
+                        "healthy": slot.healthy,
+                        "session_epoch": slot.epoch,
+                        "in_flight": slot.in_flight,
+                        "queued": slot.waiting,
+                        "calls": slot.calls,
+                    }
+                    for slot in slots
+                ],
+                "timing_ms": {
+                    "samples": len(timings),
+                    "queue_wait": self._summarize_ms([wait for wait, _ in timings]),
+                    "exec": self._summarize_ms([elapsed for _, elapsed in timings]),
+                },
+                "sticky_routes": len(self._sticky_routes.get(server_type, ())),
                 "stats": dict(stats),
                 "probe": probes.get(server_type),
             }
@@ -831,6 +1048,7 @@ class MCPClientPool:
                 "probe_timeout_seconds": probe_timeout,
                 "handshake_timeout_seconds": settings.mcp_http_handshake_timeout_seconds,
                 "recover_on_session_error": settings.mcp_http_recover_on_session_error,
+                "max_in_flight_per_session": self._max_in_flight,
             },
             "servers": servers,
             "recent_errors": list(self._recent_errors)[-50:],
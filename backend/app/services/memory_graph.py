@@ -12,6 +12,7 @@ from app.models.graph import GraphData, MemoryEdge, MemoryNode
 
 if TYPE_CHECKING:
     from app.models.graph_scope import GraphScope
+    from app.services.compiled_graph import CompiledGraph
 
 
 class MemoryGraph:
@@ -28,9 +29,20 @@ class MemoryGraph:
         self._location_index: Dict[str, set] = {}
         self._day_index: Dict[int, set] = {}
         self._participant_index: Dict[str, set] = {}
+        # Array-backed snapshot for activation (dropped on every mutation)
+        self._compiled: Optional["CompiledGraph"] = None
+
+    def compiled(self) -> "CompiledGraph":
+        """Return the CSR-compiled form of this graph (rebuilt lazily after mutations)."""
+        if self._compiled is None:
+            from app.services.compiled_graph import CompiledGraph
+
+            self._compiled = CompiledGraph.from_memory_graph(self)
+        return self._compiled
 
     def add_node(self, node: MemoryNode) -> None:
         """Add or update a node."""
+        self._compiled = None
         if node.id in self.graph:
             self._deindex_node(node.id)
         node_data = node.model_dump()
@@ -41,6 +53,7 @@ class MemoryGraph:
         """Add or update an edge (requires existing nodes)."""
         if edge.source not in self.graph or edge.target not in self.graph:
             raise ValueError("edge source/target must exist before adding edge")
+        self._compiled = None
         edge_data = edge.model_dump()
         self.graph.add_edge(edge.source, edge.target, key=edge.id, **edge_data)
         self._edge_index[edge.id] = (edge.source, edge.target, edge.id)
@@ -49,8 +62,7 @@ class MemoryGraph:
         """Fetch a node."""
         if node_id not in self.graph:
             return None
-        data = dict(self.graph.nodes[node_id])
-        return MemoryNode(**data)
+        return _node_from_attrs(self.graph.nodes[node_id])
 
     def get_edge(self, edge_id: str) -> Optional[MemoryEdge]:
         """Fetch an edge."""
@@ -61,12 +73,13 @@ class MemoryGraph:
         data = self.graph.get_edge_data(source, target, key)
         if not data:
             return None
-        return MemoryEdge(**data)
+        return _edge_from_attrs(data)
 
     def update_node(self, node_id: str, **updates) -> Optional[MemoryNode]:
         """Update node attributes."""
         if node_id not in self.graph:
             return None
+        self._compiled = None
         self._deindex_node(node_id)
         updates["updated_at"] = datetime.now()
         self.graph.nodes[node_id].update(updates)
@@ -82,6 +95,7 @@ class MemoryGraph:
         edge_data = self.graph.get_edge_data(source, target, key)
         if edge_data is None:
             return None
+        self._compiled = None
         updates["updated_at"] = datetime.now()
         edge_data.update(updates)
         return MemoryEdge(**edge_data)
@@ -90,6 +104,7 @@ class MemoryGraph:
         """Remove a node and its edges."""
         if node_id not in self.graph:
             return
+        self._compiled = None
         self._deindex_node(node_id)
         self.graph.remove_node(node_id)
         self._edge_index = {
@@ -104,6 +119,7 @@ class MemoryGraph:
             return
         source, target, key = edge_key
         if self.graph.has_edge(source, target, key):
+            self._compiled = None
             self.graph.remove_edge(source, target, key)
 
     def has_node(self, node_id: str) -> bool:
@@ -116,11 +132,7 @@ class MemoryGraph:
 
     def list_nodes(self) -> List[MemoryNode]:
         """List all nodes."""
-        nodes = []
-        for node_id in self.graph.nodes:
-            data = dict(self.graph.nodes[node_id])
-            nodes.append(MemoryNode(**data))
-        return nodes
+        return [_node_from_attrs(data) for _, data in self.graph.nodes(data=True)]
 
     def find_nodes_by_type(self, node_type: str) -> List[MemoryNode]:
         """Find nodes by type (case-sensitive)."""
@@ -136,7 +148,7 @@ class MemoryGraph:
         """List all edges."""
         edges = []
         for source, target, key, data in self.graph.edges(keys=True, data=True):
-            edges.append(MemoryEdge(**data))
+            edges.append(_edge_from_attrs(data))
             if key not in self._edge_index:
                 self._edge_index[key] = (source, target, key)
         return edges
@@ -147,7 +159,7 @@ class MemoryGraph:
             return []
         neighbors: List[Tuple[str, MemoryEdge]] = []
         for _, target, key, data in self.graph.out_edges(node_id, keys=True, data=True):
-            neighbors.append((target, MemoryEdge(**data)))
+            neighbors.append((target, _edge_from_attrs(data)))
             if key not in self._edge_index:
                 self._edge_index[key] = (node_id, target, key)
         return neighbors
@@ -158,7 +170,7 @@ class MemoryGraph:
             return []
         result: List[Tuple[str, MemoryEdge]] = []
         for source, _, key, data in self.graph.in_edges(node_id, keys=True, data=True):
-            result.append((source, MemoryEdge(**data)))
+            result.append((source, _edge_from_attrs(data)))
             if key not in self._edge_index:
                 self._edge_index[key] = (source, node_id, key)
         return result
@@ -202,21 +214,40 @@ class MemoryGraph:
 
     def to_graph_data(self) -> GraphData:
         """Serialize to GraphData."""
-        return GraphData(nodes=self.list_nodes(), edges=self.list_edges())
+        return GraphData.model_construct(nodes=self.list_nodes(), edges=self.list_edges())
 
     def subgraph(self, node_ids: Iterable[str]) -> "MemoryGraph":
-        """Extract a subgraph by node ids."""
+        """Extract a subgraph by node ids.
+
+        Edges are collected from the selected nodes' out-adjacency, so the
+        cost scales with the subgraph rather than the whole graph.
+        """
         sub = MemoryGraph()
-        node_set = set(node_ids)
-        for node_id in node_set:
-            node = self.get_node(node_id)
-            if node:
-                sub.add_node(node)
-        for source, target, key, data in self.graph.edges(keys=True, data=True):
-            if source in node_set and target in node_set:
-                sub.add_edge(MemoryEdge(**data))
+        for node_id in node_ids:
+            if node_id in self.graph and node_id not in sub.graph:
+                sub._add_node_attrs(node_id, dict(self.graph.nodes[node_id]))
+        self._copy_internal_edges(sub)
         return sub
 
+    def _add_node_attrs(self, node_id: str, attrs: Dict) -> None:
+        """Insert already-serialized node attributes (skips model round-trip)."""
+        self._compiled = None
+        if node_id in self.graph:
+            self._deindex_node(node_id)
+        self.graph.add_node(node_id, **attrs)
+        self._index_node(node_id, attrs)
+
+    def _copy_internal_edges(self, sub: "MemoryGraph") -> None:
+        """Copy every edge whose endpoints are both in ``sub`` into ``sub``."""
+        sub._compiled = None
+        for node_id in list(sub.graph):
+            if node_id not in self.graph:
+                continue
+            for _, target, key, data in self.graph.out_edges(node_id, keys=True, data=True):
+                if target in sub.graph:
+                    sub.graph.add_edge(node_id, target, key=key, **data)
+                    sub._edge_index[key] = (node_id, target, key)
+
     def rebuild_indexes(self) -> None:
         """Rebuild in-memory indexes from current graph."""
         self._type_index = {}
@@ -284,38 +315,15 @@ class MemoryGraph:
         Nodes with duplicate IDs: later entries overwrite earlier ones.
         Edges are accumulated (MultiDiGraph allows parallel edges).
         """
-        from app.models.graph_scope import GraphScope as _GraphScope
-
         merged = cls()
         pending_edges: List[MemoryEdge] = []
 
         for item in scoped_data:
             if isinstance(item, tuple) and len(item) == 2:
                 scope, graph_data = item
-                # Inject scope attributes into node properties
-                scope_attrs = {"scope_type": scope.scope_type}
-                if scope.chapter_id:
-                    scope_attrs["chapter_id"] = scope.chapter_id
-                if scope.area_id:
-                    scope_attrs["area_id"] = scope.area_id
-                if scope.location_id:
-                    scope_attrs["location_id"] = scope.location_id
-                if scope.character_id:
-                    scope_attrs["character_id"] = scope.character_id
-
+                scope_attrs = scope_properties(scope)
                 for node in graph_data.nodes:
-                    props = dict(node.properties or {})
-                    props.update(scope_attrs)
-                    injected = MemoryNode(
-                        id=node.id,
-                        type=node.type,
-                        name=node.name,
-                        created_at=node.created_at,
-                        updated_at=node.updated_at,
-                        importance=node.importance,
-                        properties=props,
-                    )
-                    merged.add_node(injected)
+                    merged.add_node(inject_scope_properties(node, scope_attrs))
                 for edge in graph_data.edges:
                     pending_edges.append(edge)
             elif isinstance(item, MemoryGraph):
@@ -440,3 +448,50 @@ class MemoryGraph:
                     self._participant_index[pid].discard(node_id)
                     if not self._participant_index[pid]:
                         self._participant_index.pop(pid, None)
+
+
+def _node_from_attrs(data: Dict) -> MemoryNode:
+    """MemoryNode view of stored attributes.
+
+    Stored attributes come from ``model_dump`` of validated models, so they are
+    not re-validated; ``properties`` is copied so callers can mutate it.
+    """
+    attrs = dict(data)
+    attrs["properties"] = dict(attrs.get("properties") or {})
+    return MemoryNode.model_construct(**attrs)
+
+
+def _edge_from_attrs(data: Dict) -> MemoryEdge:
+    """MemoryEdge view of stored attributes (see ``_node_from_attrs``)."""
+    attrs = dict(data)
+    attrs["properties"] = dict(attrs.get("properties") or {})
+    return MemoryEdge.model_construct(**attrs)
+
+
+def scope_properties(scope: "GraphScope") -> Dict[str, str]:
+    """Scope attributes injected into node properties when merging scopes."""
+    scope_attrs = {"scope_type": scope.scope_type}
+    if scope.chapter_id:
+        scope_attrs["chapter_id"] = scope.chapter_id
+    if scope.area_id:
+        scope_attrs["area_id"] = scope.area_id
+    if scope.location_id:
+        scope_attrs["location_id"] = scope.location_id
+    if scope.character_id:
+        scope_attrs["character_id"] = scope.character_id
+    return scope_attrs
+
+
+def inject_scope_properties(node: MemoryNode, scope_attrs: Dict[str, str]) -> MemoryNode:
+    """Copy of ``node`` with scope attributes merged into its properties."""
+    props = dict(node.properties or {})
+    props.update(scope_attrs)
+    return MemoryNode(
+        id=node.id,
+        type=node.type,
+        name=node.name,
+        created_at=node.created_at,
+        updated_at=node.updated_at,
+        importance=node.importance,
+        properties=props,
+    )
@@ -30,7 +30,7 @@ from app.models.character_profile import CharacterProfile
 
 if TYPE_CHECKING:
     from app.services.flash_service import FlashService
-    from app.services.graph_store import GraphStore
+    from app.services.graph_store_backend import GraphStoreBackend
     from app.services.llm_service import LLMService
     from app.services.memory_graph import MemoryGraph
 
@@ -50,7 +50,7 @@ class MemoryGraphizer:
     def __init__(
         self,
         llm_service: Optional["LLMService"] = None,
-        graph_store: Optional["GraphStore"] = None,
+        graph_store: Optional["GraphStoreBackend"] = None,
     ):
         """
         初始化图谱化器
@@ -71,11 +71,11 @@ class MemoryGraphizer:
         return self._llm_service
 
     @property
-    def graph_store(self) -> "GraphStore":
+    def graph_store(self) -> "GraphStoreBackend":
         """懒加载图谱存储"""
         if self._graph_store is None:
-            from app.services.graph_store import GraphStore
-            self._graph_store = GraphStore()
+            from app.services.graph_store_backend import create_graph_store
+            self._graph_store = create_graph_store()
         return self._graph_store
 
     async def graphize(
@@ -0,0 +1,283 @@
+"""
+Long-lived merged multi-scope graph with delta maintenance.
+
+MemoryGraph.from_multi_scope 每次召回都从零重建合并图（重新构造所有注入
+scope 属性的 MemoryNode 并去重边），代价为 O(全图)。MergedScopeGraph 为每个
+会话保留一份合并图，记录它由哪些作用域组成，每轮只应用差异：
+- 作用域内节点/边对象未变（缓存命中时为同一实例）则跳过
+- 玩家切换区域/章节时，仅移除旧作用域、加入新作用域的贡献
+- 好感度 approves 边作为最低优先级的 overlay 源按差异更新
+
+合并语义与 from_multi_scope 一致：重复节点以靠后的作用域为准；重复边以
+靠前且两端节点都存在的来源为准。
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.memory_graph import MemoryGraph, inject_scope_properties, scope_properties
+
+logger = logging.getLogger(__name__)
+
+SourceKey = Union[GraphScope, str]
+
+# overlay 源（好感度边），排在所有作用域之后
+DISPOSITION_SOURCE = "disposition"
+
+_view_ids = itertools.count(1)
+
+
+class MergedScopeGraph:
+    """Per-session merged view that applies scope deltas instead of rebuilding."""
+
+    def __init__(self) -> None:
+        self.graph = MemoryGraph()
+        # 每次合并图实际发生变化时递增
+        self.version = 0
+        # 进程内唯一，区分不同会话的视图（版本号可能相同）
+        self.view_id = next(_view_ids)
+        # 每个来源最近一次产生差异时的时钟值；单调递增，reset 后也不复用
+        self._clock = 0
+        self._source_versions: Dict[SourceKey, int] = {}
+        self.full_rebuilds = 0
+        self.node_deltas = 0
+        self.edge_deltas = 0
+        self._reset()
+
+    @property
+    def scopes(self) -> List[GraphScope]:
+        """Scopes the view is currently composed from, in merge order."""
+        return list(self._order)
+
+    def _reset(self) -> None:
+        if self.graph.graph.number_of_nodes():
+            self.graph = MemoryGraph()
+            self.version += 1
+        self._order: List[GraphScope] = []
+        self._rank: Dict[SourceKey, int] = {}
+        self._node_lists: Dict[SourceKey, List[MemoryNode]] = {}
+        self._edge_lists: Dict[SourceKey, List[MemoryEdge]] = {}
+        self._source_nodes: Dict[SourceKey, Dict[str, MemoryNode]] = {}
+        self._source_edges: Dict[SourceKey, Dict[str, MemoryEdge]] = {}
+        self._node_sources: Dict[str, Set[SourceKey]] = {}
+        self._edge_sources: Dict[str, Set[SourceKey]] = {}
+        self._edges_by_endpoint: Dict[str, Set[str]] = {}
+        self._realized_edges: Dict[str, MemoryEdge] = {}
+
+    # ---- public API ----
+
+    def sync(self, scoped_data: List[Tuple[GraphScope, GraphData]]) -> bool:
+        """Bring the view in line with ``scoped_data``; returns True if it changed."""
+        new_order = [scope for scope, _ in scoped_data]
+        new_set = set(new_order)
+        old_set = set(self._order)
+        reorder = (
+            len(new_set) != len(new_order)
+            or [s for s in self._order if s in new_set] != [s for s in new_order if s in old_set]
+        )
+        if reorder:
+            self._reset()
+            self.full_rebuilds += 1
+            old_set = set()
+
+        self._order = new_order
+        self._rank = {scope: i for i, scope in enumerate(new_order)}
+        self._rank[DISPOSITION_SOURCE] = len(new_order)
+
+        dirty_nodes: Set[str] = set()
+        dirty_edges: Set[str] = set()
+        for scope in old_set - new_set:
+            self._diff_source(scope, [], [], dirty_nodes, dirty_edges)
+        for scope, graph_data in scoped_data:
+            self._diff_source(scope, graph_data.nodes, graph_data.edges, dirty_nodes, dirty_edges)
+        return self._apply(dirty_nodes, dirty_edges)
+
+    def set_overlay_edges(self, edges: Iterable[MemoryEdge], source: str = DISPOSITION_SOURCE) -> bool:
+        """Replace the overlay edges (e.g. disposition ``approves`` edges) by delta."""
+        self._rank.setdefault(source, len(self._order))
+        previous = self._source_edges.get(source, {})
+        current: Dict[str, MemoryEdge] = {}
+        for edge in edges:
+            existing = previous.get(edge.id)
+            # overlay 边每轮重新构造，值相同则沿用旧实例，避免无效更新
+            if existing is not None and _same_edge(existing, edge):
+                edge = existing
+            current.setdefault(edge.id, edge)
+        dirty_edges: Set[str] = set()
+        self._diff_source(source, [], list(current.values()), set(), dirty_edges)
+        return self._apply(set(), dirty_edges)
+
+    def version_vector(self) -> Tuple[Any, ...]:
+        """Per-source write versions in merge order; changes whenever any source changes."""
+        sources: List[SourceKey] = list(self._order)
+        sources.extend(s for s in self._source_versions if isinstance(s, str))
+        return (self.view_id, tuple((source, self._source_versions.get(source, 0)) for source in sources))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "scopes": len(self._order),
+            "nodes": self.graph.graph.number_of_nodes(),
+            "edges": self.graph.graph.number_of_edges(),
+            "version": self.version,
+            "full_rebuilds": self.full_rebuilds,
+            "node_deltas": self.node_deltas,
+            "edge_deltas": self.edge_deltas,
+        }
+
+    # ---- diffing ----
+
+    def _diff_source(
+        self,
+        source: SourceKey,
+        nodes: List[MemoryNode],
+        edges: List[MemoryEdge],
+        dirty_nodes: Set[str],
+        dirty_edges: Set[str],
+    ) -> None:
+        prev_nodes = self._node_lists.get(source)
+        if prev_nodes is None or not _same_objects(prev_nodes, nodes):
+            previous = self._source_nodes.get(source, {})
+            current: Dict[str, MemoryNode] = {}
+            for node in nodes:
+                current[node.id] = node
+            changed = False
+            for node_id, node in current.items():
+                if previous.get(node_id) is not node:
+                    self._node_sources.setdefault(node_id, set()).add(source)
+                    dirty_nodes.add(node_id)
+                    changed = True
+            for node_id in previous.keys() - current.keys():
+                self._discard_source(self._node_sources, node_id, source)
+                dirty_nodes.add(node_id)
+                changed = True
+            if changed:
+                self._touch(source)
+            self._store(self._source_nodes, self._node_lists, source, current, nodes)
+
+        prev_edges = self._edge_lists.get(source)
+        if prev_edges is None or not _same_objects(prev_edges, edges):
+            previous_edges = self._source_edges.get(source, {})
+            current_edges: Dict[str, MemoryEdge] = {}
+            for edge in edges:
+                current_edges.setdefault(edge.id, edge)
+            changed = False
+            for edge_id, edge in current_edges.items():
+                if previous_edges.get(edge_id) is not edge:
+                    self._edge_sources.setdefault(edge_id, set()).add(source)
+                    self._edges_by_endpoint.setdefault(edge.source, set()).add(edge_id)
+                    self._edges_by_endpoint.setdefault(edge.target, set()).add(edge_id)
+                    dirty_edges.add(edge_id)
+                    changed = True
+            for edge_id in previous_edges.keys() - current_edges.keys():
+                self._discard_source(self._edge_sources, edge_id, source)
+                dirty_edges.add(edge_id)
+                changed = True
+            if changed:
+                self._touch(source)
+            self._store(self._source_edges, self._edge_lists, source, current_edges, edges)
+
+    def _touch(self, source: SourceKey) -> None:
+        self._clock += 1
+        self._source_versions[source] = self._clock
+
+    @staticmethod
+    def _store(by_id: Dict, lists: Dict, source: SourceKey, current: Dict, items: List) -> None:
+        if items:
+            by_id[source] = current
+            lists[source] = list(items)
+        else:
+            by_id.pop(source, None)
+            lists.pop(source, None)
+
+    @staticmethod
+    def _discard_source(index: Dict[str, Set[SourceKey]], item_id: str, source: SourceKey) -> None:
+        sources = index.get(item_id)
+        if sources is None:
+            return
+        sources.discard(source)
+        if not sources:
+            index.pop(item_id, None)
+
+    # ---- applying ----
+
+    def _apply(self, dirty_nodes: Set[str], dirty_edges: Set[str]) -> bool:
+        graph = self.graph
+        changed = False
+
+        for node_id in dirty_nodes:
+            sources = self._node_sources.get(node_id)
+            if not sources:
+                if graph.has_node(node_id):
+                    graph.remove_node(node_id)
+                    changed = True
+                    self.node_deltas += 1
+                dirty_edges |= self._edges_by_endpoint.get(node_id, set())
+                continue
+            # 靠后的作用域覆盖靠前的
+            winner = max(sources, key=self._rank_of)
+            existed = graph.has_node(node_id)
+            node = self._source_nodes[winner][node_id]
+            graph.add_node(inject_scope_properties(node, scope_properties(winner)))
+            changed = True
+            self.node_deltas += 1
+            if not existed:
+                dirty_edges |= self._edges_by_endpoint.get(node_id, set())
+
+        for edge_id in dirty_edges:
+            if self._apply_edge(edge_id):
+                changed = True
+                self.edge_deltas += 1
+
+        if changed:
+            self.version += 1
+        return changed
+
+    def _apply_edge(self, edge_id: str) -> bool:
+        graph = self.graph
+        winner: Optional[MemoryEdge] = None
+        for source in sorted(self._edge_sources.get(edge_id, ()), key=self._rank_of):
+            candidate = self._source_edges[source][edge_id]
+            if graph.has_node(candidate.source) and graph.has_node(candidate.target):
+                winner = candidate
+                break
+
+        realized = self._realized_edges.get(edge_id)
+        present = graph.has_edge(edge_id)
+        if winner is None:
+            self._realized_edges.pop(edge_id, None)
+            if edge_id not in self._edge_sources:
+                for endpoint in ((realized.source, realized.target) if realized else ()):
+                    self._edges_by_endpoint.get(endpoint, set()).discard(edge_id)
+            if present:
+                graph.remove_edge(edge_id)
+                return True
+            return False
+
+        if present and realized is winner:
+            return False
+        if present:
+            graph.remove_edge(edge_id)
+        graph.add_edge(winner)
+        self._realized_edges[edge_id] = winner
+        return True
+
+    def _rank_of(self, source: SourceKey) -> int:
+        return self._rank.get(source, len(self._order))
+
+
+def _same_objects(previous: List[Any], current: List[Any]) -> bool:
+    return len(previous) == len(current) and all(a is b for a, b in zip(previous, current))
+
+
+def _same_edge(a: MemoryEdge, b: MemoryEdge) -> bool:
+    return (
+        a.source == b.source
+        and a.target == b.target
+        and a.relation == b.relation
+        and a.weight == b.weight
+        and a.properties == b.properties
+    )
@@ -20,7 +20,7 @@ from app.models.party import (
     PartyMember,
     TeammateRole,
 )
-from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import GraphStoreBackend, create_graph_store
 from app.services.party_store import PartyStore
 
 
@@ -29,10 +29,10 @@ class PartyService:
 
     def __init__(
         self,
-        graph_store: Optional[GraphStore] = None,
+        graph_store: Optional[GraphStoreBackend] = None,
         party_store: Optional[PartyStore] = None,
     ) -> None:
-        self.graph_store = graph_store or GraphStore()
+        self.graph_store = graph_store or create_graph_store()
         self.party_store = party_store
         # 内存缓存：world_id:session_id -> Party
         self._parties: Dict[str, Party] = {}
@@ -0,0 +1,308 @@
+"""
+Scope graph cache (write-through, in-process).
+
+位于 GraphStore.load_graph_v2 之前的进程内缓存：
+- 键为 (world_id, GraphScope)，值为该作用域的完整节点/边
+- upsert_node_v2 / upsert_edge_v2 就地补丁，save_graph_v2 等批量写入直接失效
+- 按估算字节数控制内存预算，超出后按 LRU 淘汰
+- 每个作用域维护版本号，写入时递增；加载期间发生写入则放弃回填，避免脏数据
+- TTL 兜底其他进程（如 game_tools_server）绕过本缓存的写入
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+
+CacheKey = Tuple[str, GraphScope]
+
+# 估算单个节点/边的固定开销（pydantic 实例 + dict + datetime）
+_NODE_OVERHEAD_BYTES = 600
+_EDGE_OVERHEAD_BYTES = 500
+
+
+@dataclass
+class _ScopeEntry:
+    nodes: Dict[str, MemoryNode] = field(default_factory=dict)
+    edges: Dict[str, MemoryEdge] = field(default_factory=dict)
+    node_bytes: Dict[str, int] = field(default_factory=dict)
+    edge_bytes: Dict[str, int] = field(default_factory=dict)
+    size_bytes: int = 0
+    loaded_at: float = 0.0
+
+
+class ScopeGraphCache:
+    """LRU cache of full scope graphs with a byte budget and hit/miss counters."""
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._entries: "OrderedDict[CacheKey, _ScopeEntry]" = OrderedDict()
+        self._versions: Dict[CacheKey, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.patches = 0
+        self.rejected_puts = 0
+
+    # ---- 读取 ----
+
+    def get(self, world_id: str, scope: GraphScope) -> Optional[GraphData]:
+        """Return cached graph data or None on miss.
+
+        Returned nodes/edges are shared with the cache and must be treated
+        as read-only; the lists themselves are fresh copies.
+        """
+        key = (world_id, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return GraphData.model_construct(
+                nodes=list(entry.nodes.values()),
+                edges=list(entry.edges.values()),
+            )
+
+    def version(self, world_id: str, scope: GraphScope) -> int:
+        """Current write version of a scope (bumped on every write)."""
+        with self._lock:
+            return self._versions.get((world_id, scope), 0)
+
+    # ---- 回填 ----
+
+    def put(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        graph_data: GraphData,
+        expected_version: Optional[int] = None,
+    ) -> bool:
+        """Store a freshly loaded scope graph.
+
+        If ``expected_version`` is given and the scope was written since the
+        load started, the data is discarded (it may predate the write).
+        """
+        key = (world_id, scope)
+        entry = _ScopeEntry(loaded_at=time.monotonic())
+        for node in graph_data.nodes:
+            size = _estimate_node_bytes(node)
+            entry.nodes[node.id] = node
+            entry.node_bytes[node.id] = size
+            entry.size_bytes += size
+        for edge in graph_data.edges:
+            size = _estimate_edge_bytes(edge)
+            entry.edges[edge.id] = edge
+            entry.edge_bytes[edge.id] = size
+            entry.size_bytes += size
+
+        with self._lock:
+            if expected_version is not None and self._versions.get(key, 0) != expected_version:
+                self.rejected_puts += 1
+                return False
+            if entry.size_bytes > self.max_bytes:
+                self.rejected_puts += 1
+                self._drop(key)
+                return False
+            self._drop(key)
+            self._entries[key] = entry
+            self._total_bytes += entry.size_bytes
+            self._enforce_budget()
+            return True
+
+    # ---- 写入补丁 / 失效 ----
+
+    def patch_node(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        node: MemoryNode,
+        merge: bool = True,
+    ) -> None:
+        """Apply a node write to the cached scope (Firestore set/merge semantics)."""
+        key = (world_id, scope)
+        payload = node.model_dump()
+        with self._lock:
+            self._bump(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            existing = entry.nodes.get(node.id)
+            if merge and existing is not None:
+                payload = _deep_merge(existing.model_dump(), payload)
+            patched = MemoryNode(**payload)
+            size = _estimate_node_bytes(patched)
+            delta = size - entry.node_bytes.get(node.id, 0)
+            entry.nodes[node.id] = patched
+            entry.node_bytes[node.id] = size
+            entry.size_bytes += delta
+            self._total_bytes += delta
+            self.patches += 1
+            self._enforce_budget()
+
+    def patch_edge(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        edge: MemoryEdge,
+        merge: bool = True,
+    ) -> None:
+        """Apply an edge write to the cached scope (Firestore set/merge semantics)."""
+        key = (world_id, scope)
+        payload = edge.model_dump()
+        with self._lock:
+            self._bump(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            existing = entry.edges.get(edge.id)
+            if merge and existing is not None:
+                payload = _deep_merge(existing.model_dump(), payload)
+            patched = MemoryEdge(**payload)
+            size = _estimate_edge_bytes(patched)
+            delta = size - entry.edge_bytes.get(edge.id, 0)
+            entry.edges[edge.id] = patched
+            entry.edge_bytes[edge.id] = size
+            entry.size_bytes += delta
+            self._total_bytes += delta
+            self.patches += 1
+            self._enforce_budget()
+
+    def invalidate(self, world_id: str, scope: GraphScope) -> None:
+        """Drop a cached scope and bump its version."""
+        key = (world_id, scope)
+        with self._lock:
+            self._bump(key)
+            if self._drop(key):
+                self.invalidations += 1
+
+    def invalidate_world(self, world_id: str) -> None:
+        """Drop every cached scope of a world."""
+        with self._lock:
+            keys = {key for key in self._entries if key[0] == world_id}
+            keys.update(key for key in self._versions if key[0] == world_id)
+            for key in keys:
+                self._bump(key)
+                if self._drop(key):
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            for key in list(self._versions):
+                self._bump(key)
+            self._entries.clear()
+            self._total_bytes = 0
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "patches": self.patches,
+                "rejected_puts": self.rejected_puts,
+            }
+
+    # ---- 内部（调用方需持有锁） ----
+
+    def _bump(self, key: CacheKey) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _drop(self, key: CacheKey) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._total_bytes -= entry.size_bytes
+        return True
+
+    def _enforce_budget(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.size_bytes
+            self.evictions += 1
+
+
+def _deep_merge(base: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Recursive dict merge matching Firestore ``set(..., merge=True)``."""
+    merged = dict(base)
+    for field_name, value in updates.items():
+        current = merged.get(field_name)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[field_name] = _deep_merge(current, value)
+        else:
+            merged[field_name] = value
+    return merged
+
+
+def _estimate_node_bytes(node: MemoryNode) -> int:
+    return (
+        _NODE_OVERHEAD_BYTES
+        + len(node.id)
+        + len(node.name or "")
+        + len(node.type or "")
+        + (len(repr(node.properties)) if node.properties else 0)
+    )
+
+
+def _estimate_edge_bytes(edge: MemoryEdge) -> int:
+    return (
+        _EDGE_OVERHEAD_BYTES
+        + len(edge.id)
+        + len(edge.source)
+        + len(edge.target)
+        + len(edge.relation or "")
+        + (len(repr(edge.properties)) if edge.properties else 0)
+    )
+
+
+_shared_cache: Optional[ScopeGraphCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_scope_graph_cache() -> Optional[ScopeGraphCache]:
+    """Process-wide cache shared by all GraphStore instances (None if disabled)."""
+    global _shared_cache
+    if not settings.scope_graph_cache_enabled:
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ScopeGraphCache(
+                    max_bytes=settings.scope_graph_cache_max_mb * 1024 * 1024,
+                    ttl_seconds=settings.scope_graph_cache_ttl_seconds,
+                )
+    return _shared_cache
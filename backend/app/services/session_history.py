@@ -10,18 +10,36 @@ Responsibilities:
 3. Trigger MemoryGraphizer when token threshold is reached
 4. Remove graphized messages to free context space
 5. Persist messages to Firestore for cross-restart recovery
+
+Persistence is an append log per session: each message gets a monotonically
+increasing ``seq`` (also its document id), messages from several rounds are
+buffered and committed in one batch when the buffer fills or the session goes
+idle, and restore pages through the log by ``seq``. Log documents are created,
+never overwritten: a write that lands on an existing id re-reads the log tail
+and renumbers. Sessions written before ``seq`` existed are still read in
+timestamp order.
+
+Restore is tail-first: only the most recent ``restore_tokens`` worth of
+messages is loaded when a session is resumed, so resume latency does not grow
+with session age. Older messages are paged in on demand with
+``SessionHistory.load_older``.
 """
 from __future__ import annotations
 
 import asyncio
 import logging
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 
+from google.api_core import exceptions as gcp_exceptions
 from google.cloud import firestore as firestore_lib
 
+from app.config import settings
 from app.models.context_window import WindowMessage
 from app.services.context_window import ContextWindow
+from app.services.firestore_io import run_firestore
+from app.services.token_counter import estimate_tokens
 
 if TYPE_CHECKING:
     from app.services.graph_store import GraphStore
@@ -35,6 +53,277 @@ def _firestore_messages_path(world_id: str, session_id: str) -> str:
     return f"worlds/{world_id}/sessions/{session_id}/messages"
 
 
+def _message_doc_id(seq: int) -> str:
+    """Zero-padded so document ids sort like ``seq``."""
+    return f"{seq:012d}"
+
+
+_BATCH_SIZE = 450
+_MAX_SEQ_RESEEDS = 3
+
+
+def _read_next_seq(col_ref: Any) -> int:
+    """Next free ``seq`` of the log: newest ``seq`` + 1, or the legacy message count (blocking)."""
+    query = col_ref.order_by("seq", direction=firestore_lib.Query.DESCENDING).limit(1)
+    for doc in query.stream():
+        data = doc.to_dict()
+        if data and "seq" in data:
+            return int(data["seq"]) + 1
+    return sum(1 for doc in col_ref.order_by("timestamp").stream() if "seq" not in (doc.to_dict() or {}))
+
+
+def _renumber(records: List[Dict[str, Any]], start: int) -> int:
+    for offset, record in enumerate(records):
+        record["seq"] = start + offset
+    return start + len(records)
+
+
+def _commit_messages(
+    db: Any,
+    col_path: str,
+    records: List[Dict[str, Any]],
+    renumber: bool,
+) -> Tuple[int, Optional[int], Optional[Exception]]:
+    """Create log documents for ``records`` in batches (blocking; runs in the Firestore I/O pool).
+
+    Documents are created, never overwritten. With ``renumber`` (the log tail is
+    unknown, e.g. the restore failed) records are numbered from the tail read
+    from Firestore first. A batch that hits an existing id means the local
+    ``seq`` was stale (a late flush of a removed session, a concurrent writer):
+    the tail is re-read and the remaining records renumbered.
+
+    Returns ``(records committed, next seq if renumbered else None, error)``.
+    """
+    col_ref = db.collection(col_path)
+    committed = 0
+    next_seq: Optional[int] = None
+    reseeds = 0
+    try:
+        if renumber:
+            next_seq = _renumber(records, _read_next_seq(col_ref))
+        while committed < len(records):
+            chunk = records[committed:committed + _BATCH_SIZE]
+            batch = db.batch()
+            for record in chunk:
+                batch.create(col_ref.document(_message_doc_id(record["seq"])), record)
+            try:
+                batch.commit()
+            except gcp_exceptions.Conflict:
+                reseeds += 1
+                if reseeds > _MAX_SEQ_RESEEDS:
+                    raise
+                logger.warning("[SessionHistory] seq %d already taken in %s, re-reading log tail", chunk[0]["seq"], col_path)
+                next_seq = None
+                next_seq = _renumber(records[committed:], _read_next_seq(col_ref))
+                continue
+            committed += len(chunk)
+    except Exception as exc:
+        return committed, next_seq, exc
+    return committed, next_seq, None
+
+
+@dataclass
+class _LogCursor:
+    """Position of the oldest message loaded into memory."""
+
+    before_seq: Optional[int] = None  # oldest loaded ``seq``; None = nothing loaded yet
+    legacy_loaded: int = 0  # legacy (pre-``seq``) messages loaded, counted from the newest
+    has_older: bool = True
+
+
+def _read_log_tail(
+    db: Any,
+    world_id: str,
+    session_id: str,
+    cursor: _LogCursor,
+    max_tokens: Optional[int] = None,
+    max_messages: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int], int]:
+    """Read messages older than ``cursor`` newest-first until a budget is met (blocking).
+
+    Token counts are estimated. Advances ``cursor`` in place and returns
+    ``(records oldest-first, newest seq read, legacy message count or 0)``.
+    """
+    col_ref = db.collection(_firestore_messages_path(world_id, session_id))
+    page_size = max(1, settings.session_history_restore_page_size)
+    records: List[Dict[str, Any]] = []
+    tokens = 0
+    newest_seq: Optional[int] = None
+
+    def _full() -> bool:
+        return (max_tokens is not None and tokens >= max_tokens) or (
+            max_messages is not None and len(records) >= max_messages
+        )
+
+    seq_exhausted = cursor.legacy_loaded > 0 or cursor.before_seq == 0
+    while not seq_exhausted and not _full():
+        query = col_ref.order_by("seq", direction=firestore_lib.Query.DESCENDING).limit(page_size)
+        if cursor.before_seq is not None:
+            query = query.start_after({"seq": cursor.before_seq})
+        page = [data for data in (doc.to_dict() for doc in query.stream()) if data]
+        for data in page:
+            records.append(data)
+            tokens += estimate_tokens(data.get("content", ""))
+            cursor.before_seq = data["seq"]
+            if newest_seq is None:
+                newest_seq = data["seq"]
+            if _full():
+                break
+        if len(page) < page_size:
+            seq_exhausted = True
+
+    legacy_total = 0
+    if seq_exhausted and not _full() and cursor.before_seq != 0:
+        # 旧格式消息（无 seq）没有可分页的键，整体读出后取尾部
+        legacy = [
+            data
+            for data in (doc.to_dict() for doc in col_ref.order_by("timestamp").stream())
+            if data and "seq" not in data
+        ]
+        legacy_total = len(legacy)
+        remaining = legacy[: legacy_total - cursor.legacy_loaded]
+        while remaining and not _full():
+            data = remaining.pop()
+            records.append(data)
+            tokens += estimate_tokens(data.get("content", ""))
+            cursor.legacy_loaded += 1
+        cursor.has_older = bool(remaining)
+    else:
+        cursor.has_older = not (seq_exhausted and cursor.before_seq in (None, 0))
+
+    records.reverse()
+    return records, newest_seq, legacy_total
+
+
+# (records oldest-first, newest seq, legacy message count, cursor)
+_RestoredTail = Tuple[List[Dict[str, Any]], Optional[int], int, _LogCursor]
+
+
+class SessionMessageLog:
+    """Append-only Firestore message log for one session.
+
+    ``append`` assigns sequence numbers and buffers records; a flush is
+    scheduled after ``flush_delay`` seconds of inactivity, or immediately once
+    ``flush_max_messages`` records are pending. Only one flush runs at a time;
+    a failed flush puts its records back at the head of the buffer.
+
+    ``next_seq`` is None until the log tail is known (set by restore, or read
+    from Firestore by the next flush); records appended meanwhile are numbered
+    when they are written. After a failed flush the tail is re-read as well.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        world_id: str,
+        session_id: str,
+        flush_delay: Optional[float] = None,
+        flush_max_messages: Optional[int] = None,
+    ) -> None:
+        self._db = db
+        self._col_path = _firestore_messages_path(world_id, session_id)
+        self.flush_delay = settings.session_history_flush_delay_seconds if flush_delay is None else flush_delay
+        self.flush_max_messages = max(
+            1,
+            settings.session_history_flush_max_messages if flush_max_messages is None else flush_max_messages,
+        )
+        self.next_seq: Optional[int] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {"appended": 0, "flushes": 0, "written": 0, "errors": 0}
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def append(self, messages: List[Dict[str, Any]]) -> None:
+        for message in messages:
+            record = dict(message)
+            if self.next_seq is not None:
+                record["seq"] = self.next_seq
+                self.next_seq += 1
+            self._pending.append(record)
+        self.stats["appended"] += len(messages)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 无事件循环（同步调用方 / 脚本）：直接写入
+            self._flush_sync()
+            return
+        if len(self._pending) >= self.flush_max_messages:
+            self._schedule_flush(loop, 0)
+        else:
+            self._schedule_flush(loop, self.flush_delay)
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.ensure_future(self.flush())
+
+    def _take_pending(self) -> Tuple[List[Dict[str, Any]], bool]:
+        records, self._pending = self._pending, []
+        return records, self.next_seq is None
+
+    def _settle(
+        self,
+        records: List[Dict[str, Any]],
+        result: Tuple[int, Optional[int], Optional[Exception]],
+    ) -> bool:
+        """Apply a commit result; returns False when the flush failed."""
+        committed, next_seq, error = result
+        if next_seq is not None:
+            # 序号由写入方重新确定：之后追加的记录顺延
+            self.next_seq = _renumber(self._pending, next_seq)
+        if committed:
+            self.stats["flushes"] += 1
+            self.stats["written"] += committed
+        if error is None:
+            return True
+        self._pending = records[committed:] + self._pending
+        self.next_seq = None
+        self.stats["errors"] += 1
+        logger.warning("[SessionHistory] Firestore persist failed (%d pending): %s", len(self._pending), error)
+        return False
+
+    async def flush(self) -> int:
+        """Write all pending records; returns the number written."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        written = 0
+        while self._pending:
+            records, renumber = self._take_pending()
+            result = await run_firestore(
+                "session_history.persist", _commit_messages, self._db, self._col_path, records, renumber,
+            )
+            written += result[0]
+            if not self._settle(records, result):
+                return written
+        return written
+
+    def _flush_sync(self) -> None:
+        records, renumber = self._take_pending()
+        self._settle(records, _commit_messages(self._db, self._col_path, records, renumber))
+
+
+def _window_items(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "role": data.get("role", "system"),
+            "content": data.get("content", ""),
+            "metadata": data.get("metadata") or {},
+        }
+        for data in records
+        if data
+    ]
+
+
 def _normalize_message_for_api(
     role: str,
     content: str,
@@ -109,6 +398,9 @@ class SessionHistory:
             graphize_threshold=graphize_threshold,
             keep_recent_tokens=keep_recent_tokens,
         )
+        self._log = SessionMessageLog(firestore_db, world_id, session_id) if firestore_db else None
+        self._cursor = _LogCursor(has_older=False)
+        self._paging_lock = asyncio.Lock()
         self._graphize_in_progress = False
         self._total_graphize_runs = 0
 
@@ -137,25 +429,16 @@ class SessionHistory:
             metadata={"source": "gm_narration", **(metadata or {})},
         )
 
-        # Fire-and-forget Firestore persistence
-        if self._firestore_db:
-            try:
-                now = datetime.now(timezone.utc)
-                asyncio.get_event_loop().run_in_executor(
-                    None,
-                    self._persist_messages_sync,
-                    [
-                        {"role": "user", "content": player_input, "timestamp": now, "metadata": metadata or {}},
-                        {
-                            "role": "assistant",
-                            "content": gm_response,
-                            "timestamp": now,
-                            "metadata": {"source": "gm_narration", **(metadata or {})},
-                        },
-                    ],
-                )
-            except Exception as exc:
-                logger.debug("[SessionHistory] Firestore persist failed: %s", exc)
+        now = datetime.now(timezone.utc)
+        self._persist([
+            {"role": "user", "content": player_input, "timestamp": now, "metadata": metadata or {}},
+            {
+                "role": "assistant",
+                "content": gm_response,
+                "timestamp": now,
+                "metadata": {"source": "gm_narration", **(metadata or {})},
+            },
+        ])
 
         return {
             "round_tokens": user_result.token_count + assistant_result.token_count,
@@ -178,31 +461,65 @@ class SessionHistory:
             metadata={"source": "teammate", "character_id": character_id, "name": name},
         )
 
-        # Fire-and-forget Firestore persistence
-        if self._firestore_db:
-            try:
-                now = datetime.now(timezone.utc)
-                asyncio.get_event_loop().run_in_executor(
-                    None,
-                    self._persist_messages_sync,
-                    [
-                        {
-                            "role": "system",
-                            "content": f"[{name}] {response}",
-                            "timestamp": now,
-                            "metadata": {"source": "teammate", "character_id": character_id, "name": name},
-                        },
-                    ],
-                )
-            except Exception as exc:
-                logger.debug("[SessionHistory] Firestore persist failed: %s", exc)
+        self._persist([
+            {
+                "role": "system",
+                "content": f"[{name}] {response}",
+                "timestamp": datetime.now(timezone.utc),
+                "metadata": {"source": "teammate", "character_id": character_id, "name": name},
+            },
+        ])
+
+    def _persist(self, messages: List[Dict[str, Any]]) -> None:
+        """Queue messages on the session's append log (batched, non-blocking)."""
+        if self._log is None:
+            return
+        try:
+            self._log.append(messages)
+        except Exception as exc:
+            logger.debug("[SessionHistory] Firestore persist failed: %s", exc)
 
-    def _persist_messages_sync(self, messages: List[Dict[str, Any]]) -> None:
-        """Synchronously write messages to Firestore (runs in executor)."""
-        col_path = _firestore_messages_path(self.world_id, self.session_id)
-        col_ref = self._firestore_db.collection(col_path)
-        for msg in messages:
-            col_ref.add(msg)
+    async def flush(self) -> int:
+        """Write any buffered messages now."""
+        if self._log is None:
+            return 0
+        return await self._log.flush()
+
+    @property
+    def has_older(self) -> bool:
+        """Whether persisted messages older than the in-memory window exist."""
+        return self._log is not None and self._cursor.has_older
+
+    async def load_older(
+        self,
+        max_tokens: Optional[int] = None,
+        max_messages: Optional[int] = None,
+    ) -> int:
+        """Page persisted messages older than the window into it (e.g. for history views).
+
+        Returns the number of messages added. Concurrent calls are serialized so
+        the same page is never prepended twice; the cursor only advances once
+        the page is in the window.
+        """
+        if not self.has_older:
+            return 0
+        async with self._paging_lock:
+            if not self.has_older:
+                return 0
+            cursor = replace(self._cursor)
+            records, _, _ = await run_firestore(
+                "session_history.load_older",
+                _read_log_tail,
+                self._firestore_db,
+                self.world_id,
+                self.session_id,
+                cursor,
+                max_tokens,
+                max_messages,
+            )
+            added = self._window.prepend_messages(_window_items(records))
+            self._cursor = cursor
+            return added
 
     def get_recent_history(self, max_tokens: int = 4000) -> str:
         """
@@ -211,25 +528,14 @@ class SessionHistory:
         Returns a condensed text representation of recent messages,
         staying within max_tokens budget.
         """
-        messages = self._window.messages
-        if not messages:
-            return ""
-
         lines = []
-        accumulated_tokens = 0
-
-        for msg in reversed(messages):
-            if accumulated_tokens + msg.token_count > max_tokens:
-                break
-
+        for msg in self._window.get_recent_by_tokens(max_tokens):
             if msg.role == "user":
-                lines.insert(0, f"玩家: {msg.content}")
+                lines.append(f"玩家: {msg.content}")
             elif msg.role == "assistant":
-                lines.insert(0, f"GM: {msg.content}")
+                lines.append(f"GM: {msg.content}")
             elif msg.role == "system" and msg.metadata.get("source") == "teammate":
-                lines.insert(0, msg.content)
-
-            accumulated_tokens += msg.token_count
+                lines.append(msg.content)
 
         return "\n".join(lines)
 
@@ -375,6 +681,11 @@ class SessionHistory:
             "usage_ratio": self._window.usage_ratio,
             "total_graphize_runs": self._total_graphize_runs,
             "graphize_in_progress": self._graphize_in_progress,
+            "persist": (
+                {"pending": self._log.pending_count, "next_seq": self._log.next_seq, **self._log.stats}
+                if self._log is not None
+                else None
+            ),
         }
 
 
@@ -391,29 +702,44 @@ class SessionHistoryManager:
         max_tokens: int = 1_000_000,
         graphize_threshold: float = 0.9,
         keep_recent_tokens: int = 100_000,
+        restore_tokens: Optional[int] = None,
     ) -> None:
+        """
+        Args:
+            restore_tokens: Token budget loaded on resume (most recent messages
+                first); None restores the whole log.
+        """
         self._histories: Dict[str, SessionHistory] = {}
+        self._restoring: Dict[str, asyncio.Future] = {}
         self._firestore_db = firestore_db
         self._max_tokens = max_tokens
         self._graphize_threshold = graphize_threshold
         self._keep_recent_tokens = keep_recent_tokens
+        self._restore_tokens = restore_tokens
+
+    def _new_history(self, world_id: str, session_id: str) -> SessionHistory:
+        return SessionHistory(
+            world_id=world_id,
+            session_id=session_id,
+            max_tokens=self._max_tokens,
+            graphize_threshold=self._graphize_threshold,
+            keep_recent_tokens=self._keep_recent_tokens,
+            firestore_db=self._firestore_db,
+        )
 
     def get_or_create(
         self,
         world_id: str,
         session_id: str,
     ) -> SessionHistory:
-        """Get existing or create new SessionHistory for a session."""
+        """Get existing or create new SessionHistory for a session.
+
+        Blocks on the Firestore restore; async callers should use
+        ``get_or_create_async``.
+        """
         key = f"{world_id}:{session_id}"
         if key not in self._histories:
-            history = SessionHistory(
-                world_id=world_id,
-                session_id=session_id,
-                max_tokens=self._max_tokens,
-                graphize_threshold=self._graphize_threshold,
-                keep_recent_tokens=self._keep_recent_tokens,
-                firestore_db=self._firestore_db,
-            )
+            history = self._new_history(world_id, session_id)
             # Try to restore from Firestore on first access
             if self._firestore_db:
                 try:
@@ -423,32 +749,68 @@ class SessionHistoryManager:
             self._histories[key] = history
         return self._histories[key]
 
+    async def get_or_create_async(
+        self,
+        world_id: str,
+        session_id: str,
+    ) -> SessionHistory:
+        """``get_or_create`` with the Firestore restore run off the event loop.
+
+        Concurrent first accesses to the same session share one restore.
+        """
+        key = f"{world_id}:{session_id}"
+        pending = self._restoring.get(key)
+        if pending is not None:
+            await asyncio.wait({pending})
+        history = self._histories.get(key)
+        if history is not None:
+            return history
+
+        done: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._restoring[key] = done
+        try:
+            history = self._new_history(world_id, session_id)
+            if self._firestore_db:
+                try:
+                    fetched = await run_firestore(
+                        "session_history.restore",
+                        self._fetch_firestore_messages,
+                        world_id,
+                        session_id,
+                    )
+                    self._apply_restored(history, fetched)
+                except Exception as exc:
+                    logger.debug("[SessionHistoryManager] Firestore restore failed: %s", exc)
+            # 恢复期间可能已有同步调用方创建了该会话
+            return self._histories.setdefault(key, history)
+        finally:
+            self._restoring.pop(key, None)
+            done.set_result(None)
+
     def _restore_from_firestore_sync(self, history: SessionHistory) -> None:
-        """Restore messages from Firestore into the ContextWindow."""
-        col_path = _firestore_messages_path(history.world_id, history.session_id)
-        col_ref = self._firestore_db.collection(col_path)
-        docs = col_ref.order_by("timestamp").stream()
-
-        count = 0
-        for doc in docs:
-            data = doc.to_dict()
-            if not data:
-                continue
-            role = data.get("role", "system")
-            content = data.get("content", "")
-            metadata = data.get("metadata") or {}
-            if content:
-                history._window.add_message(
-                    role=role,
-                    content=content,
-                    metadata=metadata,
-                )
-                count += 1
+        """Restore the most recent messages from Firestore into the ContextWindow."""
+        self._apply_restored(history, self._fetch_firestore_messages(history.world_id, history.session_id))
+
+    def _fetch_firestore_messages(self, world_id: str, session_id: str) -> _RestoredTail:
+        """Read the newest ``restore_tokens`` of the message log (blocking)."""
+        cursor = _LogCursor()
+        records, newest_seq, legacy_total = _read_log_tail(
+            self._firestore_db, world_id, session_id, cursor, self._restore_tokens,
+        )
+        return records, newest_seq, legacy_total, cursor
+
+    def _apply_restored(self, history: SessionHistory, fetched: _RestoredTail) -> None:
+        records, newest_seq, legacy_total, cursor = fetched
+        history._cursor = cursor
+        if history._log is not None:
+            history._log.next_seq = newest_seq + 1 if newest_seq is not None else legacy_total
+        count = history._window.add_messages(_window_items(records))
 
         if count > 0:
             logger.info(
-                "[SessionHistoryManager] Restored %d messages from Firestore for %s:%s",
+                "[SessionHistoryManager] Restored %d messages from Firestore for %s:%s%s",
                 count, history.world_id, history.session_id,
+                " (older history paged on demand)" if cursor.has_older else "",
             )
 
     async def load_history_from_firestore(
@@ -466,12 +828,21 @@ class SessionHistoryManager:
         col_path = _firestore_messages_path(world_id, session_id)
         col_ref = db.collection(col_path)
 
-        # Get recent messages ordered by timestamp descending, then reverse
-        query = col_ref.order_by("timestamp", direction=firestore_lib.Query.DESCENDING).limit(limit)
+        # Get recent messages by log sequence descending, then reverse;
+        # sessions without a sequenced log fall back to timestamp order.
+        def _load() -> List[Dict[str, Any]]:
+            query = col_ref.order_by("seq", direction=firestore_lib.Query.DESCENDING).limit(limit)
+            records = [doc.to_dict() for doc in query.stream()]
+            if len(records) < limit:
+                legacy = col_ref.order_by("timestamp", direction=firestore_lib.Query.DESCENDING).limit(limit)
+                records.extend(
+                    data for data in (doc.to_dict() for doc in legacy.stream())
+                    if data and "seq" not in data
+                )
+            return records[:limit]
 
         messages = []
-        for doc in query.stream():
-            data = doc.to_dict()
+        for data in await run_firestore("session_history.load", _load):
             if not data:
                 continue
             messages.append(
@@ -494,7 +865,19 @@ class SessionHistoryManager:
     def remove(self, world_id: str, session_id: str) -> None:
         """Remove a session's history (e.g., on session end)."""
         key = f"{world_id}:{session_id}"
-        self._histories.pop(key, None)
+        history = self._histories.pop(key, None)
+        if history is not None and history._log is not None and history._log.pending_count:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                history._log._flush_sync()
+            else:
+                asyncio.ensure_future(history.flush())
+
+    async def flush_all(self) -> int:
+        """Write buffered messages of every session (e.g. on shutdown)."""
+        results = await asyncio.gather(*(history.flush() for history in self._histories.values()))
+        return sum(results)
 
     @property
     def active_count(self) -> int:
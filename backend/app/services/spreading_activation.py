@@ -4,14 +4,17 @@ Spreading activation and subgraph extraction.
 import logging
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 from app.models.activation import SpreadingActivationConfig
-from app.models.graph import MemoryEdge, MemoryNode
+from app.models.graph import MemoryEdge
+from app.services.compiled_graph import CAUSAL_RELATIONS, REVERSE_DECAY
 from app.services.memory_graph import MemoryGraph
 
 
-_REVERSE_DECAY = 0.7
+_REVERSE_DECAY = REVERSE_DECAY
 
 
 def _get_node_props(graph: MemoryGraph, node_id: str) -> dict:
@@ -62,7 +65,7 @@ def _apply_causal_floor(
     config: SpreadingActivationConfig,
 ) -> float:
     """Enforce minimum signal for causal edges."""
-    if edge.relation in ("caused", "led_to", "resulted_from"):
+    if edge.relation in CAUSAL_RELATIONS:
         min_signal = source_activation * config.causal_min_signal
         if signal < min_signal:
             return min_signal
@@ -74,7 +77,91 @@ def spread_activation(
     seeds: Iterable[str],
     config: SpreadingActivationConfig,
 ) -> Dict[str, float]:
-    """Run spreading activation (bidirectional, CRPG-aware)."""
+    """Run spreading activation (bidirectional, CRPG-aware).
+
+    Runs on the graph's CSR-compiled form: each iteration is one vectorized
+    sparse mat-vec over precomputed per-edge coefficients. Falls back to the
+    per-node walk when a coefficient is negative, since per-signal clamping
+    is then order-dependent.
+    """
+    compiled = graph.compiled()
+    plan = compiled.propagation_plan(config)
+    if plan.has_negative:
+        return _spread_activation_walk(graph, seeds, config)
+
+    n = compiled.node_count
+    active = ~compiled.placeholder
+    n_active = int(active.sum())
+    activation = np.zeros(n, dtype=np.float64)
+    seed_list = list(seeds)
+    n_active_seeds = 0
+    for seed in seed_list:
+        idx = compiled.index.get(seed)
+        if idx is not None and active[idx]:
+            activation[idx] = 1.0
+            n_active_seeds += 1
+
+    if not n_active:
+        return {}
+
+    fired_per_iter = []
+    converged_at = None
+    for iter_idx in range(config.max_iterations):
+        fired = (activation >= config.fire_threshold) & active
+        fired_per_iter.append(int(fired.sum()))
+
+        selected = fired[plan.fire]
+        if selected.any():
+            fire = plan.fire[selected]
+            recv = plan.recv[selected]
+            incoming = np.bincount(recv, weights=activation[fire] * plan.coef[selected], minlength=n)
+            received = np.bincount(recv, minlength=n) > 0
+            new_activation = np.where(
+                received,
+                np.minimum(activation + incoming, config.max_activation),
+                activation,
+            )
+        else:
+            new_activation = activation.copy()
+
+        if config.lateral_inhibition and config.inhibition_factor > 0:
+            mean_activation = float(new_activation[active].mean())
+            if mean_activation > 0:
+                new_activation = np.clip(
+                    new_activation - config.inhibition_factor * mean_activation,
+                    0.0,
+                    config.max_activation,
+                )
+                new_activation[~active] = 0.0
+
+        delta = np.abs(new_activation - activation)[active]
+        activation = new_activation
+        if not (delta > config.convergence_threshold).any():
+            converged_at = iter_idx + 1
+            break
+
+    output = np.flatnonzero(active & (activation > config.output_threshold))
+    result = {compiled.node_ids[i]: float(activation[i]) for i in output}
+
+    logger.info(
+        "[Activation] seeds=%d/%d nodes=%d placeholders=%d iters=%d fired=%s output=%d converged=%s",
+        n_active_seeds, len(seed_list), n_active, n - n_active,
+        len(fired_per_iter), fired_per_iter, len(result),
+        converged_at or "no",
+    )
+    if result:
+        top = sorted(result.items(), key=lambda x: x[1], reverse=True)[:10]
+        logger.debug("[Activation] top: %s", ", ".join(f"{nid}={v:.3f}" for nid, v in top))
+
+    return result
+
+
+def _spread_activation_walk(
+    graph: MemoryGraph,
+    seeds: Iterable[str],
+    config: SpreadingActivationConfig,
+) -> Dict[str, float]:
+    """Reference per-node implementation of spread_activation."""
     # Exclude placeholder nodes before activation
     placeholder_ids: set = set()
     for node_id in graph.graph.nodes:
@@ -177,21 +264,24 @@ def extract_subgraph(
     graph: MemoryGraph,
     activated_nodes: Dict[str, float],
 ) -> MemoryGraph:
-    """Extract a subgraph from activation results."""
+    """Extract a subgraph from activation results.
+
+    Driven by the activated nodes' adjacency: cost is proportional to the
+    result, not to the size of the source graph. Node attributes are copied
+    as stored; models are only built when the subgraph is serialized.
+    """
     subgraph = MemoryGraph()
+    source_nodes = graph.graph.nodes
     for node_id, act in activated_nodes.items():
-        node = graph.get_node(node_id)
-        if not node:
+        if node_id not in graph.graph:
             continue
-        node_copy = MemoryNode(**node.model_dump())
-        node_copy.properties = dict(node_copy.properties)
-        node_copy.properties["activation"] = act
-        subgraph.add_node(node_copy)
-
-    for edge in graph.list_edges():
-        if edge.source in activated_nodes and edge.target in activated_nodes:
-            subgraph.add_edge(edge)
+        attrs = dict(source_nodes[node_id])
+        props = dict(attrs.get("properties") or {})
+        props["activation"] = act
+        attrs["properties"] = props
+        subgraph._add_node_attrs(node_id, attrs)
 
+    graph._copy_internal_edges(subgraph)
     return subgraph
 
 
@@ -0,0 +1,690 @@
+"""
+SQLite graph store (local embedded backend).
+
+实现与 GraphStore 相同的存储面，用于单机部署、压测与基准对比：
+- 作用域路径沿用 GraphScope.document_path()，与 Firestore 文档路径一一对应
+- nodes / edges 按 (path, id) 主键存储，type / name / day、source / target 建二级索引；
+  query_index_by_* 直接走这些索引，无需单独维护索引集合
+- save_graph* 在单个事务中批量写入；merge=True 时按 Firestore 语义深合并
+- 读写均在本地完成（亚毫秒级），不经 Firestore I/O 线程池
+
+世界元数据（meta / maps / characters 集合）仍在 Firestore，``db`` 属性按需创建客户端。
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.graph_store_backend import GraphStoreBackend, ProgressCallback
+from app.services.memory_graph import MemoryGraph
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    path TEXT NOT NULL,
+    id TEXT NOT NULL,
+    type TEXT,
+    name_key TEXT,
+    day_key TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (path, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nodes_by_type ON nodes (path, type);
+CREATE INDEX IF NOT EXISTS nodes_by_name ON nodes (path, name_key);
+CREATE INDEX IF NOT EXISTS nodes_by_day ON nodes (path, day_key) WHERE day_key IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS edges (
+    path TEXT NOT NULL,
+    id TEXT NOT NULL,
+    source TEXT,
+    target TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (path, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_by_source ON edges (path, source);
+CREATE INDEX IF NOT EXISTS edges_by_target ON edges (path, target);
+
+CREATE TABLE IF NOT EXISTS docs (
+    path TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dispositions (
+    world_id TEXT NOT NULL,
+    character_id TEXT NOT NULL,
+    target_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (world_id, character_id, target_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS choices (
+    world_id TEXT NOT NULL,
+    choice_id TEXT NOT NULL,
+    chapter_id TEXT,
+    resolved INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    PRIMARY KEY (world_id, choice_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS choices_unresolved ON choices (world_id, resolved, chapter_id);
+"""
+
+# SQLite 默认的绑定参数上限为 999
+_IN_CHUNK = 500
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=_json_default, ensure_ascii=False)
+
+
+def _loads(text: str) -> Dict[str, Any]:
+    return json.loads(text, object_hook=_json_hook)
+
+
+def _merge_fields(existing: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Firestore ``set(merge=True)`` semantics: nested maps merge, other values replace."""
+    merged = dict(existing)
+    for key, value in update.items():
+        current = merged.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[key] = _merge_fields(current, value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _chunks(items: List[str], size: int = _IN_CHUNK) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _report_done(progress: Optional[ProgressCallback], total: int) -> None:
+    """本地写入在单个事务内完成，进度只在结束时回调一次。"""
+    if progress is not None:
+        progress(total, total)
+
+
+class SQLiteGraphStore(GraphStoreBackend):
+    """GraphStore surface backed by a local SQLite database."""
+
+    # 本地读写无需作用域缓存
+    scope_cache = None
+
+    def __init__(self, path: str = ":memory:", firestore_client: Any = None) -> None:
+        self.path = path
+        self._firestore_client = firestore_client
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @property
+    def db(self) -> Any:
+        """Firestore client for world metadata that does not live in the graph store."""
+        if self._firestore_client is None:
+            from google.cloud import firestore
+
+            self._firestore_client = firestore.Client(database=settings.firestore_database)
+        return self._firestore_client
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- path mapping (same document paths as the Firestore backend) ----
+
+    @staticmethod
+    def _scope_path(world_id: str, scope: GraphScope) -> str:
+        return scope.document_path(world_id)
+
+    @staticmethod
+    def _legacy_path(world_id: str, graph_type: str, character_id: Optional[str] = None) -> str:
+        if graph_type == "character":
+            if not character_id:
+                raise ValueError("character graph requires character_id")
+            return GraphScope.character(character_id).document_path(world_id)
+        return f"worlds/{world_id}/graphs/{graph_type}"
+
+    # ---- row helpers (caller holds the lock) ----
+
+    def _transaction(self):
+        conn = self._conn
+
+        class _Tx:
+            def __enter__(self_inner):
+                conn.execute("BEGIN")
+                return conn
+
+            def __exit__(self_inner, exc_type, exc, tb):
+                conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return _Tx()
+
+    def _node_row(self, path: str, data: Dict[str, Any]) -> Tuple:
+        node_type = data.get("type")
+        name = data.get("name")
+        name_key = self._sanitize_index_key(name.lower()) if name else None
+        day_key = None
+        if node_type == "event":
+            props = data.get("properties") or {}
+            day_value = props.get("day", props.get("game_day"))
+            if day_value is not None:
+                day_key = self._sanitize_index_key(str(day_value))
+        return (path, data["id"], node_type, name_key, day_key, _dumps(data))
+
+    @staticmethod
+    def _edge_row(path: str, data: Dict[str, Any]) -> Tuple:
+        return (path, data["id"], data.get("source"), data.get("target"), _dumps(data))
+
+    def _existing(self, table: str, path: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        for chunk in _chunks(ids):
+            marks = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT id, data FROM {table} WHERE path = ? AND id IN ({marks})",
+                (path, *chunk),
+            )
+            for row_id, data in rows:
+                found[row_id] = _loads(data)
+        return found
+
+    def _write_graph(self, path: str, graph_data: GraphData, merge: bool) -> None:
+        nodes = [node.model_dump() for node in graph_data.nodes]
+        edges = [edge.model_dump() for edge in graph_data.edges]
+        with self._lock, self._transaction():
+            if merge:
+                existing_nodes = self._existing("nodes", path, [n["id"] for n in nodes])
+                existing_edges = self._existing("edges", path, [e["id"] for e in edges])
+                nodes = [_merge_fields(existing_nodes.get(n["id"], {}), n) for n in nodes]
+                edges = [_merge_fields(existing_edges.get(e["id"], {}), e) for e in edges]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?)",
+                [self._node_row(path, n) for n in nodes],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?, ?)",
+                [self._edge_row(path, e) for e in edges],
+            )
+
+    def _read_graph(self, path: str) -> GraphData:
+        with self._lock:
+            node_rows = self._conn.execute(
+                "SELECT data FROM nodes WHERE path = ? ORDER BY id", (path,)
+            ).fetchall()
+            edge_rows = self._conn.execute(
+                "SELECT data FROM edges WHERE path = ? ORDER BY id", (path,)
+            ).fetchall()
+        return GraphData(
+            nodes=[MemoryNode(**_loads(row[0])) for row in node_rows],
+            edges=[MemoryEdge(**_loads(row[0])) for row in edge_rows],
+        )
+
+    def _upsert_node(self, path: str, node: MemoryNode, merge: bool) -> None:
+        data = node.model_dump()
+        with self._lock, self._transaction():
+            existing = self._existing("nodes", path, [node.id]).get(node.id)
+            if existing is not None and merge:
+                new_props = node.properties or {}
+                existing_props = existing.get("properties") or {}
+                # 占位节点被真实数据回填时整体替换而非合并
+                if new_props.get("placeholder", False) or not existing_props.get("placeholder", False):
+                    data = _merge_fields(existing, data)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?)",
+                self._node_row(path, data),
+            )
+
+    def _upsert_edge(self, path: str, edge: MemoryEdge, merge: bool) -> None:
+        data = edge.model_dump()
+        with self._lock, self._transaction():
+            if merge:
+                existing = self._existing("edges", path, [edge.id]).get(edge.id)
+                if existing is not None:
+                    data = _merge_fields(existing, data)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?, ?)",
+                self._edge_row(path, data),
+            )
+
+    def _nodes_by_ids(self, path: str, node_ids: Iterable[str]) -> List[MemoryNode]:
+        ids = list(dict.fromkeys(node_id for node_id in node_ids if node_id))
+        with self._lock:
+            found = self._existing("nodes", path, ids)
+        return [MemoryNode(**found[node_id]) for node_id in ids if node_id in found]
+
+    def _subgraph(self, path: str, seed_nodes: Iterable[str], depth: int, direction: str) -> GraphData:
+        direction = direction.lower()
+        if direction not in {"out", "in", "both"}:
+            raise ValueError("direction must be one of: out, in, both")
+        visited = {node_id for node_id in seed_nodes if node_id}
+        frontier = set(visited)
+        edges_by_id: Dict[str, MemoryEdge] = {}
+        columns = []
+        if direction in {"out", "both"}:
+            columns.append(("source", "target"))
+        if direction in {"in", "both"}:
+            columns.append(("target", "source"))
+
+        with self._lock:
+            for _ in range(depth):
+                if not frontier:
+                    break
+                next_frontier = set()
+                for match, other in columns:
+                    for chunk in _chunks(sorted(frontier)):
+                        marks = ",".join("?" * len(chunk))
+                        rows = self._conn.execute(
+                            f"SELECT id, {other}, data FROM edges WHERE path = ? AND {match} IN ({marks})",
+                            (path, *chunk),
+                        )
+                        for edge_id, neighbor, data in rows:
+                            if edge_id not in edges_by_id:
+                                edges_by_id[edge_id] = MemoryEdge(**_loads(data))
+                            if neighbor:
+                                next_frontier.add(neighbor)
+                next_frontier -= visited
+                visited |= next_frontier
+                frontier = next_frontier
+
+        nodes = self._nodes_by_ids(path, sorted(visited))
+        return GraphData(nodes=nodes, edges=list(edges_by_id.values()))
+
+    def _get_doc(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM docs WHERE path = ?", (path,)).fetchone()
+        return _loads(row[0]) if row else None
+
+    def _set_doc(self, path: str, data: Dict[str, Any], merge: bool) -> None:
+        with self._lock, self._transaction():
+            if merge:
+                row = self._conn.execute("SELECT data FROM docs WHERE path = ?", (path,)).fetchone()
+                if row:
+                    data = _merge_fields(_loads(row[0]), data)
+            self._conn.execute("INSERT OR REPLACE INTO docs VALUES (?, ?)", (path, _dumps(data)))
+
+    # ---- GraphScope (v2) ----
+
+    async def load_graph_v2(self, world_id: str, scope: GraphScope) -> GraphData:
+        return self._read_graph(self._scope_path(world_id, scope))
+
+    async def save_graph_v2(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        graph: Union[GraphData, MemoryGraph],
+        merge: bool = True,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        graph_data = graph.to_graph_data() if isinstance(graph, MemoryGraph) else graph
+        self._write_graph(self._scope_path(world_id, scope), graph_data, merge)
+        _report_done(progress, len(graph_data.nodes) + len(graph_data.edges))
+
+    async def upsert_node_v2(
+        self, world_id: str, scope: GraphScope, node: MemoryNode, merge: bool = True
+    ) -> None:
+        self._upsert_node(self._scope_path(world_id, scope), node, merge)
+
+    async def upsert_edge_v2(
+        self, world_id: str, scope: GraphScope, edge: MemoryEdge, merge: bool = True
+    ) -> None:
+        self._upsert_edge(self._scope_path(world_id, scope), edge, merge)
+
+    async def get_nodes_by_ids_v2(
+        self, world_id: str, scope: GraphScope, node_ids: Iterable[str]
+    ) -> List[MemoryNode]:
+        return self._nodes_by_ids(self._scope_path(world_id, scope), node_ids)
+
+    async def load_local_subgraph_v2(
+        self,
+        world_id: str,
+        scope: GraphScope,
+        seed_nodes: Iterable[str],
+        depth: int = 1,
+        direction: str = "both",
+    ) -> GraphData:
+        return self._subgraph(self._scope_path(world_id, scope), seed_nodes, depth, direction)
+
+    # ---- Legacy (graph_type, character_id) addressing ----
+
+    async def load_graph(
+        self, world_id: str, graph_type: str, character_id: Optional[str] = None
+    ) -> GraphData:
+        return self._read_graph(self._legacy_path(world_id, graph_type, character_id))
+
+    async def save_graph(
+        self,
+        world_id: str,
+        graph_type: str,
+        graph: Union[GraphData, MemoryGraph],
+        character_id: Optional[str] = None,
+        merge: bool = True,
+        build_indexes: bool = False,
+        progress: Optional[ProgressCallback] = None,
+    ) -> None:
+        graph_data = graph.to_graph_data() if isinstance(graph, MemoryGraph) else graph
+        self._write_graph(self._legacy_path(world_id, graph_type, character_id), graph_data, merge)
+        _report_done(progress, len(graph_data.nodes) + len(graph_data.edges))
+
+    async def upsert_node(
+        self,
+        world_id: str,
+        graph_type: str,
+        node: MemoryNode,
+        character_id: Optional[str] = None,
+        merge: bool = True,
+        index: bool = False,
+    ) -> None:
+        self._upsert_node(self._legacy_path(world_id, graph_type, character_id), node, merge)
+
+    async def upsert_edge(
+        self,
+        world_id: str,
+        graph_type: str,
+        edge: MemoryEdge,
+        character_id: Optional[str] = None,
+        merge: bool = True,
+    ) -> None:
+        self._upsert_edge(self._legacy_path(world_id, graph_type, character_id), edge, merge)
+
+    async def get_node(
+        self, world_id: str, graph_type: str, node_id: str, character_id: Optional[str] = None
+    ) -> Optional[MemoryNode]:
+        nodes = self._nodes_by_ids(self._legacy_path(world_id, graph_type, character_id), [node_id])
+        return nodes[0] if nodes else None
+
+    async def get_edge(
+        self, world_id: str, graph_type: str, edge_id: str, character_id: Optional[str] = None
+    ) -> Optional[MemoryEdge]:
+        path = self._legacy_path(world_id, graph_type, character_id)
+        with self._lock:
+            found = self._existing("edges", path, [edge_id])
+        return MemoryEdge(**found[edge_id]) if edge_id in found else None
+
+    async def get_nodes_by_ids(
+        self,
+        world_id: str,
+        graph_type: str,
+        node_ids: Iterable[str],
+        character_id: Optional[str] = None,
+    ) -> List[MemoryNode]:
+        return self._nodes_by_ids(self._legacy_path(world_id, graph_type, character_id), node_ids)
+
+    async def load_local_subgraph(
+        self,
+        world_id: str,
+        graph_type: str,
+        seed_nodes: Iterable[str],
+        depth: int = 1,
+        direction: str = "both",
+        character_id: Optional[str] = None,
+    ) -> GraphData:
+        path = self._legacy_path(world_id, graph_type, character_id)
+        return self._subgraph(path, seed_nodes, depth, direction)
+
+    async def clear_graph(
+        self, world_id: str, graph_type: str, character_id: Optional[str] = None
+    ) -> None:
+        path = self._legacy_path(world_id, graph_type, character_id)
+        with self._lock, self._transaction():
+            self._conn.execute("DELETE FROM nodes WHERE path = ?", (path,))
+            self._conn.execute("DELETE FROM edges WHERE path = ?", (path,))
+
+    # ---- Character document ----
+
+    async def update_character_state(self, world_id: str, character_id: str, updates: dict) -> None:
+        self._set_doc(self._legacy_path(world_id, "character", character_id), {"state": updates}, merge=True)
+
+    async def get_character_state(self, world_id: str, character_id: str) -> dict:
+        data = self._get_doc(self._legacy_path(world_id, "character", character_id)) or {}
+        return data.get("state", {}) or {}
+
+    async def get_character_profile(self, world_id: str, character_id: str) -> dict:
+        data = self._get_doc(self._legacy_path(world_id, "character", character_id)) or {}
+        return data.get("profile", {}) or {}
+
+    async def set_character_profile(
+        self, world_id: str, character_id: str, profile: dict, merge: bool = True
+    ) -> None:
+        self._set_doc(self._legacy_path(world_id, "character", character_id), {"profile": profile}, merge=merge)
+
+    # ---- Dispositions ----
+
+    async def get_disposition(
+        self, world_id: str, character_id: str, target_id: str
+    ) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM dispositions WHERE world_id = ? AND character_id = ? AND target_id = ?",
+                (world_id, character_id, target_id),
+            ).fetchone()
+        return _loads(row[0]) if row else None
+
+    async def update_disposition(
+        self,
+        world_id: str,
+        character_id: str,
+        target_id: str,
+        deltas: Dict[str, int],
+        reason: str = "",
+        game_day: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        with self._lock, self._transaction():
+            row = self._conn.execute(
+                "SELECT data FROM dispositions WHERE world_id = ? AND character_id = ? AND target_id = ?",
+                (world_id, character_id, target_id),
+            ).fetchone()
+            data = _loads(row[0]) if row else self._new_disposition()
+            self._apply_disposition_deltas(data, deltas, reason, game_day, datetime.now())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dispositions VALUES (?, ?, ?, ?)",
+                (world_id, character_id, target_id, _dumps(data)),
+            )
+        return data
+
+    async def get_all_dispositions(
+        self, world_id: str, character_id: str
+    ) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT target_id, data FROM dispositions WHERE world_id = ? AND character_id = ? "
+                "ORDER BY target_id",
+                (world_id, character_id),
+            ).fetchall()
+        return {target_id: _loads(data) for target_id, data in rows}
+
+    # ---- Choices ----
+
+    def _put_choice(self, world_id: str, choice_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO choices VALUES (?, ?, ?, ?, ?)",
+                (world_id, choice_id, data.get("chapter_id"), int(bool(data.get("resolved"))), _dumps(data)),
+            )
+
+    async def record_choice(
+        self,
+        world_id: str,
+        choice_id: str,
+        description: str,
+        chapter_id: Optional[str] = None,
+        consequences: Optional[List[Dict[str, Any]]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        character_id: Optional[str] = None,
+        write_to_character_graph: bool = True,
+    ) -> Dict[str, Any]:
+        normalized_consequences = consequences or []
+        data: Dict[str, Any] = {
+            "choice_id": choice_id,
+            "description": description,
+            "chapter_id": chapter_id,
+            "consequences": normalized_consequences,
+            "resolved": False,
+            "created_at": datetime.now(),
+        }
+        if metadata:
+            data["metadata"] = metadata
+        if character_id:
+            data["character_id"] = character_id
+        self._put_choice(world_id, choice_id, data)
+
+        if character_id and write_to_character_graph:
+            choice_node = self._build_choice_node(
+                choice_id=choice_id,
+                description=description,
+                chapter_id=chapter_id,
+                consequences=normalized_consequences,
+                metadata=metadata,
+                character_id=character_id,
+                resolved=False,
+            )
+            await self.upsert_node_v2(world_id, GraphScope.character(character_id), choice_node, merge=True)
+        return data
+
+    async def get_choice(self, world_id: str, choice_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM choices WHERE world_id = ? AND choice_id = ?",
+                (world_id, choice_id),
+            ).fetchone()
+        return _loads(row[0]) if row else None
+
+    async def get_unresolved_consequences(
+        self, world_id: str, chapter_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        sql = "SELECT choice_id, data FROM choices WHERE world_id = ? AND resolved = 0"
+        params: Tuple = (world_id,)
+        if chapter_id:
+            sql += " AND chapter_id = ?"
+            params += (chapter_id,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY choice_id", params).fetchall()
+        results = []
+        for choice_id, data in rows:
+            item = _loads(data)
+            item["choice_id"] = choice_id
+            results.append(item)
+        return results
+
+    async def resolve_consequence(
+        self,
+        world_id: str,
+        choice_id: str,
+        consequence_index: int,
+        resolution: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        data = await self.get_choice(world_id, choice_id)
+        if data is None:
+            return None
+        consequences = data.get("consequences", [])
+        if consequence_index < 0 or consequence_index >= len(consequences):
+            return data
+
+        consequences[consequence_index]["resolved"] = True
+        consequences[consequence_index]["resolved_at"] = datetime.now()
+        if resolution:
+            consequences[consequence_index]["resolution"] = resolution
+        all_resolved = all(c.get("resolved", False) for c in consequences)
+        data["consequences"] = consequences
+        data["resolved"] = all_resolved
+        self._put_choice(world_id, choice_id, data)
+
+        character_id = data.get("character_id")
+        if isinstance(character_id, str) and character_id:
+            choice_node = self._build_choice_node(
+                choice_id=choice_id,
+                description=data.get("description", ""),
+                chapter_id=data.get("chapter_id"),
+                consequences=consequences,
+                metadata=data.get("metadata"),
+                character_id=character_id,
+                resolved=all_resolved,
+            )
+            await self.upsert_node_v2(world_id, GraphScope.character(character_id), choice_node, merge=True)
+        return data
+
+    # ---- Secondary indexes ----
+
+    def _query_nodes(self, path: str, column: str, value: str) -> List[Tuple[str, str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, name_key, data FROM nodes WHERE path = ? AND {column} = ? ORDER BY id",
+                (path, value),
+            ).fetchall()
+
+    async def query_index_by_type(
+        self, world_id: str, graph_type: str, node_type: str, character_id: Optional[str] = None
+    ) -> List[dict]:
+        path = self._legacy_path(world_id, graph_type, character_id)
+        results = []
+        for node_id, _, data in self._query_nodes(path, "type", node_type):
+            node = _loads(data)
+            results.append({"node_id": node_id, "name": node.get("name"), "type": node.get("type")})
+        return results
+
+    async def query_index_by_name(
+        self, world_id: str, graph_type: str, name: str, character_id: Optional[str] = None
+    ) -> List[dict]:
+        path = self._legacy_path(world_id, graph_type, character_id)
+        name_key = self._sanitize_index_key(name.lower())
+        results = []
+        for node_id, _, data in self._query_nodes(path, "name_key", name_key):
+            node = _loads(data)
+            results.append({"node_id": node_id, "name": node.get("name"), "type": node.get("type")})
+        return results
+
+    async def query_index_by_day(
+        self, world_id: str, graph_type: str, day: str, character_id: Optional[str] = None
+    ) -> List[dict]:
+        path = self._legacy_path(world_id, graph_type, character_id)
+        day_key = self._sanitize_index_key(str(day))
+        results = []
+        for node_id, _, data in self._query_nodes(path, "day_key", day_key):
+            node = _loads(data)
+            props = node.get("properties") or {}
+            results.append({
+                "node_id": node_id,
+                "name": node.get("name"),
+                "type": node.get("type"),
+                "day": props.get("day", props.get("game_day")),
+            })
+        return results
+
+    async def rebuild_indexes(
+        self,
+        world_id: str,
+        graph_type: str,
+        character_id: Optional[str] = None,
+        clear_first: bool = False,
+        progress: Optional[ProgressCallback] = None,
+    ) -> int:
+        """Indexes are maintained on every write; returns the node count like the Firestore backend."""
+        path = self._legacy_path(world_id, graph_type, character_id)
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM nodes WHERE path = ?", (path,)).fetchone()
+        _report_done(progress, int(row[0]))
+        return int(row[0])
+
+    async def clear_indexes(
+        self, world_id: str, graph_type: str, character_id: Optional[str] = None
+    ) -> None:
+        """No-op: secondary indexes are part of the schema."""
+        return None
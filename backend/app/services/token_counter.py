@@ -0,0 +1,145 @@
+"""
+Token counting.
+
+进程级共享的 tiktoken 编码器（cl100k_base），供 ContextWindow / SessionHistory
+等按消息计数使用：
+- ``count_tokens`` 精确计数（tiktoken 不可用时退回字符估算）
+- ``count_tokens_batch`` 批量计数，恢复历史等批量场景使用 ``encode_batch``
+- ``estimate_tokens`` 不需要精确值时的快速估算（正则统计中文字符，无逐字循环）
+
+调用次数、字符数与耗时按模式累计，``get_token_counter_stats()`` 读取。
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken
+    _TIKTOKEN_AVAILABLE = True
+except ImportError:
+    _TIKTOKEN_AVAILABLE = False
+
+_ENCODING_NAME = "cl100k_base"
+_CJK_RE = re.compile("[\u4e00-\u9fff]")
+
+_ENCODER_RETRY_SECONDS = 30.0
+
+_encoder: Optional[Any] = None
+_encoder_retry_at = 0.0
+_encoder_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def get_encoder() -> Optional[Any]:
+    """Return the shared tiktoken encoding, or None when tiktoken is unavailable.
+
+    Only a successfully loaded encoder is cached; after a failure (e.g. the BPE
+    download failing on first use) loading is retried at most every
+    ``_ENCODER_RETRY_SECONDS`` and counts fall back to estimates meanwhile.
+    """
+    global _encoder, _encoder_retry_at
+    if _encoder is not None or not _TIKTOKEN_AVAILABLE:
+        return _encoder
+    if time.monotonic() < _encoder_retry_at:
+        return None
+    with _encoder_lock:
+        if _encoder is None and time.monotonic() >= _encoder_retry_at:
+            try:
+                _encoder = tiktoken.get_encoding(_ENCODING_NAME)
+            except Exception:
+                _encoder_retry_at = time.monotonic() + _ENCODER_RETRY_SECONDS
+    return _encoder
+
+
+def estimate_tokens(text: str) -> int:
+    """快速估算：中文约 2 字符 = 1 token，其他约 4 字符 = 1 token（保守估计）。"""
+    if not text:
+        return 0
+    chinese_count = len(_CJK_RE.findall(text))
+    other_count = len(text) - chinese_count
+    return chinese_count // 2 + other_count // 4 + 1
+
+
+def count_tokens(text: str) -> int:
+    """
+    计算文本的 token 数
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        token 数量
+    """
+    if not text:
+        return 0
+    started = time.perf_counter()
+    encoder = get_encoder()
+    if encoder is not None:
+        try:
+            result = len(encoder.encode(text))
+            _record("exact", 1, len(text), started)
+            return result
+        except Exception:
+            pass
+    result = estimate_tokens(text)
+    _record("estimate", 1, len(text), started)
+    return result
+
+
+def count_tokens_batch(texts: Sequence[str]) -> List[int]:
+    """批量计算 token 数，结果与 ``count_tokens`` 逐条计算一致。"""
+    if not texts:
+        return []
+    started = time.perf_counter()
+    chars = sum(len(text) for text in texts if text)
+    encoder = get_encoder()
+    if encoder is not None:
+        try:
+            non_empty = [text for text in texts if text]
+            encoded = iter(encoder.encode_batch(non_empty)) if non_empty else iter(())
+            result = [len(next(encoded)) if text else 0 for text in texts]
+            _record("exact_batch", len(texts), chars, started)
+            return result
+        except Exception:
+            pass
+    result = [estimate_tokens(text) for text in texts]
+    _record("estimate", len(texts), chars, started)
+    return result
+
+
+def _record(mode: str, texts: int, chars: int, started: float) -> None:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        row = _stats.get(mode)
+        if row is None:
+            row = _stats[mode] = {"calls": 0, "texts": 0, "chars": 0, "total_ms": 0.0}
+        row["calls"] += 1
+        row["texts"] += texts
+        row["chars"] += chars
+        row["total_ms"] += elapsed_ms
+
+
+def get_token_counter_stats() -> Dict[str, Any]:
+    """累计计数统计（按模式：exact / exact_batch / estimate）。"""
+    with _stats_lock:
+        modes = {
+            mode: {
+                "calls": int(row["calls"]),
+                "texts": int(row["texts"]),
+                "chars": int(row["chars"]),
+                "total_ms": round(row["total_ms"], 3),
+                "us_per_kchar": round(row["total_ms"] * 1000 / (row["chars"] / 1000), 2) if row["chars"] else None,
+            }
+            for mode, row in sorted(_stats.items())
+        }
+    return {"tiktoken": get_encoder() is not None, "modes": modes}
+
+
+def reset_token_counter_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
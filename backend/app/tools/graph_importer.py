@@ -50,6 +50,10 @@ def _collect_input_files(path: Path) -> List[Path]:
     return [path]
 
 
+def _print_progress(done: int, total: int) -> None:
+    print(f"  Committed {done}/{total} writes", end="\r" if done < total else "\n", flush=True)
+
+
 async def import_graph(
     input_path: Path,
     world_id: str,
@@ -83,6 +87,7 @@ async def import_graph(
         character_id=character_id,
         merge=merge,
         build_indexes=build_indexes,
+        progress=_print_progress,
     )
     return len(graph_data.nodes), len(graph_data.edges)
 
@@ -0,0 +1,396 @@
+"""
+Offline recall / activation benchmark (no Firestore, no LLM).
+
+把 goblin_slayer 数据集按 GraphPrefillLoader 的作用域规则写入内存 SQLite 图存储
+（world_graph.json 作为 world 作用域底图，prefilled_graph.json 按作用域分发），
+按 RECALL_CONFIGS 的意图混合与随机种子回放召回，分阶段统计：
+- load            作用域加载（recall() 的 5 个作用域）
+- merge_full      MemoryGraph.from_multi_scope 全量合并
+- merge_delta     MergedScopeGraph.sync 增量合并（会话稳态）
+- activate        spread_activation
+- extract         extract_subgraph + to_graph_data
+- tokens          召回子图节点文本的 token 计数（count_tokens_batch，注入提示词前的开销）
+- recall          RecallOrchestrator.recall 端到端（关闭结果缓存）
+- recall_cached   RecallOrchestrator.recall 端到端（开启结果缓存）
+
+每阶段输出 p50/p99 延迟、tracemalloc 峰值分配与进程峰值 RSS；--scales 按倍数
+合成放大图谱（10x/100x）观察退化点。
+
+Run:
+    cd backend
+    python -m app.tools.recall_benchmark
+    python -m app.tools.recall_benchmark --scales 1,10,100 --iterations 300 --json bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.models.activation import SpreadingActivationConfig
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.activation_cache import ActivationCache
+from app.services.admin.recall_orchestrator import RecallOrchestrator
+from app.services.memory_graph import MemoryGraph
+from app.services.merged_scope_graph import MergedScopeGraph
+from app.services.scope_graph_cache import ScopeGraphCache
+from app.services.spreading_activation import extract_subgraph, spread_activation
+from app.services.sqlite_graph_store import SQLiteGraphStore
+from app.services.token_counter import count_tokens_batch, get_token_counter_stats, reset_token_counter_stats
+from app.tools.world_initializer.graph_prefill_loader import GraphPrefillLoader
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "data" / "goblin_slayer" / "structured"
+WORLD_ID = "bench_world"
+STAGES = ["load", "merge_full", "merge_delta", "activate", "extract", "tokens", "recall", "recall_cached"]
+
+
+class _CachedStore:
+    """SQLite store behind a ScopeGraphCache, like GraphStore in production (warm path)."""
+
+    def __init__(self, store: SQLiteGraphStore, cache: Optional[ScopeGraphCache]) -> None:
+        self.store = store
+        self.cache = cache
+
+    async def load_graph_v2(self, world_id: str, scope: GraphScope) -> GraphData:
+        if self.cache is not None:
+            cached = self.cache.get(world_id, scope)
+            if cached is not None:
+                return cached
+        data = await self.store.load_graph_v2(world_id, scope)
+        if self.cache is not None:
+            self.cache.put(world_id, scope, data)
+        return data
+
+    async def get_all_dispositions(self, world_id: str, character_id: str) -> Dict[str, Dict[str, Any]]:
+        return await self.store.get_all_dispositions(world_id, character_id)
+
+
+# ---- dataset ----
+
+
+def _read_graph(path: Path) -> Tuple[List[MemoryNode], List[MemoryEdge]]:
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    return (
+        [MemoryNode(**n) for n in raw.get("nodes", [])],
+        [MemoryEdge(**e) for e in raw.get("edges", [])],
+    )
+
+
+def scale_graph(
+    nodes: List[MemoryNode],
+    edges: List[MemoryEdge],
+    factor: int,
+    rng: random.Random,
+    bridge_ratio: float = 0.05,
+) -> Tuple[List[MemoryNode], List[MemoryEdge]]:
+    """Replicate the graph ``factor`` times; copies keep scope properties and are bridged to the original."""
+    if factor <= 1:
+        return list(nodes), list(edges)
+    out_nodes = list(nodes)
+    out_edges = list(edges)
+    for copy in range(1, factor):
+        suffix = f"~{copy}"
+        for node in nodes:
+            out_nodes.append(node.model_copy(update={"id": node.id + suffix}))
+        for edge in edges:
+            out_edges.append(edge.model_copy(update={
+                "id": edge.id + suffix,
+                "source": edge.source + suffix,
+                "target": edge.target + suffix,
+            }))
+        for node in rng.sample(nodes, max(1, int(len(nodes) * bridge_ratio))):
+            out_edges.append(MemoryEdge(
+                id=f"bench_bridge_{node.id}{suffix}",
+                source=node.id + suffix,
+                target=node.id,
+                relation="related_to",
+                weight=0.5,
+            ))
+    return out_nodes, out_edges
+
+
+async def build_store(data_dir: Path, factor: int, rng: random.Random) -> Tuple[SQLiteGraphStore, Dict[str, Any]]:
+    """Route the dataset into scopes and write it into an in-memory SQLite store."""
+    world_nodes, world_edges = _read_graph(data_dir / "world_graph.json")
+    prefilled_nodes, prefilled_edges = _read_graph(data_dir / "prefilled_graph.json")
+    chapters_path = data_dir / "chapters_v2.json"
+    chapters_v2 = json.loads(chapters_path.read_text(encoding="utf-8")) if chapters_path.exists() else []
+
+    world_nodes, world_edges = scale_graph(world_nodes, world_edges, factor, rng)
+    prefilled_nodes, prefilled_edges = scale_graph(prefilled_nodes, prefilled_edges, factor, rng)
+
+    store = SQLiteGraphStore(":memory:")
+    await store.save_graph_v2(WORLD_ID, GraphScope.world(), GraphData(nodes=world_nodes, edges=world_edges))
+
+    loader = GraphPrefillLoader(graph_store=store)
+    scope_nodes, scope_edges = loader.route_scopes(prefilled_nodes, prefilled_edges, chapters_v2)
+    scope_sizes: Dict[str, int] = {}
+    for key in sorted(set(scope_nodes) | set(scope_edges)):
+        scope = loader._scope_key_to_scope(key)
+        if scope is None:
+            continue
+        graph_data = GraphData(nodes=scope_nodes.get(key, []), edges=scope_edges.get(key, []))
+        await store.save_graph_v2(WORLD_ID, scope, graph_data)
+        scope_sizes[key] = len(graph_data.nodes)
+
+    return store, {
+        "nodes": len(world_nodes) + len(prefilled_nodes),
+        "edges": len(world_edges) + len(prefilled_edges),
+        "scope_sizes": scope_sizes,
+        "area_to_chapter": dict(loader._area_to_chapter),
+    }
+
+
+# ---- workload ----
+
+
+def build_workload(info: Dict[str, Any], count: int, rng: random.Random, pool_size: int = 64) -> List[Dict[str, Any]]:
+    """Synthetic recall requests: intents from RECALL_CONFIGS, 1-3 seeds from the loaded scopes.
+
+    Requests are drawn from a fixed pool so consecutive turns repeat, like real sessions.
+    """
+    characters = sorted(
+        (key.split(":", 1)[1] for key in info["scope_sizes"] if key.startswith("character:")),
+        key=lambda cid: -info["scope_sizes"][f"character:{cid}"],
+    )[:8]
+    areas = [(chapter, area) for area, chapter in sorted(info["area_to_chapter"].items())]
+    seed_candidates = [key.split(":")[-1] for key in info["scope_sizes"] if ":" in key]
+    intents = sorted(RecallOrchestrator.RECALL_CONFIGS)
+
+    pool = []
+    for _ in range(pool_size):
+        chapter_id, area_id = rng.choice(areas) if areas else (None, None)
+        pool.append({
+            "character_id": rng.choice(characters) if characters else "player",
+            "chapter_id": chapter_id,
+            "area_id": area_id,
+            "intent_type": rng.choice(intents),
+            "seed_nodes": rng.sample(seed_candidates, k=min(len(seed_candidates), rng.randint(1, 3))),
+        })
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _scopes_for(request: Dict[str, Any]) -> List[GraphScope]:
+    scopes = [GraphScope.character(request["character_id"])]
+    if request["chapter_id"] and request["area_id"]:
+        scopes.append(GraphScope.area(request["chapter_id"], request["area_id"]))
+    if request["chapter_id"]:
+        scopes.append(GraphScope.chapter(request["chapter_id"]))
+    scopes.extend([GraphScope.camp(), GraphScope.world()])
+    return scopes
+
+
+def _config_for(request: Dict[str, Any]) -> SpreadingActivationConfig:
+    recall_cfg = RecallOrchestrator.RECALL_CONFIGS.get(request["intent_type"], {})
+    return SpreadingActivationConfig(
+        output_threshold=recall_cfg.get("output_threshold", 0.15),
+        current_chapter_id=request["chapter_id"],
+    )
+
+
+# ---- measurement ----
+
+
+def _percentile(values: List[float], ratio: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[int(round((len(ordered) - 1) * ratio))], 3)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss 在 Linux 上单位为 KB
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class StageRecorder:
+    """Collects per-stage latency samples and tracemalloc peaks."""
+
+    def __init__(self, trace_every: int) -> None:
+        self.trace_every = trace_every
+        self.latency_ms: Dict[str, List[float]] = defaultdict(list)
+        self.alloc_peak_kb: Dict[str, List[float]] = defaultdict(list)
+        self.rss_mb: Dict[str, float] = {}
+        self._calls: Dict[str, int] = defaultdict(int)
+
+    async def measure(self, stage: str, fn: Callable[[], Any]) -> Any:
+        self._calls[stage] += 1
+        traced = self.trace_every > 0 and self._calls[stage] % self.trace_every == 0
+        if traced:
+            tracemalloc.start()
+            base, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        result = fn()
+        if isinstance(result, Awaitable):
+            result = await result
+        elapsed = (time.perf_counter() - started) * 1000
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.alloc_peak_kb[stage].append((peak - base) / 1024)
+        else:
+            # tracemalloc 会显著拖慢执行，被追踪的样本不计入延迟
+            self.latency_ms[stage].append(elapsed)
+        self.rss_mb[stage] = _peak_rss_mb()
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for stage in STAGES:
+            samples = self.latency_ms.get(stage, [])
+            allocs = self.alloc_peak_kb.get(stage, [])
+            if not samples and not allocs:
+                continue
+            result[stage] = {
+                "samples": len(samples),
+                "p50_ms": _percentile(samples, 0.50),
+                "p99_ms": _percentile(samples, 0.99),
+                "max_ms": round(max(samples), 3) if samples else None,
+                "alloc_peak_kb_avg": round(sum(allocs) / len(allocs), 1) if allocs else None,
+                "alloc_peak_kb_max": round(max(allocs), 1) if allocs else None,
+                "peak_rss_mb": self.rss_mb.get(stage),
+            }
+        return result
+
+
+async def run_scale(
+    data_dir: Path,
+    factor: int,
+    iterations: int,
+    seed: int,
+    trace_every: int = 10,
+    scope_cache: bool = True,
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    build_started = time.perf_counter()
+    store, info = await build_store(data_dir, factor, rng)
+    build_seconds = time.perf_counter() - build_started
+
+    cache = ScopeGraphCache(max_bytes=8 * 1024 * 1024 * 1024) if scope_cache else None
+    source = _CachedStore(store, cache)
+    character_ids = {key.split(":", 1)[1] for key in info["scope_sizes"] if key.startswith("character:")}
+
+    async def _character_id_set(_world_id: str) -> set:
+        return character_ids
+
+    async def _area_chapter_map(_world_id: str) -> Dict[str, str]:
+        return info["area_to_chapter"]
+
+    def _orchestrator(cache_entries: int) -> RecallOrchestrator:
+        orchestrator = RecallOrchestrator(
+            graph_store=source,
+            get_character_id_set=_character_id_set,
+            get_area_chapter_map=_area_chapter_map,
+        )
+        orchestrator.activation_cache = ActivationCache(cache_entries)
+        return orchestrator
+
+    reset_token_counter_stats()
+    uncached = _orchestrator(0)
+    cached = _orchestrator(1024)
+    views: Dict[str, MergedScopeGraph] = {}
+    recorder = StageRecorder(trace_every)
+
+    for request in build_workload(info, iterations, rng):
+        scopes = _scopes_for(request)
+        scoped_data = await recorder.measure(
+            "load",
+            lambda: asyncio.gather(*(source.load_graph_v2(WORLD_ID, scope) for scope in scopes)),
+        )
+        scoped = list(zip(scopes, scoped_data))
+        merged = await recorder.measure("merge_full", lambda: MemoryGraph.from_multi_scope(scoped))
+
+        view = views.setdefault(request["character_id"], MergedScopeGraph())
+        await recorder.measure("merge_delta", lambda: view.sync(scoped))
+
+        config = _config_for(request)
+        seeds = [seed for seed in request["seed_nodes"] if merged.has_node(seed)] or request["seed_nodes"]
+        activated = await recorder.measure("activate", lambda: spread_activation(merged, seeds, config))
+        subgraph = await recorder.measure("extract", lambda: extract_subgraph(merged, activated).to_graph_data())
+        texts = [f"{node.name} {node.properties.get('description', '')}" for node in subgraph.nodes]
+        await recorder.measure("tokens", lambda: count_tokens_batch(texts))
+
+        kwargs = dict(
+            world_id=WORLD_ID,
+            character_id=request["character_id"],
+            seed_nodes=request["seed_nodes"],
+            intent_type=request["intent_type"],
+            chapter_id=request["chapter_id"],
+            area_id=request["area_id"],
+            session_id="bench",
+        )
+        await recorder.measure("recall", lambda: uncached.recall(**kwargs))
+        await recorder.measure("recall_cached", lambda: cached.recall(**kwargs))
+
+    store.close()
+    return {
+        "scale": factor,
+        "nodes": info["nodes"],
+        "edges": info["edges"],
+        "scopes": len(info["scope_sizes"]),
+        "build_seconds": round(build_seconds, 2),
+        "iterations": iterations,
+        "stages": recorder.summary(),
+        "activation_cache": cached.activation_cache.get_stats(),
+        "token_counter": get_token_counter_stats(),
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"\n=== scale {report['scale']}x: nodes={report['nodes']} edges={report['edges']} "
+        f"scopes={report['scopes']} build={report['build_seconds']}s iterations={report['iterations']}"
+    )
+    print(f"{'stage':<14}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'alloc KB':>12}{'peak RSS MB':>14}")
+    for stage, row in report["stages"].items():
+        print(
+            f"{stage:<14}{row['p50_ms'] or 0:>10.3f}{row['p99_ms'] or 0:>10.3f}{row['max_ms'] or 0:>10.3f}"
+            f"{row['alloc_peak_kb_max'] or 0:>12.1f}{row['peak_rss_mb'] or 0:>14.1f}"
+        )
+    cache = report["activation_cache"]
+    print(f"activation cache: hits={cache['hits']} misses={cache['misses']} hit_rate={cache['hit_rate']}")
+    for mode, row in report["token_counter"]["modes"].items():
+        print(f"token counter [{mode}]: texts={row['texts']} chars={row['chars']} us/kchar={row['us_per_kchar']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline recall/activation benchmark")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR), help="Directory with prefilled_graph.json/world_graph.json")
+    parser.add_argument("--scales", default="1,10", help="Comma-separated graph scale factors, e.g. 1,10,100")
+    parser.add_argument("--iterations", type=int, default=200, help="Recall requests replayed per scale")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for workload and scaling")
+    parser.add_argument("--trace-every", type=int, default=10, help="Trace allocations on every Nth call per stage (0 disables)")
+    parser.add_argument("--no-scope-cache", action="store_true", help="Load every scope from the store (cold path)")
+    parser.add_argument("--json", default=None, help="Write the full report to this path")
+    args = parser.parse_args()
+
+    reports = []
+    for factor in [int(part) for part in args.scales.split(",") if part.strip()]:
+        report = asyncio.run(
+            run_scale(
+                data_dir=Path(args.data_dir),
+                factor=factor,
+                iterations=args.iterations,
+                seed=args.seed,
+                trace_every=args.trace_every,
+                scope_cache=not args.no_scope_cache,
+            )
+        )
+        _print_report(report)
+        reports.append(report)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,16 +26,30 @@ from app.config import settings
 from app.models.graph import GraphData, MemoryEdge, MemoryNode
 from app.models.graph_scope import GraphScope
 from app.services.graph_store import GraphStore
+from app.services.graph_store_backend import GraphStoreBackend, ProgressCallback
+
+
+def _print_progress(done: int, total: int) -> None:
+    print(f"  Committed {done}/{total} graph writes", end="\r" if done < total else "\n", flush=True)
 
 
 class GraphPrefillLoader:
     """Loads prefilled graph data into Firestore using v2 scope addressing."""
 
-    def __init__(self, firestore_client: Optional[firestore.Client] = None):
-        self.db = firestore_client or firestore.Client(
-            database=settings.firestore_database
-        )
-        self.graph_store = GraphStore(firestore_client=self.db)
+    def __init__(
+        self,
+        firestore_client: Optional[firestore.Client] = None,
+        graph_store: Optional[GraphStoreBackend] = None,
+    ):
+        self._db = firestore_client
+        self._area_to_chapter: Dict[str, str] = {}
+        self.graph_store = graph_store or GraphStore(firestore_client=self.db)
+
+    @property
+    def db(self) -> firestore.Client:
+        if self._db is None:
+            self._db = firestore.Client(database=settings.firestore_database)
+        return self._db
 
     async def load_prefilled_graph(
         self,
@@ -43,10 +57,12 @@ class GraphPrefillLoader:
         data_dir: Path,
         dry_run: bool = False,
         verbose: bool = True,
+        progress: Optional[ProgressCallback] = None,
     ) -> Dict[str, Any]:
         """Load prefilled_graph.json + chapters_v2.json into Firestore.
 
-        Returns stats dict.
+        ``progress(done, total)`` counts node/edge writes across all scopes
+        (defaults to a console line when ``verbose``). Returns stats dict.
         """
         stats: Dict[str, Any] = {
             "nodes_written": 0,
@@ -102,37 +118,17 @@ class GraphPrefillLoader:
             if mainlines_raw:
                 print(f"  Loaded {len(mainlines_raw)} mainline definitions")
 
-        # Build area -> first chapter mapping from chapters_v2
-        # Each area is assigned to the earliest chapter that references it
-        self._area_to_chapter: Dict[str, str] = {}
-        for ch in chapters_v2:
-            ch_id = ch["id"]
-            for area_id in ch.get("available_areas", []):
-                if area_id not in self._area_to_chapter:
-                    self._area_to_chapter[area_id] = ch_id
-
-        # Build node lookup for scope routing
+        scope_nodes, scope_edges = self.route_scopes(nodes, edges, chapters_v2)
         node_by_id: Dict[str, MemoryNode] = {n.id: n for n in nodes}
 
-        # Route nodes by scope
-        scope_nodes: Dict[str, List[MemoryNode]] = defaultdict(list)
-        for node in nodes:
-            scope_key = self._node_scope_key(node)
-            scope_nodes[scope_key].append(node)
-
         if verbose:
             print(f"  Routing to {len(scope_nodes)} scopes:")
             for sk, ns in sorted(scope_nodes.items()):
                 print(f"    {sk}: {len(ns)} nodes")
 
-        # Route edges: follow source node scope, cross-scope goes to world
-        scope_edges: Dict[str, List[MemoryEdge]] = defaultdict(list)
-        for edge in edges:
-            scope_key = self._edge_scope_key(edge, node_by_id)
-            scope_edges[scope_key].append(edge)
-
         # Write nodes + edges per scope
         all_scope_keys = set(scope_nodes.keys()) | set(scope_edges.keys())
+        writes: List[Tuple[str, GraphScope, GraphData]] = []
         for scope_key in sorted(all_scope_keys):
             scope = self._scope_key_to_scope(scope_key)
             if scope is None:
@@ -145,7 +141,17 @@ class GraphPrefillLoader:
             if not scope_node_list and not scope_edge_list:
                 continue
 
-            graph_data = GraphData(nodes=scope_node_list, edges=scope_edge_list)
+            writes.append((scope_key, scope, GraphData(nodes=scope_node_list, edges=scope_edge_list)))
+
+        if progress is None and verbose:
+            progress = _print_progress
+        total_writes = sum(len(g.nodes) + len(g.edges) for _, _, g in writes)
+        written = 0
+        for scope_key, scope, graph_data in writes:
+            scope_progress = None
+            if progress is not None:
+                def scope_progress(done: int, _total: int, base: int = written) -> None:
+                    progress(base + done, total_writes)
 
             if not dry_run:
                 await self.graph_store.save_graph_v2(
@@ -153,10 +159,14 @@ class GraphPrefillLoader:
                     scope=scope,
                     graph=graph_data,
                     merge=True,
+                    progress=scope_progress,
                 )
+            elif scope_progress is not None:
+                scope_progress(len(graph_data.nodes) + len(graph_data.edges), total_writes)
+            written += len(graph_data.nodes) + len(graph_data.edges)
 
-            stats["nodes_written"] += len(scope_node_list)
-            stats["edges_written"] += len(scope_edge_list)
+            stats["nodes_written"] += len(graph_data.nodes)
+            stats["edges_written"] += len(graph_data.edges)
             if scope_key not in stats["scopes_used"]:
                 stats["scopes_used"].append(scope_key)
 
@@ -443,6 +453,38 @@ class GraphPrefillLoader:
 
     # ---- Scope routing ----
 
+    def route_scopes(
+        self,
+        nodes: List[MemoryNode],
+        edges: List[MemoryEdge],
+        chapters_v2: List[Dict[str, Any]],
+    ) -> Tuple[Dict[str, List[MemoryNode]], Dict[str, List[MemoryEdge]]]:
+        """Group nodes and edges by scope key (see module docstring for rules)."""
+        # Build area -> first chapter mapping from chapters_v2
+        # Each area is assigned to the earliest chapter that references it
+        self._area_to_chapter = {}
+        for ch in chapters_v2:
+            ch_id = ch["id"]
+            for area_id in ch.get("available_areas", []):
+                if area_id not in self._area_to_chapter:
+                    self._area_to_chapter[area_id] = ch_id
+
+        # Build node lookup for scope routing
+        node_by_id: Dict[str, MemoryNode] = {n.id: n for n in nodes}
+
+        # Route nodes by scope
+        scope_nodes: Dict[str, List[MemoryNode]] = defaultdict(list)
+        for node in nodes:
+            scope_key = self._node_scope_key(node)
+            scope_nodes[scope_key].append(node)
+
+        # Route edges: follow source node scope, cross-scope goes to world
+        scope_edges: Dict[str, List[MemoryEdge]] = defaultdict(list)
+        for edge in edges:
+            scope_key = self._edge_scope_key(edge, node_by_id)
+            scope_edges[scope_key].append(edge)
+        return scope_nodes, scope_edges
+
     def _node_scope_key(self, node: MemoryNode) -> str:
         """Determine scope key for a node based on its properties.
 
@@ -4,6 +4,7 @@
 协调地图加载、角色加载等流程，完成世界数据初始化。
 """
 import json
+import uuid
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -231,6 +232,9 @@ class WorldInitializer:
             if verbose:
                 print(f"ERROR: {error}")
 
+        if not dry_run:
+            self._stamp_data_version(world_id)
+
         # 打印总结
         if verbose:
             print("\n" + "=" * 50)
@@ -280,12 +284,15 @@ class WorldInitializer:
         maps_raw = json.loads(maps_path.read_text(encoding="utf-8"))
         maps_data = MapsData(**maps_raw)
 
-        return await self.map_loader.load_maps(
+        result = await self.map_loader.load_maps(
             world_id=world_id,
             maps_data=maps_data,
             dry_run=dry_run,
             verbose=verbose,
         )
+        if not dry_run:
+            self._stamp_data_version(world_id)
+        return result
 
     async def initialize_character(
         self,
@@ -302,13 +309,23 @@ class WorldInitializer:
         chars_raw = json.loads(chars_path.read_text(encoding="utf-8"))
         chars_data = CharactersData(**chars_raw)
 
-        return await self.character_loader.load_single_character(
+        loaded = await self.character_loader.load_single_character(
             world_id=world_id,
             char_id=character_id,
             characters_data=chars_data,
             dry_run=dry_run,
             verbose=verbose,
         )
+        if loaded and not dry_run:
+            self._stamp_data_version(world_id)
+        return loaded
+
+    def _stamp_data_version(self, world_id: str) -> None:
+        """更新世界数据版本戳（WorldInstance 据此判断本地快照是否过期）。"""
+        self.map_loader._get_world_meta_ref(world_id).set({
+            "data_version": uuid.uuid4().hex,
+            "data_updated_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
 
     @staticmethod
     def _flatten_entity_entries(raw: Any) -> list[dict]:
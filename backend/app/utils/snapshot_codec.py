@@ -0,0 +1,81 @@
+"""本地快照文件的编码与原子读写（世界快照、战斗会话快照共用）。
+
+安装了 msgpack 时使用 msgpack，否则紧凑 JSON；编码方式体现在扩展名
+（``SNAPSHOT_SUFFIX``）中。写入走临时文件 + rename，读取时文件缺失、
+读取失败或内容损坏都返回 None，由调用方回退到权威数据源。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = "msgpack" if MSGPACK_AVAILABLE else "json"
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def safe_file_name(name: str) -> str:
+    """把任意 ID 转成可用作文件名的字符串。"""
+    return _SAFE_NAME_RE.sub("_", name)
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def encode_payload(payload: Any) -> bytes:
+    """编码快照内容；时间转为 ISO 字符串，集合转为列表，其余未知类型转为字符串。"""
+    if MSGPACK_AVAILABLE:
+        return msgpack.packb(payload, default=_encode_default, use_bin_type=True)
+    return json.dumps(
+        payload, ensure_ascii=False, separators=(",", ":"), default=_encode_default,
+    ).encode("utf-8")
+
+
+def decode_payload(blob: bytes) -> Any:
+    if MSGPACK_AVAILABLE:
+        return msgpack.unpackb(blob, raw=False, strict_map_key=False)
+    return json.loads(blob.decode("utf-8"))
+
+
+def write_atomic(path: Path, payload: Any) -> Path:
+    """编码并原子写入（阻塞）。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    blob = encode_payload(payload)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(blob)
+    os.replace(tmp, path)
+    return path
+
+
+def read_payload(path: Path, label: str = "快照") -> Optional[Any]:
+    """读取并解码；不存在、读取失败或损坏时返回 None（``label`` 用于日志）。"""
+    try:
+        blob = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning("读取%s失败 %s: %s", label, path, exc)
+        return None
+    try:
+        return decode_payload(blob)
+    except Exception as exc:
+        logger.warning("%s损坏 %s: %s", label, path, exc)
+        return None
@@ -0,0 +1,102 @@
+"""Tests for recall result memoization keyed by merged-graph version vector."""
+from unittest.mock import patch
+
+from app.models.activation import SpreadingActivationConfig
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.activation_cache import ActivationCache, make_key
+from app.services.admin import recall_orchestrator as recall_module
+from app.services.admin.recall_orchestrator import RecallOrchestrator
+from app.services.merged_scope_graph import MergedScopeGraph
+
+
+def _node(id: str, **props) -> MemoryNode:
+    return MemoryNode(id=id, type="event", name=id, properties=props)
+
+
+def _edge(id: str, source: str, target: str) -> MemoryEdge:
+    return MemoryEdge(id=id, source=source, target=target, relation="knows", weight=1.0)
+
+
+CHAR = GraphScope.character("player")
+AREA = GraphScope.area("ch1", "town")
+
+
+def _orchestrator() -> RecallOrchestrator:
+    async def _empty(_world_id):
+        return {}
+
+    return RecallOrchestrator(graph_store=None, get_character_id_set=_empty, get_area_chapter_map=_empty)
+
+
+def _scoped():
+    return [
+        (AREA, GraphData(nodes=[_node("a"), _node("b"), _node("p", placeholder=True)],
+                         edges=[_edge("ab", "a", "b"), _edge("ap", "a", "p")])),
+        (CHAR, GraphData(nodes=[_node("c")], edges=[_edge("ca", "c", "a")])),
+    ]
+
+
+def test_key_normalizes_seed_order_and_duplicates():
+    config = SpreadingActivationConfig()
+    assert make_key(("v", 1), ["a", "b", "a"], config) == make_key(("v", 1), ["b", "a"], config)
+    assert make_key(("v", 1), ["a"], config) != make_key(("v", 1), ["a"], SpreadingActivationConfig(decay=0.5))
+    assert make_key(("v", 1), ["a"], config) != make_key(("v", 2), ["a"], config)
+
+
+def test_version_vector_changes_only_on_writes():
+    view = MergedScopeGraph()
+    scoped = _scoped()
+    view.sync(scoped)
+    before = view.version_vector()
+
+    view.sync(scoped)
+    assert view.version_vector() == before
+
+    area_data = scoped[0][1]
+    patched = GraphData(nodes=[*area_data.nodes[:-1], _node("b", mood="angry")], edges=area_data.edges)
+    view.sync([(AREA, patched), scoped[1]])
+    after = view.version_vector()
+    assert after != before
+    # 只有 area 作用域的版本前进
+    assert dict(after[1])[CHAR] == dict(before[1])[CHAR]
+    assert dict(after[1])[AREA] > dict(before[1])[AREA]
+
+    assert MergedScopeGraph().version_vector()[0] != view.version_vector()[0]
+
+
+def test_orchestrator_serves_repeat_recall_from_cache():
+    orchestrator = _orchestrator()
+    view = orchestrator._get_merged_view("recall", "w1", "player", "s1")
+    view.sync(_scoped())
+    config = SpreadingActivationConfig(output_threshold=0.1)
+
+    with patch.object(recall_module, "spread_activation", wraps=recall_module.spread_activation) as spy:
+        first_scores, first_subgraph = orchestrator._activate(view, ["a", "c"], config)
+        second_scores, second_subgraph = orchestrator._activate(view, ["c", "a"], config)
+        assert spy.call_count == 1
+
+        assert second_scores == first_scores
+        assert [n.id for n in second_subgraph.nodes] == [n.id for n in first_subgraph.nodes]
+        assert "p" not in {n.id for n in second_subgraph.nodes}
+        second_subgraph.nodes.clear()
+        assert orchestrator._activate(view, ["a", "c"], config)[1].nodes
+
+        view.set_overlay_edges([_edge("disposition_cb", "c", "b")])
+        orchestrator._activate(view, ["a", "c"], config)
+        assert spy.call_count == 2
+
+    stats = orchestrator.get_stats()["activation_cache"]
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+    orchestrator.drop_session_views("w1", "s1")
+    assert orchestrator.get_stats()["activation_cache"]["entries"] == 0
+
+
+def test_cache_is_bounded():
+    cache = ActivationCache(max_entries=2)
+    for i in range(3):
+        cache.put(((i, ()), frozenset(), ()), {"n": 1.0}, None)
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+    assert cache.get(((0, ()), frozenset(), ())) is None
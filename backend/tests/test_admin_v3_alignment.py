@@ -204,6 +204,7 @@ def _make_base_coordinator(
     )
     coordinator.session_history_manager = types.SimpleNamespace(
         get_or_create=lambda world_id, session_id: history,
+        get_or_create_async=AsyncMock(return_value=history),
     )
     coordinator.narrative_service = narrative_service
     coordinator.story_director = types.SimpleNamespace(
@@ -0,0 +1,112 @@
+"""Tests for combat session eviction, snapshotting and restart recovery."""
+import pytest
+
+from app.combat import combat_engine as engine_module
+from app.combat.combat_engine import CombatEngine
+from app.combat.models.combat_session import CombatState
+from app.combat.models.combatant import StatusEffect
+from app.combat.session_snapshot import CombatSnapshotStore, dump_session, load_session
+from app.config import settings
+
+PLAYER = {"hp": 40, "max_hp": 40, "ac": 15, "attack_bonus": 5, "damage_dice": "1d8", "damage_bonus": 3,
+          "spell_slots": {1: 2}}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(engine_module.time, "monotonic", fake)
+    return fake
+
+
+def _play_turn(engine, session):
+    actor = session.get_current_actor()
+    target = session.get_enemies()[0]
+    engaged = session.get_distance_band(actor.id, target.id) == "engaged"
+    if not engaged and actor.movement_points > 0:
+        return engine.execute_action(session.combat_id, "move_closer")
+    if engaged and actor.action_available:
+        return engine.execute_action(session.combat_id, f"attack_{target.id}")
+    return engine.execute_action(session.combat_id, "end_turn")
+
+
+def test_session_round_trips_through_snapshot():
+    session = CombatEngine().start_combat([{"type": "goblin"}, {"type": "orc"}], PLAYER)
+    session.get_combatant("player").add_status_effect(StatusEffect.DEFENDING, 1, source="player")
+
+    restored = load_session(dump_session(session))
+    assert dump_session(restored) == dump_session(session)
+    assert restored.get_combatant("player").spell_slots == {1: 2}
+    assert restored.get_distance_band("player", "goblin_1") == session.get_distance_band("player", "goblin_1")
+
+
+def test_restart_restores_in_flight_combat(tmp_path, clock):
+    store = CombatSnapshotStore(str(tmp_path))
+    engine = CombatEngine(snapshot_store=store)
+    session = engine.start_combat([{"type": "orc", "overrides": {"max_hp": 200}}], PLAYER)
+    result = _play_turn(engine, session)
+    while result.action_id != "end_turn":
+        result = _play_turn(engine, session)
+    assert session.state != CombatState.ENDED
+    expected = dump_session(session)
+
+    restarted = CombatEngine(snapshot_store=CombatSnapshotStore(str(tmp_path)))
+    assert restarted.sessions == {}
+    restored = restarted.get_combat_state(session.combat_id)
+    assert dump_session(restored) == expected
+    _play_turn(restarted, restored)
+    assert restored.event_seq > expected["event_seq"]
+
+
+def test_ended_sessions_are_evicted(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(settings, "combat_ended_ttl_seconds", 600)
+    monkeypatch.setattr(settings, "combat_idle_ttl_seconds", 60)
+    store = CombatSnapshotStore(str(tmp_path))
+    engine = CombatEngine(snapshot_store=store)
+    strong = dict(PLAYER, attack_bonus=30, damage_bonus=100)
+
+    ended = engine.start_combat([{"type": "goblin"}], strong)
+    while ended.state != CombatState.ENDED:
+        _play_turn(engine, ended)
+    engine.get_combat_result(ended.combat_id)
+    idle = engine.start_combat([{"type": "orc"}], PLAYER)
+    assert store.path_for(ended.combat_id).exists()
+
+    clock.now += 120
+    engine.get_combat_state("missing")
+    assert ended.combat_id in engine.sessions
+    assert idle.combat_id not in engine.sessions
+    assert engine.get_combat_state(idle.combat_id) is not idle
+    assert engine.get_combat_state(idle.combat_id).combat_id == idle.combat_id
+
+    engine.release_session(ended.combat_id, delay=30)
+    clock.now += 60
+    assert engine.get_combat_state(ended.combat_id) is None
+    assert not store.path_for(ended.combat_id).exists()
+
+    engine.release_session(idle.combat_id)
+    assert engine.sessions == {}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_idle_session_stays_in_memory_when_snapshot_fails(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(settings, "combat_idle_ttl_seconds", 60)
+    store = CombatSnapshotStore(str(tmp_path))
+    engine = CombatEngine(snapshot_store=store)
+    session = engine.start_combat([{"type": "orc"}], PLAYER)
+
+    def _fail(_session):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "save", _fail)
+    clock.now += 120
+    assert engine.get_combat_state(session.combat_id) is session
+    assert session.combat_id in engine.sessions
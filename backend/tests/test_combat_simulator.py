@@ -0,0 +1,78 @@
+"""Tests for the vectorized Monte Carlo encounter simulator."""
+import random
+
+from app.combat.combat_engine import CombatEngine
+from app.combat.encounter_simulator import simulate_encounter
+from app.combat.models.combat_session import CombatEndReason, CombatState
+
+PLAYER = {"hp": 40, "max_hp": 40, "ac": 15, "attack_bonus": 5, "damage_dice": "1d8", "damage_bonus": 3}
+
+
+def _engine_fight(enemies, player_state):
+    """Play one engine combat with the simulator's party policy (close in, focus weakest)."""
+    engine = CombatEngine()
+    session = engine.start_combat(enemies=enemies, player_state=player_state)
+    moved = set()
+    while session.state != CombatState.ENDED:
+        actor = session.get_current_actor()
+        if actor.id not in moved:
+            moved.add(actor.id)
+            engine.execute_action(session.combat_id, "move_closer")
+        elif actor.action_available:
+            target = min(session.get_enemies(), key=lambda enemy: enemy.hp)
+            engine.execute_action(session.combat_id, f"attack_{target.id}")
+        else:
+            engine.execute_action(session.combat_id, "end_turn")
+    return session.end_reason
+
+
+def test_seeded_runs_are_reproducible():
+    enemies = [{"type": "goblin"}, {"type": "wolf", "level": 2}]
+    first = simulate_encounter(enemies, PLAYER, trials=500, seed=7)
+    second = simulate_encounter(enemies, PLAYER, trials=500, seed=7)
+    first.pop("elapsed_ms"), second.pop("elapsed_ms")
+    assert first == second
+    assert first["trials"] == 500
+    total = first["win_rate"] + first["defeat_rate"] + first["fled_rate"] + first["timeout_rate"]
+    assert abs(total - 1.0) < 1e-6
+
+
+def test_outcome_extremes():
+    weak_player = dict(PLAYER, hp=5, max_hp=5, attack_bonus=0)
+    hopeless = simulate_encounter([{"type": "orc", "level": 5}] * 3, weak_player, trials=300, seed=1)
+    assert hopeless["defeat_rate"] > 0.95
+    assert hopeless["expected_hp_loss"] > 4
+
+    strong_player = dict(PLAYER, hp=200, max_hp=200, attack_bonus=15, damage_bonus=20)
+    easy = simulate_encounter([{"type": "orc"}], strong_player, trials=300, seed=1)
+    assert easy["win_rate"] == 1.0
+    assert easy["expected_rounds_to_win"] <= 2
+
+
+def test_flee_and_immunity_heuristics():
+    aggressive = simulate_encounter([{"type": "orc"}], PLAYER, trials=500, seed=2)
+    assert aggressive["fled_rate"] == 0.0
+
+    cowardly = simulate_encounter([{"type": "goblin"}] * 2, PLAYER, trials=500, seed=2)
+    assert cowardly["fled_rate"] > 0.1
+
+    immune = simulate_encounter(
+        [{"type": "orc", "overrides": {"damage_type": "slashing"}}] * 2,
+        dict(PLAYER, hp=10, max_hp=10, immunities=["slashing"]),
+        allies=[{"id": "ally", "hp": 30, "max_hp": 30}],
+        trials=200,
+        seed=3,
+    )
+    assert immune["defeat_rate"] == 0.0
+    assert immune["party"][0]["expected_hp_loss"] == 0.0
+    assert [row["id"] for row in immune["party"]] == ["player", "ally"]
+
+
+def test_matches_engine_win_rate():
+    random.seed(11)
+    enemies = [{"type": "orc"}]
+    trials = 1500
+    wins = sum(_engine_fight(enemies, PLAYER) == CombatEndReason.VICTORY for _ in range(trials))
+
+    simulated = simulate_encounter(enemies, PLAYER, trials=5000, seed=11)
+    assert abs(simulated["win_rate"] - wins / trials) < 0.06
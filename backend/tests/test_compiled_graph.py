@@ -0,0 +1,121 @@
+"""Tests for the CSR-compiled graph and vectorized spreading activation."""
+import random
+
+import pytest
+
+from app.models.activation import SpreadingActivationConfig
+from app.models.graph import MemoryEdge, MemoryNode
+from app.services.memory_graph import MemoryGraph
+from app.services.spreading_activation import _spread_activation_walk, spread_activation
+
+
+_RELATIONS = ["knows", "located_in", "caused", "led_to", "resulted_from", "approves"]
+
+
+def _random_graph(seed: int, n_nodes: int = 80, n_edges: int = 260) -> MemoryGraph:
+    rng = random.Random(seed)
+    graph = MemoryGraph()
+    for i in range(n_nodes):
+        props = {}
+        if rng.random() < 0.6:
+            props["perspective"] = rng.choice(["narrative", "personal"])
+        if rng.random() < 0.7:
+            props["chapter_id"] = rng.choice(["ch1", "ch2", "ch3"])
+        if rng.random() < 0.15:
+            props["scope_type"] = "camp"
+        if rng.random() < 0.05:
+            props["placeholder"] = True
+        graph.add_node(MemoryNode(id=f"n{i}", type="event", name=f"n{i}", properties=props))
+    for j in range(n_edges):
+        # Skew towards low ids so hubs exceed hub_threshold.
+        source = f"n{min(int(rng.expovariate(0.05)), n_nodes - 1)}"
+        target = f"n{rng.randrange(n_nodes)}"
+        graph.add_edge(
+            MemoryEdge(
+                id=f"e{j}",
+                source=source,
+                target=target,
+                relation=rng.choice(_RELATIONS),
+                weight=round(rng.uniform(0.05, 1.0), 3),
+            )
+        )
+    return graph
+
+
+_CONFIGS = [
+    SpreadingActivationConfig(),
+    SpreadingActivationConfig(max_iterations=5, current_chapter_id="ch1"),
+    SpreadingActivationConfig(
+        max_iterations=6,
+        lateral_inhibition=True,
+        inhibition_factor=0.2,
+        current_chapter_id="ch2",
+        output_threshold=0.05,
+    ),
+    SpreadingActivationConfig(max_iterations=4, max_activation=0.8, hub_threshold=3, fire_threshold=0.05),
+]
+
+
+class TestCompiledGraph:
+
+    def test_csr_adjacency_matches_networkx(self):
+        graph = _random_graph(1)
+        compiled = graph.compiled()
+        for node_id in ["n0", "n5", "n40"]:
+            idx = compiled.index[node_id]
+            out_ids = sorted(compiled.edge_ids[p] for p in compiled.out_edge_positions(idx))
+            in_ids = sorted(compiled.edge_ids[p] for p in compiled.in_edge_positions(idx))
+            assert out_ids == sorted(k for _, _, k in graph.graph.out_edges(node_id, keys=True))
+            assert in_ids == sorted(k for _, _, k in graph.graph.in_edges(node_id, keys=True))
+            assert compiled.degree[idx] == graph.degree(node_id)
+
+    def test_compiled_form_is_cached_until_mutation(self):
+        graph = _random_graph(2, n_nodes=10, n_edges=20)
+        first = graph.compiled()
+        assert graph.compiled() is first
+        graph.add_node(MemoryNode(id="extra", type="event", name="extra"))
+        assert graph.compiled() is not first
+        assert "extra" in graph.compiled().index
+
+    def test_cross_flags(self):
+        graph = MemoryGraph()
+        graph.add_node(MemoryNode(id="a", type="t", name="a", properties={"perspective": "narrative", "chapter_id": "ch1"}))
+        graph.add_node(MemoryNode(id="b", type="t", name="b", properties={"perspective": "personal", "chapter_id": "ch2"}))
+        graph.add_node(MemoryNode(id="c", type="t", name="c", properties={"chapter_id": "ch2", "scope_type": "camp"}))
+        graph.add_edge(MemoryEdge(id="ab", source="a", target="b", relation="knows"))
+        graph.add_edge(MemoryEdge(id="ac", source="a", target="c", relation="caused"))
+        compiled = graph.compiled()
+        assert compiled.cross_perspective.tolist() == [True, False]
+        assert compiled.cross_chapter.tolist() == [True, False]
+        assert compiled.relation_class.tolist() == [0, 1]
+
+
+class TestVectorizedActivationMatchesWalk:
+
+    @pytest.mark.parametrize("graph_seed", [3, 4, 5])
+    @pytest.mark.parametrize("config", _CONFIGS)
+    def test_matches_reference(self, graph_seed, config):
+        graph = _random_graph(graph_seed)
+        seeds = ["n0", "n1", "n7", "missing"]
+        expected = _spread_activation_walk(graph, seeds, config)
+        actual = spread_activation(graph, seeds, config)
+        assert list(actual) == list(expected)
+        for node_id, value in expected.items():
+            assert actual[node_id] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+    def test_negative_weight_falls_back_to_walk(self):
+        graph = MemoryGraph()
+        for node_id in ["A", "B", "C"]:
+            graph.add_node(MemoryNode(id=node_id, type="t", name=node_id))
+        graph.add_edge(MemoryEdge(id="ab", source="A", target="B", relation="knows", weight=1.0))
+        graph.add_edge(MemoryEdge(id="cb", source="C", target="B", relation="knows", weight=-1.0))
+        config = SpreadingActivationConfig(max_iterations=1, decay=1.0, output_threshold=-1.0)
+        assert graph.compiled().propagation_plan(config).has_negative
+        assert spread_activation(graph, ["A", "C"], config) == _spread_activation_walk(graph, ["A", "C"], config)
+
+    def test_placeholder_seed_is_ignored(self):
+        graph = MemoryGraph()
+        graph.add_node(MemoryNode(id="P", type="unknown", name="P", properties={"placeholder": True}))
+        graph.add_node(MemoryNode(id="A", type="t", name="A"))
+        graph.add_edge(MemoryEdge(id="pa", source="P", target="A", relation="knows"))
+        assert spread_activation(graph, ["P"], SpreadingActivationConfig()) == {}
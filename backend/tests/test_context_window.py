@@ -0,0 +1,75 @@
+"""Tests for ContextWindow indexed storage (id index, token tails, graphized segments)."""
+from app.services.context_window import ContextWindow
+
+
+def _window(**kwargs) -> ContextWindow:
+    window = ContextWindow(npc_id="npc", world_id="w", **kwargs)
+    for i in range(10):
+        window.add_message("user", f"message {i} " + "x" * 40, message_id=f"m{i}")
+    return window
+
+
+def test_get_message_by_id():
+    window = _window()
+    assert window.get_message("m3").content.startswith("message 3")
+    assert window.get_message("missing") is None
+
+
+def test_recent_by_tokens_is_contiguous_tail():
+    window = _window()
+    per_message = window.get_message("m0").token_count
+    tail = window.get_recent_by_tokens(per_message * 3)
+    assert [m.id for m in tail] == ["m7", "m8", "m9"]
+    assert window.get_recent_by_tokens(0) == []
+    assert len(window.get_recent_by_tokens(10**9)) == 10
+
+
+def test_select_skips_graphized_and_keeps_recent_tokens():
+    window = _window()
+    window.keep_recent_tokens = window.get_message("m0").token_count * 2
+    window.mark_messages_graphized(["m1", "m2"])
+    selected = [m.id for m in window._select_messages_for_graphize()]
+    assert selected == ["m0", "m3", "m4", "m5", "m6", "m7"]
+
+
+def test_remove_graphized_prefix_and_interior_segments():
+    window = _window()
+    tokens_before = window.current_tokens
+    window.mark_messages_graphized(["m0", "m1", "m4"])
+    result = window.remove_graphized_messages()
+
+    assert result.removed_count == 3
+    assert result.tokens_freed == tokens_before - window.current_tokens
+    assert [m.id for m in window.get_all_messages()] == ["m2", "m3", "m5", "m6", "m7", "m8", "m9"]
+    assert window.get_message("m0") is None
+    assert window.get_message("m5").id == "m5"
+    assert [m.id for m in window.get_recent_messages(2)] == ["m8", "m9"]
+
+    window.mark_messages_graphized(["m2", "m3"])
+    assert window.remove_graphized_messages().removed_count == 2
+    assert window.message_count == 5
+    assert window.remove_graphized_messages().removed_count == 0
+
+
+def test_state_round_trip_rebuilds_index():
+    window = _window()
+    window.mark_messages_graphized(["m0"])
+    restored = ContextWindow.from_state(window.to_state())
+    assert restored.get_message("m9").id == "m9"
+    assert restored.remove_graphized_messages().removed_count == 1
+    assert restored.message_count == 9
+
+
+def test_prepend_messages_keeps_graphized_segments_and_tokens():
+    window = _window()
+    window.mark_messages_graphized(["m5"])
+    tokens_before = window.current_tokens
+
+    added = window.prepend_messages([{"role": "user", "content": "older", "id": "old0"}])
+
+    assert added == 1
+    assert [m.id for m in window.messages][:2] == ["old0", "m0"]
+    assert window.current_tokens == tokens_before + window.get_message("old0").token_count
+    assert window.get_message("m9").content.startswith("message 9")
+    assert window.remove_graphized_messages().removed_count == 1
+    assert window.get_message("m5") is None
@@ -0,0 +1,111 @@
+"""Tests for compiled event conditions and dependency-skipping in AreaRuntime.check_events."""
+import types
+
+from app.runtime.area_runtime import AreaRuntime
+from app.runtime.event_conditions import compile_condition_group
+from app.runtime.models.area_state import AreaDefinition, AreaEvent
+
+
+def _session(**narrative):
+    narrative.setdefault("npc_interactions", {})
+    narrative.setdefault("events_triggered", [])
+    narrative.setdefault("objectives_completed", [])
+    narrative.setdefault("rounds_in_chapter", 0)
+    return types.SimpleNamespace(
+        player=types.SimpleNamespace(sub_location=None, game_state="exploring"),
+        narrative=types.SimpleNamespace(**narrative),
+        time=types.SimpleNamespace(day=1, hour=8),
+        party=None,
+    )
+
+
+def _cond(type: str, **params):
+    return {"type": type, "params": params}
+
+
+def _runtime(*events: AreaEvent) -> AreaRuntime:
+    runtime = AreaRuntime("guild", AreaDefinition(area_id="guild"))
+    runtime.events = list(events)
+    runtime._reset_condition_cache()
+    return runtime
+
+
+def _event(id: str, trigger=None, completion=None, status="locked") -> AreaEvent:
+    return AreaEvent(
+        id=id, area_id="guild", chapter_id="ch1", name=id, status=status,
+        trigger_conditions=trigger or {}, completion_conditions=completion,
+    )
+
+
+def test_compiled_semantics_match_operators():
+    session = _session(npc_interactions={"priestess": 2}, rounds_in_chapter=3)
+    talked = _cond("npc_interacted", npc_id="priestess", min_interactions=2)
+    elsewhere = _cond("location", area_id="forest")
+    flash = _cond("flash_evaluate", prompt="玩家是否表现出善意")
+
+    and_group = compile_condition_group({"operator": "and", "conditions": [talked, elsewhere]}, "guild")
+    assert and_group.evaluate(session)[0] is False
+    assert and_group.evaluate(session)[2] == {"npc_interacted:priestess": True, "location": False}
+
+    or_group = compile_condition_group({"operator": "or", "conditions": [talked, elsewhere]}, "guild")
+    assert or_group.evaluate(session)[0] is True
+
+    not_group = compile_condition_group({"operator": "not", "conditions": [elsewhere]}, "guild")
+    assert not_group.evaluate(session)[0] is True
+    assert not_group.deps == frozenset()
+
+    flash_group = compile_condition_group({"operator": "not", "conditions": [flash]}, "guild")
+    satisfied, pending, _ = flash_group.evaluate(session)
+    assert satisfied is True and len(pending) == 1
+
+    nested = compile_condition_group(
+        {"operator": "and", "conditions": [
+            {"operator": "or", "conditions": [_cond("rounds_elapsed", min_rounds=5), talked]},
+        ]},
+        "guild",
+    )
+    assert nested.evaluate(session)[0] is True
+    assert nested.deps == {"rounds", "npc_interactions"}
+
+
+def test_check_events_skips_until_dependency_changes():
+    trigger = {"operator": "and", "conditions": [_cond("npc_interacted", npc_id="priestess")]}
+    runtime = _runtime(_event("ev_meet", trigger=trigger), _event("ev_none"))
+    session = _session()
+
+    assert runtime.check_events(session) == []
+    assert runtime.check_events(session) == []
+    # Unrelated fact changes do not trigger re-evaluation.
+    session.narrative.rounds_in_chapter = 4
+    session.time.hour = 12
+    assert runtime.check_events(session) == []
+    assert runtime.condition_stats == {"checks": 3, "evaluated": 1, "skipped": 2}
+
+    session.narrative.npc_interactions["priestess"] = 1
+    updates = runtime.check_events(session)
+    assert [(u.event.id, u.transition) for u in updates] == [("ev_meet", "locked→available")]
+    assert runtime.condition_stats["evaluated"] == 2
+
+
+def test_status_change_forces_reevaluation():
+    completion = {"operator": "and", "conditions": [_cond("event_triggered", event_id="ev_x")]}
+    event = _event("ev_quest", completion=completion, status="available")
+    runtime = _runtime(event)
+    session = _session(events_triggered=["ev_x"])
+
+    assert runtime.check_events(session) == []  # available: no checks
+    event.status = "active"
+    updates = runtime.check_events(session)
+    assert [(u.event.id, u.transition) for u in updates] == [("ev_quest", "active→completed")]
+    assert updates[0].details == {"event_triggered:ev_x": True}
+
+
+def test_replaced_conditions_are_recompiled():
+    event = _event("ev_go", trigger={"operator": "and", "conditions": [_cond("location", area_id="forest")]})
+    runtime = _runtime(event)
+    session = _session()
+
+    assert runtime.check_events(session) == []
+    event.trigger_conditions = {"operator": "and", "conditions": [_cond("location", area_id="guild")]}
+    updates = runtime.check_events(session)
+    assert [u.event.id for u in updates] == ["ev_go"]
@@ -0,0 +1,135 @@
+"""Tests for the Firestore I/O offload layer and the call sites routed through it."""
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.graph_scope import GraphScope
+from app.services import firestore_io
+from app.services.firestore_io import FirestoreIO
+from app.services.graph_store import GraphStore
+from app.services.session_history import SessionHistoryManager
+
+
+@pytest.fixture
+def io(monkeypatch):
+    layer = FirestoreIO(max_workers=4)
+    monkeypatch.setattr(firestore_io, "_shared_io", layer)
+    yield layer
+    layer.shutdown()
+
+
+def _blocking_read(delay: float, value):
+    time.sleep(delay)
+    return value
+
+
+@pytest.mark.asyncio
+async def test_blocking_reads_overlap(io):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(io.run("read", _blocking_read, 0.1, i) for i in range(4)))
+    elapsed = time.perf_counter() - started
+
+    assert results == [0, 1, 2, 3]
+    assert elapsed < 0.3  # 串行需要 0.4s
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive(io):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    await asyncio.gather(io.run("read", _blocking_read, 0.1, None), ticker())
+    assert ticks == 5
+
+
+@pytest.mark.asyncio
+async def test_stats_per_op_and_errors(io):
+    def _fail():
+        raise RuntimeError("unavailable")
+
+    await io.run("graph.load", _blocking_read, 0, None)
+    with pytest.raises(RuntimeError):
+        await io.run("graph.load", _fail)
+
+    stats = io.get_stats()
+    assert stats["max_workers"] == 4
+    assert stats["in_flight"] == 0
+    op = stats["ops"]["graph.load"]
+    assert (op["calls"], op["errors"]) == (2, 1)
+    assert op["p95_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_bounded_pool_reports_queue_wait():
+    layer = FirestoreIO(max_workers=1)
+    await asyncio.gather(*(layer.run("read", _blocking_read, 0.05, None) for _ in range(3)))
+    assert layer.get_stats()["ops"]["read"]["queue_wait_p95_ms"] >= 40
+    layer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_graph_store_streams_off_the_loop(io):
+    loop_thread = threading.get_ident()
+    stream_threads = []
+
+    def _stream():
+        stream_threads.append(threading.get_ident())
+        return []
+
+    store = GraphStore.__new__(GraphStore)
+    store.db = MagicMock()
+    store.scope_cache = None
+    nodes_ref, edges_ref = MagicMock(), MagicMock()
+    nodes_ref.stream.side_effect = _stream
+    edges_ref.stream.side_effect = _stream
+    store._get_graph_refs_v2 = MagicMock(return_value=(nodes_ref, edges_ref))
+
+    data = await store.load_graph_v2("w1", GraphScope.world())
+
+    assert data.nodes == [] and data.edges == []
+    assert len(stream_threads) == 2
+    assert loop_thread not in stream_threads
+    assert {"graph.load_v2.nodes", "graph.load_v2.edges"} <= set(io.get_stats()["ops"])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_history_restore_reads_once(io):
+    reads = []
+
+    def _order_by(field, direction=None):
+        query = MagicMock()
+        query.limit.return_value = query
+
+        def _stream():
+            reads.append(field)
+            time.sleep(0.05)
+            if field == "seq":
+                return []
+            doc = MagicMock()
+            doc.to_dict.return_value = {"role": "user", "content": "你好", "metadata": {}}
+            return [doc]
+
+        query.stream.side_effect = _stream
+        return query
+
+    db = MagicMock()
+    db.collection.return_value.order_by.side_effect = _order_by
+    manager = SessionHistoryManager(firestore_db=db)
+
+    first, second = await asyncio.gather(
+        manager.get_or_create_async("w1", "s1"),
+        manager.get_or_create_async("w1", "s1"),
+    )
+
+    assert first is second
+    assert reads == ["seq", "timestamp"]
+    assert first.get_recent_messages(5)[0]["content"] == "你好"
+    assert manager.get_or_create("w1", "s1") is first
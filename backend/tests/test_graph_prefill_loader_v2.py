@@ -1,5 +1,11 @@
+import json
+from unittest.mock import MagicMock
+
 import pytest
 
+from app.config import settings
+from app.models.graph_scope import GraphScope
+from app.services.sqlite_graph_store import SQLiteGraphStore
 from app.tools.world_initializer.graph_prefill_loader import GraphPrefillLoader
 
 
@@ -72,3 +78,30 @@ def test_upgrade_narrative_v2_artifacts_makes_legacy_data_valid():
     assert upgraded_chapters[0]["events"][0]["id"] == "ev_1"
     assert upgraded_chapters[1]["events"]
     assert isinstance(upgraded_mainlines[0]["chapter_graph"], dict)
+
+
+@pytest.mark.asyncio
+async def test_load_prefilled_graph_reports_progress_across_scopes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "narrative_v2_strict_mode", False)
+    (tmp_path / "prefilled_graph.json").write_text(json.dumps({
+        "nodes": [
+            {"id": "guild", "type": "faction", "name": "Guild"},
+            {"id": "camp", "type": "location", "name": "Camp", "properties": {"scope_type": "camp"}},
+            {"id": "goblin", "type": "monster", "name": "Goblin"},
+        ],
+        "edges": [{"id": "e1", "source": "guild", "target": "goblin", "relation": "hunts"}],
+    }), encoding="utf-8")
+    store = SQLiteGraphStore(":memory:")
+    calls = []
+
+    loader = GraphPrefillLoader(firestore_client=MagicMock(), graph_store=store)
+    stats = await loader.load_prefilled_graph(
+        "w1", tmp_path, verbose=False, progress=lambda *args: calls.append(args),
+    )
+
+    assert stats["errors"] == []
+    assert len(stats["scopes_used"]) == 2
+    assert calls[-1] == (4, 4)
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+    assert len((await store.load_graph_v2("w1", GraphScope.world())).nodes) == 2
+    store.close()
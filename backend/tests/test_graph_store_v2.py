@@ -249,3 +249,148 @@ class TestChoiceLogic:
         result = await store.resolve_consequence("w1", "ch_001", 5)
         # Returns data unchanged when index is out of range
         assert result["consequences"][0]["resolved"] is False
+
+
+class _FakeDoc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.to_dict_calls = 0
+
+    def to_dict(self):
+        self.to_dict_calls += 1
+        return dict(self._data) if self._data else None
+
+
+class _FakeQuery:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def stream(self):
+        return iter(self._docs)
+
+
+class _FakeEdges:
+    """edges_ref stand-in: records ``where(field, "in", chunk)`` queries."""
+
+    def __init__(self, edges):
+        self.docs = [_FakeDoc(e["id"], e) for e in edges]
+        self.queries = []
+
+    def where(self, field, op, values):
+        assert op == "in" and len(values) <= 10
+        self.queries.append((field, tuple(values)))
+        return _FakeQuery([d for d in self.docs if d._data[field] in values])
+
+
+class _FakeNodes:
+    def __init__(self, node_ids):
+        self.node_ids = set(node_ids)
+
+    def document(self, node_id):
+        data = {"id": node_id, "type": "npc", "name": node_id} if node_id in self.node_ids else None
+        return _FakeDoc(node_id, data)
+
+
+class TestLocalSubgraphV2:
+    """load_local_subgraph_v2 hop traversal (chunked edge queries, node pipelining)."""
+
+    def _store(self, node_ids, edges):
+        store = _make_store()
+        nodes_ref, edges_ref = _FakeNodes(node_ids), _FakeEdges(edges)
+        store._get_graph_refs_v2 = lambda world_id, scope: (nodes_ref, edges_ref)
+        store.db.get_all.side_effect = lambda refs: list(refs)
+        return store, edges_ref
+
+    @pytest.mark.asyncio
+    async def test_depth_two_both_directions(self):
+        edges = [
+            {"id": "ab", "source": "a", "target": "b", "relation": "knows"},
+            {"id": "bc", "source": "b", "target": "c", "relation": "knows"},
+            {"id": "xa", "source": "x", "target": "a", "relation": "knows"},
+            {"id": "cd", "source": "c", "target": "d", "relation": "knows"},
+        ]
+        store, edges_ref = self._store(["a", "b", "c", "d", "x"], edges)
+
+        graph = await store.load_local_subgraph_v2("w1", GraphScope.world(), ["a"], depth=2)
+
+        assert {n.id for n in graph.nodes} == {"a", "b", "c", "x"}
+        assert {e.id for e in graph.edges} == {"ab", "bc", "xa"}
+        # Edge "ab" comes back in hop 2 (target query for b) but is parsed only once.
+        ab_doc = next(d for d in edges_ref.docs if d.id == "ab")
+        assert ab_doc.to_dict_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_frontier_is_chunked_per_direction(self):
+        seeds = [f"n{i}" for i in range(25)]
+        store, edges_ref = self._store(seeds, [])
+
+        graph = await store.load_local_subgraph_v2("w1", GraphScope.world(), seeds, depth=1, direction="out")
+
+        assert len(graph.nodes) == 25
+        assert [field for field, _ in edges_ref.queries] == ["source"] * 3
+        assert sorted(v for _, chunk in edges_ref.queries for v in chunk) == sorted(seeds)
+
+    @pytest.mark.asyncio
+    async def test_invalid_direction(self):
+        store, _ = self._store([], [])
+        with pytest.raises(ValueError):
+            await store.load_local_subgraph_v2("w1", GraphScope.world(), ["a"], direction="sideways")
+
+
+class _FakeBatch:
+    def __init__(self, log, failures):
+        self.log = log
+        self.failures = failures
+        self.ops = []
+
+    def set(self, doc_ref, payload, merge=False):
+        self.ops.append(doc_ref)
+
+    def commit(self):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.log.append(list(self.ops))
+
+
+class TestCommitInBatches:
+    """Concurrent batch commits with retry and progress."""
+
+    def _store(self, monkeypatch, failures=()):
+        from app.services import graph_store as graph_store_module
+
+        monkeypatch.setattr(graph_store_module, "_COMMIT_RETRY_BASE_DELAY", 0)
+        store = _make_store()
+        log, pending = [], list(failures)
+        store.db.batch.side_effect = lambda: _FakeBatch(log, pending)
+        return store, log
+
+    @pytest.mark.asyncio
+    async def test_splits_and_reports_progress(self, monkeypatch):
+        store, log = self._store(monkeypatch)
+        operations = [(f"doc{i}", {"i": i}, True) for i in range(1000)]
+        progress = []
+
+        await store._commit_in_batches("save_v2", operations, lambda done, total: progress.append((done, total)))
+
+        assert sorted(len(ops) for ops in log) == [100, 450, 450]
+        assert sorted(ref for ops in log for ref in ops) == sorted(ref for ref, _, _ in operations)
+        assert [total for _, total in progress] == [1000] * 3
+        dones = [done for done, _ in progress]
+        assert dones == sorted(dones) and dones[-1] == 1000
+
+    @pytest.mark.asyncio
+    async def test_retries_transient_errors(self, monkeypatch):
+        from google.api_core import exceptions as gcp_exceptions
+
+        store, log = self._store(monkeypatch, [gcp_exceptions.ServiceUnavailable("busy")])
+        await store._commit_in_batches("save_v2", [("doc", {}, True)])
+        assert log == [["doc"]]
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_propagates(self, monkeypatch):
+        store, log = self._store(monkeypatch, [ValueError("bad payload")])
+        with pytest.raises(ValueError):
+            await store._commit_in_batches("save_v2", [("doc", {}, True)])
+        assert log == []
@@ -0,0 +1,179 @@
+"""Tests for InstanceManager background eviction (graphize + persist off the request path)."""
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.instance_manager import InstanceManager
+
+
+def _graph_store() -> AsyncMock:
+    store = AsyncMock()
+    store.get_character_profile.return_value = None
+    store.get_character_state.return_value = None
+    return store
+
+
+def _manager(**kwargs):
+    kwargs.setdefault("max_instances", 1)
+    manager = InstanceManager(graph_store=_graph_store(), **kwargs)
+    release = asyncio.Event()
+    graphized = []
+
+    async def _slow_graphize(instance, current_scene, game_day, force_all=False):
+        graphized.append(instance.npc_id)
+        await release.wait()
+        return {"success": True, "nodes_added": 1, "edges_added": 0}
+
+    manager._graphize_messages = _slow_graphize
+    return manager, release, graphized
+
+
+async def _talk(manager: InstanceManager, npc_id: str, world_id: str = "w1"):
+    instance = await manager.get_or_create(npc_id, world_id)
+    instance.context_window.add_message("user", f"hello {npc_id}")
+    return instance
+
+
+@pytest.mark.asyncio
+async def test_eviction_does_not_block_get_or_create():
+    manager, release, graphized = _manager()
+    await _talk(manager, "a")
+
+    # Graphization of "a" is blocked, yet "b" is created immediately.
+    b = await asyncio.wait_for(manager.get_or_create("b", "w1"), timeout=1)
+    assert b.npc_id == "b"
+    await asyncio.sleep(0)
+    assert graphized == ["a"]
+    stats = manager.get_stats()["evictions"]
+    assert stats["in_progress"] == 1
+    assert manager.get_stats()["total_evicted"] == 0
+
+    release.set()
+    assert await manager.drain_evictions() == 1
+    assert manager.get_stats()["total_evicted"] == 1
+    assert manager.get_stats()["evictions"]["in_progress"] == 0
+    manager.graph_store.update_character_state.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_queued_eviction_is_reclaimed():
+    manager, release, graphized = _manager(eviction_concurrency=1, max_instances=2)
+    await _talk(manager, "a")
+    await _talk(manager, "b")
+    await _talk(manager, "c")  # evicts "a" (starts graphizing)
+    await asyncio.sleep(0)
+    original_b = manager._instances["w1:b"]
+    await _talk(manager, "d")  # evicts "b" (queued behind "a")
+
+    reclaimed = await manager.get_or_create("b", "w1")  # evicts "c", reclaims "b"
+    assert reclaimed is original_b
+    assert manager.get_stats()["evictions"]["reclaimed"] == 1
+
+    release.set()
+    await manager.drain_evictions()
+    assert graphized == ["a", "c"]
+    assert manager.get_stats()["total_created"] == 4
+
+
+@pytest.mark.asyncio
+async def test_started_eviction_is_awaited_before_recreate():
+    manager, release, _ = _manager()
+    first = await _talk(manager, "a")
+    await manager.get_or_create("b", "w1")
+    await asyncio.sleep(0)
+
+    recreate = asyncio.create_task(manager.get_or_create("a", "w1"))
+    await asyncio.sleep(0.01)
+    assert not recreate.done()
+
+    release.set()
+    second = await asyncio.wait_for(recreate, timeout=1)
+    assert second is not first
+    await manager.shutdown()
+    assert manager.get_stats()["total_evicted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_repeat_visitor_is_protected_from_one_off_npcs():
+    manager, release, _ = _manager(max_instances=3)
+    release.set()
+    await _talk(manager, "companion")
+    await manager.get_or_create("companion", "w1")  # second interaction -> protected
+
+    for npc_id in ["p1", "p2", "p3", "p4"]:
+        await _talk(manager, npc_id)
+
+    assert manager.has("w1", "companion")
+    assert manager.get_stats()["budget"]["protected"] == 1
+    await manager.drain_evictions()
+    assert manager.get_stats()["total_evicted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_token_budget_evicts_heaviest_lru_but_keeps_requested():
+    manager, release, _ = _manager(max_instances=10)
+    release.set()
+    heavy = await _talk(manager, "heavy")
+    heavy.context_window.add_message("assistant", "很长的回答。" * 500)
+    manager.token_budget = heavy.resident_tokens + 1
+
+    await manager.get_or_create("light", "w1")
+
+    assert not manager.has("w1", "heavy")
+    assert manager.has("w1", "light")
+    await manager.drain_evictions()
+    assert manager.get_stats()["total_evicted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stats_report_residency_per_world():
+    manager, release, _ = _manager(max_instances=10)
+    release.set()
+    a = await _talk(manager, "a", "w1")
+    await _talk(manager, "b", "w1")
+    await _talk(manager, "c", "w2")
+
+    stats = manager.get_stats()
+    assert stats["worlds"]["w1"]["instances"] == 2
+    assert stats["worlds"]["w2"]["instances"] == 1
+    assert stats["worlds"]["w1"]["tokens"] >= a.resident_tokens
+    assert stats["budget"]["resident_bytes"] == sum(row["bytes"] for row in stats["worlds"].values())
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_budget_unless_instance_grew(monkeypatch):
+    from app.services.instance_manager import NPCInstance
+
+    manager, release, _ = _manager(max_instances=10, byte_budget=10**9)
+    release.set()
+    a = await _talk(manager, "a")
+    await _talk(manager, "b")
+    a.memory_graph.graph.add_edge("n1", "n2")
+
+    recounts, enforced = [], []
+    refresh = NPCInstance.refresh_graph_bytes
+    monkeypatch.setattr(NPCInstance, "refresh_graph_bytes", lambda self: recounts.append(self) or refresh(self))
+    enforce = manager._enforce_budget
+
+    async def _spy_enforce(keep=None):
+        enforced.append(keep)
+        await enforce(keep=keep)
+
+    manager._enforce_budget = _spy_enforce
+    manager.get_stats()  # sync the messages added after each insert
+    await manager.get_or_create("a", "w1")
+    await manager.get_or_create("a", "w1")
+    await manager.get_or_create("b", "w1")
+    assert enforced == []
+    assert recounts == []
+
+    a.context_window.add_message("user", "again")
+    await manager.get_or_create("a", "w1")
+    assert enforced == ["w1:a"]
+
+    budget = manager.get_stats()["budget"]
+    live = list(manager._instances.values())
+    assert budget["resident_tokens"] == sum(inst.resident_tokens for inst in live)
+    assert budget["resident_bytes"] == sum(inst.estimated_bytes() for inst in live)
+    assert manager._protected_tokens == sum(manager._instances[k].resident_tokens for k in manager._protected)
@@ -0,0 +1,65 @@
+"""Tests for cached static context fragments and prefix-split V4 prompts."""
+import json
+from pathlib import Path
+
+from app.runtime.models.layered_context import StaticDict, StaticList, dumps_context
+from app.runtime.models.world_constants import WorldConstants
+from app.runtime.world_instance import WorldInstance
+from app.services.admin.flash_cpu_service import FlashCPUService
+
+
+def _world() -> WorldInstance:
+    world = WorldInstance("w1")
+    world.world_constants = WorldConstants(world_id="w1", name="边境", background="战后的边境小镇")
+    world.character_registry = {
+        "guard": {"id": "guard", "profile": {"metadata": {"default_map": "town"}}},
+        "hermit": {"id": "hermit", "state": {"current_map": "forest"}},
+    }
+    return world
+
+
+def test_dumps_context_matches_json_and_reuses_fragments():
+    npcs = StaticList([{"id": "guard", "name": "守卫"}])
+    context = {
+        "world_context": StaticDict({"world_name": "边境", 1: None}),
+        "area_context": {"npcs": npcs, "events": [], "visit_count": 2},
+        "conversation_history": "玩家: 你好",
+    }
+    expected = json.dumps(context, ensure_ascii=False, default=str)
+    assert dumps_context(context) == expected
+
+    npcs.__dict__["json"] = '["cached"]'
+    assert '"npcs": ["cached"]' in dumps_context(context)
+
+
+def test_world_context_fragments_cached_per_version():
+    world = _world()
+    first = world.get_world_context()
+    assert world.get_world_context() is first
+    assert [c["id"] for c in world.get_area_npcs_context("town")] == ["guard"]
+
+    world.version += 1
+    world._context_cache = {}
+    assert world.get_world_context() is not first
+    assert world.get_world_context() == first
+
+
+def test_v4_prompt_sends_world_context_as_static_prefix():
+    service = FlashCPUService.__new__(FlashCPUService)
+    service.image_service = object()
+    service.agentic_prompt_path = Path("/nonexistent/agentic_prompt.md")
+    world_context = _world().get_world_context()
+
+    class _Session:
+        world_id, session_id, current_area = "w1", "s1", None
+
+    _, request = service._prepare_agentic_v4(
+        session=_Session(),
+        player_input="观察",
+        context={"world_context": world_context, "dynamic_state": {"party_members": []}},
+        graph_store=None,
+    )
+
+    assert request["static_prefix"].endswith(world_context.json)
+    assert "边境" not in request["user_prompt"]
+    assert '{"dynamic_state": {"party_members": []}}' in request["user_prompt"]
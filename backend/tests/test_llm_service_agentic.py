@@ -92,6 +92,45 @@ class _FakeFinalizeModels:
         )
 
 
+class _FakeStreamModels:
+    @staticmethod
+    def _chunk(*parts):
+        return types.SimpleNamespace(
+            candidates=[types.SimpleNamespace(content=types.SimpleNamespace(parts=list(parts)))],
+            usage_metadata=None,
+        )
+
+    async def generate_content_stream(self, *, model, contents, config):
+        def text(value):
+            return types.SimpleNamespace(text=value, thought=False, function_call=None)
+
+        call = types.SimpleNamespace(text=None, function_call=types.SimpleNamespace(name="leave", args={}))
+
+        async def _stream():
+            yield self._chunk(text("让我先看看"))
+            yield self._chunk(text("四周。"), call)
+            yield self._chunk(text("你走出酒馆，"))
+            yield self._chunk(text("夜风扑面。"))
+
+        return _stream()
+
+
+@pytest.mark.asyncio
+async def test_agentic_stream_keeps_only_final_round_text():
+    service = LLMService()
+    service.client = types.SimpleNamespace(aio=types.SimpleNamespace(models=_FakeStreamModels()))
+
+    events = [
+        event
+        async for event in service.agentic_generate_stream(
+            user_prompt="离开", system_instruction="系统指令", tools=[],
+        )
+    ]
+
+    assert [e["text"] for e in events if e["type"] == "answer"] == ["让我先看看", "四周。", "你走出酒馆，", "夜风扑面。"]
+    assert events[-1]["response"].text == "你走出酒馆，夜风扑面。"
+
+
 @pytest.mark.asyncio
 async def test_agentic_generate_raises_on_incompatible_cached_content():
     service = LLMService()
@@ -0,0 +1,175 @@
+"""Tests for multi-session MCP dispatch (concurrency, least-busy, sticky routing, timings)."""
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.mcp_client_pool import MCPClientPool
+
+
+class _FakeSession:
+    def __init__(self, delay: float = 0.05, result=None):
+        self.delay = delay
+        self.result = result or {}
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self.pings = 0
+
+    async def send_ping(self):
+        self.pings += 1
+
+    async def call_tool(self, tool_name, arguments):
+        self.calls.append((tool_name, dict(arguments)))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(structuredContent=dict(self.result), content=[])
+
+
+def _pool(size: int = 1, max_in_flight: int = 8) -> MCPClientPool:
+    pool = MCPClientPool()
+    pool._pool_sizes[MCPClientPool.COMBAT] = size
+    pool._max_in_flight = max_in_flight
+    return pool
+
+
+def _attach(pool: MCPClientPool, sessions):
+    """Install fake sessions into the combat slots so no subprocess is spawned."""
+    slots = pool._slots_for(MCPClientPool.COMBAT)
+    for slot, session in zip(slots, sessions):
+        slot.session = session
+        slot.healthy = True
+        slot.epoch = slot.index + 1
+    return slots
+
+
+@pytest.mark.asyncio
+async def test_calls_on_one_session_run_concurrently():
+    pool = _pool(size=1, max_in_flight=8)
+    session = _FakeSession(delay=0.05)
+    _attach(pool, [session])
+
+    await asyncio.gather(*[
+        pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {}) for _ in range(4)
+    ])
+
+    assert session.peak == 4
+    assert pool._server_stats[MCPClientPool.COMBAT]["calls_success"] == 4
+
+
+@pytest.mark.asyncio
+async def test_in_flight_limit_queues_and_reports_wait():
+    pool = _pool(size=1, max_in_flight=1)
+    session = _FakeSession(delay=0.05)
+    _attach(pool, [session])
+
+    await asyncio.gather(*[
+        pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {}) for _ in range(3)
+    ])
+
+    assert session.peak == 1
+    diagnostics = await pool.get_diagnostics(include_probe=False)
+    timing = diagnostics["servers"][MCPClientPool.COMBAT]["timing_ms"]
+    assert timing["samples"] == 3
+    assert timing["queue_wait"]["max"] >= 80
+    assert timing["exec"]["max"] < timing["queue_wait"]["max"]
+
+
+@pytest.mark.asyncio
+async def test_least_busy_dispatch_spreads_load():
+    pool = _pool(size=2)
+    sessions = [_FakeSession(delay=0.05), _FakeSession(delay=0.05)]
+    _attach(pool, sessions)
+
+    await asyncio.gather(*[
+        pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {}) for _ in range(4)
+    ])
+
+    assert [len(s.calls) for s in sessions] == [2, 2]
+    diagnostics = await pool.get_diagnostics(include_probe=False)
+    server = diagnostics["servers"][MCPClientPool.COMBAT]
+    assert server["pool_size"] == 2
+    assert [slot["calls"] for slot in server["sessions"]] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_idle_pool_prefers_first_session():
+    pool = _pool(size=2)
+    sessions = [_FakeSession(delay=0), _FakeSession(delay=0)]
+    _attach(pool, sessions)
+
+    for _ in range(3):
+        await pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {})
+
+    assert [len(s.calls) for s in sessions] == [3, 0]
+
+
+@pytest.mark.asyncio
+async def test_created_combat_sticks_to_owning_session():
+    pool = _pool(size=2)
+    busy = _FakeSession(delay=0.2)
+    owner = _FakeSession(delay=0, result={"combat_id": "combat_7"})
+    _attach(pool, [busy, owner])
+
+    background = asyncio.create_task(pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {}))
+    await asyncio.sleep(0)
+    await pool.call_tool(MCPClientPool.COMBAT, "start_combat_session", {"enemies": []})
+    await background
+    assert len(owner.calls) == 1
+
+    # Session 0 is idle now, but combat_7 lives in session 1's process.
+    await pool.call_tool(MCPClientPool.COMBAT, "execute_action_for_actor", {"combat_id": "combat_7"})
+    assert owner.calls[-1][0] == "execute_action_for_actor"
+    assert len(busy.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_health_ping_is_throttled_after_success():
+    pool = _pool(size=1)
+    session = _FakeSession(delay=0)
+    _attach(pool, [session])
+
+    for _ in range(3):
+        await pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {})
+
+    assert session.pings == 1
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_error_closes_only_failing_slot():
+    class _Broken(_FakeSession):
+        async def call_tool(self, tool_name, arguments):
+            raise RuntimeError("ClosedResourceError: stream closed")
+
+    pool = _pool(size=2)
+    healthy = _FakeSession(delay=0)
+    slots = _attach(pool, [healthy, _Broken()])
+    closed = []
+
+    async def _fake_close_session(server_type, index=None):
+        closed.append(index)
+        slots[index].session = None
+        slots[index].healthy = False
+
+    pool._close_session = _fake_close_session  # type: ignore[assignment]
+    pool._sticky_routes[MCPClientPool.COMBAT] = OrderedDict({"combat_id:c1": 1})
+
+    async def _reconnect(server_type, slot=None):
+        slot.session = _FakeSession(delay=0, result={"ok": True})
+        slot.healthy = True
+        slot.epoch += 10
+        return slot.session
+
+    pool._connect = _reconnect  # type: ignore[assignment]
+
+    result = await pool.call_tool(MCPClientPool.COMBAT, "get_combat_state", {"combat_id": "c1"})
+
+    assert result == {"ok": True}
+    assert closed == [1]
+    assert slots[0].session is healthy and slots[0].healthy
+    assert slots[1].epoch == 12
@@ -41,7 +41,7 @@ async def test_timeout_failure_does_not_enter_cooldown():
     pool = MCPClientPool()
     pool._tool_timeout_seconds = 1.0
 
-    async def _fake_get_session(server_type: str):
+    async def _fake_get_session(server_type: str, slot=None):
         return _SlowSession()
 
     pool.get_session = _fake_get_session  # type: ignore[assignment]
@@ -64,7 +64,7 @@ async def test_non_timeout_failure_enters_cooldown():
     pool._tool_timeout_seconds = 1.0
     pool._cooldown_seconds = 30.0
 
-    async def _fake_get_session(server_type: str):
+    async def _fake_get_session(server_type: str, slot=None):
         return _FailSession()
 
     pool.get_session = _fake_get_session  # type: ignore[assignment]
@@ -86,7 +86,7 @@ async def test_connect_failure_maps_to_service_unavailable():
     pool._tool_timeout_seconds = 1.0
     pool._cooldown_seconds = 30.0
 
-    async def _fake_get_session(server_type: str):
+    async def _fake_get_session(server_type: str, slot=None):
         return _ConnectFailSession()
 
     pool.get_session = _fake_get_session  # type: ignore[assignment]
@@ -110,10 +110,10 @@ async def test_session_lifecycle_error_forces_reconnect(monkeypatch):
     session = _SessionLifecycleFailThenSuccess()
     close_calls = {"count": 0}
 
-    async def _fake_get_session(server_type: str):
+    async def _fake_get_session(server_type: str, slot=None):
         return session
 
-    async def _fake_close_session(server_type: str):
+    async def _fake_close_session(server_type: str, index=None):
         close_calls["count"] += 1
 
     pool.get_session = _fake_get_session  # type: ignore[assignment]
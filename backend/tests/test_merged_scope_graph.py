@@ -0,0 +1,166 @@
+"""Tests for MergedScopeGraph delta maintenance (must equal from_multi_scope)."""
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.memory_graph import MemoryGraph
+from app.services.merged_scope_graph import MergedScopeGraph
+
+
+def _node(id: str, **props) -> MemoryNode:
+    return MemoryNode(id=id, type="event", name=id, properties=props)
+
+
+def _edge(id: str, source: str, target: str, weight: float = 1.0) -> MemoryEdge:
+    return MemoryEdge(id=id, source=source, target=target, relation="knows", weight=weight)
+
+
+def _snapshot(graph: MemoryGraph):
+    nodes = {
+        node_id: (data["name"], data["properties"])
+        for node_id, data in graph.graph.nodes(data=True)
+    }
+    edges = {
+        key: (source, target, data["weight"])
+        for source, target, key, data in graph.graph.edges(keys=True, data=True)
+    }
+    return nodes, edges
+
+
+def _assert_matches_rebuild(view: MergedScopeGraph, scoped_data, overlay=()):
+    expected = MemoryGraph.from_multi_scope(scoped_data)
+    for edge in overlay:
+        if not expected.has_edge(edge.id) and expected.has_node(edge.source) and expected.has_node(edge.target):
+            expected.add_edge(edge)
+    assert _snapshot(view.graph) == _snapshot(expected)
+
+
+CHAR = GraphScope.character("player")
+AREA_1 = GraphScope.area("ch1", "town")
+AREA_2 = GraphScope.area("ch1", "forest")
+CHAPTER = GraphScope.chapter("ch1")
+
+
+def _char_data():
+    return GraphData(
+        nodes=[_node("player"), _node("memory_1", day=1)],
+        edges=[_edge("e_pm", "player", "memory_1"), _edge("e_pt", "player", "tavern")],
+    )
+
+
+def _town_data():
+    return GraphData(
+        nodes=[_node("tavern"), _node("guild"), _node("memory_1", shared=True)],
+        edges=[_edge("e_tg", "tavern", "guild"), _edge("e_pm", "tavern", "guild")],
+    )
+
+
+def _forest_data():
+    return GraphData(
+        nodes=[_node("grove"), _node("goblin_den")],
+        edges=[_edge("e_gd", "grove", "goblin_den"), _edge("e_pg", "player", "grove")],
+    )
+
+
+class TestMergedScopeGraph:
+
+    def test_initial_sync_matches_from_multi_scope(self):
+        scoped = [(AREA_1, _town_data()), (CHAR, _char_data())]
+        view = MergedScopeGraph()
+        assert view.sync(scoped) is True
+        _assert_matches_rebuild(view, scoped)
+
+    def test_unchanged_scopes_are_a_noop(self):
+        char, town = _char_data(), _town_data()
+        view = MergedScopeGraph()
+        view.sync([(AREA_1, town), (CHAR, char)])
+        version = view.version
+        compiled = view.graph.compiled()
+        assert view.sync([(AREA_1, town), (CHAR, char)]) is False
+        assert view.version == version
+        assert view.graph.compiled() is compiled
+
+    def test_node_patch_is_applied_as_delta(self):
+        char, town = _char_data(), _town_data()
+        view = MergedScopeGraph()
+        view.sync([(AREA_1, town), (CHAR, char)])
+        deltas = view.node_deltas
+
+        patched = GraphData(
+            nodes=[char.nodes[0], _node("memory_1", day=2), _node("memory_2")],
+            edges=char.edges + [_edge("e_m2", "memory_2", "guild")],
+        )
+        scoped = [(AREA_1, town), (CHAR, patched)]
+        assert view.sync(scoped) is True
+        _assert_matches_rebuild(view, scoped)
+        assert view.node_deltas - deltas == 2
+        assert view.full_rebuilds == 0
+
+    def test_area_change_swaps_only_area_scope(self):
+        char = _char_data()
+        view = MergedScopeGraph()
+        view.sync([(AREA_1, _town_data()), (CHAR, char)])
+
+        scoped = [(AREA_2, _forest_data()), (CHAR, char)]
+        view.sync(scoped)
+        _assert_matches_rebuild(view, scoped)
+        assert not view.graph.has_node("tavern")
+        assert view.graph.has_edge("e_pg")
+        assert view.scopes == [AREA_2, CHAR]
+
+        scoped = [(AREA_1, _town_data()), (CHAR, char)]
+        view.sync(scoped)
+        _assert_matches_rebuild(view, scoped)
+
+    def test_removed_node_restores_lower_priority_copy(self):
+        char, town = _char_data(), _town_data()
+        view = MergedScopeGraph()
+        view.sync([(AREA_1, town), (CHAR, char)])
+        assert view.graph.get_node("memory_1").properties["scope_type"] == "character"
+
+        char_without = GraphData(nodes=[char.nodes[0]], edges=[char.edges[1]])
+        scoped = [(AREA_1, town), (CHAR, char_without)]
+        view.sync(scoped)
+        _assert_matches_rebuild(view, scoped)
+        assert view.graph.get_node("memory_1").properties["scope_type"] == "area"
+
+    def test_scope_order_change_rebuilds(self):
+        char, town = _char_data(), _town_data()
+        view = MergedScopeGraph()
+        view.sync([(AREA_1, town), (CHAR, char)])
+        scoped = [(CHAR, char), (AREA_1, town)]
+        view.sync(scoped)
+        assert view.full_rebuilds == 1
+        _assert_matches_rebuild(view, scoped)
+
+    def test_added_scope_in_middle(self):
+        char, town = _char_data(), _town_data()
+        view = MergedScopeGraph()
+        view.sync([(AREA_1, town), (CHAR, char)])
+        chapter = GraphData(nodes=[_node("tavern", chapter_note=True)], edges=[])
+        scoped = [(AREA_1, town), (CHAPTER, chapter), (CHAR, char)]
+        view.sync(scoped)
+        assert view.full_rebuilds == 0
+        _assert_matches_rebuild(view, scoped)
+
+    def test_overlay_edges_apply_as_deltas(self):
+        char, town = _char_data(), _town_data()
+        scoped = [(AREA_1, town), (CHAR, char)]
+        view = MergedScopeGraph()
+        view.sync(scoped)
+
+        overlay = [_edge("disp_1", "player", "guild", 0.7), _edge("disp_2", "player", "nobody", 0.2)]
+        assert view.set_overlay_edges(overlay) is True
+        _assert_matches_rebuild(view, scoped, overlay)
+
+        # Same values rebuilt next turn: no change.
+        assert view.set_overlay_edges(
+            [_edge("disp_1", "player", "guild", 0.7), _edge("disp_2", "player", "nobody", 0.2)]
+        ) is False
+
+        overlay = [_edge("disp_1", "player", "guild", 0.9)]
+        assert view.set_overlay_edges(overlay) is True
+        _assert_matches_rebuild(view, scoped, overlay)
+
+        # Scope edge with the same id wins over the overlay.
+        overlay = [_edge("e_tg", "player", "guild", 0.1)]
+        view.set_overlay_edges(overlay)
+        assert view.graph.get_edge("e_tg").source == "tavern"
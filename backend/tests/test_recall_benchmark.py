@@ -0,0 +1,78 @@
+"""Tests for the offline recall benchmark helpers (scaling, scope routing, workload)."""
+import random
+
+from app.models.graph import MemoryEdge, MemoryNode
+from app.tools.recall_benchmark import _percentile, build_workload, scale_graph
+from app.tools.world_initializer.graph_prefill_loader import GraphPrefillLoader
+
+
+def _node(id: str, type: str = "event", **props) -> MemoryNode:
+    return MemoryNode(id=id, type=type, name=id, properties=props)
+
+
+def _edge(id: str, source: str, target: str) -> MemoryEdge:
+    return MemoryEdge(id=id, source=source, target=target, relation="knows", weight=1.0)
+
+
+def test_scale_graph_copies_and_bridges():
+    nodes = [_node("a", scope_type="character", character_id="priestess"), _node("b")]
+    edges = [_edge("ab", "a", "b")]
+
+    out_nodes, out_edges = scale_graph(nodes, edges, 3, random.Random(0))
+
+    ids = {n.id for n in out_nodes}
+    assert ids == {"a", "b", "a~1", "b~1", "a~2", "b~2"}
+    copy = next(n for n in out_nodes if n.id == "a~2")
+    assert copy.properties["character_id"] == "priestess"
+    assert any(e.source == "a~1" and e.target == "b~1" for e in out_edges)
+    bridges = [e for e in out_edges if e.id.startswith("bench_bridge_")]
+    assert len(bridges) == 2
+    assert all(e.target in {"a", "b"} for e in bridges)
+
+
+def test_scale_graph_factor_one_is_identity():
+    nodes, edges = [_node("a")], [_edge("aa", "a", "a")]
+    out_nodes, out_edges = scale_graph(nodes, edges, 1, random.Random(0))
+    assert [n.id for n in out_nodes] == ["a"]
+    assert [e.id for e in out_edges] == ["aa"]
+
+
+def test_route_scopes_groups_by_scope_key():
+    loader = GraphPrefillLoader(graph_store=object())
+    nodes = [
+        _node("guild", type="area"),
+        _node("hall", type="location", scope_type="area", area_id="guild"),
+        _node("priestess", type="character", scope_type="character", character_id="priestess"),
+        _node("lore"),
+    ]
+    edges = [_edge("e1", "hall", "guild"), _edge("e2", "priestess", "hall")]
+    chapters = [{"id": "ch1", "available_areas": ["guild"]}, {"id": "ch2", "available_areas": ["guild"]}]
+
+    scope_nodes, scope_edges = loader.route_scopes(nodes, edges, chapters)
+
+    assert {n.id for n in scope_nodes["area:ch1:guild"]} == {"guild", "hall"}
+    assert [n.id for n in scope_nodes["character:priestess"]] == ["priestess"]
+    assert [n.id for n in scope_nodes["world"]] == ["lore"]
+    assert [e.id for e in scope_edges["area:ch1:guild"]] == ["e1"]
+    assert "e2" in {e.id for edges in scope_edges.values() for e in edges}
+
+
+def test_build_workload_draws_from_loaded_scopes():
+    info = {
+        "scope_sizes": {"character:priestess": 3, "area:ch1:guild": 2, "world": 10},
+        "area_to_chapter": {"guild": "ch1"},
+    }
+    workload = build_workload(info, 20, random.Random(1), pool_size=4)
+
+    assert len(workload) == 20
+    assert len({id(request) for request in workload}) <= 4
+    for request in workload:
+        assert request["character_id"] == "priestess"
+        assert (request["chapter_id"], request["area_id"]) == ("ch1", "guild")
+        assert 1 <= len(request["seed_nodes"]) <= 2
+
+
+def test_percentile():
+    assert _percentile([], 0.5) is None
+    assert _percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert _percentile([float(i) for i in range(101)], 0.99) == 99.0
@@ -0,0 +1,178 @@
+"""Tests for the write-through scope graph cache in front of GraphStore.load_graph_v2."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.graph_store import GraphStore
+from app.services.scope_graph_cache import ScopeGraphCache
+
+
+def _node(node_id: str, **props) -> MemoryNode:
+    return MemoryNode(id=node_id, type="person", name=node_id, properties=props)
+
+
+def _graph(*node_ids: str) -> GraphData:
+    nodes = [_node(node_id) for node_id in node_ids]
+    edges = [
+        MemoryEdge(id=f"{a}_{b}", source=a, target=b, relation="knows")
+        for a, b in zip(node_ids, node_ids[1:])
+    ]
+    return GraphData(nodes=nodes, edges=edges)
+
+
+def _doc(data: dict) -> MagicMock:
+    doc = MagicMock()
+    doc.id = data["id"]
+    doc.to_dict.return_value = data
+    return doc
+
+
+def _make_store(cache: ScopeGraphCache, graph: GraphData):
+    """GraphStore whose nodes/edges collections stream ``graph``."""
+    store = GraphStore.__new__(GraphStore)
+    store.db = MagicMock()
+    store.scope_cache = cache
+    nodes_ref = MagicMock()
+    edges_ref = MagicMock()
+    nodes_ref.stream.side_effect = lambda: [_doc(n.model_dump()) for n in graph.nodes]
+    edges_ref.stream.side_effect = lambda: [_doc(e.model_dump()) for e in graph.edges]
+    nodes_ref.document.return_value.get.return_value.exists = False
+    store._get_graph_refs_v2 = MagicMock(return_value=(nodes_ref, edges_ref))
+    return store, nodes_ref, edges_ref
+
+
+class TestScopeGraphCache:
+
+    def test_miss_then_hit(self):
+        cache = ScopeGraphCache()
+        scope = GraphScope.world()
+        assert cache.get("w1", scope) is None
+        cache.put("w1", scope, _graph("a", "b"))
+        data = cache.get("w1", scope)
+        assert [n.id for n in data.nodes] == ["a", "b"]
+        assert len(data.edges) == 1
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_keys_are_per_world_and_scope(self):
+        cache = ScopeGraphCache()
+        cache.put("w1", GraphScope.character("c1"), _graph("a"))
+        assert cache.get("w2", GraphScope.character("c1")) is None
+        assert cache.get("w1", GraphScope.character("c2")) is None
+        assert cache.get("w1", GraphScope.character("c1")) is not None
+
+    def test_patch_node_merges_properties(self):
+        cache = ScopeGraphCache()
+        scope = GraphScope.camp()
+        cache.put("w1", scope, GraphData(nodes=[_node("a", mood="calm", hp=3)]))
+        cache.patch_node("w1", scope, _node("a", mood="angry"), merge=True)
+        node = cache.get("w1", scope).nodes[0]
+        assert node.properties == {"mood": "angry", "hp": 3}
+
+        cache.patch_node("w1", scope, _node("a", mood="sad"), merge=False)
+        node = cache.get("w1", scope).nodes[0]
+        assert node.properties == {"mood": "sad"}
+
+    def test_patch_adds_new_node_and_edge(self):
+        cache = ScopeGraphCache()
+        scope = GraphScope.chapter("ch1")
+        cache.put("w1", scope, _graph("a"))
+        cache.patch_node("w1", scope, _node("b"))
+        cache.patch_edge(
+            "w1", scope, MemoryEdge(id="a_b", source="a", target="b", relation="knows")
+        )
+        data = cache.get("w1", scope)
+        assert {n.id for n in data.nodes} == {"a", "b"}
+        assert [e.id for e in data.edges] == ["a_b"]
+
+    def test_put_rejected_after_concurrent_write(self):
+        cache = ScopeGraphCache()
+        scope = GraphScope.world()
+        version = cache.version("w1", scope)
+        cache.patch_node("w1", scope, _node("late"))
+        assert cache.put("w1", scope, _graph("a"), expected_version=version) is False
+        assert cache.get("w1", scope) is None
+
+    def test_lru_eviction_under_budget(self):
+        probe = ScopeGraphCache()
+        probe.put("w1", GraphScope.world(), _graph("a", "b"))
+        one_entry = probe.get_stats()["bytes"]
+
+        cache = ScopeGraphCache(max_bytes=one_entry * 2 + 10)
+        cache.put("w1", GraphScope.character("c1"), _graph("a", "b"))
+        cache.put("w1", GraphScope.character("c2"), _graph("a", "b"))
+        cache.get("w1", GraphScope.character("c1"))  # c1 becomes most recent
+        cache.put("w1", GraphScope.character("c3"), _graph("a", "b"))
+
+        assert cache.get("w1", GraphScope.character("c2")) is None
+        assert cache.get("w1", GraphScope.character("c1")) is not None
+        assert cache.get("w1", GraphScope.character("c3")) is not None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        import app.services.scope_graph_cache as module
+
+        now = [1000.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+        cache = ScopeGraphCache(ttl_seconds=10)
+        cache.put("w1", GraphScope.world(), _graph("a"))
+        now[0] += 11
+        assert cache.get("w1", GraphScope.world()) is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_invalidate_world(self):
+        cache = ScopeGraphCache()
+        cache.put("w1", GraphScope.world(), _graph("a"))
+        cache.put("w1", GraphScope.camp(), _graph("a"))
+        cache.put("w2", GraphScope.world(), _graph("a"))
+        cache.invalidate_world("w1")
+        assert cache.get("w1", GraphScope.world()) is None
+        assert cache.get("w1", GraphScope.camp()) is None
+        assert cache.get("w2", GraphScope.world()) is not None
+
+
+class TestGraphStoreWriteThrough:
+
+    @pytest.mark.asyncio
+    async def test_second_load_is_served_from_cache(self):
+        store, nodes_ref, edges_ref = _make_store(ScopeGraphCache(), _graph("a", "b"))
+        scope = GraphScope.area("ch1", "town")
+        first = await store.load_graph_v2("w1", scope)
+        second = await store.load_graph_v2("w1", scope)
+        assert [n.id for n in second.nodes] == [n.id for n in first.nodes]
+        assert nodes_ref.stream.call_count == 1
+        assert edges_ref.stream.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_upsert_patches_cached_scope(self):
+        store, nodes_ref, _ = _make_store(ScopeGraphCache(), _graph("a"))
+        scope = GraphScope.character("c1")
+        await store.load_graph_v2("w1", scope)
+        await store.upsert_node_v2("w1", scope, _node("b"))
+        await store.upsert_edge_v2(
+            "w1", scope, MemoryEdge(id="a_b", source="a", target="b", relation="knows")
+        )
+        data = await store.load_graph_v2("w1", scope)
+        assert {n.id for n in data.nodes} == {"a", "b"}
+        assert [e.id for e in data.edges] == ["a_b"]
+        assert nodes_ref.stream.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_save_graph_v2_invalidates(self):
+        store, nodes_ref, _ = _make_store(ScopeGraphCache(), _graph("a"))
+        store._commit_in_batches = AsyncMock()
+        scope = GraphScope.world()
+        await store.load_graph_v2("w1", scope)
+        await store.save_graph_v2("w1", scope, _graph("a", "b"))
+        await store.load_graph_v2("w1", scope)
+        assert nodes_ref.stream.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_no_cache_always_reads(self):
+        store, nodes_ref, _ = _make_store(None, _graph("a"))
+        await store.load_graph_v2("w1", GraphScope.world())
+        await store.load_graph_v2("w1", GraphScope.world())
+        assert nodes_ref.stream.call_count == 2
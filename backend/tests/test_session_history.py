@@ -5,7 +5,9 @@ import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.services.session_history import SessionHistory, SessionHistoryManager
+from google.api_core import exceptions as gcp_exceptions
+
+from app.services.session_history import SessionHistory, SessionHistoryManager, SessionMessageLog
 
 
 class TestSessionHistory:
@@ -264,3 +266,247 @@ class TestSessionHistoryManager:
 
         manager.get_or_create("w1", "s1")  # same key
         assert manager.active_count == 2
+
+
+class _FakeQuery:
+    def __init__(self, docs, field=None, descending=False, limit=None, after=None):
+        self._docs, self._field, self._descending = docs, field, descending
+        self._limit, self._after = limit, after
+
+    def order_by(self, field, direction=None):
+        return _FakeQuery(self._docs, field, direction == "DESCENDING", self._limit, self._after)
+
+    def limit(self, n):
+        return _FakeQuery(self._docs, self._field, self._descending, n, self._after)
+
+    def start_after(self, values):
+        return _FakeQuery(self._docs, self._field, self._descending, self._limit, values[self._field])
+
+    def stream(self):
+        rows = [d for d in self._docs.values() if self._field in d]
+        rows.sort(key=lambda d: d[self._field], reverse=self._descending)
+        if self._after is not None:
+            rows = [d for d in rows if (d[self._field] < self._after if self._descending else d[self._field] > self._after)]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [MagicMock(to_dict=MagicMock(return_value=dict(d))) for d in rows]
+
+
+class _FakeCollection(_FakeQuery):
+    def __init__(self, docs):
+        super().__init__(docs)
+
+    def document(self, doc_id):
+        return doc_id
+
+
+class _FakeBatch:
+    def __init__(self, db):
+        self._db, self._writes = db, []
+
+    def create(self, ref, data):
+        self._writes.append((ref, data))
+
+    def commit(self):
+        if self._db.fail_commits:
+            self._db.fail_commits -= 1
+            raise RuntimeError("unavailable")
+        if any(ref in self._db.docs for ref, _ in self._writes):
+            raise gcp_exceptions.AlreadyExists("document exists")
+        self._db.commits += 1
+        for ref, data in self._writes:
+            self._db.docs[ref] = dict(data)
+
+
+class _FakeFirestore:
+    def __init__(self, docs=None):
+        self.docs = dict(docs or {})
+        self.commits = 0
+        self.fail_commits = 0
+
+    def collection(self, path):
+        return _FakeCollection(self.docs)
+
+    def batch(self):
+        return _FakeBatch(self)
+
+
+class TestSessionMessageLog:
+    """Batched, sequenced message persistence."""
+
+    @pytest.mark.asyncio
+    async def test_rounds_coalesce_into_one_batch_on_idle(self):
+        db = _FakeFirestore()
+        history = SessionHistory("w1", "s1", firestore_db=db)
+        history._log.flush_delay = 0.01
+        for i in range(3):
+            history.record_round(f"q{i}", f"a{i}")
+        history.record_teammate_response("c1", "Ally", "ok")
+        assert db.commits == 0
+
+        await asyncio.sleep(0.05)
+        assert db.commits == 1
+        assert sorted(db.docs) == [f"{i:012d}" for i in range(7)]
+        assert [db.docs[k]["content"] for k in sorted(db.docs)][:2] == ["q0", "a0"]
+        assert history.stats["persist"]["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_flushes_without_waiting(self):
+        db = _FakeFirestore()
+        log = SessionMessageLog(db, "w1", "s1", flush_delay=60, flush_max_messages=4)
+        log.append([{"role": "user", "content": str(i)} for i in range(4)])
+        await asyncio.sleep(0.05)
+        assert db.commits == 1
+        assert log.pending_count == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_order(self):
+        db = _FakeFirestore()
+        db.fail_commits = 1
+        log = SessionMessageLog(db, "w1", "s1", flush_delay=60)
+        log.append([{"role": "user", "content": "a"}])
+        assert await log.flush() == 0
+        assert log.next_seq is None
+        log.append([{"role": "user", "content": "b"}])
+        assert await log.flush() == 2
+        assert [db.docs[k]["content"] for k in sorted(db.docs)] == ["a", "b"]
+        assert log.stats["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_restore_never_overwrites_history(self):
+        docs = {f"{seq:012d}": {"role": "user", "content": f"old {seq}", "timestamp": 0, "seq": seq} for seq in range(2)}
+        db = _FakeFirestore(docs)
+        manager = SessionHistoryManager(firestore_db=db)
+        with patch.object(manager, "_fetch_firestore_messages", side_effect=RuntimeError("unavailable")):
+            history = await manager.get_or_create_async("w1", "s1")
+        assert history._log.next_seq is None
+
+        history.record_round("q", "a")
+        await history.flush()
+
+        assert [db.docs[k]["content"] for k in sorted(db.docs)] == ["old 0", "old 1", "q", "a"]
+        assert history._log.next_seq == 4
+
+    @pytest.mark.asyncio
+    async def test_stale_seq_reseeds_instead_of_overwriting(self):
+        db = _FakeFirestore()
+        manager = SessionHistoryManager(firestore_db=db)
+        history = manager.get_or_create("w1", "s1")
+        history._log.flush_delay = 60
+        history.record_round("q1", "a1")
+        manager.remove("w1", "s1")
+        resumed = manager.get_or_create("w1", "s1")  # 读到的尾部早于上一轮 flush
+        resumed.record_round("q2", "a2")
+
+        await asyncio.sleep(0.05)
+        await resumed.flush()
+
+        assert [db.docs[k]["content"] for k in sorted(db.docs)] == ["q1", "a1", "q2", "a2"]
+        assert resumed._log.next_seq == 4
+
+    def test_restore_pages_by_seq_after_legacy(self, monkeypatch):
+        from app.services import session_history as module
+
+        monkeypatch.setattr(module.settings, "session_history_restore_page_size", 2)
+        docs = {
+            "auto1": {"role": "user", "content": "old-q", "timestamp": 1},
+            "auto2": {"role": "assistant", "content": "old-a", "timestamp": 2},
+        }
+        for seq, content in [(2, "q"), (3, "a"), (4, "q2")]:
+            docs[f"{seq:012d}"] = {"role": "user", "content": content, "timestamp": 0, "seq": seq}
+        manager = SessionHistoryManager(firestore_db=_FakeFirestore(docs))
+
+        history = manager.get_or_create("w1", "s1")
+
+        contents = [m["content"] for m in history.get_recent_messages(10)]
+        assert contents == ["old-q", "old-a", "q", "a", "q2"]
+        assert history._log.next_seq == 5
+
+    @pytest.mark.asyncio
+    async def test_remove_and_flush_all_write_pending(self):
+        db = _FakeFirestore()
+        manager = SessionHistoryManager(firestore_db=db)
+        h1 = manager.get_or_create("w1", "s1")
+        h2 = manager.get_or_create("w1", "s2")
+        h1._log.flush_delay = h2._log.flush_delay = 60
+        h1.record_round("q", "a")
+        h2.record_round("q", "a")
+
+        assert await manager.flush_all() == 4
+        h1.record_round("q2", "a2")
+        manager.remove("w1", "s1")
+        await asyncio.sleep(0.05)
+        assert db.commits == 3
+
+
+class TestLazyRestore:
+    """Tail-first restore with on-demand paging of older history."""
+
+    @staticmethod
+    def _db(count, legacy=0):
+        docs = {f"auto{i}": {"role": "user", "content": f"legacy {i}", "timestamp": i} for i in range(legacy)}
+        for seq in range(legacy, legacy + count):
+            docs[f"{seq:012d}"] = {"role": "user", "content": f"message {seq}", "timestamp": 0, "seq": seq}
+        return _FakeFirestore(docs)
+
+    @pytest.mark.asyncio
+    async def test_resume_loads_only_recent_budget(self, monkeypatch):
+        from app.services import session_history as module
+
+        monkeypatch.setattr(module.settings, "session_history_restore_page_size", 3)
+        manager = SessionHistoryManager(firestore_db=self._db(100), restore_tokens=10)
+
+        history = await manager.get_or_create_async("w1", "s1")
+
+        contents = [m["content"] for m in history.get_recent_messages(100)]
+        assert 0 < len(contents) < 100
+        assert contents[-1] == "message 99"
+        assert history.has_older
+        assert history._log.next_seq == 100
+
+    @pytest.mark.asyncio
+    async def test_load_older_pages_through_seq_and_legacy(self, monkeypatch):
+        from app.services import session_history as module
+
+        monkeypatch.setattr(module.settings, "session_history_restore_page_size", 2)
+        manager = SessionHistoryManager(firestore_db=self._db(5, legacy=3), restore_tokens=1)
+        history = await manager.get_or_create_async("w1", "s1")
+        assert [m["content"] for m in history.get_recent_messages(10)] == ["message 7"]
+
+        assert await history.load_older(max_messages=5) == 5
+        assert [m["content"] for m in history.get_recent_messages(10)][:2] == ["legacy 2", "message 3"]
+        assert await history.load_older() == 2
+        assert not history.has_older
+        assert await history.load_older() == 0
+        contents = [m["content"] for m in history.get_recent_messages(10)]
+        assert contents == [f"legacy {i}" for i in range(3)] + [f"message {i}" for i in range(3, 8)]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_load_older_never_duplicates_pages(self, monkeypatch):
+        import time
+        from app.services import session_history as module
+
+        monkeypatch.setattr(module.settings, "session_history_restore_page_size", 5)
+        manager = SessionHistoryManager(firestore_db=self._db(30), restore_tokens=1)
+        history = await manager.get_or_create_async("w1", "s1")
+        stream = _FakeQuery.stream
+
+        def _slow_stream(query):
+            time.sleep(0.05)
+            return stream(query)
+
+        monkeypatch.setattr(_FakeQuery, "stream", _slow_stream)
+        added = await asyncio.gather(
+            history.load_older(max_messages=10),
+            history.load_older(max_messages=10),
+        )
+
+        assert added == [10, 10]
+        contents = [m["content"] for m in history.get_recent_messages(100)]
+        assert contents == [f"message {i}" for i in range(9, 30)]
+
+    def test_legacy_only_session_continues_sequence_after_legacy(self):
+        manager = SessionHistoryManager(firestore_db=self._db(0, legacy=4), restore_tokens=1)
+        history = manager.get_or_create("w1", "s1")
+        assert history._log.next_seq == 4
+        assert history.has_older
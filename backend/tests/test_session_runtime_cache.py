@@ -0,0 +1,184 @@
+"""Tests for the resident SessionRuntime cache in GameRuntime (write-behind, eviction)."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.runtime.game_runtime import GameRuntime
+from app.runtime.session_runtime import SessionRuntime
+
+
+class _FakeStateManager:
+    def __init__(self):
+        self.get_calls = 0
+        self.set_calls = 0
+        self.states = {}
+
+    async def get_state(self, world_id, session_id):
+        self.get_calls += 1
+        return self.states.get((world_id, session_id))
+
+    async def set_state(self, world_id, session_id, state):
+        self.set_calls += 1
+        self.states[(world_id, session_id)] = state
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    monkeypatch.setattr(settings, "session_runtime_cache_enabled", True)
+    monkeypatch.setattr(settings, "session_runtime_cache_max", 8)
+    monkeypatch.setattr(settings, "session_runtime_idle_ttl_seconds", 900)
+    monkeypatch.setattr(settings, "session_runtime_flush_interval_seconds", 3600)
+    return GameRuntime()
+
+
+def _factory(state_manager, session_id="s1"):
+    return lambda: SessionRuntime("w1", session_id, state_manager=state_manager)
+
+
+@pytest.mark.asyncio
+async def test_second_turn_skips_restore(runtime):
+    sm = _FakeStateManager()
+    async with runtime.session("w1", "s1", _factory(sm)) as first:
+        pass
+    async with runtime.session("w1", "s1", _factory(sm)) as second:
+        pass
+    assert second is first
+    assert sm.get_calls == 1
+    stats = runtime.get_session_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_dirty_state_is_written_behind(runtime):
+    sm = _FakeStateManager()
+    async with runtime.session("w1", "s1", _factory(sm)) as session:
+        writes = sm.set_calls
+        session.mark_game_state_dirty()
+    # 回合结束不立即持久化
+    assert sm.set_calls == writes
+    assert runtime.get_session_stats()["dirty"] == 1
+
+    assert await runtime.flush_sessions() == 1
+    assert sm.set_calls == writes + 1
+    assert not session.is_dirty
+    assert await runtime.flush_sessions() == 0
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_busy_session_is_not_flushed(runtime):
+    sm = _FakeStateManager()
+    async with runtime.session("w1", "s1", _factory(sm)) as session:
+        session.mark_game_state_dirty()
+        assert await runtime.flush_sessions() == 0
+    assert await runtime.flush_sessions() == 1
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_idle_eviction_flushes_and_notifies(runtime, monkeypatch):
+    sm = _FakeStateManager()
+    evicted = []
+    runtime.add_session_evict_listener(lambda w, s: evicted.append((w, s)))
+    async with runtime.session("w1", "s1", _factory(sm)) as session:
+        session.mark_game_state_dirty()
+    monkeypatch.setattr(settings, "session_runtime_idle_ttl_seconds", 0)
+    await runtime.flush_sessions()
+    assert not session.is_dirty
+    assert evicted == [("w1", "s1")]
+    assert runtime.get_session_stats()["sessions"] == 0
+    assert runtime._session_locks == {}
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_or_stale_turn_is_dropped(runtime):
+    sm = _FakeStateManager()
+    with pytest.raises(ValueError):
+        async with runtime.session("w1", "s1", _factory(sm)) as session:
+            session.mark_game_state_dirty()
+            raise ValueError("boom")
+    assert not session.is_dirty
+    assert runtime.get_session_stats()["sessions"] == 0
+
+    async with runtime.session("w1", "s1", _factory(sm)) as session:
+        session.mark_stale()
+    assert runtime.get_session_stats()["sessions"] == 0
+    assert sm.get_calls == 2
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_capacity_evicts_least_recent(runtime, monkeypatch):
+    monkeypatch.setattr(settings, "session_runtime_cache_max", 2)
+    sm = _FakeStateManager()
+    for session_id in ["a", "b", "a", "c"]:
+        async with runtime.session("w1", session_id, _factory(sm, session_id)):
+            pass
+    assert [key[1] for key in runtime._sessions] == ["a", "c"]
+    assert runtime.get_session_stats()["capacity_evictions"] == 1
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_turns_on_same_session_are_serialized(runtime):
+    sm = _FakeStateManager()
+    order = []
+
+    async def turn(tag):
+        async with runtime.session("w1", "s1", _factory(sm)):
+            order.append(f"{tag}-start")
+            await asyncio.sleep(0.01)
+            order.append(f"{tag}-end")
+
+    await asyncio.gather(turn("x"), turn("y"))
+    assert order == ["x-start", "x-end", "y-start", "y-end"]
+    assert sm.get_calls == 1
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_evict_and_shutdown_flush(runtime):
+    sm = _FakeStateManager()
+    async with runtime.session("w1", "s1", _factory(sm, "s1")) as s1:
+        s1.mark_game_state_dirty()
+    async with runtime.session("w1", "s2", _factory(sm, "s2")) as s2:
+        s2.mark_game_state_dirty()
+
+    assert await runtime.evict_session("w1", "s1") is True
+    assert await runtime.evict_session("w1", "s1") is False
+    assert not s1.is_dirty and s2.is_dirty
+
+    await runtime.shutdown()
+    assert not s2.is_dirty
+    assert runtime.get_session_stats()["sessions"] == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_session_writes_without_evicting(runtime):
+    sm = _FakeStateManager()
+    async with runtime.session("w1", "s1", _factory(sm)) as session:
+        writes = sm.set_calls
+        session.mark_game_state_dirty()
+
+    assert await runtime.flush_session("w1", "s1") is True
+    assert sm.set_calls == writes + 1 and not session.is_dirty
+    assert await runtime.flush_session("w1", "s1") is False
+    assert await runtime.flush_session("w1", "missing") is False
+    async with runtime.session("w1", "s1", _factory(sm)) as again:
+        assert again is session
+    await runtime.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_restores_and_persists_every_turn(runtime, monkeypatch):
+    monkeypatch.setattr(settings, "session_runtime_cache_enabled", False)
+    sm = _FakeStateManager()
+    for _ in range(2):
+        async with runtime.session("w1", "s1", _factory(sm)) as session:
+            session.mark_game_state_dirty()
+        assert not session.is_dirty
+    assert sm.get_calls == 2
+    assert runtime.get_session_stats()["sessions"] == 0
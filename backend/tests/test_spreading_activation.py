@@ -87,6 +87,30 @@ def test_extract_subgraph_includes_activation():
     assert node.properties["activation"] == pytest.approx(1.0, rel=1e-3)
 
 
+def test_extract_subgraph_keeps_only_internal_edges():
+    graph = _build_linear_graph()
+    graph.add_node(MemoryNode(id="D", type="test", name="D", properties={"tag": "x"}))
+    graph.add_edge(MemoryEdge(id="edge_da", source="D", target="A", relation="link"))
+    graph.add_edge(MemoryEdge(id="edge_aa", source="A", target="A", relation="self"))
+
+    subgraph = extract_subgraph(graph, {"A": 0.9, "B": 0.5, "D": 0.3, "missing": 0.2})
+
+    expected = {
+        edge.id for edge in graph.list_edges()
+        if edge.source in {"A", "B", "D"} and edge.target in {"A", "B", "D"}
+    }
+    assert {edge.id for edge in subgraph.list_edges()} == expected == {"edge_ab", "edge_da", "edge_aa"}
+    assert sorted(node.id for node in subgraph.list_nodes()) == ["A", "B", "D"]
+    assert subgraph.find_nodes_by_type("test")
+
+    # Serialized output is detached from both graphs.
+    data = subgraph.to_graph_data()
+    data.nodes[0].properties["tag"] = "mutated"
+    assert "activation" not in graph.get_node("A").properties
+    assert graph.get_node("D").properties == {"tag": "x"}
+    assert subgraph.get_node(data.nodes[0].id).properties.get("tag") != "mutated"
+
+
 def test_find_paths_orders_by_weight():
     graph = MemoryGraph()
     for node_id in ["A", "B", "C"]:
@@ -0,0 +1,172 @@
+"""Tests for the SQLite graph store backend and the backend factory."""
+import pytest
+
+from app.config import settings
+from app.models.graph import GraphData, MemoryEdge, MemoryNode
+from app.models.graph_scope import GraphScope
+from app.services.graph_store_backend import GraphStoreBackend, create_graph_store
+from app.services.sqlite_graph_store import SQLiteGraphStore
+
+
+def _node(node_id, node_type="npc", name=None, **props):
+    return MemoryNode(id=node_id, type=node_type, name=name or node_id, properties=props)
+
+
+def _edge(edge_id, source, target, relation="knows"):
+    return MemoryEdge(id=edge_id, source=source, target=target, relation=relation)
+
+
+@pytest.fixture
+def store():
+    backend = SQLiteGraphStore(":memory:")
+    yield backend
+    backend.close()
+
+
+@pytest.mark.asyncio
+async def test_scope_round_trip_and_isolation(store):
+    area = GraphScope.area("ch1", "town")
+    graph = GraphData(
+        nodes=[_node("a"), _node("b")],
+        edges=[_edge("e1", "a", "b")],
+    )
+    await store.save_graph_v2("w1", area, graph)
+
+    loaded = await store.load_graph_v2("w1", area)
+    assert [n.id for n in loaded.nodes] == ["a", "b"]
+    assert [e.id for e in loaded.edges] == ["e1"]
+    assert (await store.load_graph_v2("w1", GraphScope.world())).nodes == []
+    assert (await store.load_graph_v2("w2", area)).nodes == []
+
+
+@pytest.mark.asyncio
+async def test_merge_semantics_and_placeholder_backfill(store):
+    scope = GraphScope.world()
+    await store.upsert_node_v2("w1", scope, _node("a", mood="calm", nested={"x": 1}))
+    await store.upsert_node_v2("w1", scope, _node("a", nested={"y": 2}))
+    node = (await store.get_nodes_by_ids_v2("w1", scope, ["a"]))[0]
+    assert node.properties == {"mood": "calm", "nested": {"x": 1, "y": 2}}
+
+    await store.upsert_node_v2("w1", scope, _node("p", placeholder=True, stale="yes"))
+    await store.upsert_node_v2("w1", scope, _node("p", real="data"))
+    node = (await store.get_nodes_by_ids_v2("w1", scope, ["p"]))[0]
+    assert node.properties == {"real": "data"}
+
+    await store.upsert_node_v2("w1", scope, _node("a", only="this"), merge=False)
+    node = (await store.get_nodes_by_ids_v2("w1", scope, ["a"]))[0]
+    assert node.properties == {"only": "this"}
+
+
+@pytest.mark.asyncio
+async def test_local_subgraph_directions(store):
+    scope = GraphScope.world()
+    graph = GraphData(
+        nodes=[_node(n) for n in "abcd"],
+        edges=[_edge("ab", "a", "b"), _edge("bc", "b", "c"), _edge("db", "d", "b")],
+    )
+    await store.save_graph_v2("w1", scope, graph)
+
+    out1 = await store.load_local_subgraph_v2("w1", scope, ["a"], depth=1, direction="out")
+    assert sorted(n.id for n in out1.nodes) == ["a", "b"]
+
+    out2 = await store.load_local_subgraph_v2("w1", scope, ["a"], depth=2, direction="out")
+    assert sorted(n.id for n in out2.nodes) == ["a", "b", "c"]
+
+    both = await store.load_local_subgraph_v2("w1", scope, ["b"], depth=1)
+    assert sorted(n.id for n in both.nodes) == ["a", "b", "c", "d"]
+    assert sorted(e.id for e in both.edges) == ["ab", "bc", "db"]
+
+    with pytest.raises(ValueError):
+        await store.load_local_subgraph_v2("w1", scope, ["a"], direction="sideways")
+
+
+@pytest.mark.asyncio
+async def test_disposition_clamps_and_keeps_history(store):
+    await store.update_disposition("w1", "npc", "player", {"approval": 150, "fear": -5}, reason="saved", game_day=1)
+    data = await store.update_disposition("w1", "npc", "player", {"trust": 10}, game_day=2)
+
+    assert (data["approval"], data["fear"], data["trust"]) == (100, 0, 10)
+    assert [h["day"] for h in data["history"]] == [1, 2]
+    assert (await store.get_disposition("w1", "npc", "player"))["approval"] == 100
+    assert list(await store.get_all_dispositions("w1", "npc")) == ["player"]
+
+
+@pytest.mark.asyncio
+async def test_choices_resolve_and_character_graph(store):
+    await store.record_choice(
+        "w1", "c1", "spared the goblin", chapter_id="ch1",
+        consequences=[{"text": "a"}, {"text": "b"}], character_id="hero",
+    )
+    await store.record_choice("w1", "c2", "other", chapter_id="ch2", consequences=[{"text": "c"}])
+
+    assert [c["choice_id"] for c in await store.get_unresolved_consequences("w1")] == ["c1", "c2"]
+    assert [c["choice_id"] for c in await store.get_unresolved_consequences("w1", "ch1")] == ["c1"]
+
+    await store.resolve_consequence("w1", "c1", 0, resolution="done")
+    assert (await store.get_choice("w1", "c1"))["resolved"] is False
+    await store.resolve_consequence("w1", "c1", 1)
+    assert (await store.get_choice("w1", "c1"))["resolved"] is True
+    assert [c["choice_id"] for c in await store.get_unresolved_consequences("w1")] == ["c2"]
+
+    nodes = await store.get_nodes_by_ids_v2("w1", GraphScope.character("hero"), ["choice_c1"])
+    assert nodes[0].properties["resolved"] is True
+
+
+@pytest.mark.asyncio
+async def test_index_queries_follow_writes(store):
+    await store.save_graph(
+        "w1", "gm",
+        GraphData(nodes=[
+            _node("n1", "npc", name="Goblin/King"),
+            _node("e1", "event", name="Raid", day=3),
+            _node("e2", "event", name="Feast", game_day=4),
+        ]),
+    )
+
+    assert [r["node_id"] for r in await store.query_index_by_type("w1", "gm", "event")] == ["e1", "e2"]
+    assert await store.query_index_by_name("w1", "gm", "goblin/king") == [
+        {"node_id": "n1", "name": "Goblin/King", "type": "npc"}
+    ]
+    day = await store.query_index_by_day("w1", "gm", "3")
+    assert day == [{"node_id": "e1", "name": "Raid", "type": "event", "day": 3}]
+    assert await store.rebuild_indexes("w1", "gm") == 3
+
+    await store.clear_graph("w1", "gm")
+    assert await store.query_index_by_type("w1", "gm", "event") == []
+
+
+
+@pytest.mark.asyncio
+async def test_bulk_writes_report_progress(store):
+    calls = []
+    graph = GraphData(nodes=[_node("a"), _node("b")], edges=[_edge("e1", "a", "b")])
+
+    await store.save_graph_v2("w1", GraphScope.world(), graph, progress=lambda *args: calls.append(args))
+    await store.save_graph("w1", "gm", graph, progress=lambda *args: calls.append(args))
+    assert await store.rebuild_indexes("w1", "gm", progress=lambda *args: calls.append(args)) == 2
+    assert calls == [(3, 3), (3, 3), (2, 2)]
+
+@pytest.mark.asyncio
+async def test_character_documents_persist_to_file(tmp_path):
+    path = str(tmp_path / "graph.sqlite3")
+    first = SQLiteGraphStore(path)
+    await first.update_character_state("w1", "hero", {"hp": 10})
+    await first.set_character_profile("w1", "hero", {"name": "Hero"})
+    first.close()
+
+    second = SQLiteGraphStore(path)
+    assert await second.get_character_state("w1", "hero") == {"hp": 10}
+    assert await second.get_character_profile("w1", "hero") == {"name": "Hero"}
+    second.close()
+
+
+def test_factory_selects_backend(monkeypatch):
+    monkeypatch.setattr(settings, "graph_store_backend", "sqlite")
+    backend = create_graph_store(path=":memory:")
+    assert isinstance(backend, SQLiteGraphStore)
+    assert isinstance(backend, GraphStoreBackend)
+    backend.close()
+
+    monkeypatch.setattr(settings, "graph_store_backend", "lmdb")
+    with pytest.raises(ValueError):
+        create_graph_store()
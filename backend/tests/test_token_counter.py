@@ -0,0 +1,81 @@
+"""Tests for the shared token counter."""
+from types import SimpleNamespace
+
+from app.services import token_counter
+from app.services.context_window import ContextWindow
+from app.services.token_counter import (
+    count_tokens,
+    count_tokens_batch,
+    estimate_tokens,
+    get_encoder,
+    get_token_counter_stats,
+    reset_token_counter_stats,
+)
+
+
+def test_encoder_is_shared():
+    assert get_encoder() is get_encoder()
+
+
+def test_encoder_load_is_retried_after_failure(monkeypatch):
+    encoding = object()
+    calls = []
+
+    def _get_encoding(name):
+        calls.append(name)
+        if len(calls) == 1:
+            raise OSError("BPE download failed")
+        return encoding
+
+    monkeypatch.setattr(token_counter, "_TIKTOKEN_AVAILABLE", True)
+    monkeypatch.setattr(token_counter, "tiktoken", SimpleNamespace(get_encoding=_get_encoding), raising=False)
+    monkeypatch.setattr(token_counter, "_encoder", None)
+    monkeypatch.setattr(token_counter, "_encoder_retry_at", 0.0)
+
+    assert get_encoder() is None
+    assert get_encoder() is None  # rate-limited, no second attempt yet
+    assert len(calls) == 1
+
+    monkeypatch.setattr(token_counter, "_encoder_retry_at", 0.0)
+    assert get_encoder() is encoding
+    assert get_encoder() is encoding
+    assert len(calls) == 2
+
+
+def test_batch_matches_single_counts():
+    texts = ["你好，冒险者。", "", "The goblin slayer enters the guild.", "混合 text 文本"]
+    assert count_tokens_batch(texts) == [count_tokens(text) for text in texts]
+    assert count_tokens_batch([]) == []
+
+
+def test_estimate_tokens_chinese_heavy():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("哥布林" * 10) == 30 // 2 + 1
+    assert estimate_tokens("abcdefgh") == 8 // 4 + 1
+
+
+def test_stats_accumulate_per_mode():
+    reset_token_counter_stats()
+    count_tokens("hello")
+    count_tokens_batch(["a", "b"])
+    modes = get_token_counter_stats()["modes"]
+    assert sum(row["texts"] for row in modes.values()) == 3
+    assert sum(row["calls"] for row in modes.values()) == 2
+
+
+def test_add_messages_matches_add_message():
+    single = ContextWindow(npc_id="n", world_id="w")
+    bulk = ContextWindow(npc_id="n", world_id="w")
+    records = [
+        {"role": "user", "content": "我走进酒馆"},
+        {"role": "assistant", "content": "酒馆里热闹非凡。", "metadata": {"speaker": "gm"}},
+        {"role": "user", "content": ""},
+    ]
+    for record in records:
+        if record["content"]:
+            single.add_message(record["role"], record["content"], metadata=record.get("metadata"))
+
+    assert bulk.add_messages(records) == 2
+    assert bulk.current_tokens == single.current_tokens
+    assert [m.token_count for m in bulk.get_all_messages()] == [m.token_count for m in single.get_all_messages()]
+    assert bulk.get_all_messages()[1].metadata == {"speaker": "gm"}
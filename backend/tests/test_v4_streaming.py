@@ -0,0 +1,122 @@
+"""Tests for V4 token streaming (FlashCPU agentic stream + SSE event mapping)."""
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.admin_protocol import CoordinatorResponse
+from app.services.admin.admin_coordinator import AdminCoordinator
+from app.services.admin.flash_cpu_service import FlashCPUService
+from app.services.llm_service import LLMResponse
+
+
+class _FakeSession:
+    world_id = "final-world"
+    session_id = "s1"
+    current_area = None
+
+    async def leave_sublocation(self):
+        return {"success": True}
+
+
+class _StreamingLLM:
+    """Emits a thought, runs a tool mid-stream (like the SDK's AFC loop), then answer text."""
+
+    async def agentic_generate_stream(self, **request):
+        tools = {tool.__name__: tool for tool in request["tools"]}
+        yield {"type": "thought", "text": "先离开子地点"}
+        await tools["leave_sublocation"]()
+        yield {"type": "answer", "text": "你走出酒馆，"}
+        yield {"type": "answer", "text": "夜风扑面。"}
+        yield {"type": "done", "response": LLMResponse(text="你走出酒馆，夜风扑面。")}
+
+
+def _flash_cpu(llm_service) -> FlashCPUService:
+    service = FlashCPUService.__new__(FlashCPUService)
+    service.llm_service = llm_service
+    service.image_service = object()
+    service.agentic_prompt_path = Path("/nonexistent/agentic_prompt.md")
+    return service
+
+
+@pytest.mark.asyncio
+async def test_agentic_stream_surfaces_deltas_and_tool_progress():
+    service = _flash_cpu(_StreamingLLM())
+    events = [
+        event
+        async for event in service.agentic_process_v4_stream(
+            session=_FakeSession(),
+            player_input="离开",
+            context={},
+            graph_store=None,
+        )
+    ]
+
+    types = [event["type"] for event in events]
+    assert types == ["thought", "tool_start", "tool_end", "answer", "answer", "agentic_result"]
+    assert events[1]["name"] == "leave_sublocation"
+    assert events[2]["success"] is True
+
+    result = events[-1]["result"]
+    assert result.narration == "你走出酒馆，夜风扑面。"
+    assert [call.name for call in result.tool_calls] == ["leave_sublocation"]
+
+
+@pytest.mark.asyncio
+async def test_agentic_stream_propagates_model_errors():
+    class _FailingLLM:
+        async def agentic_generate_stream(self, **request):
+            yield {"type": "answer", "text": "半句"}
+            raise RuntimeError("stream broke")
+
+    service = _flash_cpu(_FailingLLM())
+    received = []
+    with pytest.raises(RuntimeError, match="stream broke"):
+        async for event in service.agentic_process_v4_stream(
+            session=_FakeSession(), player_input="x", context={}, graph_store=None,
+        ):
+            received.append(event["type"])
+    assert received == ["answer"]
+
+
+@pytest.mark.asyncio
+async def test_v4_sse_maps_pipeline_events_incrementally():
+    response = CoordinatorResponse(
+        narration="你走出酒馆，夜风扑面。",
+        speaker="GM",
+        teammate_responses=[{"character_id": "t1", "name": "T", "response": "走吧", "reaction": ""}],
+        metadata={"source": "v4_pipeline"},
+    )
+
+    async def process_stream(**kwargs):
+        yield {"type": "tool_start", "name": "leave_sublocation", "args": {}}
+        yield {"type": "tool_end", "name": "leave_sublocation", "success": True, "duration_ms": 3, "error": None}
+        yield {"type": "thought", "text": "想"}
+        yield {"type": "answer", "text": "你走出酒馆，"}
+        yield {"type": "answer", "text": "夜风扑面。"}
+        yield {"type": "narration_complete", "narration": response.narration}
+        yield {"type": "teammate_start", "character_id": "t1", "name": "T"}
+        yield {"type": "teammate_chunk", "character_id": "t1", "text": "走吧"}
+        yield {"type": "teammate_end", "character_id": "t1", "name": "T", "response": "走吧", "reaction": ""}
+        yield {"type": "response", "response": response}
+
+    coordinator = AdminCoordinator.__new__(AdminCoordinator)
+    coordinator._pipeline_orchestrator = SimpleNamespace(process_stream=process_stream)
+
+    events = [
+        event
+        async for event in AdminCoordinator.process_player_input_v3_stream(
+            coordinator, world_id="final-world", session_id="s1", player_input="离开",
+        )
+    ]
+    types = [event["type"] for event in events]
+    assert types == [
+        "phase", "phase", "phase",
+        "gm_start", "gm_chunk", "gm_chunk", "gm_chunk", "gm_end",
+        "teammate_start", "teammate_chunk", "teammate_end",
+        "complete",
+    ]
+    assert [e.get("phase") for e in events[:3]] == ["generating", "tool_running", "tool_done"]
+    assert [e["chunk_type"] for e in events if e["type"] == "gm_chunk"] == ["thought", "answer", "answer"]
+    assert events[7]["full_text"] == response.narration
+    assert events[-1]["teammate_responses"][0]["response"] == "走吧"
@@ -0,0 +1,126 @@
+"""Tests for WorldInstance secondary indexes (area/sublocation/danger/class lookups)."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.runtime.models.area_state import AreaDefinition, SubLocationDef
+from app.runtime.world_instance import WorldInstance
+
+
+def _world() -> WorldInstance:
+    world = WorldInstance("w1")
+    world.character_registry = {
+        "guard": {"id": "guard", "profile": {"metadata": {"default_map": "town"}}},
+        "hermit": {"id": "hermit", "state": {"current_map": "forest"}},
+        "merchant": {"id": "merchant", "profile": {"metadata": {"default_map": "town"}}, "state": {"current_map": "town"}},
+        "priestess": {"id": "priestess", "profile": {"metadata": {"default_map": "guild"}}},
+    }
+    world.area_registry = {
+        "town": AreaDefinition(area_id="town", sub_locations=[
+            SubLocationDef(id="gate", name="城门", resident_npcs=["priestess", "guard", "ghost"]),
+            SubLocationDef(id="well", name="水井"),
+        ]),
+    }
+    world.monster_registry = {
+        "dragon": {"id": "dragon", "challenge_rating": "黄金"},
+        "goblin": {"id": "goblin", "challenge_rating": "白瓷"},
+        "ogre": {"id": "ogre", "challenge_rating": " Steel "},
+        "slime": {"id": "slime", "challenge_rating": "unknown"},
+    }
+    world.skill_registry = {
+        "heal": {"id": "heal", "source": "Priest"},
+        "slash": {"id": "slash", "class": "warrior"},
+        "bless": {"id": "bless", "classes": ["priest", "Paladin"]},
+        "generic": {"id": "generic"},
+    }
+    return world
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+def test_queries_match_registry_order():
+    world = _world()
+
+    assert _ids(world.get_characters_in_area("town")) == ["guard", "merchant"]
+    assert _ids(world.get_characters_in_area("forest")) == ["hermit"]
+    assert world.get_characters_in_area("nowhere") == []
+
+    assert _ids(world.get_characters_at_sublocation("town", "gate")) == ["guard", "priestess"]
+    assert world.get_characters_at_sublocation("town", "well") == []
+    assert world.get_characters_at_sublocation("cave", "gate") == []
+
+    assert world.get_monsters_for_danger(0) == []
+    assert _ids(world.get_monsters_for_danger(1)) == ["goblin"]
+    assert _ids(world.get_monsters_for_danger(2)) == ["goblin", "ogre"]
+    assert _ids(world.get_monsters_for_danger(9)) == ["dragon", "goblin", "ogre"]
+
+    assert _ids(world.get_skills_for_classes(["PRIEST"])) == ["heal", "bless"]
+    assert _ids(world.get_skills_for_classes(["paladin", "warrior"])) == ["slash", "bless"]
+    assert _ids(world.get_skills_for_classes([])) == ["heal", "slash", "bless", "generic"]
+
+
+def test_results_are_copies():
+    world = _world()
+    world.get_characters_in_area("town").clear()
+    assert len(world.get_characters_in_area("town")) == 2
+
+
+def test_current_map_update_reindexes_incrementally():
+    world = _world()
+    town_npcs = world.get_area_npcs_context("town")
+    forest_npcs = world.get_area_npcs_context("forest")
+
+    world.update_character_state("priestess", {"current_map": "town"})
+    assert _ids(world.get_characters_in_area("town")) == ["guard", "merchant", "priestess"]
+    assert _ids(world.get_characters_in_area("guild")) == ["priestess"]  # default_map still applies
+    assert world.get_area_npcs_context("town") is not town_npcs
+    assert world.get_area_npcs_context("forest") is forest_npcs
+
+    world.update_character_state("hermit", {"current_map": "town", "mood": "calm"})
+    assert _ids(world.get_characters_in_area("town")) == ["guard", "hermit", "merchant", "priestess"]
+    assert world.get_characters_in_area("forest") == []
+    assert world.character_registry["hermit"]["state"] == {"current_map": "town", "mood": "calm"}
+
+    # merchant stays in town through default_map
+    world.update_character_state("merchant", {"current_map": "forest"})
+    assert "merchant" in _ids(world.get_characters_in_area("town"))
+    assert _ids(world.get_characters_in_area("forest")) == ["merchant"]
+
+    world.update_character_state("missing", {"current_map": "town"})
+    assert len(world.get_characters_in_area("town")) == 4
+
+
+def test_any_state_update_invalidates_area_npcs_context():
+    world = _world()
+    town_npcs = world.get_area_npcs_context("town")
+    forest_npcs = world.get_area_npcs_context("forest")
+
+    world.update_character_state("merchant", {"mood": "angry"})
+    refreshed = world.get_area_npcs_context("town")
+    assert refreshed is not town_npcs
+    assert refreshed[1]["state"]["mood"] == "angry"
+    assert world.get_area_npcs_context("forest") is forest_npcs
+
+
+@pytest.mark.asyncio
+async def test_ingested_state_updates_reach_cached_world_only():
+    from app.models.flash import EventIngestRequest
+    from app.runtime.game_runtime import GameRuntime
+    from app.services.flash_service import FlashService
+
+    service = FlashService(graph_store=AsyncMock(), reference_resolver=MagicMock())
+    request = EventIngestRequest(state_updates={"current_map": "forest"})
+    GameRuntime.reset_instance()
+    try:
+        await service.ingest_event("w1", "merchant", request)
+        assert GameRuntime.peek_instance() is None
+
+        runtime = await GameRuntime.get_instance()
+        world = _world()
+        runtime._worlds["w1"] = world
+        await service.ingest_event("w1", "merchant", request)
+        assert "merchant" in _ids(world.get_characters_in_area("forest"))
+    finally:
+        GameRuntime.reset_instance()
@@ -0,0 +1,154 @@
+"""Tests for WorldInstance local snapshots (fast cold start + background refresh)."""
+import types
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import settings
+from app.runtime import world_instance as world_module
+from app.runtime.models.area_state import AreaDefinition, SubLocationDef
+from app.runtime.models.world_constants import WorldConstants
+from app.runtime.world_instance import WorldInstance
+from app.runtime.world_snapshot import read_snapshot, snapshot_path, write_snapshot
+
+
+class _FakeRef:
+    def __init__(self, meta):
+        self._meta = meta
+
+    def collection(self, name):
+        return self
+
+    def document(self, name):
+        return self
+
+    def get(self):
+        return types.SimpleNamespace(exists=True, to_dict=lambda: dict(self._meta), update_time=None)
+
+
+@pytest.fixture
+def fake_world(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "world_snapshot_enabled", True)
+    monkeypatch.setattr(settings, "world_snapshot_dir", str(tmp_path))
+    meta = {"data_version": "v1", "guard_map": "town", "complete": True}
+    loads = []
+
+    async def _load_characters(self, world_ref):
+        self.character_registry = {
+            "guard": {"id": "guard", "profile": {"metadata": {"default_map": "town"}},
+                      "state": {"current_map": meta["guard_map"]},
+                      "created_at": datetime(2025, 1, 2, tzinfo=timezone.utc)},
+        }
+
+    async def _load(self):
+        loads.append(meta["data_version"])
+        if not meta["complete"]:
+            return False
+        self.data_version = meta["data_version"]
+        self.world_constants = WorldConstants(world_id=self.world_id, name="边境")
+        self.area_registry = {
+            "town": AreaDefinition(area_id="town", sub_locations=[
+                SubLocationDef(id="gate", name="城门", resident_npcs=["guard"]),
+            ]),
+        }
+        await self._load_characters(None)
+        self.monster_registry = {"goblin": {"id": "goblin", "challenge_rating": "白瓷"}}
+        self.chapter_registry = {"ch1": {"id": "ch1", "name": f"第一章 {meta['data_version']}"}}
+        return True
+
+    monkeypatch.setattr(WorldInstance, "_load_characters", _load_characters)
+    monkeypatch.setattr(WorldInstance, "_load_from_firestore", _load)
+    monkeypatch.setattr(world_module.firestore, "Client", lambda **kwargs: _FakeRef(meta))
+    return meta, loads
+
+
+@pytest.mark.asyncio
+async def test_cold_start_restores_snapshot_and_skips_reload_when_current(fake_world):
+    meta, loads = fake_world
+    first = WorldInstance("w1")
+    await first.initialize()
+    await first.close()
+    assert first.source == "firestore"
+
+    second = WorldInstance("w1")
+    await second.initialize()
+    assert second.source == "snapshot"
+    assert second.world_constants.name == "边境"
+    assert second.get_area_definition("town").sub_locations[0].resident_npcs == ["guard"]
+    assert [c["id"] for c in second.get_characters_at_sublocation("town", "gate")] == ["guard"]
+    assert [m["id"] for m in second.get_monsters_for_danger(1)] == ["goblin"]
+    assert second.character_registry["guard"]["created_at"] == "2025-01-02T00:00:00+00:00"
+
+    await second.close()
+    assert loads == ["v1"]
+    assert second.source == "snapshot"
+
+
+@pytest.mark.asyncio
+async def test_character_state_is_refreshed_even_when_version_matches(fake_world):
+    meta, loads = fake_world
+    first = WorldInstance("w1")
+    await first.initialize()
+    await first.close()
+
+    # 运行时写入角色 state 不会改变 data_version
+    meta["guard_map"] = "market"
+    second = WorldInstance("w1")
+    await second.initialize()
+    assert second.get_area_npcs_context("market") == []
+    await second._refresh_task
+
+    assert loads == ["v1"]
+    assert second.character_registry["guard"]["state"]["current_map"] == "market"
+    assert [c["id"] for c in second.get_area_npcs_context("market")] == ["guard"]
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_incomplete_reload_keeps_snapshot(fake_world):
+    meta, loads = fake_world
+    first = WorldInstance("w1")
+    await first.initialize()
+    await first.close()
+
+    meta.update(data_version="v2", complete=False)
+    second = WorldInstance("w1")
+    await second.initialize()
+    await second._refresh_task
+
+    assert loads == ["v1", "v2"]
+    assert second.source == "snapshot"
+    assert second.chapter_registry["ch1"]["name"] == "第一章 v1"
+    assert [m["id"] for m in second.get_monsters_for_danger(1)] == ["goblin"]
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_refreshed_in_background(fake_world):
+    meta, loads = fake_world
+    first = WorldInstance("w1")
+    await first.initialize()
+    await first.close()
+
+    meta["data_version"] = "v2"
+    second = WorldInstance("w1")
+    await second.initialize()
+    assert second.chapter_registry["ch1"]["name"] == "第一章 v1"
+    version = second.version
+    await second._refresh_task
+
+    assert loads == ["v1", "v2"]
+    assert second.source == "firestore"
+    assert second.version == version + 1
+    assert second.chapter_registry["ch1"]["name"] == "第一章 v2"
+    await second.close()
+    assert read_snapshot("w1")["data_version"] == "v2"
+
+
+def test_incompatible_or_corrupt_snapshot_is_ignored(tmp_path):
+    write_snapshot("w1", "v1", {"chapter_registry": {}}, directory=str(tmp_path))
+    assert read_snapshot("w1", directory=str(tmp_path))["data_version"] == "v1"
+    assert read_snapshot("w2", directory=str(tmp_path)) is None
+
+    snapshot_path("w1", directory=str(tmp_path)).write_bytes(b"\x00garbage")
+    assert read_snapshot("w1", directory=str(tmp_path)) is None